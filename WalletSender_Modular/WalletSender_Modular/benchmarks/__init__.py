@@ -0,0 +1 @@
+"""Бенчмарки конвейера отправки (python -m benchmarks.send_pipeline)"""
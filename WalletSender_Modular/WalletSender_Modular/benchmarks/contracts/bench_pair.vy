@@ -0,0 +1,89 @@
+# pragma version ~=0.4.0
+"""
+@title BenchPair
+@notice Пара x*y=k в стиле PancakeSwap V2 (комиссия 0.25%). Ликвидность
+        вносится переводом токенов на пару и вызовом sync.
+"""
+
+interface Token:
+    def transfer(receiver: address, amount: uint256) -> bool: nonpayable
+    def balanceOf(owner: address) -> uint256: view
+
+event Sync:
+    reserve0: uint112
+    reserve1: uint112
+
+event Swap:
+    sender: indexed(address)
+    amount0In: uint256
+    amount1In: uint256
+    amount0Out: uint256
+    amount1Out: uint256
+    to: indexed(address)
+
+token0: public(immutable(address))
+token1: public(immutable(address))
+
+reserve0: uint256
+reserve1: uint256
+blockTimestampLast: uint256
+
+
+@deploy
+def __init__(token_a: address, token_b: address):
+    lower: address = token_a
+    upper: address = token_b
+    if convert(token_b, uint160) < convert(token_a, uint160):
+        lower = token_b
+        upper = token_a
+    token0 = lower
+    token1 = upper
+
+
+@external
+@view
+def getReserves() -> (uint112, uint112, uint32):
+    return convert(self.reserve0, uint112), convert(self.reserve1, uint112), convert(self.blockTimestampLast, uint32)
+
+
+@external
+@nonreentrant
+def sync():
+    self._update(staticcall Token(token0).balanceOf(self), staticcall Token(token1).balanceOf(self))
+
+
+@external
+@nonreentrant
+def swap(amount0_out: uint256, amount1_out: uint256, to: address, data: Bytes[256]):
+    assert amount0_out > 0 or amount1_out > 0, "OUTPUT"
+    assert amount0_out < self.reserve0 and amount1_out < self.reserve1, "LIQUIDITY"
+    if amount0_out > 0:
+        extcall Token(token0).transfer(to, amount0_out)
+    if amount1_out > 0:
+        extcall Token(token1).transfer(to, amount1_out)
+
+    balance0: uint256 = staticcall Token(token0).balanceOf(self)
+    balance1: uint256 = staticcall Token(token1).balanceOf(self)
+    amount0_in: uint256 = 0
+    amount1_in: uint256 = 0
+    if balance0 > self.reserve0 - amount0_out:
+        amount0_in = balance0 - (self.reserve0 - amount0_out)
+    if balance1 > self.reserve1 - amount1_out:
+        amount1_in = balance1 - (self.reserve1 - amount1_out)
+    assert amount0_in > 0 or amount1_in > 0, "INPUT"
+    adjusted0: uint256 = balance0 * 10000 - amount0_in * 25
+    adjusted1: uint256 = balance1 * 10000 - amount1_in * 25
+    assert adjusted0 * adjusted1 >= self.reserve0 * self.reserve1 * 10 ** 8, "K"
+
+    self._update(balance0, balance1)
+    log Swap(sender=msg.sender, amount0In=amount0_in, amount1In=amount1_in,
+             amount0Out=amount0_out, amount1Out=amount1_out, to=to)
+
+
+@internal
+def _update(balance0: uint256, balance1: uint256):
+    assert balance0 <= convert(max_value(uint112), uint256) and balance1 <= convert(max_value(uint112), uint256), "OVERFLOW"
+    self.reserve0 = balance0
+    self.reserve1 = balance1
+    self.blockTimestampLast = block.timestamp % 2 ** 32
+    log Sync(reserve0=convert(balance0, uint112), reserve1=convert(balance1, uint112))
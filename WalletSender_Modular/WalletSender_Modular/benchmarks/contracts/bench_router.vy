@@ -0,0 +1,148 @@
+# pragma version ~=0.4.0
+"""
+@title BenchRouter
+@notice Роутер в стиле PancakeSwap V2 с методами, которые вызывает
+        DexSwapService: getAmountsOut, swapExactETHForTokens,
+        swapExactTokensForETH, swapExactTokensForTokens. Пары регистрирует
+        развернувший роутер (вместо фабрики и CREATE2).
+"""
+
+interface Token:
+    def transfer(receiver: address, amount: uint256) -> bool: nonpayable
+    def transferFrom(owner: address, receiver: address, amount: uint256) -> bool: nonpayable
+    def deposit(): payable
+    def withdraw(amount: uint256): nonpayable
+
+interface Pair:
+    def swap(amount0_out: uint256, amount1_out: uint256, to: address, data: Bytes[256]): nonpayable
+    def getReserves() -> (uint112, uint112, uint32): view
+    def token0() -> address: view
+    def token1() -> address: view
+
+MAX_HOPS: constant(uint256) = 4
+
+WETH: public(immutable(address))
+admin: immutable(address)
+getPair: public(HashMap[address, HashMap[address, address]])
+
+
+@deploy
+def __init__(weth: address):
+    WETH = weth
+    admin = msg.sender
+
+
+@external
+@payable
+def __default__():
+    assert msg.sender == WETH, "WETH"
+
+
+@external
+def registerPair(pair: address):
+    assert msg.sender == admin, "ADMIN"
+    token0: address = staticcall Pair(pair).token0()
+    token1: address = staticcall Pair(pair).token1()
+    self.getPair[token0][token1] = pair
+    self.getPair[token1][token0] = pair
+
+
+@external
+@pure
+def getAmountOut(amount_in: uint256, reserve_in: uint256, reserve_out: uint256) -> uint256:
+    return self._amount_out(amount_in, reserve_in, reserve_out)
+
+
+@external
+@view
+def getAmountsOut(amount_in: uint256, path: DynArray[address, MAX_HOPS]) -> DynArray[uint256, MAX_HOPS]:
+    return self._amounts_out(amount_in, path)
+
+
+@external
+def swapExactTokensForTokens(amount_in: uint256, amount_out_min: uint256, path: DynArray[address, MAX_HOPS],
+                             to: address, deadline: uint256) -> DynArray[uint256, MAX_HOPS]:
+    assert deadline >= block.timestamp, "EXPIRED"
+    amounts: DynArray[uint256, MAX_HOPS] = self._amounts_out(amount_in, path)
+    assert amounts[len(amounts) - 1] >= amount_out_min, "INSUFFICIENT_OUTPUT_AMOUNT"
+    extcall Token(path[0]).transferFrom(msg.sender, self._pair(path[0], path[1]), amounts[0])
+    self._swap(amounts, path, to)
+    return amounts
+
+
+@external
+@payable
+def swapExactETHForTokens(amount_out_min: uint256, path: DynArray[address, MAX_HOPS],
+                          to: address, deadline: uint256) -> DynArray[uint256, MAX_HOPS]:
+    assert deadline >= block.timestamp, "EXPIRED"
+    assert path[0] == WETH, "INVALID_PATH"
+    amounts: DynArray[uint256, MAX_HOPS] = self._amounts_out(msg.value, path)
+    assert amounts[len(amounts) - 1] >= amount_out_min, "INSUFFICIENT_OUTPUT_AMOUNT"
+    extcall Token(WETH).deposit(value=msg.value)
+    extcall Token(WETH).transfer(self._pair(path[0], path[1]), msg.value)
+    self._swap(amounts, path, to)
+    return amounts
+
+
+@external
+def swapExactTokensForETH(amount_in: uint256, amount_out_min: uint256, path: DynArray[address, MAX_HOPS],
+                          to: address, deadline: uint256) -> DynArray[uint256, MAX_HOPS]:
+    assert deadline >= block.timestamp, "EXPIRED"
+    assert path[len(path) - 1] == WETH, "INVALID_PATH"
+    amounts: DynArray[uint256, MAX_HOPS] = self._amounts_out(amount_in, path)
+    amount_out: uint256 = amounts[len(amounts) - 1]
+    assert amount_out >= amount_out_min, "INSUFFICIENT_OUTPUT_AMOUNT"
+    extcall Token(path[0]).transferFrom(msg.sender, self._pair(path[0], path[1]), amounts[0])
+    self._swap(amounts, path, self)
+    extcall Token(WETH).withdraw(amount_out)
+    raw_call(to, b"", value=amount_out)
+    return amounts
+
+
+@internal
+@pure
+def _amount_out(amount_in: uint256, reserve_in: uint256, reserve_out: uint256) -> uint256:
+    assert amount_in > 0, "INSUFFICIENT_INPUT_AMOUNT"
+    assert reserve_in > 0 and reserve_out > 0, "INSUFFICIENT_LIQUIDITY"
+    amount_in_with_fee: uint256 = amount_in * 9975
+    return amount_in_with_fee * reserve_out // (reserve_in * 10000 + amount_in_with_fee)
+
+
+@internal
+@view
+def _pair(token_a: address, token_b: address) -> address:
+    pair: address = self.getPair[token_a][token_b]
+    assert pair != empty(address), "NO_PAIR"
+    return pair
+
+
+@internal
+@view
+def _amounts_out(amount_in: uint256, path: DynArray[address, MAX_HOPS]) -> DynArray[uint256, MAX_HOPS]:
+    assert len(path) >= 2, "INVALID_PATH"
+    amounts: DynArray[uint256, MAX_HOPS] = [amount_in]
+    for i: uint256 in range(len(path) - 1, bound=MAX_HOPS):
+        pair: address = self._pair(path[i], path[i + 1])
+        reserve0: uint112 = 0
+        reserve1: uint112 = 0
+        ts: uint32 = 0
+        reserve0, reserve1, ts = staticcall Pair(pair).getReserves()
+        if path[i] == staticcall Pair(pair).token0():
+            amounts.append(self._amount_out(amounts[i], convert(reserve0, uint256), convert(reserve1, uint256)))
+        else:
+            amounts.append(self._amount_out(amounts[i], convert(reserve1, uint256), convert(reserve0, uint256)))
+    return amounts
+
+
+@internal
+def _swap(amounts: DynArray[uint256, MAX_HOPS], path: DynArray[address, MAX_HOPS], to: address):
+    for i: uint256 in range(len(path) - 1, bound=MAX_HOPS):
+        pair: address = self._pair(path[i], path[i + 1])
+        amount_out: uint256 = amounts[i + 1]
+        recipient: address = to
+        if i < len(path) - 2:
+            recipient = self._pair(path[i + 1], path[i + 2])
+        if path[i] == staticcall Pair(pair).token0():
+            extcall Pair(pair).swap(0, amount_out, recipient, b"")
+        else:
+            extcall Pair(pair).swap(amount_out, 0, recipient, b"")
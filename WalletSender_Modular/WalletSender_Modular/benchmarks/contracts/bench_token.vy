@@ -0,0 +1,81 @@
+# pragma version ~=0.4.0
+"""
+@title BenchToken
+@notice ERC20 для бенчмарков на локальной цепи. deposit/withdraw позволяют
+        использовать тот же контракт как WBNB (развертывается с supply=0).
+"""
+
+event Transfer:
+    sender: indexed(address)
+    receiver: indexed(address)
+    value: uint256
+
+event Approval:
+    owner: indexed(address)
+    spender: indexed(address)
+    value: uint256
+
+name: public(String[32])
+symbol: public(String[16])
+decimals: public(uint8)
+totalSupply: public(uint256)
+balanceOf: public(HashMap[address, uint256])
+allowance: public(HashMap[address, HashMap[address, uint256]])
+
+
+@deploy
+def __init__(name_: String[32], symbol_: String[16], decimals_: uint8, supply: uint256):
+    self.name = name_
+    self.symbol = symbol_
+    self.decimals = decimals_
+    self.totalSupply = supply
+    self.balanceOf[msg.sender] = supply
+    log Transfer(sender=empty(address), receiver=msg.sender, value=supply)
+
+
+@external
+def transfer(receiver: address, amount: uint256) -> bool:
+    self._transfer(msg.sender, receiver, amount)
+    return True
+
+
+@external
+def approve(spender: address, amount: uint256) -> bool:
+    self.allowance[msg.sender][spender] = amount
+    log Approval(owner=msg.sender, spender=spender, value=amount)
+    return True
+
+
+@external
+def transferFrom(owner: address, receiver: address, amount: uint256) -> bool:
+    allowed: uint256 = self.allowance[owner][msg.sender]
+    if allowed != max_value(uint256):
+        assert allowed >= amount, "ALLOWANCE"
+        self.allowance[owner][msg.sender] = allowed - amount
+    self._transfer(owner, receiver, amount)
+    return True
+
+
+@external
+@payable
+def deposit():
+    self.balanceOf[msg.sender] += msg.value
+    self.totalSupply += msg.value
+    log Transfer(sender=empty(address), receiver=msg.sender, value=msg.value)
+
+
+@external
+def withdraw(amount: uint256):
+    assert self.balanceOf[msg.sender] >= amount, "BALANCE"
+    self.balanceOf[msg.sender] -= amount
+    self.totalSupply -= amount
+    log Transfer(sender=msg.sender, receiver=empty(address), value=amount)
+    raw_call(msg.sender, b"", value=amount)
+
+
+@internal
+def _transfer(sender: address, receiver: address, amount: uint256):
+    assert self.balanceOf[sender] >= amount, "BALANCE"
+    self.balanceOf[sender] -= amount
+    self.balanceOf[receiver] += amount
+    log Transfer(sender=sender, receiver=receiver, value=amount)
@@ -0,0 +1,286 @@
+"""
+Локальная цепь для бенчмарков: узел, контракты и финансирование аккаунтов
+
+Узел - один из:
+- eth-tester: py-evm в процессе бенчмарка, JSON-RPC отдает CountingRpcProxy;
+- anvil: запускается из PATH (chainId 56, автомайнинг);
+- внешний узел по --rpc-url (hardhat node, ganache, уже запущенный anvil).
+
+Контракты (contracts/*.vy) компилируются vyper и кешируются в
+contracts/.build по хешу исходников: ERC20 токен, WBNB (тот же контракт с
+deposit/withdraw), пара x*y=k и роутер с интерфейсом PancakeSwap V2.
+"""
+
+import hashlib
+import http.client
+import json
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+CONTRACTS_DIR = Path(__file__).parent / 'contracts'
+BUILD_DIR = CONTRACTS_DIR / '.build'
+
+# Известные ключи dev-аккаунтов #0 (публичные тестовые ключи, не для реальных сетей)
+ANVIL_KEY = '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80'  # anvil / hardhat
+TESTER_KEY = '0x' + '00' * 31 + '01'  # eth-tester
+
+TOKEN_SUPPLY = 10 ** 9 * 10 ** 18
+LIQUIDITY_BNB = 1000 * 10 ** 18
+LIQUIDITY_TOKENS = 10 ** 8 * 10 ** 18
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _to_json(value: Any) -> Any:
+    """Ответ eth-tester -> JSON-RPC (числа как hex quantity, байты как hex)"""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex()
+    if isinstance(value, dict) or hasattr(value, 'items'):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+class TesterBackend:
+    """py-evm в процессе: JSON-RPC вызовы исполняются без отдельного узла"""
+
+    kind = 'eth-tester'
+    funder_key = TESTER_KEY
+
+    def __init__(self):
+        from eth_tester import EthereumTester, PyEVMBackend
+        from web3 import EthereumTesterProvider, Web3
+
+        provider = EthereumTesterProvider(EthereumTester(PyEVMBackend()))
+        # Форматтеры провайдера (camelCase <-> snake_case) без внешних middleware web3
+        self._request = provider.request_func(Web3(provider, middlewares=[]), ())
+        self._lock = threading.Lock()
+
+    def _call(self, call: Dict) -> Dict:
+        try:
+            with self._lock:
+                response = dict(self._request(call['method'], call.get('params', [])))
+        except Exception as e:
+            response = {'error': {'code': -32000, 'message': str(e)}}
+        if 'error' not in response:
+            response['result'] = _to_json(response.get('result'))
+        response.update(jsonrpc='2.0', id=call.get('id'))
+        return response
+
+    def forward(self, body: bytes) -> bytes:
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            return json.dumps([self._call(call) for call in payload]).encode()
+        return json.dumps(self._call(payload)).encode()
+
+    def close(self):
+        pass
+
+
+class HttpBackend:
+    """Внешний JSON-RPC узел (соединение keep-alive на поток прокси)"""
+
+    def __init__(self, url: str, kind: str = 'rpc', funder_key: str = ANVIL_KEY,
+                 process: Optional[subprocess.Popen] = None):
+        self.url = url
+        self.kind = kind
+        self.funder_key = funder_key
+        self.process = process
+        parsed = urlparse(url)
+        self._host, self._port = parsed.hostname, parsed.port or 80
+        self._path = parsed.path or '/'
+        self._local = threading.local()
+
+    def forward(self, body: bytes) -> bytes:
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection(self._host, self._port, timeout=60)
+            try:
+                conn.request('POST', self._path, body, {'Content-Type': 'application/json'})
+                return conn.getresponse().read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        raise RuntimeError('unreachable')
+
+    def wait_ready(self, timeout: float = 20.0):
+        deadline = time.monotonic() + timeout
+        request = json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_chainId', 'params': []}).encode()
+        while True:
+            try:
+                if 'result' in json.loads(self.forward(request)):
+                    return
+            except (OSError, ValueError, http.client.HTTPException):
+                pass
+            if self.process is not None and self.process.poll() is not None:
+                raise RuntimeError(f"{self.kind} завершился с кодом {self.process.returncode}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Узел {self.url} не ответил за {timeout}с")
+            time.sleep(0.2)
+
+    def close(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def open_node(kind: str, rpc_url: Optional[str] = None, funder_key: Optional[str] = None,
+              block_time: Optional[float] = None):
+    """
+    Запуск или подключение узла
+
+    Args:
+        kind: eth-tester | anvil | rpc
+        rpc_url: URL внешнего узла (для rpc)
+        funder_key: Ключ аккаунта с балансом (по умолчанию - dev-аккаунт #0)
+        block_time: Интервал блоков anvil (None = автомайнинг)
+    """
+    if kind == 'eth-tester':
+        backend = TesterBackend()
+    elif kind == 'anvil':
+        binary = shutil.which('anvil')
+        if not binary:
+            raise RuntimeError("anvil не найден в PATH (установите foundry или используйте --node eth-tester)")
+        port = free_port()
+        command = [binary, '--port', str(port), '--chain-id', '56', '--silent']
+        if block_time:
+            command += ['--block-time', str(block_time)]
+        backend = HttpBackend(f'http://127.0.0.1:{port}', kind='anvil',
+                              process=subprocess.Popen(command))
+        backend.wait_ready()
+    elif kind == 'rpc':
+        if not rpc_url:
+            raise ValueError("Для внешнего узла нужен --rpc-url")
+        backend = HttpBackend(rpc_url)
+        backend.wait_ready()
+    else:
+        raise ValueError(f"Неизвестный тип узла: {kind}")
+
+    if funder_key:
+        backend.funder_key = funder_key
+    return backend
+
+
+def compile_contracts() -> Dict[str, Dict[str, Any]]:
+    """ABI и байткод контрактов (кеш по хешу исходников и версии vyper)"""
+    import vyper
+
+    sources = sorted(CONTRACTS_DIR.glob('*.vy'))
+    digest = hashlib.sha256(vyper.__version__.encode())
+    for path in sources:
+        digest.update(path.read_bytes())
+    cache = BUILD_DIR / f'{digest.hexdigest()[:16]}.json'
+    if cache.exists():
+        return json.loads(cache.read_text(encoding='utf-8'))
+
+    artifacts = {}
+    for path in sources:
+        output = vyper.compile_code(path.read_text(encoding='utf-8'), output_formats=['abi', 'bytecode'])
+        artifacts[path.stem] = {'abi': output['abi'], 'bytecode': output['bytecode']}
+
+    BUILD_DIR.mkdir(exist_ok=True)
+    cache.write_text(json.dumps(artifacts), encoding='utf-8')
+    return artifacts
+
+
+@dataclass
+class Deployment:
+    """Адреса контрактов на локальной цепи"""
+    token: str
+    wbnb: str
+    pair: str
+    router: str
+    abi: Dict[str, List[Dict]]
+
+
+class DevChain:
+    """Развертывание контрактов и финансирование аккаунтов от dev-аккаунта"""
+
+    def __init__(self, web3, funder_key: str, gas_price_wei: int):
+        from eth_account import Account
+
+        self.web3 = web3
+        self.funder = Account.from_key(funder_key)
+        self.gas_price_wei = gas_price_wei
+        self.chain_id = web3.eth.chain_id
+        self.deployment: Optional[Deployment] = None
+        self._nonce = web3.eth.get_transaction_count(self.funder.address, 'pending')
+
+    def transact(self, tx: Dict[str, Any], account=None) -> Dict[str, Any]:
+        """Подпись, отправка и ожидание чека (откат - исключение)"""
+        account = account or self.funder
+        tx = dict(tx, chainId=self.chain_id, gasPrice=self.gas_price_wei)
+        tx.setdefault('from', account.address)
+        if account is self.funder:
+            tx['nonce'] = self._nonce
+            self._nonce += 1
+        else:
+            tx.setdefault('nonce', self.web3.eth.get_transaction_count(account.address, 'pending'))
+        tx.setdefault('gas', self.web3.eth.estimate_gas(tx))
+        signed = account.sign_transaction(tx)
+        tx_hash = self.web3.eth.send_raw_transaction(signed.rawTransaction)
+        receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        if receipt['status'] != 1:
+            raise RuntimeError(f"Транзакция {tx_hash.hex()} откатилась")
+        return receipt
+
+    def _deploy(self, artifact: Dict[str, Any], *args) -> str:
+        contract = self.web3.eth.contract(abi=artifact['abi'], bytecode=artifact['bytecode'])
+        tx = contract.constructor(*args).build_transaction({'from': self.funder.address, 'gas': 3_000_000,
+                                                            'gasPrice': self.gas_price_wei})
+        return self.transact(tx)['contractAddress']
+
+    def contract(self, name: str, address: str):
+        return self.web3.eth.contract(address=address, abi=self.deployment.abi[name])
+
+    def deploy(self) -> Deployment:
+        """Токен, WBNB, пара с ликвидностью и роутер"""
+        artifacts = compile_contracts()
+        token = self._deploy(artifacts['bench_token'], 'Bench Token', 'BENCH', 18, TOKEN_SUPPLY)
+        wbnb = self._deploy(artifacts['bench_token'], 'Wrapped BNB', 'WBNB', 18, 0)
+        pair = self._deploy(artifacts['bench_pair'], token, wbnb)
+        router = self._deploy(artifacts['bench_router'], wbnb)
+        self.deployment = Deployment(token=token, wbnb=wbnb, pair=pair, router=router,
+                                     abi={name: artifact['abi'] for name, artifact in artifacts.items()})
+
+        params = {'from': self.funder.address, 'gas': 300_000, 'gasPrice': self.gas_price_wei}
+        wbnb_contract = self.contract('bench_token', wbnb)
+        self.transact(wbnb_contract.functions.deposit().build_transaction(dict(params, value=LIQUIDITY_BNB)))
+        self.transact(wbnb_contract.functions.transfer(pair, LIQUIDITY_BNB).build_transaction(params))
+        self.transact(self.contract('bench_token', token).functions.transfer(pair, LIQUIDITY_TOKENS)
+                      .build_transaction(params))
+        self.transact(self.contract('bench_pair', pair).functions.sync().build_transaction(params))
+        self.transact(self.contract('bench_router', router).functions.registerPair(pair)
+                      .build_transaction(params))
+        return self.deployment
+
+    def fund(self, address: str, bnb_wei: int = 0, tokens_wei: int = 0):
+        """Перевод BNB и токенов с dev-аккаунта"""
+        if bnb_wei:
+            self.transact({'to': address, 'value': bnb_wei, 'gas': 21000})
+        if tokens_wei:
+            token = self.contract('bench_token', self.deployment.token)
+            self.transact(token.functions.transfer(address, tokens_wei).build_transaction(
+                {'from': self.funder.address, 'gas': 100_000, 'gasPrice': self.gas_price_wei}))
@@ -0,0 +1,224 @@
+"""
+Метрики прогона и история результатов для отслеживания регрессий
+
+Задержка отправки транзакции - интервал между ответами узла на
+eth_sendRawTransaction одного отправителя (для первой - от старта сценария):
+в нее входят резерв nonce, оценка газа, подпись, запись в БД/журнал и все
+RPC вызовы конвейера перед отправкой. Для конвейеров с одним потоком на
+отправителя это полное время обработки одного адреса.
+
+История - JSONL файл: одна строка на сценарий прогона с коммитом git,
+параметрами и метриками. Новый результат сравнивается с последним прогоном
+с тем же ключом (сценарий, N, узел, параметры). Сценарий, завершившийся
+исключением, помечается ошибкой: его частичные метрики не сохраняются в
+историю и не участвуют в сравнении.
+"""
+
+import json
+import math
+import os
+import subprocess
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Направление метрик: True - больше лучше
+TRACKED_METRICS = {
+    'tx_per_s': True,
+    'p50_ms': False,
+    'p99_ms': False,
+    'rpc_per_tx': False,
+    'db_commits_per_tx': False,
+    'journal_commits_per_tx': False,
+}
+
+# Ключ сравнения прогонов
+KEY_FIELDS = ('scenario', 'n', 'node', 'params')
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Перцентиль по ближайшему рангу"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * q / 100))
+    return ordered[rank - 1]
+
+
+def submit_latencies(submissions, started: float) -> List[float]:
+    """Интервалы (мс) между успешными отправками одного отправителя"""
+    from eth_account import Account
+
+    last: Dict[str, float] = defaultdict(lambda: started)
+    latencies = []
+    for submission in sorted(submissions, key=lambda s: s.finished):
+        if submission.error or not submission.tx_hash:
+            continue
+        sender = Account.recover_transaction(submission.raw)
+        latencies.append((submission.finished - last[sender]) * 1000)
+        last[sender] = submission.finished
+    return latencies
+
+
+@dataclass
+class ScenarioResult:
+    """Результат одного сценария"""
+    scenario: str
+    n: int
+    node: str
+    params: Dict[str, Any]
+    submitted: int
+    failed: int
+    mined: int
+    duration_s: float
+    confirm_s: Optional[float]
+    tx_per_s: float
+    p50_ms: Optional[float]
+    p99_ms: Optional[float]
+    rpc_calls: int
+    rpc_per_tx: float
+    http_requests: int
+    db_commits: Optional[int]
+    db_commits_per_tx: Optional[float]
+    journal_commits: int
+    journal_commits_per_tx: float
+    rpc_methods: Dict[str, int] = field(default_factory=dict)
+    # Исключение сценария (результат частичный)
+    error: Optional[str] = None
+
+
+def build_result(scenario: str, n: int, node: str, params: Dict[str, Any], stats, started: float,
+                 mined: int, confirmed_at: Optional[float], db_commits: Optional[int],
+                 journal_commits: int, error: Optional[str] = None) -> ScenarioResult:
+    """
+    Сборка метрик сценария
+
+    Args:
+        stats: ProxyStats за время сценария
+        started: time.perf_counter() старта сценария
+        mined: Число успешно исполненных транзакций
+        confirmed_at: time.perf_counter() подтверждения последней транзакции
+        db_commits: COMMIT общего хранилища (None - учет выключен)
+        journal_commits: Групповые записи журнала транзакций
+        error: Исключение сценария, если он не завершился
+    """
+    ok = [s for s in stats.submissions if s.tx_hash and not s.error]
+    finished = max((s.finished for s in ok), default=started)
+    duration = finished - started
+    latencies = submit_latencies(ok, started)
+    per_tx = max(len(ok), 1)
+
+    def rounded(value, digits=2):
+        return round(value, digits) if value is not None else None
+
+    return ScenarioResult(
+        scenario=scenario,
+        n=n,
+        node=node,
+        params=params,
+        submitted=len(ok),
+        failed=n - len(ok),
+        mined=mined,
+        duration_s=round(duration, 3),
+        confirm_s=rounded(confirmed_at - started if confirmed_at else None, 3),
+        tx_per_s=round(len(ok) / duration, 2) if duration > 0 else 0.0,
+        p50_ms=rounded(percentile(latencies, 50)),
+        p99_ms=rounded(percentile(latencies, 99)),
+        rpc_calls=stats.total_calls,
+        rpc_per_tx=round(stats.total_calls / per_tx, 2),
+        http_requests=stats.http_requests,
+        db_commits=db_commits,
+        db_commits_per_tx=rounded(db_commits / per_tx if db_commits is not None else None),
+        journal_commits=journal_commits,
+        journal_commits_per_tx=round(journal_commits / per_tx, 2),
+        rpc_methods=dict(stats.calls.most_common()),
+        error=error,
+    )
+
+
+def git_revision(cwd: Optional[str] = None) -> Optional[str]:
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd,
+                                capture_output=True, text=True, timeout=10)
+        return output.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class ResultHistory:
+    """История результатов в JSONL"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+
+    @staticmethod
+    def key(record: Dict[str, Any]) -> str:
+        return json.dumps([record.get(name) for name in KEY_FIELDS], sort_keys=True)
+
+    def previous(self, result: ScenarioResult) -> Optional[Dict[str, Any]]:
+        """Последний успешный сохраненный прогон с тем же ключом"""
+        key = self.key(asdict(result))
+        matching = [record for record in self.load() if self.key(record) == key and not record.get('error')]
+        return matching[-1] if matching else None
+
+    def append(self, result: ScenarioResult, revision: Optional[str] = None):
+        if result.error:
+            raise ValueError(f"Результат сценария {result.scenario} с ошибкой не сохраняется")
+        record = dict(asdict(result), ts=datetime.now().isoformat(timespec='seconds'), revision=revision)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def regressions(result: ScenarioResult, previous: Optional[Dict[str, Any]],
+                tolerance: float = 0.1) -> List[str]:
+    """
+    Ухудшения относительно предыдущего прогона больше допуска
+
+    Для счетчиков на транзакцию допуск дополнительно не меньше 0.05 вызова,
+    чтобы округление не давало ложных срабатываний.
+    """
+    if not previous or result.error:
+        return []
+    current = asdict(result)
+    found = []
+    for metric, higher_is_better in TRACKED_METRICS.items():
+        new, old = current.get(metric), previous.get(metric)
+        if new is None or old is None:
+            continue
+        slack = abs(old) * tolerance
+        if metric.endswith('_per_tx'):
+            slack = max(slack, 0.05)
+        worse = old - new if higher_is_better else new - old
+        if worse > slack:
+            found.append(f"{result.scenario}: {metric} {old} -> {new}")
+    return found
+
+
+def format_table(results: List[ScenarioResult]) -> str:
+    """Текстовая таблица результатов"""
+    columns = [('scenario', 'сценарий'), ('submitted', 'отпр.'), ('failed', 'ошиб.'), ('tx_per_s', 'tx/s'),
+               ('p50_ms', 'p50 мс'), ('p99_ms', 'p99 мс'), ('rpc_per_tx', 'RPC/tx'),
+               ('db_commits_per_tx', 'COMMIT/tx'), ('journal_commits_per_tx', 'журнал/tx'),
+               ('confirm_s', 'подтв. с')]
+    rows = [[title for _, title in columns]]
+    for result in results:
+        values = asdict(result)
+        if result.error:
+            values['scenario'] = f"{result.scenario} (ошибка)"
+        rows.append(['-' if values[name] is None else str(values[name]) for name, _ in columns])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
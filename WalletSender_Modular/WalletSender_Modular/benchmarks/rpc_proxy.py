@@ -0,0 +1,140 @@
+"""
+Считающий JSON-RPC прокси между конвейером отправки и узлом
+
+Приложение получает URL прокси вместо узла (rpc.list, Web3Provider), поэтому
+учитываются все вызовы конвейера, включая фоновые (подтверждения, замена
+зависших) и пакетные запросы сырых транспортов. Каждый элемент пакета -
+отдельный вызов. Запросы самого бенчмарка (развертывание, финансирование,
+ожидание чеков) идут на путь /harness и не учитываются.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+HARNESS_PATH = '/harness'
+
+
+@dataclass
+class Submission:
+    """eth_sendRawTransaction, прошедший через прокси"""
+    finished: float  # time.perf_counter() получения ответа узла
+    raw: str
+    tx_hash: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ProxyStats:
+    """Снимок счетчиков прокси"""
+    http_requests: int = 0
+    calls: Counter = field(default_factory=Counter)
+    submissions: List[Submission] = field(default_factory=list)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        proxy: CountingRpcProxy = self.server.proxy
+        try:
+            response = proxy.backend.forward(body)
+            status = 200
+        except Exception as e:
+            response = json.dumps({'jsonrpc': '2.0', 'id': None,
+                                   'error': {'code': -32603, 'message': str(e)}}).encode()
+            status = 502
+        finished = time.perf_counter()
+        if self.path != HARNESS_PATH:
+            proxy.record(body, response, finished)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingRpcProxy:
+    """HTTP JSON-RPC прокси с учетом вызовов по методам и отправок транзакций"""
+
+    def __init__(self, backend, host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            backend: Объект с forward(body: bytes) -> bytes (узел)
+            host: Адрес прослушивания
+            port: Порт (0 - свободный)
+        """
+        self.backend = backend
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+        self._lock = threading.Lock()
+        self._stats = ProxyStats()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def harness_url(self) -> str:
+        return self.url.rstrip('/') + HARNESS_PATH
+
+    def start(self) -> 'CountingRpcProxy':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True, name='RpcProxy')
+        self._thread.start()
+        return self
+
+    def record(self, body: bytes, response: bytes, finished: float):
+        try:
+            calls = json.loads(body)
+            results = json.loads(response)
+        except ValueError:
+            return
+        if not isinstance(calls, list):
+            calls, results = [calls], [results]
+        by_id = {item.get('id'): item for item in results if isinstance(item, dict)}
+
+        with self._lock:
+            self._stats.http_requests += 1
+            for call in calls:
+                method = call.get('method', '?')
+                self._stats.calls[method] += 1
+                if method == 'eth_sendRawTransaction':
+                    result = by_id.get(call.get('id'), {})
+                    error = result.get('error')
+                    self._stats.submissions.append(Submission(
+                        finished=finished,
+                        raw=(call.get('params') or [''])[0],
+                        tx_hash=result.get('result'),
+                        error=(error.get('message') if isinstance(error, dict) else error)
+                    ))
+
+    def submitted(self) -> List[str]:
+        """Хеши успешно отправленных транзакций с последнего сброса"""
+        with self._lock:
+            return [s.tx_hash for s in self._stats.submissions if s.tx_hash and not s.error]
+
+    def reset(self) -> ProxyStats:
+        """Снимок счетчиков с обнулением"""
+        with self._lock:
+            stats, self._stats = self._stats, ProxyStats()
+        return stats
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,168 @@
+"""
+Сценарии бенчмарка: реальные пути отправки приложения на локальной цепи
+
+Каждый сценарий получает свежий профинансированный кошелек отправителя и N
+адресов получателей и вызывает код приложения так же, как UI/headless:
+- distribution: DistributionExecutor (JobEngine, журнал транзакций, nonce manager);
+- queue: QueueExecutor (аренда адресов, TokenService, StatusWriteBuffer);
+- batch_send_token: TransactionService.batch_send_token;
+- swap_buy / swap_sell: DexSwapService swapExactETHForTokens / swapExactTokensForETH.
+
+Модули приложения импортируются внутри функций: к этому моменту конфиг
+уже направлен на рабочий каталог бенчмарка и прокси.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .devchain import DevChain, Deployment
+
+
+@dataclass
+class BenchContext:
+    """Параметры прогона и доступ к цепи"""
+    chain: DevChain
+    deployment: Deployment
+    rpc_url: str
+    amount: float = 1.0
+    swap_bnb: float = 0.01
+    gas_price_gwei: float = 5.0
+    delay: float = 0.0
+    workers: int = 1
+    timeout: float = 600.0
+
+    @property
+    def gas_price_wei(self) -> int:
+        return int(self.gas_price_gwei * 10 ** 9)
+
+    def web3_provider(self):
+        """Web3Provider приложения, направленный на прокси"""
+        from wallet_sender.core.web3_provider import Web3Provider
+
+        provider = Web3Provider([self.rpc_url])
+        provider.network_config['chain_id'] = self.chain.chain_id
+        return provider
+
+    def app_web3(self):
+        """Web3 из RPC менеджера приложения (rpc.list указывает на прокси)"""
+        from wallet_sender.core.rpc import get_rpc_manager
+
+        return get_rpc_manager().get_client()
+
+
+@dataclass
+class Scenario:
+    name: str
+    run: Callable[[BenchContext, object, List[str]], None]
+    prepare: Optional[Callable[[BenchContext, object], None]] = None
+
+
+_engine = None
+
+
+def _job_engine():
+    """JobEngine без главного цикла: исполнитель запускается в текущем потоке"""
+    global _engine
+    if _engine is None:
+        from wallet_sender.core.job_engine import JobEngine
+        _engine = JobEngine()
+    return _engine
+
+
+def run_distribution(ctx: BenchContext, sender, recipients: List[str]):
+    from wallet_sender.core.job_engine import DistributionExecutor
+
+    engine = _job_engine()
+    job_id = engine.store.create_job('benchmark', 'distribution', {
+        'addresses': recipients,
+        'token_address': ctx.deployment.token,
+        'amount_per_address': ctx.amount,
+        'sender_key': sender.key.hex(),
+        'gas_price': ctx.gas_price_gwei,
+        'gas_limit': 100_000,
+        'token_decimals': 18,
+        'delay_between_tx': ctx.delay,
+    })
+    DistributionExecutor(job_id, engine.store.get_job(job_id), engine).run()
+
+
+def run_queue(ctx: BenchContext, sender, recipients: List[str]):
+    from wallet_sender.core.wallet_manager import WalletManager
+    from wallet_sender.database.models import DistributionAddress, DistributionTask
+    from wallet_sender.services.queue_executor import QueueExecutor
+
+    wallet = WalletManager()
+    wallet.connect_with_private_key(sender.key.hex())
+    executor = QueueExecutor(wallet, web3_provider=ctx.web3_provider())
+    executor.send_interval = ctx.delay
+    executor.check_interval = 0.05
+
+    with executor._session_scope() as session:
+        task = DistributionTask(name='benchmark', token_address=ctx.deployment.token, token_symbol='BENCH',
+                                amount_per_address=ctx.amount, total_addresses=len(recipients),
+                                status='pending')
+        session.add(task)
+        session.flush()
+        task_id = task.id
+        session.add_all(DistributionAddress(task_id=task_id, address=address, status='pending')
+                        for address in recipients)
+
+    executor.start(ctx.workers)
+    deadline = time.monotonic() + ctx.timeout
+    try:
+        while time.monotonic() < deadline:
+            with executor._session_scope() as session:
+                if session.get(DistributionTask, task_id).status in ('completed', 'failed'):
+                    break
+            time.sleep(0.05)
+    finally:
+        executor.stop()
+
+
+def run_batch_send_token(ctx: BenchContext, sender, recipients: List[str]):
+    from wallet_sender.services.transaction_service import TransactionService
+
+    service = TransactionService(ctx.web3_provider(), private_key=sender.key.hex())
+    service.batch_send_token(ctx.deployment.token,
+                             [{'address': address, 'amount': ctx.amount} for address in recipients],
+                             gas_price=ctx.gas_price_wei, gas_limit=100_000)
+
+
+def _swap_service(ctx: BenchContext, sender):
+    from wallet_sender.services.dex_swap_service import DexSwapService
+
+    return DexSwapService(ctx.app_web3(), ctx.deployment.router, sender.key.hex(),
+                          custom_gas_price_gwei=ctx.gas_price_gwei)
+
+
+def run_swap_buy(ctx: BenchContext, sender, recipients: List[str]):
+    service = _swap_service(ctx, sender)
+    path = [ctx.deployment.wbnb, ctx.deployment.token]
+    amount_wei = int(ctx.swap_bnb * 10 ** 18)
+    for _ in recipients:
+        service.swap_exact_eth_for_tokens(amount_wei, 0, path)
+
+
+def prepare_swap_sell(ctx: BenchContext, sender):
+    """approve роутеру до замера"""
+    service = _swap_service(ctx, sender)
+    tx_hash = service.approve(ctx.deployment.token)
+    ctx.chain.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+
+
+def run_swap_sell(ctx: BenchContext, sender, recipients: List[str]):
+    service = _swap_service(ctx, sender)
+    path = [ctx.deployment.token, ctx.deployment.wbnb]
+    amount_wei = int(ctx.amount * 10 ** 18)
+    for _ in recipients:
+        service.swap_exact_tokens_for_eth(amount_wei, 0, path)
+
+
+SCENARIOS: Dict[str, Scenario] = {scenario.name: scenario for scenario in [
+    Scenario('distribution', run_distribution),
+    Scenario('queue', run_queue),
+    Scenario('batch_send_token', run_batch_send_token),
+    Scenario('swap_buy', run_swap_buy),
+    Scenario('swap_sell', run_swap_sell, prepare=prepare_swap_sell),
+]}
@@ -0,0 +1,249 @@
+"""
+Бенчмарк конвейера отправки на локальной цепи
+
+Разворачивает токен, WBNB, пару и роутер на локальном узле, направляет
+приложение на считающий RPC прокси и прогоняет сценарии отправки N
+транзакций. Для каждого сценария выводятся tx/s, p50/p99 задержки отправки,
+RPC вызовы, COMMIT SQLite и групповые записи журнала на транзакцию;
+результаты дописываются в историю и сравниваются с прошлым прогоном.
+Сценарий с исключением помечается ошибкой, в историю не попадает, а с
+--fail-on-regression дает код выхода 1.
+
+Запуск из корня проекта (зависимости: pip install -e .[bench]):
+    python -m benchmarks.send_pipeline
+    python -m benchmarks.send_pipeline --node anvil -n 1000 --scenarios distribution,queue
+    python -m benchmarks.send_pipeline --node rpc --rpc-url http://127.0.0.1:8545 --funder-key-env DEV_KEY
+    python -m benchmarks.send_pipeline --set rpc.max_rps=1000 --fail-on-regression
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .devchain import DevChain, open_node
+from .results import ResultHistory, build_result, format_table, git_revision, regressions
+from .rpc_proxy import CountingRpcProxy
+from .scenarios import SCENARIOS, BenchContext
+
+DEFAULT_HISTORY = Path(__file__).parent / 'results' / 'history.jsonl'
+
+
+def parse_override(text: str) -> Tuple[List[str], Any]:
+    """KEY=VALUE -> (путь ключа, значение JSON или строка)"""
+    key, sep, raw = text.partition('=')
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"Ожидается KEY=VALUE: {text}")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return key.split('.'), value
+
+
+def nested(path: List[str], value: Any) -> Dict[str, Any]:
+    for name in reversed(path):
+        value = {name: value}
+    return value
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.send_pipeline',
+                                     description='Бенчмарк конвейера отправки на локальной цепи')
+    parser.add_argument('--node', choices=['eth-tester', 'anvil', 'rpc'], default='eth-tester',
+                        help='Локальный узел (по умолчанию py-evm в процессе)')
+    parser.add_argument('--rpc-url', help='URL внешнего узла для --node rpc')
+    parser.add_argument('--funder-key-env', help='Переменная окружения с ключом аккаунта с балансом')
+    parser.add_argument('--block-time', type=float, help='Интервал блоков anvil (по умолчанию автомайнинг)')
+    parser.add_argument('-n', '--count', type=int, default=100, help='Транзакций на сценарий')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Сценарии через запятую ({', '.join(SCENARIOS)})")
+    parser.add_argument('--amount', type=float, default=1.0, help='Токенов на адрес')
+    parser.add_argument('--swap-bnb', type=float, default=0.01, help='BNB на одну покупку')
+    parser.add_argument('--gas-price', type=float, default=5.0, help='Цена газа, Gwei')
+    parser.add_argument('--delay', type=float, default=0.0, help='Задержка между транзакциями, с')
+    parser.add_argument('--workers', type=int, default=1, help='Потоков QueueExecutor')
+    parser.add_argument('--timeout', type=float, default=600.0, help='Таймаут сценария, с')
+    parser.add_argument('--set', dest='overrides', action='append', type=parse_override, default=[],
+                        metavar='KEY=VALUE', help='Переопределение конфига (значение JSON), можно повторять')
+    parser.add_argument('--workdir', help='Каталог БД и журналов (по умолчанию временный)')
+    parser.add_argument('--results', default=str(DEFAULT_HISTORY), help='JSONL история результатов')
+    parser.add_argument('--no-save', action='store_true', help='Не дописывать результаты в историю')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Допуск регрессии (доля)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Код выхода 1 при регрессии или ошибке сценария')
+    parser.add_argument('--log-level', default='WARNING', help='Уровень логов приложения')
+    parser.add_argument('--json', action='store_true', help='Вывести результаты в JSON')
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(unknown)}")
+    if args.count < 1:
+        parser.error("-n должно быть положительным")
+    return args
+
+
+def configure_app(workdir: Path, rpc_url: str, overrides: List[Tuple[List[str], Any]], log_level: str):
+    """
+    Конфиг приложения в памяти: RPC через прокси, все БД и журналы в workdir
+
+    Вызывается до импорта остальных модулей wallet_sender: часть синглтонов
+    (аналитика, хранилище) создается при импорте.
+    """
+    from wallet_sender.config import get_config
+    from wallet_sender.utils.logger import setup_logging
+
+    config = get_config()
+    settings = {
+        'rpc': {'list': [rpc_url]},
+        'storage': {'path': str(workdir / 'store.db'), 'trace_commits': True},
+        'tx_journal': {'path': str(workdir / 'tx_journal.jsonl')},
+        'nonce_journal': {'path': str(workdir / 'nonce_journal.jsonl')},
+        'cache': {'disk_path': str(workdir / 'cache.db')},
+        'txqueue': {'writeback': {'journal_path': str(workdir / 'writeback.jsonl')}},
+        'address_classifier': {'db_path': str(workdir / 'address_classifier.db')},
+    }
+    for path, value in overrides:
+        settings = config._merge_configs(settings, nested(path, value))
+    # Без config.set(): он сохраняет файл пользователя
+    config.config = config._merge_configs(config.config, settings)
+    setup_logging(log_level, str(workdir / 'bench.log'))
+
+
+def wait_receipts(web3, hashes: List[str], timeout: float) -> Tuple[int, Optional[float]]:
+    """
+    Ожидание чеков отправленных транзакций
+
+    Returns:
+        (число успешных, time.perf_counter() последнего чека или None при таймауте)
+    """
+    from web3.exceptions import TransactionNotFound
+
+    pending = set(hashes)
+    mined = 0
+    last = None
+    deadline = time.monotonic() + timeout
+    while pending and time.monotonic() < deadline:
+        for tx_hash in list(pending):
+            try:
+                receipt = web3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            pending.discard(tx_hash)
+            last = time.perf_counter()
+            mined += receipt['status'] == 1
+        if pending:
+            time.sleep(0.05)
+    return mined, (None if pending else last)
+
+
+def run(args: argparse.Namespace, backend, proxy: CountingRpcProxy) -> List:
+    from eth_account import Account
+    from web3 import Web3
+
+    from wallet_sender.core.tx_journal import get_tx_journal
+    from wallet_sender.utils.storage import get_storage
+
+    harness = Web3(Web3.HTTPProvider(proxy.harness_url, request_kwargs={'timeout': 120}))
+    chain = DevChain(harness, backend.funder_key, int(args.gas_price * 10 ** 9))
+    deployment = chain.deploy()
+    ctx = BenchContext(chain, deployment, proxy.url, amount=args.amount, swap_bnb=args.swap_bnb,
+                       gas_price_gwei=args.gas_price, delay=args.delay, workers=args.workers,
+                       timeout=args.timeout)
+    params = {
+        'amount': args.amount,
+        'swap_bnb': args.swap_bnb,
+        'gas_price': args.gas_price,
+        'delay': args.delay,
+        'workers': args.workers,
+        'block_time': args.block_time,
+        'overrides': {'.'.join(path): value for path, value in args.overrides},
+    }
+    storage, journal = get_storage(), get_tx_journal()
+    n = args.count
+
+    results = []
+    for name in args.scenarios:
+        scenario = SCENARIOS[name]
+        sender = Account.create()
+        chain.fund(sender.address,
+                   bnb_wei=int((1 + n * (args.swap_bnb + 0.002)) * 10 ** 18),
+                   tokens_wei=int(2 * n * args.amount * 10 ** 18))
+        recipients = [Account.create().address for _ in range(n)]
+        if scenario.prepare:
+            scenario.prepare(ctx, sender)
+
+        journal.flush()
+        proxy.reset()
+        db_commits = storage.get_stats()['total_commits']
+        journal_commits = journal.get_stats()['total_commits']
+        print(f"[{name}] {n} транзакций...", file=sys.stderr)
+
+        started = time.perf_counter()
+        error = None
+        try:
+            scenario.run(ctx, sender, recipients)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"[{name}] ошибка сценария: {error}", file=sys.stderr)
+        mined, confirmed_at = wait_receipts(harness, proxy.submitted(), args.timeout)
+        journal.flush()
+        stats = proxy.reset()
+
+        db_total = storage.get_stats()['total_commits']
+        results.append(build_result(
+            name, n, backend.kind, params, stats, started, mined, confirmed_at,
+            db_total - db_commits if db_total is not None else None,
+            journal.get_stats()['total_commits'] - journal_commits,
+            error,
+        ))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix='wallet_sender_bench_'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    funder_key = os.environ.get(args.funder_key_env) if args.funder_key_env else None
+
+    backend = open_node(args.node, args.rpc_url, funder_key, args.block_time)
+    proxy = CountingRpcProxy(backend).start()
+    try:
+        configure_app(workdir, proxy.url, args.overrides, args.log_level)
+        results = run(args, backend, proxy)
+    finally:
+        proxy.close()
+        backend.close()
+
+    history = ResultHistory(args.results)
+    revision = git_revision(str(Path(__file__).parent))
+    found = []
+    failed = [result for result in results if result.error]
+    for result in results:
+        if result.error:
+            continue
+        found += regressions(result, history.previous(result), args.tolerance)
+        if not args.no_save:
+            history.append(result, revision)
+
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], ensure_ascii=False, indent=2))
+    else:
+        print(format_table(results))
+    print(f"Рабочий каталог: {workdir}", file=sys.stderr)
+    for line in found:
+        print(f"Регрессия: {line}", file=sys.stderr)
+    for result in failed:
+        print(f"Ошибка сценария {result.scenario} (не сохранен): {result.error}", file=sys.stderr)
+    return 1 if (found or failed) and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
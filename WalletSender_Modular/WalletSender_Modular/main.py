@@ -7,21 +7,36 @@ WalletSender Modular - Главная точка входа приложения
 """
 
 import sys
+import time
 import logging
+import multiprocessing
 from pathlib import Path
 
+_STARTED_AT = time.perf_counter()
+
 # Добавляем src в Python path (для запуска из корня проекта)
 current_dir = Path(__file__).parent
 src_path = current_dir / "src"
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
+# Замеры запуска подключаются первыми, чтобы профилировщик импортов
+# (--profile-startup) видел все последующие импорты. Пакеты wallet_sender и
+# wallet_sender.utils при импорте ничего не загружают, startup_timing зависит
+# только от стандартной библиотеки.
+import wallet_sender.utils.startup_timing as startup_timing
+
+startup_timing.set_origin(_STARTED_AT)
+startup_timing.configure_from_argv(sys.argv)
+
 # Импорты Qt и модулей приложения (PyQt5)
 from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtCore import Qt
 from wallet_sender import __version__
 from wallet_sender.utils.logger import setup_logging
 
+startup_timing.mark('imports')
+
 
 def main() -> int:
     """Главная функция приложения.
@@ -47,6 +62,7 @@ def main() -> int:
 
         # Создаем приложение Qt
         app = QApplication(sys.argv)
+        startup_timing.mark('qapplication')
         
         # Улучшенная стабильность Qt приложения
         try:
@@ -95,7 +111,9 @@ def main() -> int:
 
         # Создаем и показываем главное окно (ленивый импорт после QApplication)
         from wallet_sender.ui.main_window import MainWindow
+        startup_timing.mark('main_window_import')
         window = MainWindow()
+        startup_timing.mark('main_window')
         window.show()
         logger.info("[OK] Главное окно создано и отображено")
 
@@ -119,4 +137,6 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    # Процессы шардов рассылки в собранном (PyInstaller) приложении
+    multiprocessing.freeze_support()
     sys.exit(main())
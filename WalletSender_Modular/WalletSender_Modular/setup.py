@@ -65,11 +65,15 @@ setup(
             "black>=23.7.0",
             "isort>=5.12.0",
             "pyinstaller>=5.13.2"
+        ],
+        "export": [
+            "pyarrow>=14.0.0"
         ]
     },
     entry_points={
         "console_scripts": [
             "walletsender=wallet_sender.__main__:main",
+            "walletsender-headless=wallet_sender.cli:main",
         ],
     },
     classifiers=[
@@ -0,0 +1,269 @@
+"""
+Командная строка headless режима (без Qt)
+
+    walletsender-headless serve [--host H] [--port P] [--unix-socket PATH]
+    walletsender-headless submit distribution job.json --key-env SENDER_KEY [--watch]
+    walletsender-headless submit auto_buy job.json --keys-file buyers.txt
+    walletsender-headless list | status ID | watch ID | pause ID | resume ID | cancel ID | stats
+
+serve запускает JobEngine и локальный HTTP API (services.headless_service),
+остальные команды - клиенты этого API. Параметры задачи передаются JSON
+файлом с аргументами соответствующего JobRouter.submit_*; приватные ключи
+берутся из переменных окружения или файла, а не из аргументов командной
+строки (они видны в списке процессов).
+"""
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlencode, urlparse
+
+from .services.headless_service import KEY_FIELDS, SUBMITTERS, load_settings
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP соединение через Unix socket"""
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class HeadlessClient:
+    """Клиент HTTP API headless сервиса"""
+
+    def __init__(self, url: str = '', unix_socket: str = '', token: str = '',
+                 timeout: Optional[float] = 30):
+        self.url = urlparse(url) if url else None
+        self.unix_socket = unix_socket
+        self.token = token
+        self.timeout = timeout
+
+    def _connection(self, timeout: Optional[float]) -> http.client.HTTPConnection:
+        if self.unix_socket:
+            return _UnixHTTPConnection(self.unix_socket, timeout=timeout)
+        return http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=timeout)
+
+    def _open(self, method: str, path: str, body: Optional[Dict] = None,
+              timeout: Optional[float] = None):
+        headers = {'Accept': 'application/json'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        conn = self._connection(timeout)
+        conn.request(method, path, body=data, headers=headers)
+        response = conn.getresponse()
+        if response.status >= 400:
+            try:
+                error = json.loads(response.read().decode('utf-8')).get('error')
+            except ValueError:
+                error = response.reason
+            conn.close()
+            raise RuntimeError(f"HTTP {response.status}: {error}")
+        return conn, response
+
+    def request(self, method: str, path: str, body: Optional[Dict] = None) -> Any:
+        conn, response = self._open(method, path, body, self.timeout)
+        try:
+            return json.loads(response.read().decode('utf-8'))
+        finally:
+            conn.close()
+
+    def events(self, job_id: int, interval: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Поток снимков прогресса задачи до ее завершения"""
+        path = f'/jobs/{job_id}/events'
+        if interval is not None:
+            path += '?' + urlencode({'interval': interval})
+        conn, response = self._open('GET', path, timeout=None)
+        try:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line.decode('utf-8'))
+        finally:
+            conn.close()
+
+
+def _read_keys(args) -> List[str]:
+    keys = []
+    for name in args.key_env or []:
+        value = os.environ.get(name)
+        if not value:
+            raise SystemExit(f"Переменная окружения {name} не задана")
+        keys.append(value.strip())
+    if args.keys_file:
+        with open(args.keys_file, 'r', encoding='utf-8') as f:
+            keys.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return keys
+
+
+def build_submission(mode: str, params: Dict[str, Any], keys: List[str]) -> Dict[str, Any]:
+    """
+    Параметры задачи с подставленными приватными ключами
+
+    distribution и rewards принимают один ключ отправителя, auto_buy и
+    auto_sell - список ключей кошельков.
+    """
+    params = dict(params)
+    field = KEY_FIELDS[mode]
+    if keys:
+        if field.endswith('_keys'):
+            params[field] = keys
+        elif len(keys) == 1:
+            params[field] = keys[0]
+        else:
+            raise SystemExit(f"Режим {mode} принимает один ключ отправителя, передано {len(keys)}")
+    if not params.get(field):
+        raise SystemExit(f"Не задан {field}: используйте --key-env или --keys-file")
+    return params
+
+
+def _print(payload: Any):
+    print(json.dumps(payload, ensure_ascii=False, indent=2, default=str))
+
+
+def _watch(client: HeadlessClient, job_id: int, interval: Optional[float]) -> int:
+    last = None
+    for event in client.events(job_id, interval):
+        print(json.dumps(event, ensure_ascii=False, default=str), flush=True)
+        last = event
+    return 0 if last and last.get('state') == 'completed' else 1
+
+
+def _serve(args, settings: Dict[str, Any]) -> int:
+    from .utils.logger import setup_logging
+    from .services.headless_service import HeadlessService, HeadlessServer
+    from .services.job_router import close_job_router
+    from .core.job_engine import close_job_engine
+
+    setup_logging(args.log_level, args.log_file)
+    service = HeadlessService(poll_interval=float(settings['poll_interval']))
+    server = HeadlessServer(service, host=settings['host'], port=int(settings['port']),
+                            unix_socket=settings['unix_socket'], token=settings['token'])
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    server.start()
+    print(f"Headless API: {server.address}", flush=True)
+    try:
+        while not stop.wait(1):
+            pass
+    finally:
+        server.stop()
+        close_job_router()
+        close_job_engine()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='walletsender-headless',
+        description='WalletSender без GUI: сервис задач и клиент его API'
+    )
+    parser.add_argument('--host', help='Адрес API (config headless.host)')
+    parser.add_argument('--port', type=int, help='Порт API (config headless.port)')
+    parser.add_argument('--unix-socket', dest='unix_socket', help='Unix socket вместо TCP')
+    parser.add_argument('--token', help='Токен доступа (лучше WALLET_SENDER_API_TOKEN)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='Запустить JobEngine и HTTP API')
+    serve.add_argument('--log-level', default='INFO')
+    serve.add_argument('--log-file', default='wallet_sender_headless.log')
+
+    submit = commands.add_parser('submit', help='Создать задачу')
+    submit.add_argument('mode', choices=sorted(SUBMITTERS))
+    submit.add_argument('params', help='JSON файл с параметрами задачи ("-" - stdin)')
+    submit.add_argument('--key-env', action='append', metavar='VAR',
+                        help='Переменная окружения с приватным ключом (можно повторять)')
+    submit.add_argument('--keys-file', help='Файл с приватными ключами, по одному в строке')
+    submit.add_argument('--tag')
+    submit.add_argument('--priority', type=int)
+    submit.add_argument('--watch', action='store_true', help='Следить за прогрессом до завершения')
+    submit.add_argument('--interval', type=float)
+
+    jobs = commands.add_parser('list', help='Последние задачи')
+    jobs.add_argument('--state')
+    jobs.add_argument('--mode')
+    jobs.add_argument('--limit', type=int, default=50)
+
+    commands.add_parser('stats', help='Статистика задач')
+
+    for name, help_text in (('status', 'Задача и ее прогресс'), ('pause', 'Приостановить задачу'),
+                            ('resume', 'Возобновить задачу'), ('cancel', 'Отменить задачу')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('job_id', type=int)
+
+    watch = commands.add_parser('watch', help='Поток прогресса задачи (JSON lines)')
+    watch.add_argument('job_id', type=int)
+    watch.add_argument('--interval', type=float)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    settings = load_settings({
+        'host': args.host, 'port': args.port,
+        'unix_socket': args.unix_socket, 'token': args.token,
+    })
+
+    if args.command == 'serve':
+        return _serve(args, settings)
+
+    client = HeadlessClient(
+        url=f"http://{settings['host']}:{settings['port']}",
+        unix_socket=settings['unix_socket'],
+        token=settings['token'],
+    )
+    try:
+        if args.command == 'submit':
+            if args.params == '-':
+                params = json.load(sys.stdin)
+            else:
+                with open(args.params, 'r', encoding='utf-8') as f:
+                    params = json.load(f)
+            params = build_submission(args.mode, params, _read_keys(args))
+            result = client.request('POST', '/jobs', {
+                'mode': args.mode, 'params': params,
+                'tag': args.tag, 'priority': args.priority,
+            })
+            _print(result)
+            if args.watch:
+                return _watch(client, result['job_id'], args.interval)
+        elif args.command == 'list':
+            query = {k: v for k, v in (('state', args.state), ('mode', args.mode),
+                                       ('limit', args.limit)) if v is not None}
+            _print(client.request('GET', '/jobs?' + urlencode(query)))
+        elif args.command == 'stats':
+            _print(client.request('GET', '/stats'))
+        elif args.command == 'status':
+            _print(client.request('GET', f'/jobs/{args.job_id}'))
+        elif args.command == 'watch':
+            return _watch(client, args.job_id, args.interval)
+        else:
+            result = client.request('POST', f'/jobs/{args.job_id}/{args.command}')
+            _print(result)
+            return 0 if result.get('ok') else 1
+    except (OSError, RuntimeError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -31,7 +31,9 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "default_gas_limit": 100000,
         "max_gas_price": 50,
         "auto_estimate": False,
-        "use_eip1559": False
+        "use_eip1559": False,
+        "oracle_blocks": 20,
+        "oracle_interval": 3
     },
     "tokens": {
         "PLEX_ONE": "0xdf179b6cadbc61ffd86a3d2e55f6d6e083ade6c1",
@@ -76,14 +78,113 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         },
         "max_rps": 5
     },
+    "stuck_tx": {
+        "blocks": 20,
+        "bump_percent": 12.5,
+        "max_bumps": 5,
+        "mode": "bump"
+    },
+    "confirmations": {
+        "poll_interval": 1.0,
+        "recent_blocks": 64,
+        "max_catchup_blocks": 32,
+        "sweep_batch": 50,
+        "drop_after_blocks": 200,
+        "block_receipts_threshold": 8,
+        "reload_interval": 30
+    },
+    "cache": {
+        "disk": True,
+        "disk_path": "",
+        "disk_flush_interval_ms": 50,
+        "namespaces": {
+            "block_number": {"ttl": 1, "max_size": 64},
+            "balance": {"ttl": 10, "max_size": 10000},
+            "token_decimals": {"ttl": 86400, "max_size": 5000, "disk": True},
+            "contract_code": {"ttl": 3600, "max_size": 5000, "disk": True},
+            "token_info": {"ttl": 300, "max_size": 5000, "disk": True},
+            "token_metadata": {"ttl": 3600, "max_size": 5000, "disk": True},
+            "code_audit": {"ttl": 604800, "max_size": 5000, "disk": True},
+            "token_safety": {"ttl": 60, "max_size": 1000},
+            "swap_simulation": {"ttl": 120, "max_size": 2000},
+            "gas_price": {"ttl": 15, "max_size": 64},
+            "gas_estimate": {"ttl": 15, "max_size": 64},
+            "swap_gas": {"ttl": 3600, "max_size": 2000, "disk": True},
+            "analytics": {"ttl": 60, "max_size": 256}
+        }
+    },
+    "nonce_journal": {
+        "enabled": True,
+        "path": "",
+        "flush_interval_ms": 50
+    },
+    "storage": {
+        "path": "",
+        "busy_timeout_ms": 5000,
+        "statement_cache": 256,
+        "trace_commits": False,
+        "orm_pool_size": 8,
+        "orm_max_overflow": 16,
+        "orm_pool_timeout": 30
+    },
+    "tx_journal": {
+        "path": "",
+        "flush_interval_ms": 50,
+        "max_batch": 1000,
+        "fsync": True,
+        "segment_mb": 64,
+        "max_projection_failures": 5,
+        "projections": ["store", "database", "analytics"]
+    },
+    "headless": {
+        "host": "127.0.0.1",
+        "port": 8765,
+        "unix_socket": "",
+        "token": "",
+        "poll_interval": 1.0
+    },
     "txqueue": {
         "max_parallel_rpc": 4,
         "per_address_serial": True,
+        "claim_batch_size": 20,
+        "lease_seconds": 300,
+        "writeback": {
+            "flush_rows": 50,
+            "flush_interval_ms": 500,
+            "fsync": True,
+            "journal_path": ""
+        },
         "retry": {
             "attempts": 3,
             "base_delay_ms": 1000
         }
     },
+    "address_classifier": {
+        "mode": "flag",
+        "rpc_url": "",
+        "db_path": "",
+        "batch_size": 200,
+        "workers": 4,
+        "eoa_ttl": 86400
+    },
+    "token_safety": {
+        "rpc_url": "",
+        "workers": 4,
+        "batch_tokens": 10,
+        "factory": "0xcA143Ce32Fe78f1f7019d7d551a6402fC5350c73",
+        "init_code_hash": "0x00fb7f630766e6a796048ea87d01acd3068e8ff67d078148a3fa3f4a84f69bd5",
+        "min_liquidity": {"WBNB": 1.0, "USDT": 1000.0}
+    },
+    "swap_simulation": {
+        "enabled": True,
+        "amount_bnb": 0.01,
+        "block_window": 20,
+        "warn_tax": 0.10,
+        "max_tax": 0.50,
+        "batch_tokens": 20,
+        "workers": 4,
+        "multicall": "0xcA11bde05977b3631167028862bE2a173976CA11"
+    },
     "ui": {
         "window_width": 1400,
         "window_height": 900,
@@ -102,7 +203,14 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "backup_count": 5,
         "log_to_console": True,
         "log_transactions": True,
-        "log_api_calls": False
+        "log_api_calls": False,
+        "async": True,
+        "json_log": True,
+        "flush_interval": 0.5,
+        "batch_size": 200,
+        "ui_fps": 10,
+        "ui_max_lines": 5000,
+        "ui_history": 1000
     },
     "database": {
         "url": "sqlite:///wallet_sender.db",
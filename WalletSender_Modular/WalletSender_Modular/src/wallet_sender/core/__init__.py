@@ -12,9 +12,13 @@ from .job_engine import (
     NonceManager,
     BaseExecutor,
     DistributionExecutor,
+    ShardedDistributionExecutor,
     AutoBuyExecutor,
     RewardsExecutor
 )
+from .tx_tracker import TxTracker, get_tx_tracker, close_tx_tracker
+from .confirmation_service import ConfirmationService, get_confirmation_service, close_confirmation_service
+from .tx_journal import TxJournal, get_tx_journal, close_tx_journal
 
 # Существующие импорты для обратной совместимости
 try:
@@ -48,9 +52,25 @@ __all__ = [
     'NonceManager',
     'BaseExecutor',
     'DistributionExecutor',
+    'ShardedDistributionExecutor',
     'AutoBuyExecutor',
     'RewardsExecutor',
     
+    # Tx Tracker
+    'TxTracker',
+    'get_tx_tracker',
+    'close_tx_tracker',
+    
+    # Confirmations
+    'ConfirmationService',
+    'get_confirmation_service',
+    'close_confirmation_service',
+    
+    # Tx Journal
+    'TxJournal',
+    'get_tx_journal',
+    'close_tx_journal',
+    
     # Legacy
     'WalletManager',
     'Web3Provider'
@@ -1,10 +1,13 @@
 """
 Модуль аналитики для WalletSender v2.1.1
 SQL-запросы и агрегация данных для вкладки аналитики
+
+Сводные отчеты читают агрегаты tx_rollup / tx_latency_hist / tx_gas_hist,
+которые Store поддерживает триггерами при вставке и изменении транзакций.
 """
 
 import sqlite3
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass, field
 import json
@@ -33,9 +36,12 @@ class Analytics:
         """
         Получить общую статистику за период
         
+        Читает почасовые агрегаты tx_rollup (см. Store), а не tx_history.
+        Корзины агрегатов в UTC: границы периода переводятся в UTC.
+        
         Args:
-            start_date: Начало периода (None = 30 дней назад)
-            end_date: Конец периода (None = сейчас)
+            start_date: Начало периода (None = 30 дней назад); без tzinfo - местное время
+            end_date: Конец периода (None = сейчас); без tzinfo - местное время
             
         Returns:
             AnalyticsData с агрегированными данными
@@ -44,6 +50,8 @@ class Analytics:
             start_date = datetime.now() - timedelta(days=30)
         if not end_date:
             end_date = datetime.now()
+        start_bucket = start_date.astimezone(timezone.utc).strftime('%Y-%m-%d %H:00:00')
+        end_bucket = end_date.astimezone(timezone.utc).strftime('%Y-%m-%d %H:00:00')
             
         conn = self._get_connection()
         try:
@@ -52,20 +60,26 @@ class Analytics:
             # Общая статистика транзакций
             cursor.execute("""
                 SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'mined' THEN 1 ELSE 0 END) as success,
-                    SUM(CASE WHEN status IN ('failed', 'canceled') THEN 1 ELSE 0 END) as failed,
-                    SUM(amount_wei) as total_volume,
-                    SUM(gas_price_wei * gas_used) as total_gas,
-                    COUNT(DISTINCT from_addr) as unique_senders,
-                    COUNT(DISTINCT to_addr) as unique_receivers,
-                    AVG(gas_price_wei) as avg_gas_price
-                FROM tx_history
-                WHERE ts BETWEEN ? AND ?
-            """, (start_date, end_date))
+                    SUM(tx_count) as total,
+                    SUM(CASE WHEN status IN ('success', 'mined') THEN tx_count ELSE 0 END) as success,
+                    SUM(CASE WHEN status IN ('failed', 'canceled') THEN tx_count ELSE 0 END) as failed,
+                    SUM(amount_sum) as total_volume,
+                    SUM(gas_cost_sum) as total_gas,
+                    COUNT(DISTINCT CASE WHEN tx_count > 0 THEN sender END) as unique_senders,
+                    SUM(gas_price_sum) / NULLIF(SUM(gas_price_count), 0) as avg_gas_price
+                FROM tx_rollup
+                WHERE period = 'hour' AND bucket BETWEEN ? AND ?
+            """, (start_bucket, end_bucket))
             
             row = cursor.fetchone()
             
+            cursor.execute("""
+                SELECT COUNT(DISTINCT to_address) as unique_receivers
+                FROM tx_rollup_receivers
+                WHERE tx_count > 0 AND day BETWEEN ? AND ?
+            """, (start_bucket[:10], end_bucket[:10]))
+            unique_receivers = cursor.fetchone()['unique_receivers']
+            
             analytics = AnalyticsData(
                 period_start=start_date,
                 period_end=end_date,
@@ -75,40 +89,35 @@ class Analytics:
                 total_volume_wei=row['total_volume'] or 0,
                 total_gas_wei=row['total_gas'] or 0,
                 unique_senders=row['unique_senders'] or 0,
-                unique_receivers=row['unique_receivers'] or 0,
+                unique_receivers=unique_receivers or 0,
                 avg_gas_price=row['avg_gas_price'] or 0.0
             )
             
             # Статистика по токенам
             cursor.execute("""
-                SELECT 
-                    COALESCE(token, 'BNB') as token,
-                    COUNT(*) as count
-                FROM tx_history
-                WHERE ts BETWEEN ? AND ?
+                SELECT token, SUM(tx_count) as count
+                FROM tx_rollup
+                WHERE period = 'hour' AND bucket BETWEEN ? AND ?
                 GROUP BY token
-            """, (start_date, end_date))
+                HAVING SUM(tx_count) > 0
+            """, (start_bucket, end_bucket))
             
             for row in cursor.fetchall():
                 analytics.tokens_used[row['token']] = row['count']
                 
-            # Расчет перцентилей задержки (если есть данные о задержках)
-            # Для простоты используем время между created и mined статусом
+            # Перцентили задержки по гистограмме (created_at -> confirmed_at)
             cursor.execute("""
-                SELECT 
-                    (julianday(ts) - julianday(LAG(ts) OVER (PARTITION BY tx_hash ORDER BY ts))) * 86400000 as latency_ms
-                FROM tx_history
-                WHERE ts BETWEEN ? AND ?
-                    AND status = 'mined'
-                    AND tx_hash IS NOT NULL
-            """, (start_date, end_date))
-            
-            latencies = [row['latency_ms'] for row in cursor.fetchall() if row['latency_ms']]
-            if latencies:
-                latencies.sort()
-                n = len(latencies)
-                analytics.p50_latency_ms = latencies[n // 2] if n > 0 else 0
-                analytics.p95_latency_ms = latencies[int(n * 0.95)] if n > 0 else 0
+                SELECT le_ms, SUM(tx_count) as count
+                FROM tx_latency_hist
+                WHERE bucket BETWEEN ? AND ?
+                GROUP BY le_ms
+                ORDER BY le_ms
+            """, (start_bucket, end_bucket))
+            
+            histogram = [(row['le_ms'], row['count']) for row in cursor.fetchall() if row['count'] > 0]
+            if histogram:
+                analytics.p50_latency_ms = _histogram_percentile(histogram, 0.50)
+                analytics.p95_latency_ms = _histogram_percentile(histogram, 0.95)
                 
             return analytics
             
@@ -134,15 +143,16 @@ class Analytics:
             
             cursor.execute("""
                 SELECT 
-                    DATE(ts) as date,
-                    COUNT(*) as total_tx,
-                    SUM(CASE WHEN status = 'mined' THEN 1 ELSE 0 END) as success_tx,
-                    SUM(amount_wei) as volume_wei,
-                    SUM(gas_price_wei * gas_used) as gas_wei,
-                    COUNT(DISTINCT from_addr) as unique_senders
-                FROM tx_history
-                WHERE ts >= DATE('now', '-' || ? || ' days')
-                GROUP BY DATE(ts)
+                    bucket as date,
+                    SUM(tx_count) as total_tx,
+                    SUM(CASE WHEN status IN ('success', 'mined') THEN tx_count ELSE 0 END) as success_tx,
+                    SUM(amount_sum) as volume_wei,
+                    SUM(gas_cost_sum) as gas_wei,
+                    COUNT(DISTINCT CASE WHEN tx_count > 0 THEN sender END) as unique_senders
+                FROM tx_rollup
+                WHERE period = 'day' AND bucket >= DATE('now', '-' || ? || ' days')
+                GROUP BY bucket
+                HAVING SUM(tx_count) > 0
                 ORDER BY date DESC
             """, (days,))
             
@@ -287,16 +297,16 @@ class Analytics:
             
             cursor.execute("""
                 SELECT 
-                    COALESCE(token, 'BNB') as token,
-                    COUNT(*) as tx_count,
-                    SUM(CASE WHEN status = 'mined' THEN 1 ELSE 0 END) as success_count,
-                    SUM(amount_wei) as total_volume,
-                    AVG(amount_wei) as avg_amount,
-                    MIN(amount_wei) as min_amount,
-                    MAX(amount_wei) as max_amount
-                FROM tx_history
-                WHERE ts >= DATE('now', '-' || ? || ' days')
+                    token,
+                    SUM(tx_count) as tx_count,
+                    SUM(CASE WHEN status IN ('success', 'mined') THEN tx_count ELSE 0 END) as success_count,
+                    SUM(amount_sum) as total_volume,
+                    MIN(amount_min) as min_amount,
+                    MAX(amount_max) as max_amount
+                FROM tx_rollup
+                WHERE period = 'day' AND bucket >= DATE('now', '-' || ? || ' days')
                 GROUP BY token
+                HAVING SUM(tx_count) > 0
                 ORDER BY tx_count DESC
             """, (days,))
             
@@ -307,7 +317,7 @@ class Analytics:
                     'tx_count': row['tx_count'],
                     'success_count': row['success_count'],
                     'total_volume': row['total_volume'] or 0,
-                    'avg_amount': row['avg_amount'] or 0,
+                    'avg_amount': (row['total_volume'] or 0) / row['tx_count'],
                     'min_amount': row['min_amount'] or 0,
                     'max_amount': row['max_amount'] or 0,
                     'success_rate': (row['success_count'] / row['tx_count'] * 100) if row['tx_count'] > 0 else 0
@@ -325,6 +335,8 @@ class Analytics:
         """
         Получить аналитику по газу
         
+        Min/max и перцентили цены газа считаются по гистограмме с шагом 0.1 gwei.
+        
         Args:
             hours: Период анализа в часах
             
@@ -337,55 +349,37 @@ class Analytics:
             
             cursor.execute("""
                 SELECT 
-                    AVG(gas_price_wei) as avg_gas_price,
-                    MIN(gas_price_wei) as min_gas_price,
-                    MAX(gas_price_wei) as max_gas_price,
-                    AVG(gas_used) as avg_gas_used,
-                    MIN(gas_used) as min_gas_used,
-                    MAX(gas_used) as max_gas_used,
-                    AVG(gas_price_wei * gas_used) as avg_gas_cost,
-                    SUM(gas_price_wei * gas_used) as total_gas_cost
-                FROM tx_history
-                WHERE ts >= datetime('now', '-' || ? || ' hours')
-                    AND gas_price_wei IS NOT NULL
-                    AND gas_used IS NOT NULL
+                    SUM(gas_price_sum) / NULLIF(SUM(gas_price_count), 0) as avg_gas_price,
+                    SUM(gas_used_sum) / NULLIF(SUM(gas_used_count), 0) as avg_gas_used,
+                    SUM(gas_cost_sum) as total_gas_cost,
+                    SUM(gas_cost_sum) / NULLIF(SUM(CASE WHEN gas_cost_sum > 0 THEN tx_count ELSE 0 END), 0) as avg_gas_cost
+                FROM tx_rollup
+                WHERE period = 'hour' AND bucket >= strftime('%Y-%m-%d %H:00:00', 'now', '-' || ? || ' hours')
             """, (hours,))
             
             row = cursor.fetchone()
             
-            # Расчет перцентилей для gas_price
             cursor.execute("""
-                SELECT gas_price_wei
-                FROM tx_history
-                WHERE ts >= datetime('now', '-' || ? || ' hours')
-                    AND gas_price_wei IS NOT NULL
-                ORDER BY gas_price_wei
+                SELECT gwei, SUM(tx_count) as count
+                FROM tx_gas_hist
+                WHERE bucket >= strftime('%Y-%m-%d %H:00:00', 'now', '-' || ? || ' hours')
+                GROUP BY gwei
+                ORDER BY gwei
             """, (hours,))
             
-            prices = [row['gas_price_wei'] for row in cursor.fetchall()]
+            histogram = [(int(r['gwei'] * 10**9), r['count']) for r in cursor.fetchall() if r['count'] > 0]
             
             result = {
                 'avg_gas_price': row['avg_gas_price'] or 0,
-                'min_gas_price': row['min_gas_price'] or 0,
-                'max_gas_price': row['max_gas_price'] or 0,
+                'min_gas_price': histogram[0][0] if histogram else 0,
+                'max_gas_price': histogram[-1][0] if histogram else 0,
                 'avg_gas_used': row['avg_gas_used'] or 0,
-                'min_gas_used': row['min_gas_used'] or 0,
-                'max_gas_used': row['max_gas_used'] or 0,
                 'avg_gas_cost': row['avg_gas_cost'] or 0,
                 'total_gas_cost': row['total_gas_cost'] or 0
             }
             
-            if prices:
-                n = len(prices)
-                result['p25_gas_price'] = prices[n // 4] if n > 3 else prices[0]
-                result['p50_gas_price'] = prices[n // 2] if n > 1 else prices[0]
-                result['p75_gas_price'] = prices[3 * n // 4] if n > 3 else prices[-1]
-                result['p95_gas_price'] = prices[int(n * 0.95)] if n > 19 else prices[-1]
-            else:
-                result['p25_gas_price'] = 0
-                result['p50_gas_price'] = 0
-                result['p75_gas_price'] = 0
-                result['p95_gas_price'] = 0
+            for name, q in (('p25', 0.25), ('p50', 0.50), ('p75', 0.75), ('p95', 0.95)):
+                result[f'{name}_gas_price'] = _histogram_percentile(histogram, q) if histogram else 0
                 
             return result
             
@@ -394,3 +388,15 @@ class Analytics:
             return {}
         finally:
             conn.close()
+
+
+def _histogram_percentile(histogram: List[Tuple[float, int]], q: float) -> float:
+    """Перцентиль по отсортированной гистограмме [(граница, количество), ...]"""
+    total = sum(count for _, count in histogram)
+    target = q * total
+    seen = 0
+    for edge, count in histogram:
+        seen += count
+        if seen >= target:
+            return edge
+    return histogram[-1][0]
@@ -0,0 +1,578 @@
+"""
+Подтверждение транзакций по новым блокам
+
+Один фоновый поток следит за всеми транзакциями в полете. Вместо опроса
+квитанции по каждому хешу сервис на каждый новый блок запрашивает список
+хешей блока (eth_getBlockByNumber без тел транзакций) и пересекает его с
+набором отслеживаемых. Квитанции запрашиваются только для найденных: по
+одной или одним eth_getBlockReceipts, если наших транзакций в блоке много.
+10 тысяч транзакций в полете обходятся в 2-3 RPC вызова на блок.
+
+Хеши последних recent_blocks блоков хранятся в памяти, поэтому транзакция,
+поставленная на отслеживание уже после попадания в просмотренный блок, не
+теряется. Транзакции, которые могли попасть в блоки до начала наблюдения
+(pending строки истории после перезапуска, пропуск блоков при потере
+связи), проверяются точечно по квитанции небольшими порциями (sweep).
+
+Результат записывается событием mined/failed в журнал транзакций (его
+проекции обновляют tx_history и transactions), тикет nonce подтверждается
+или закрывается с ошибкой, подписчики получают уведомление.
+
+Транзакции, которые заменяет TxTracker, принадлежат трекеру: при замене
+наблюдение переносится на новый хеш (replace), а когда трекер разобрал
+nonce, наблюдение снимается без повторной записи и финализации (settle).
+"""
+
+import calendar
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .nonce_manager import NonceStatus, NonceTicket, get_nonce_manager
+from .store import get_store
+from .tx_journal import FAILED as JOURNAL_FAILED, MINED, get_tx_journal
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+SUCCESS = 'success'
+FAILED = 'failed'
+DROPPED = 'dropped'
+
+# Поля квитанции eth_getBlockReceipts, приходящие hex-числами
+_RECEIPT_QUANTITIES = ('blockNumber', 'cumulativeGasUsed', 'effectiveGasPrice', 'gasUsed',
+                       'status', 'transactionIndex', 'type')
+_LOG_QUANTITIES = ('blockNumber', 'logIndex', 'transactionIndex')
+
+
+def normalize_hash(tx_hash: Any) -> str:
+    """Хеш в виде 0x... в нижнем регистре"""
+    if not isinstance(tx_hash, str):
+        tx_hash = tx_hash.hex()
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith('0x') else '0x' + tx_hash
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return int(value, 16) if value.startswith('0x') else int(value)
+    return int(value)
+
+
+def _format_receipt(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Квитанция из ответа eth_getBlockReceipts с числами вместо hex строк"""
+    receipt = dict(item)
+    for key in _RECEIPT_QUANTITIES:
+        if key in receipt:
+            receipt[key] = _to_int(receipt[key])
+    receipt['logs'] = [
+        {key: (_to_int(value) if key in _LOG_QUANTITIES else value) for key, value in log.items()}
+        for log in receipt.get('logs') or []
+    ]
+    receipt['transactionHash'] = normalize_hash(receipt['transactionHash'])
+    return receipt
+
+
+def _utc_timestamp(value: Any) -> Optional[float]:
+    """Время создания строки истории (UTC) в unix timestamp"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return float(calendar.timegm(value.timetuple()))
+
+
+@dataclass
+class Watch:
+    """Отслеживаемая транзакция"""
+    tx_hash: str
+    since_block: Optional[int] = None
+    ticket: Optional[NonceTicket] = None
+    future: Future = field(default_factory=Future)
+    checked_block: Optional[int] = None
+
+
+class ConfirmationService:
+    """Фоновое подтверждение транзакций по новым блокам"""
+
+    def __init__(self, web3=None, nonce_manager=None, poll_interval: float = 1.0,
+                 recent_blocks: int = 64, max_catchup_blocks: int = 32, sweep_batch: int = 50,
+                 drop_after_blocks: int = 200, block_receipts_threshold: int = 8,
+                 reload_interval: float = 30.0, persist: bool = True):
+        """
+        Args:
+            web3: Web3 экземпляр (может быть установлен позже)
+            nonce_manager: NonceManager для финализации тикетов
+            poll_interval: Интервал проверки номера блока
+            recent_blocks: Сколько последних блоков хранить хеши в памяти
+            max_catchup_blocks: Максимум блоков, просматриваемых за один цикл после отставания
+            sweep_batch: Точечных проверок квитанций за цикл
+            drop_after_blocks: Через сколько блоков без квитанции проверять, не выброшена ли транзакция
+            block_receipts_threshold: С какого числа наших транзакций в блоке запрашивать все квитанции блока
+            reload_interval: Интервал подхвата pending строк истории (секунды, 0 - не подхватывать)
+            persist: Записывать результат в журнал транзакций
+        """
+        self.web3 = web3
+        self.nonce_manager = nonce_manager
+        self.poll_interval = poll_interval
+        self.recent_blocks = max(1, recent_blocks)
+        self.max_catchup_blocks = max(1, max_catchup_blocks)
+        self.sweep_batch = max(1, sweep_batch)
+        self.drop_after_blocks = drop_after_blocks
+        self.block_receipts_threshold = block_receipts_threshold
+        self.reload_interval = reload_interval
+        self.persist = persist
+
+        self.watched: Dict[str, Watch] = {}
+        self.lock = threading.Lock()
+        # Номер блока -> (время блока, хеши транзакций); непрерывный диапазон последних блоков
+        self.recent: 'OrderedDict[int, Tuple[float, Set[str]]]' = OrderedDict()
+        self.last_block: Optional[int] = None
+        # Найдены в уже просмотренных блоках, ждут квитанции
+        self._found: Dict[str, int] = {}
+        # Нужна точечная проверка квитанции (очередь и множество для проверки членства)
+        self._sweep: Deque[str] = deque()
+        self._sweep_set: Set[str] = set()
+        self._last_reload = 0.0
+
+        self.subscribers: List[Callable[[str, str, Optional[Dict[str, Any]]], None]] = []
+
+        # Статистика
+        self.total_resolved = 0
+        self.total_dropped = 0
+        self.blocks_scanned = 0
+        self.rpc_calls = 0
+
+        self.is_running = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_web3(self, web3):
+        """Установка Web3 экземпляра"""
+        self.web3 = web3
+
+    def start(self):
+        """Запуск фонового потока"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ConfirmationService")
+        self._thread.start()
+        logger.info("Сервис подтверждений запущен")
+
+    def stop(self):
+        """Остановка фонового потока"""
+        self.is_running = False
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+    def subscribe(self, callback: Callable[[str, str, Optional[Dict[str, Any]]], None]):
+        """Подписка на результаты: callback(tx_hash, status, receipt)"""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def watch(self, tx_hash: Any, ticket: Optional[NonceTicket] = None,
+              since_block: Optional[int] = None, sent_at: Optional[float] = None) -> Future:
+        """
+        Постановка транзакции на отслеживание
+
+        Args:
+            tx_hash: Хеш транзакции
+            ticket: NonceTicket для подтверждения или закрытия с ошибкой
+            since_block: Номер блока на момент отправки (если известен)
+            sent_at: Время отправки, unix timestamp (если известно)
+
+        Returns:
+            Future с квитанцией (None - транзакция выброшена из сети)
+        """
+        tx_hash = normalize_hash(tx_hash)
+        with self.lock:
+            existing = self.watched.get(tx_hash)
+            if existing:
+                if ticket and not existing.ticket:
+                    existing.ticket = ticket
+                return existing.future
+
+            # Номер блока неизвестен до первого цикла сканирования
+            current = since_block if since_block is not None else self.last_block
+            watch = Watch(tx_hash, current, ticket, checked_block=current)
+            self.watched[tx_hash] = watch
+
+            # Уже в просмотренном блоке?
+            found = next((number for number, (_, hashes) in self.recent.items() if tx_hash in hashes), None)
+            if found is not None:
+                self._found[tx_hash] = found
+            elif not self._covered(since_block, sent_at):
+                self._queue_sweep(tx_hash)
+        return watch.future
+
+    def _queue_sweep(self, tx_hash: str):
+        """Постановка в очередь точечной проверки (под self.lock)"""
+        if tx_hash not in self._sweep_set:
+            self._sweep_set.add(tx_hash)
+            self._sweep.append(tx_hash)
+
+    def replace(self, old_hash: Any, new_hash: Any):
+        """
+        Перенос наблюдения на замену транзакции (тот же nonce)
+
+        Future и тикет переходят к новому хешу: исходный не будет объявлен
+        выброшенным, тикет финализируется один раз.
+        """
+        old_hash, new_hash = normalize_hash(old_hash), normalize_hash(new_hash)
+        with self.lock:
+            watch = self.watched.pop(old_hash, None)
+            self._found.pop(old_hash, None)
+            if watch is None or new_hash in self.watched:
+                return
+            watch.tx_hash = new_hash
+            self.watched[new_hash] = watch
+            found = next((number for number, (_, hashes) in self.recent.items() if new_hash in hashes), None)
+            if found is not None:
+                self._found[new_hash] = found
+
+    def settle(self, hashes: List[Any], receipt: Optional[Dict[str, Any]] = None):
+        """
+        Снятие наблюдения с транзакций, которые разобрал их владелец (TxTracker)
+
+        Журнал и тикет nonce не трогаются; ожидающие получают квитанцию.
+        """
+        with self.lock:
+            watches = [self.watched.pop(normalize_hash(h), None) for h in hashes]
+        for watch in watches:
+            if watch is not None and not watch.future.done():
+                watch.future.set_result(receipt)
+
+    def _covered(self, since_block: Optional[int], sent_at: Optional[float]) -> bool:
+        """Просмотрены ли все блоки, в которые могла попасть транзакция"""
+        if not self.recent:
+            # Сканирование еще не начато или прервано
+            return False
+        oldest_block, (oldest_time, _) = next(iter(self.recent.items()))
+        if since_block is not None:
+            return since_block >= oldest_block
+        # Запас на расхождение часов узла и локальных
+        return sent_at is not None and sent_at >= oldest_time + 5
+
+    def wait(self, tx_hash: Any, timeout: float = 300, ticket: Optional[NonceTicket] = None) -> Optional[Dict[str, Any]]:
+        """
+        Ожидание квитанции (поток вызывающего ждет, RPC запросы выполняет сервис)
+
+        Returns:
+            Квитанция или None при таймауте и выброшенной транзакции
+        """
+        self.start()
+        future = self.watch(tx_hash, ticket, sent_at=time.time())
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def recheck(self, hashes: List[str]):
+        """Внеочередная проверка квитанций (например, по кнопке в истории)"""
+        for tx_hash in hashes:
+            tx_hash = normalize_hash(tx_hash)
+            self.watch(tx_hash)
+            with self.lock:
+                self._queue_sweep(tx_hash)
+
+    def _run(self):
+        while self.is_running:
+            try:
+                if self.web3:
+                    self.check_once()
+            except Exception as e:
+                logger.error(f"Ошибка сервиса подтверждений: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def check_once(self):
+        """Один цикл: новые блоки, найденные хеши, точечные проверки"""
+        if self.reload_interval and time.time() - self._last_reload >= self.reload_interval:
+            self._last_reload = time.time()
+            self.load_pending()
+
+        head = self.web3.eth.block_number
+        self.rpc_calls += 1
+
+        with self.lock:
+            last = self.last_block
+        if last is None:
+            last = head - 1
+        first = last + 1
+        if head - last > self.max_catchup_blocks:
+            # Пропущенные блоки не просматриваются: все отслеживаемые проверяются точечно
+            first = head - self.max_catchup_blocks + 1
+            logger.warning(f"Пропущено {first - last - 1} блоков, точечная проверка отслеживаемых")
+            with self.lock:
+                self.recent.clear()
+                for tx_hash in self.watched:
+                    self._queue_sweep(tx_hash)
+
+        for number in range(first, head + 1):
+            self._scan_block(number)
+
+        with self.lock:
+            found = dict(self._found)
+            self._found.clear()
+        for tx_hash, number in found.items():
+            self._fetch_receipts(number, [tx_hash])
+
+        self._sweep_once(head)
+
+    def _scan_block(self, number: int):
+        block = self.web3.eth.get_block(number)
+        self.rpc_calls += 1
+        hashes = {normalize_hash(h) for h in block.get('transactions', [])}
+
+        with self.lock:
+            self.recent[number] = (float(block.get('timestamp') or time.time()), hashes)
+            while len(self.recent) > self.recent_blocks:
+                self.recent.popitem(last=False)
+            self.last_block = number
+            matched = [h for h in hashes if h in self.watched]
+        self.blocks_scanned += 1
+
+        if matched:
+            self._fetch_receipts(number, matched)
+
+    def _fetch_receipts(self, number: int, hashes: List[str]):
+        receipts: Dict[str, Dict[str, Any]] = {}
+        if len(hashes) >= self.block_receipts_threshold:
+            receipts = self._block_receipts(number)
+        for tx_hash in hashes:
+            receipt = receipts.get(tx_hash)
+            if receipt is None:
+                receipt = self._receipt(tx_hash)
+            if receipt is not None:
+                self._resolve(tx_hash, receipt)
+            else:
+                # Узел еще не отдает квитанцию смайненной транзакции: повтор в следующем цикле
+                with self.lock:
+                    self._found[tx_hash] = number
+
+    def _block_receipts(self, number: int) -> Dict[str, Dict[str, Any]]:
+        """Все квитанции блока одним вызовом (если узел поддерживает eth_getBlockReceipts)"""
+        try:
+            response = self.web3.provider.make_request('eth_getBlockReceipts', [hex(number)])
+            self.rpc_calls += 1
+            result = response.get('result') or []
+        except Exception as e:
+            logger.debug(f"eth_getBlockReceipts недоступен: {e}")
+            return {}
+        receipts = {}
+        for item in result:
+            receipt = _format_receipt(item)
+            receipts[receipt['transactionHash']] = receipt
+        return receipts
+
+    def _receipt(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        self.rpc_calls += 1
+        try:
+            return self.web3.eth.get_transaction_receipt(tx_hash)
+        except Exception:
+            # TransactionNotFound или ошибка узла: повторим при следующей проверке
+            return None
+
+    def _sweep_once(self, head: int):
+        """Точечная проверка порции транзакций, которые могли быть пропущены"""
+        with self.lock:
+            for watch in self.watched.values():
+                if watch.since_block is None:
+                    watch.since_block = watch.checked_block = head
+                elif (self.drop_after_blocks and head - watch.checked_block >= self.drop_after_blocks
+                      and watch.tx_hash not in self._sweep_set):
+                    # Давно не подтвержденные: не выброшены ли они из мемпула
+                    watch.checked_block = head
+                    self._queue_sweep(watch.tx_hash)
+            batch = []
+            while self._sweep and len(batch) < self.sweep_batch:
+                tx_hash = self._sweep.popleft()
+                self._sweep_set.discard(tx_hash)
+                if tx_hash in self.watched:
+                    batch.append(self.watched[tx_hash])
+
+        for watch in batch:
+            receipt = self._receipt(watch.tx_hash)
+            if receipt is not None:
+                self._resolve(watch.tx_hash, receipt)
+            elif (self.drop_after_blocks and head - watch.since_block >= self.drop_after_blocks
+                  and self._is_dropped(watch.tx_hash)):
+                self._resolve(watch.tx_hash, None)
+            else:
+                watch.checked_block = head
+
+    def _is_dropped(self, tx_hash: str) -> bool:
+        self.rpc_calls += 1
+        try:
+            return self.web3.eth.get_transaction(tx_hash) is None
+        except Exception as e:
+            return 'not found' in str(e).lower()
+
+    def _resolve(self, tx_hash: str, receipt: Optional[Dict[str, Any]]):
+        """Финализация: история, тикет nonce, подписчики"""
+        with self.lock:
+            watch = self.watched.pop(tx_hash, None)
+        if watch is None:
+            return
+
+        if receipt is None:
+            status = DROPPED
+            self.total_dropped += 1
+        else:
+            status = SUCCESS if receipt.get('status') == 1 else FAILED
+        self.total_resolved += 1
+
+        if self.persist:
+            self._persist(tx_hash, status, receipt)
+
+        # Тикет, уже финализированный владельцем транзакции, не трогаем
+        if watch.ticket and getattr(watch.ticket, 'status', None) not in (
+                NonceStatus.CONFIRMED, NonceStatus.FAILED, NonceStatus.EXPIRED):
+            manager = self.nonce_manager or get_nonce_manager()
+            try:
+                if status == SUCCESS:
+                    manager.confirm(watch.ticket)
+                else:
+                    manager.fail(watch.ticket, 'reverted' if status == FAILED else 'dropped')
+            except Exception as e:
+                logger.error(f"Ошибка финализации nonce для {tx_hash}: {e}")
+
+        if not watch.future.done():
+            watch.future.set_result(receipt)
+        for callback in list(self.subscribers):
+            try:
+                callback(tx_hash, status, receipt)
+            except Exception as e:
+                logger.error(f"Ошибка в подписчике подтверждений: {e}")
+        logger.debug(f"Транзакция {tx_hash}: {status}")
+
+    def _persist(self, tx_hash: str, status: str, receipt: Optional[Dict[str, Any]]):
+        """Событие журнала; tx_history и transactions обновляют его проекции"""
+        try:
+            if receipt is None:
+                get_tx_journal().append(JOURNAL_FAILED, tx_hash, status=FAILED, note='dropped')
+            else:
+                get_tx_journal().append(MINED, tx_hash, status=status,
+                                        gas_used=receipt.get('gasUsed'),
+                                        block_number=receipt.get('blockNumber'))
+        except Exception as e:
+            logger.error(f"Ошибка записи результата {tx_hash} в журнал транзакций: {e}")
+
+    def _pending_rows(self) -> List[Tuple[str, Optional[float]]]:
+        rows: List[Tuple[str, Optional[float]]] = []
+        try:
+            with get_store().get_connection() as conn:
+                for tx_hash, created_at in conn.execute(
+                    "SELECT tx_hash, created_at FROM tx_history WHERE status = 'pending' AND tx_hash IS NOT NULL"
+                ):
+                    rows.append((tx_hash, _utc_timestamp(created_at)))
+        except Exception as e:
+            logger.debug(f"Не удалось прочитать pending из tx_history: {e}")
+        try:
+            from ..database.database import get_database
+            from ..database.models import Transaction
+            session = get_database().get_session()
+            try:
+                for tx_hash, created_at in session.query(Transaction.tx_hash, Transaction.created_at).filter(
+                    Transaction.status == 'pending', Transaction.tx_hash.isnot(None)
+                ):
+                    rows.append((tx_hash, _utc_timestamp(created_at)))
+            finally:
+                session.close()
+        except Exception as e:
+            logger.debug(f"Не удалось прочитать pending из transactions: {e}")
+        return rows
+
+    def load_pending(self) -> int:
+        """
+        Подхват pending строк tx_history и transactions
+
+        Returns:
+            Количество новых отслеживаемых транзакций
+        """
+        added = 0
+        for tx_hash, created_at in self._pending_rows():
+            tx_hash = normalize_hash(tx_hash)
+            if tx_hash in self.watched:
+                continue
+            self.watch(tx_hash, sent_at=created_at)
+            added += 1
+        if added:
+            logger.info(f"На отслеживание поставлено {added} pending транзакций из истории")
+        return added
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'watched': len(self.watched),
+                'sweep_queue': len(self._sweep),
+                'last_block': self.last_block,
+                'blocks_scanned': self.blocks_scanned,
+                'rpc_calls': self.rpc_calls,
+                'total_resolved': self.total_resolved,
+                'total_dropped': self.total_dropped,
+            }
+
+
+# Глобальный экземпляр
+_confirmation_service: Optional[ConfirmationService] = None
+_confirmation_lock = threading.Lock()
+
+
+def get_confirmation_service(web3=None) -> ConfirmationService:
+    """Получение глобального сервиса подтверждений (запускается при первом обращении)"""
+    global _confirmation_service
+
+    with _confirmation_lock:
+        if _confirmation_service is None:
+            settings = {}
+            try:
+                from ..config import get_config
+                settings = get_config().get('confirmations', {}) or {}
+            except Exception:
+                pass
+            _confirmation_service = ConfirmationService(
+                web3,
+                poll_interval=settings.get('poll_interval', 1.0),
+                recent_blocks=settings.get('recent_blocks', 64),
+                max_catchup_blocks=settings.get('max_catchup_blocks', 32),
+                sweep_batch=settings.get('sweep_batch', 50),
+                drop_after_blocks=settings.get('drop_after_blocks', 200),
+                block_receipts_threshold=settings.get('block_receipts_threshold', 8),
+                reload_interval=settings.get('reload_interval', 30.0)
+            )
+            _confirmation_service.start()
+        elif web3 and not _confirmation_service.web3:
+            _confirmation_service.set_web3(web3)
+
+    return _confirmation_service
+
+
+def current_confirmation_service() -> Optional[ConfirmationService]:
+    """Глобальный сервис подтверждений, если он уже создан (без запуска)"""
+    return _confirmation_service
+
+
+def close_confirmation_service():
+    """Остановка глобального сервиса подтверждений"""
+    global _confirmation_service
+
+    with _confirmation_lock:
+        if _confirmation_service:
+            _confirmation_service.stop()
+            _confirmation_service = None
@@ -0,0 +1,207 @@
+"""
+Шардирование массовой рассылки по нескольким кошелькам-отправителям
+
+Получатели делятся между K отправителями, каждый шард выполняется в
+отдельном процессе со своим Web3 клиентом и своей полосой nonce (аренда
+NonceLease в локальном NonceManager процесса). Пропускная способность
+растет с числом отправителей, а не упирается в последовательность nonce
+одного аккаунта.
+
+У каждого отправителя свой файл журнала nonce: после падения процесса
+следующий запуск шарда повторно отправляет потерянные транзакции, как и
+глобальный NonceManager. Без явной цены газа шард берет уровень из
+собственного GasOracle по последним блокам.
+
+Процесс шарда не пишет в БД: о каждой транзакции он сообщает событием в
+очередь, а родительский ShardedDistributionExecutor агрегирует прогресс в
+одну задачу, сохраняет транзакции и ставит их на отслеживание.
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from web3 import Web3
+from web3.middleware import geth_poa_middleware
+from eth_account import Account
+
+from .nonce_journal import DEFAULT_PATH, NonceJournal
+from .nonce_manager import NonceManager
+from ..utils.gas_manager import GasOracle, GasPriority
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# События процесса шарда: (тип, номер шарда, ...)
+SENT = 'sent'            # (SENT, shard, index, recipient, tx_hash, tx)
+FAILED = 'failed'        # (FAILED, shard, index, recipient, error)
+SHARD_DONE = 'done'      # (SHARD_DONE, shard, error или None)
+
+TRANSFER_ABI = [{
+    "constant": False,
+    "inputs": [
+        {"name": "_to", "type": "address"},
+        {"name": "_value", "type": "uint256"}
+    ],
+    "name": "transfer",
+    "outputs": [{"name": "", "type": "bool"}],
+    "type": "function"
+}]
+
+
+def shard_addresses(addresses: List[str], count: int) -> List[List[Tuple[int, str]]]:
+    """
+    Распределение получателей по шардам по кругу
+
+    Returns:
+        Для каждого шарда список пар (индекс в исходном списке, адрес)
+    """
+    count = max(1, min(int(count), len(addresses) or 1))
+    shards: List[List[Tuple[int, str]]] = [[] for _ in range(count)]
+    for index, address in enumerate(addresses):
+        shards[index % count].append((index, address))
+    return shards
+
+
+def journal_path(base_path: Optional[str], sender: str) -> str:
+    """Файл журнала nonce отправителя шарда рядом с основным журналом"""
+    root, ext = os.path.splitext(base_path or DEFAULT_PATH)
+    return f"{root}_{sender.lower()}{ext or '.db'}"
+
+
+def shard_gas_price(params: Dict[str, Any], oracle: Optional[GasOracle]) -> int:
+    """
+    Цена газа очередной транзакции шарда
+
+    Явная params['gas_price_wei'] имеет приоритет, иначе уровень
+    params['gas_priority'] из оракула, а без снимка - цена, рассчитанная
+    родителем при запуске (params['fallback_gas_price_wei']).
+    """
+    if params.get('gas_price_wei') is not None:
+        return params['gas_price_wei']
+    tiers = oracle.get_tiers() if oracle else None
+    if tiers is not None:
+        try:
+            priority = GasPriority(params.get('gas_priority', GasPriority.STANDARD.value))
+        except ValueError:
+            priority = GasPriority.STANDARD
+        return tiers.get(priority)
+    return params['fallback_gas_price_wei']
+
+
+def make_client(url: str, timeout: int = 30) -> Web3:
+    """Web3 клиент процесса шарда (с POA middleware для BSC)"""
+    w3 = Web3(Web3.HTTPProvider(url, request_kwargs={'timeout': timeout}))
+    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    return w3
+
+
+def build_transfer_tx(w3: Web3, params: Dict[str, Any], sender: str, recipient: str,
+                      nonce: int, chain_id: int, gas_price_wei: Optional[int] = None) -> Dict[str, Any]:
+    """Транзакция перевода BNB или ERC20 для одного получателя"""
+    if gas_price_wei is None:
+        gas_price_wei = params['gas_price_wei']
+    token_address = params.get('token_address')
+    amount = params['amount_per_address']
+    if token_address and token_address != "BNB":
+        contract = w3.eth.contract(address=Web3.to_checksum_address(token_address), abi=TRANSFER_ABI)
+        amount_wei = int(amount * (10 ** params.get('token_decimals', 18)))
+        return contract.functions.transfer(
+            Web3.to_checksum_address(recipient),
+            amount_wei
+        ).build_transaction({
+            'from': sender,
+            'gas': params.get('gas_limit', 100000),
+            'gasPrice': gas_price_wei,
+            'nonce': nonce,
+            'chainId': chain_id
+        })
+    return {
+        'from': sender,
+        'to': Web3.to_checksum_address(recipient),
+        'value': w3.to_wei(amount, 'ether'),
+        'gas': params.get('gas_limit', 21000),
+        'gasPrice': gas_price_wei,
+        'nonce': nonce,
+        'chainId': chain_id
+    }
+
+
+def run_shard(shard: int, sender_key: str, items: List[Tuple[int, str]], params: Dict[str, Any],
+              events, run_event, cancel_event, client: Optional[Web3] = None):
+    """
+    Точка входа процесса шарда
+
+    Args:
+        shard: Номер шарда
+        sender_key: Приватный ключ отправителя шарда
+        items: Пары (индекс, адрес получателя)
+        params: Параметры рассылки (rpc_url, token_address, amount_per_address,
+            gas_price_wei или gas_priority и fallback_gas_price_wei, gas_limit,
+            token_decimals, delay_between_tx, nonce_journal_path)
+        events: Очередь событий для родительского процесса
+        run_event: Сброшен - шард на паузе
+        cancel_event: Установлен - шард останавливается
+        client: Готовый Web3 клиент (по умолчанию создается по params['rpc_url'])
+    """
+    error = None
+    lease = None
+    nonce_manager = None
+    try:
+        w3 = client or make_client(params['rpc_url'], params.get('timeout', 30))
+        account = Account.from_key(sender_key)
+        sender = account.address
+        chain_id = w3.eth.chain_id
+        # Локальный менеджер процесса: полоса nonce только этого отправителя,
+        # журнал восстанавливает ее после падения процесса
+        journal = None
+        if params.get('nonce_journal_path'):
+            journal = NonceJournal(db_path=params['nonce_journal_path'])
+        nonce_manager = NonceManager(w3, journal=journal)
+        oracle = None
+        if params.get('gas_price_wei') is None:
+            oracle = GasOracle(w3, interval=params.get('gas_oracle_interval', 3.0))
+        gas_checked_at = 0.0
+        delay = params.get('delay_between_tx', 1.0)
+
+        logger.info(f"Шард {shard}: {len(items)} получателей от {sender}")
+
+        for position, (index, recipient) in enumerate(items):
+            run_event.wait()
+            if cancel_event.is_set():
+                break
+
+            if lease is None or lease.exhausted:
+                lease = nonce_manager.lease(sender, len(items) - position)
+            if oracle and time.monotonic() - gas_checked_at >= oracle.interval:
+                gas_checked_at = time.monotonic()
+                try:
+                    oracle.refresh()
+                except Exception as e:
+                    logger.debug(f"Шард {shard}: ошибка обновления оракула газа: {e}")
+
+            nonce = lease.next()
+            try:
+                tx = build_transfer_tx(w3, params, sender, recipient, nonce, chain_id,
+                                       shard_gas_price(params, oracle))
+                signed_tx = account.sign_transaction(tx)
+                tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction).hex()
+                lease.complete(nonce, tx_hash, signed_tx.rawTransaction)
+                events.put((SENT, shard, index, recipient, tx_hash, tx))
+            except Exception as e:
+                # Аренда закрывается и откатывается к неотправленному nonce
+                lease.fail(nonce, str(e))
+                events.put((FAILED, shard, index, recipient, str(e)))
+
+            if delay:
+                time.sleep(delay)
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Шард {shard} остановлен: {e}")
+    finally:
+        if lease is not None and not lease.exhausted:
+            lease.release()
+        if nonce_manager is not None:
+            nonce_manager.shutdown()
+        events.put((SHARD_DONE, shard, error))
@@ -6,6 +6,7 @@ import time
 import threading
 import queue
 import asyncio
+import multiprocessing
 from typing import Dict, List, Optional, Any, Callable
 from datetime import datetime, timedelta
 from enum import Enum
@@ -15,7 +16,12 @@ from eth_account import Account
 from .store import get_store
 from .rpc import get_rpc_pool
 from .nonce_manager import NonceManager, get_nonce_manager
+from .tx_tracker import get_tx_tracker
+from . import tx_journal
+from . import distribution_shards
 from ..utils.logger import get_logger
+from ..utils import startup_timing
+from ..utils.gas_manager import GasPriority, get_gas_oracle, start_gas_oracle
 from ..config import get_config
 from ..constants import ERC20_ABI
 
@@ -41,6 +47,8 @@ class JobEngine:
         self.rpc_pool = get_rpc_pool()
         self.config = get_config()
         self.nonce_manager = get_nonce_manager()  # Используем глобальный экземпляр
+        self.tx_tracker = get_tx_tracker()  # Замена зависших транзакций
+        self.journal = tx_journal.get_tx_journal()  # События транзакций -> tx_history и аналитика
         
         self.job_queue = queue.PriorityQueue()
         self.active_jobs = {}  # {job_id: JobExecutor}
@@ -68,6 +76,14 @@ class JobEngine:
         self.is_running = True
         self.main_thread = threading.Thread(target=self._run, daemon=True)
         self.main_thread.start()
+        
+        # Оракул газа для задач без явной цены
+        try:
+            client = self.rpc_pool.get_client()
+            if client is not None:
+                start_gas_oracle(client)
+        except Exception as e:
+            logger.warning(f"Оракул газа не запущен: {e}")
         logger.info("JobEngine запущен")
     
     def stop(self):
@@ -148,6 +164,8 @@ class JobEngine:
             # Создаем исполнитель в зависимости от типа
             if job['mode'] == 'distribution':
                 executor = DistributionExecutor(job_id, job, self)
+            elif job['mode'] == 'sharded_distribution':
+                executor = ShardedDistributionExecutor(job_id, job, self)
             elif job['mode'] == 'auto_buy':
                 executor = AutoBuyExecutor(job_id, job, self)
             elif job['mode'] == 'auto_sell':
@@ -382,6 +400,27 @@ class BaseExecutor:
         
         return None
     
+    def gas_price_wei(self, w3: Web3, default_gwei: float = 5) -> int:
+        """
+        Цена газа для транзакции задачи
+        
+        Явно заданный в конфиге задачи 'gas_price' (gwei) имеет приоритет,
+        иначе берется уровень 'gas_priority' из оракула по последним блокам.
+        """
+        if self.config.get('gas_price') is not None:
+            return w3.to_wei(self.config['gas_price'], 'gwei')
+        
+        oracle = get_gas_oracle()
+        tiers = oracle.get_tiers() if oracle else None
+        if tiers is not None:
+            try:
+                priority = GasPriority(self.config.get('gas_priority', GasPriority.STANDARD.value))
+            except ValueError:
+                priority = GasPriority.STANDARD
+            return tiers.get(priority)
+        
+        return w3.to_wei(default_gwei, 'gwei')
+    
     def update_progress(self):
         """Обновление прогресса в БД"""
         self.engine.store.update_job(
@@ -443,6 +482,8 @@ class DistributionExecutor(BaseExecutor):
                     # Резервируем nonce
                     ticket = self.engine.nonce_manager.reserve(sender_address)
                     nonce = ticket.nonce
+                    self.engine.journal.append(tx_journal.RESERVED, from_address=sender_address,
+                                               to_address=recipient, nonce=nonce, job_id=self.job_id)
                     
                     # Формируем транзакцию
                     if token_address and token_address != "BNB":
@@ -458,27 +499,36 @@ class DistributionExecutor(BaseExecutor):
                             'to': recipient,
                             'value': w3.to_wei(amount_per_address, 'ether'),
                             'gas': self.config.get('gas_limit', 21000),
-                            'gasPrice': w3.to_wei(self.config.get('gas_price', 5), 'gwei'),
+                            'gasPrice': self.gas_price_wei(w3),
                             'nonce': nonce
                         }
                     
                     # Подписываем и отправляем
                     signed_tx = account.sign_transaction(tx)
+                    self.engine.journal.append(tx_journal.SIGNED, signed_tx.hash.hex(),
+                                               from_address=sender_address, nonce=nonce, job_id=self.job_id)
                     tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
                     
                     # Подтверждаем использование nonce
-                    self.engine.nonce_manager.complete(ticket, tx_hash.hex())
+                    self.engine.nonce_manager.complete(ticket, tx_hash.hex(), signed_tx.rawTransaction)
+                    
+                    # Отслеживаем до майнинга (замена при зависании)
+                    if not self.engine.tx_tracker.web3:
+                        self.engine.tx_tracker.set_web3(w3)
+                    self.engine.tx_tracker.track(tx, tx_hash.hex(), sender_address,
+                                                 account.sign_transaction, ticket)
                     
-                    # Сохраняем в БД
-                    self.engine.store.add_transaction(
-                        tx_hash=tx_hash.hex(),
+                    # Событие журнала; строку tx_history строит проекция
+                    self.engine.journal.append(
+                        tx_journal.BROADCAST,
+                        tx_hash.hex(),
                         from_address=sender_address,
                         to_address=recipient,
                         token_address=token_address or 'BNB',
                         amount=amount_per_address,
                         gas_price=tx['gasPrice'],
                         gas_limit=tx['gas'],
-                        status='pending',
+                        nonce=nonce,
                         type='distribution',
                         job_id=self.job_id
                     )
@@ -489,6 +539,8 @@ class DistributionExecutor(BaseExecutor):
                 except Exception as e:
                     logger.error(f"Ошибка отправки на {recipient}: {e}")
                     self.failed_count += 1
+                    self.engine.journal.append(tx_journal.FAILED, from_address=sender_address,
+                                               to_address=recipient, error=str(e), job_id=self.job_id)
                     
                     # Отмечаем неудачу использования nonce
                     if 'ticket' in locals():
@@ -541,13 +593,210 @@ class DistributionExecutor(BaseExecutor):
         ).build_transaction({
             'from': sender,
             'gas': self.config.get('gas_limit', 100000),
-            'gasPrice': w3.to_wei(self.config.get('gas_price', 5), 'gwei'),
+            'gasPrice': self.gas_price_wei(w3),
             'nonce': nonce
         })
         
         return tx
 
 
+class ShardedDistributionExecutor(BaseExecutor):
+    """
+    Массовая рассылка с нескольких кошельков: шард на отправителя, процесс на шард
+
+    Процессы шардов сообщают о транзакциях через очередь событий; исполнитель
+    агрегирует прогресс в одну задачу, пишет транзакции в БД и ставит их на
+    отслеживание зависших.
+    """
+
+    def __init__(self, job_id: int, job: Dict, engine: JobEngine):
+        super().__init__(job_id, job, engine)
+        ctx = multiprocessing.get_context('spawn')
+        self._ctx = ctx
+        self._run_event = ctx.Event()
+        self._run_event.set()
+        self._cancel_event = ctx.Event()
+
+    def pause(self):
+        super().pause()
+        self._run_event.clear()
+
+    def resume(self):
+        super().resume()
+        self._run_event.set()
+
+    def cancel(self):
+        super().cancel()
+        self._cancel_event.set()
+        self._run_event.set()
+
+    def _shard_urls(self) -> List[str]:
+        """RPC endpoints для шардов: основной первым, остальные по кругу"""
+        primary = self.engine.rpc_pool.current_primary()
+        urls = [ep['url'] for ep in getattr(self.engine.rpc_pool, 'endpoints', [])]
+        if primary:
+            urls = [primary] + [url for url in urls if url != primary]
+        return urls
+
+    def run(self):
+        """Выполнение шардированной рассылки"""
+        self.start_time = time.time()
+        processes = {}
+
+        try:
+            addresses = self.config.get('addresses', [])
+            sender_keys = self.config.get('sender_keys', [])
+            token_address = self.config.get('token_address')
+            amount_per_address = self.config.get('amount_per_address')
+
+            if not addresses or not sender_keys:
+                raise ValueError("Отсутствуют обязательные параметры")
+
+            self.total_count = len(addresses)
+            self.engine.store.update_job(self.job_id, total=self.total_count)
+
+            w3 = self.engine.rpc_pool.get_client()
+            urls = self._shard_urls()
+            if not w3 or not urls:
+                raise Exception("Не удалось получить Web3 соединение")
+
+            explicit_gas_price = self.config.get('gas_price')
+            params = {
+                'token_address': token_address,
+                'amount_per_address': amount_per_address,
+                'token_decimals': self.config.get('token_decimals', 18),
+                'gas_limit': self.config.get('gas_limit', 100000),
+                # Без явной цены шард следит за газом через свой оракул
+                'gas_price_wei': (w3.to_wei(explicit_gas_price, 'gwei')
+                                  if explicit_gas_price is not None else None),
+                'gas_priority': self.config.get('gas_priority', GasPriority.STANDARD.value),
+                'fallback_gas_price_wei': self.gas_price_wei(w3),
+                'delay_between_tx': self.config.get('delay_between_tx', 1.0),
+                'timeout': self.config.get('rpc_timeout', 30)
+            }
+            journal_settings = get_config().get('nonce_journal', {}) or {}
+
+            shards = distribution_shards.shard_addresses(addresses, len(sender_keys))
+            senders = [Account.from_key(key) for key in sender_keys[:len(shards)]]
+            events = self._ctx.Queue()
+
+            for shard, items in enumerate(shards):
+                shard_params = dict(params, rpc_url=urls[shard % len(urls)])
+                if journal_settings.get('enabled', True):
+                    shard_params['nonce_journal_path'] = distribution_shards.journal_path(
+                        journal_settings.get('path') or None, senders[shard].address)
+                process = self._ctx.Process(
+                    target=distribution_shards.run_shard,
+                    args=(shard, sender_keys[shard], items, shard_params,
+                          events, self._run_event, self._cancel_event),
+                    name=f'job{self.job_id}-shard{shard}',
+                    daemon=True
+                )
+                process.start()
+                processes[shard] = process
+
+            logger.info(f"Рассылка {self.total_count} адресов в {len(shards)} шардах "
+                        f"от {len(senders)} отправителей")
+
+            if not self.engine.tx_tracker.web3:
+                self.engine.tx_tracker.set_web3(w3)
+
+            processed = {shard: 0 for shard in processes}
+            finished = set()
+            last_progress = time.time()
+
+            while len(finished) < len(processes):
+                try:
+                    event = events.get(timeout=0.5)
+                except queue.Empty:
+                    # Шард, завершившийся без события done (аварийно), - остаток в ошибки
+                    dead = [s for s, p in processes.items() if s not in finished and p.exitcode is not None]
+                    for event in self._drain(events):
+                        self._handle_event(event, senders, processed, finished, token_address)
+                    for shard in dead:
+                        if shard not in finished:
+                            lost = len(shards[shard]) - processed[shard]
+                            logger.error(f"Шард {shard} завершился с кодом {processes[shard].exitcode}, "
+                                         f"не обработано {lost} адресов")
+                            if not self.is_cancelled:
+                                self.failed_count += lost
+                            finished.add(shard)
+                else:
+                    self._handle_event(event, senders, processed, finished, token_address)
+
+                if time.time() - last_progress >= 1:
+                    self.update_progress()
+                    last_progress = time.time()
+
+            # Основной nonce manager мог закешировать nonce этих отправителей
+            for sender in senders:
+                try:
+                    self.engine.nonce_manager.resync(sender.address)
+                except Exception as e:
+                    logger.debug(f"Ресинхронизация nonce {sender.address} не удалась: {e}")
+
+            self.is_done = True
+            self.update_progress()
+
+            logger.info(f"Шардированная рассылка завершена: {self.done_count} успешно, "
+                        f"{self.failed_count} ошибок")
+
+        except Exception as e:
+            logger.error(f"Критическая ошибка в ShardedDistributionExecutor: {e}")
+            self.is_done = True
+        finally:
+            self._cancel_event.set()
+            self._run_event.set()
+            for process in processes.values():
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    @staticmethod
+    def _drain(events) -> List[tuple]:
+        drained = []
+        while True:
+            try:
+                drained.append(events.get_nowait())
+            except queue.Empty:
+                return drained
+
+    def _handle_event(self, event: tuple, senders: List[Any],
+                      processed: Dict[int, int], finished: set, token_address: Optional[str]):
+        """Учет события процесса шарда"""
+        kind, shard = event[0], event[1]
+
+        if kind == distribution_shards.SENT:
+            _, _, index, recipient, tx_hash, tx = event
+            processed[shard] += 1
+            self.done_count += 1
+            self.engine.tx_tracker.track(tx, tx_hash, senders[shard].address, senders[shard].sign_transaction)
+            self.engine.journal.append(
+                tx_journal.BROADCAST,
+                tx_hash,
+                from_address=senders[shard].address,
+                to_address=recipient,
+                token_address=token_address or 'BNB',
+                amount=self.config.get('amount_per_address'),
+                gas_price=tx['gasPrice'],
+                gas_limit=tx['gas'],
+                nonce=tx.get('nonce'),
+                type='distribution',
+                job_id=self.job_id
+            )
+        elif kind == distribution_shards.FAILED:
+            _, _, index, recipient, error = event
+            processed[shard] += 1
+            self.failed_count += 1
+            self.engine.journal.append(tx_journal.FAILED, from_address=senders[shard].address,
+                                       to_address=recipient, error=error, job_id=self.job_id)
+            logger.error(f"Шард {shard}: ошибка отправки на {recipient}: {error}")
+        elif kind == distribution_shards.SHARD_DONE:
+            if event[2]:
+                logger.error(f"Шард {shard} остановлен с ошибкой: {event[2]}")
+            finished.add(shard)
+
+
 class AutoBuyExecutor(BaseExecutor):
     """Исполнитель автоматических покупок"""
     
@@ -776,7 +1025,7 @@ class AutoSellExecutor(BaseExecutor):
                                     'from': seller_address,
                                     'nonce': nonce,
                                     'gas': 60000,
-                                    'gasPrice': w3.to_wei(5, 'gwei')
+                                    'gasPrice': self.gas_price_wei(w3)
                                 })
                                 
                                 # Подписываем и отправляем approve
@@ -795,7 +1044,8 @@ class AutoSellExecutor(BaseExecutor):
                                     raise Exception(f"Approve не подтвержден: {approve_error}")
                                 
                                 # Обновляем nonce для swap транзакции
-                                self.engine.nonce_manager.complete(ticket, approve_hash.hex())
+                                self.engine.nonce_manager.complete(ticket, approve_hash.hex(),
+                                                                  signed_approve.rawTransaction)
                                 ticket = self.engine.nonce_manager.reserve(seller_address)
                                 nonce = ticket.nonce
                             
@@ -839,7 +1089,7 @@ class AutoSellExecutor(BaseExecutor):
                                 'from': seller_address,
                                 'nonce': nonce,
                                 'gas': 300000,
-                                'gasPrice': w3.to_wei(5, 'gwei')
+                                'gasPrice': self.gas_price_wei(w3)
                             })
                             
                             # Подписываем и отправляем swap
@@ -847,19 +1097,24 @@ class AutoSellExecutor(BaseExecutor):
                             tx_hash = w3.eth.send_raw_transaction(signed_swap.rawTransaction)
                             
                             # Подтверждаем использование nonce
-                            self.engine.nonce_manager.complete(ticket, tx_hash.hex())
+                            self.engine.nonce_manager.complete(ticket, tx_hash.hex(), signed_swap.rawTransaction)
+                            if not self.engine.tx_tracker.web3:
+                                self.engine.tx_tracker.set_web3(w3)
+                            self.engine.tx_tracker.track(swap_tx, tx_hash.hex(), seller_address,
+                                                         account.sign_transaction, ticket)
                             ticket = None  # Помечаем как использованный
                             
-                            # Сохраняем транзакцию в БД
-                            self.engine.store.add_transaction(
-                                tx_hash=tx_hash.hex(),
+                            # Событие журнала; строку tx_history строит проекция
+                            self.engine.journal.append(
+                                tx_journal.BROADCAST,
+                                tx_hash.hex(),
                                 from_address=seller_address,
                                 to_address=PANCAKE_ROUTER,
                                 token_address=Web3.to_checksum_address(token_address),
                                 amount=amount_to_sell / (10 ** token_decimals),  # ИСПРАВЛЕНИЕ: Используем правильные decimals
                                 gas_price=swap_tx.get('gasPrice', 0),
                                 gas_limit=swap_tx.get('gas', 0),
-                                status='pending',
+                                nonce=nonce,
                                 type='sell',
                                 job_id=self.job_id
                             )
@@ -917,8 +1172,9 @@ def get_job_engine() -> JobEngine:
     global _job_engine
     
     if _job_engine is None:
-        _job_engine = JobEngine()
-        _job_engine.start()
+        with startup_timing.measure('get_job_engine'):
+            _job_engine = JobEngine()
+            _job_engine.start()
     
     return _job_engine
 
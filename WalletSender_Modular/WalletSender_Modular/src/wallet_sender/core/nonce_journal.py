@@ -0,0 +1,224 @@
+"""
+Журнал nonce для восстановления NonceManager после сбоя
+
+Все резервирования, отправки, подтверждения и ошибки записываются в небольшую
+SQLite таблицу. Запись групповая: вызывающий поток только кладет событие в
+буфер, фоновый писатель коммитит пачку раз в flush_interval (WAL + fsync на
+коммите). При старте журнал воспроизводится и сверяется с сетью: вместе с
+отправкой хранится подписанная транзакция, чтобы заново отправить ту, что
+узел потерял.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Действия журнала
+RESERVE = 'reserve'
+BROADCAST = 'broadcast'
+REPLACE = 'replace'
+CONFIRM = 'confirm'
+FAIL = 'fail'
+EXPIRE = 'expire'
+
+
+@dataclass
+class JournaledAddress:
+    """Состояние адреса, восстановленное из журнала"""
+    address: str
+    max_broadcast_nonce: Optional[int] = None
+    # nonce -> tx_hash для отправленных, но не подтвержденных транзакций
+    inflight: Dict[int, str] = field(default_factory=dict)
+    # nonce -> подписанная транзакция (hex) для повторной отправки
+    raw: Dict[int, str] = field(default_factory=dict)
+    # Зарезервированные, но так и не отправленные nonce
+    reserved: Set[int] = field(default_factory=set)
+
+
+# Файл журнала по умолчанию (в корне проекта)
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'nonce_journal.db')
+
+
+class NonceJournal:
+    """Append-only журнал событий nonce с групповыми коммитами"""
+
+    def __init__(self, db_path: Optional[str] = None, flush_interval: float = 0.05,
+                 max_batch: int = 500):
+        """
+        Args:
+            db_path: Путь к файлу журнала
+            flush_interval: Максимальная задержка коммита пачки (сек)
+            max_batch: Размер пачки, при котором коммит выполняется сразу
+        """
+        if db_path is None:
+            db_path = DEFAULT_PATH
+
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self._buffer: List[Tuple[str, int, str, str, Optional[str], Optional[str], float]] = []
+        self._cond = threading.Condition()
+        self._flushed_seq = 0
+        self._queued_seq = 0
+        self._db_lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=FULL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS nonce_journal (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                address TEXT NOT NULL,
+                nonce INTEGER NOT NULL,
+                ticket_id TEXT,
+                action TEXT NOT NULL,
+                tx_hash TEXT,
+                raw_tx TEXT,
+                ts REAL NOT NULL
+            )
+        ''')
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(nonce_journal)')}
+        if 'raw_tx' not in columns:
+            self._conn.execute('ALTER TABLE nonce_journal ADD COLUMN raw_tx TEXT')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_nonce_journal_addr ON nonce_journal(address, nonce)')
+        self._conn.commit()
+
+        self.is_running = True
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="NonceJournal")
+        self._writer.start()
+
+    def record(self, action: str, address: str, nonce: int, ticket_id: str = '',
+               tx_hash: Optional[str] = None, sync: bool = False,
+               raw_tx: Optional[Union[bytes, str]] = None):
+        """
+        Добавление события в журнал
+
+        Args:
+            action: Действие (reserve, broadcast, replace, confirm, fail, expire)
+            address: Checksum адрес
+            nonce: Nonce
+            ticket_id: ID тикета NonceManager
+            tx_hash: Хеш транзакции
+            sync: Дождаться записи на диск
+            raw_tx: Подписанная транзакция (для broadcast/replace)
+        """
+        if isinstance(raw_tx, (bytes, bytearray)):
+            raw_tx = '0x' + bytes(raw_tx).hex()
+        with self._cond:
+            self._buffer.append((address, nonce, ticket_id, action, tx_hash, raw_tx, time.time()))
+            self._queued_seq += 1
+            seq = self._queued_seq
+            if len(self._buffer) >= self.max_batch:
+                self._cond.notify_all()
+        if sync:
+            self.wait_flushed(seq)
+
+    def wait_flushed(self, seq: Optional[int] = None, timeout: float = 5.0):
+        """Ожидание записи событий вплоть до seq (по умолчанию - всех текущих)"""
+        deadline = time.time() + timeout
+        with self._cond:
+            target = self._queued_seq if seq is None else seq
+            self._cond.notify_all()
+            while self._flushed_seq < target and self.is_running:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    logger.warning("Таймаут ожидания записи журнала nonce")
+                    return
+                self._cond.wait(remaining)
+
+    def flush(self):
+        """Синхронная запись буфера"""
+        self.wait_flushed()
+
+    def _writer_loop(self):
+        """Фоновый писатель пачек"""
+        while self.is_running:
+            with self._cond:
+                if not self._buffer:
+                    self._cond.wait(self.flush_interval)
+                batch, self._buffer = self._buffer, []
+                batch_seq = self._queued_seq
+            if batch:
+                self._write_batch(batch)
+            with self._cond:
+                self._flushed_seq = max(self._flushed_seq, batch_seq)
+                self._cond.notify_all()
+
+    def _write_batch(self, batch):
+        """Запись пачки одной транзакцией"""
+        try:
+            with self._db_lock:
+                self._conn.executemany(
+                    'INSERT INTO nonce_journal (address, nonce, ticket_id, action, tx_hash, raw_tx, ts) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    batch
+                )
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Ошибка записи журнала nonce ({len(batch)} событий): {e}")
+
+    def load(self, address: str) -> JournaledAddress:
+        """Воспроизведение журнала для адреса"""
+        self.flush()
+        state = JournaledAddress(address=address)
+        with self._db_lock:
+            rows = self._conn.execute(
+                'SELECT nonce, action, tx_hash, raw_tx FROM nonce_journal WHERE address = ? ORDER BY id',
+                (address,)
+            ).fetchall()
+        for nonce, action, tx_hash, raw_tx in rows:
+            if action == RESERVE:
+                state.reserved.add(nonce)
+            elif action in (BROADCAST, REPLACE):
+                state.reserved.discard(nonce)
+                state.inflight[nonce] = tx_hash
+                # Замена без подписанной транзакции делает прежнюю неактуальной
+                if raw_tx:
+                    state.raw[nonce] = raw_tx
+                else:
+                    state.raw.pop(nonce, None)
+                if state.max_broadcast_nonce is None or nonce > state.max_broadcast_nonce:
+                    state.max_broadcast_nonce = nonce
+            elif action in (CONFIRM, FAIL, EXPIRE):
+                state.reserved.discard(nonce)
+                state.inflight.pop(nonce, None)
+                state.raw.pop(nonce, None)
+        return state
+
+    def compact(self, address: str, mined_nonce: int):
+        """Удаление записей для nonce, уже смайненных сетью"""
+        self.flush()
+        try:
+            with self._db_lock:
+                self._conn.execute(
+                    'DELETE FROM nonce_journal WHERE address = ? AND nonce < ?',
+                    (address, mined_nonce)
+                )
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Ошибка компактификации журнала nonce: {e}")
+
+    def forget(self, address: str):
+        """Удаление всех записей адреса (ручной сброс - доверяем сети)"""
+        self.compact(address, 2 ** 63 - 1)
+
+    def close(self):
+        """Запись остатка и закрытие"""
+        self.flush()
+        self.is_running = False
+        with self._cond:
+            self._cond.notify_all()
+        self._writer.join(timeout=5)
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self._buffer = []
+        self._conn.close()
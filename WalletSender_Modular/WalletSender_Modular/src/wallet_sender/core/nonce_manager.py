@@ -3,8 +3,10 @@ NonceManager для предотвращения коллизий при пар
 """
 
 import time
+import heapq
 import threading
-from typing import Dict, Optional, Set, Tuple, Any
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple, Any, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
@@ -12,9 +14,18 @@ import logging
 from web3 import Web3
 from collections import deque
 
+from .nonce_journal import NonceJournal, RESERVE, BROADCAST, REPLACE, CONFIRM, FAIL, EXPIRE
+from ..utils import startup_timing
+
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _checksum(address: str) -> str:
+    """Checksum адреса с кешем (keccak считается один раз на адрес)"""
+    return Web3.to_checksum_address(address)
+
+
 class NonceStatus(Enum):
     """Статус nonce"""
     RESERVED = "reserved"     # Зарезервирован, но не использован
@@ -52,42 +63,108 @@ class AddressNonceState:
     failed_nonces: Set[int] = field(default_factory=set)
     confirmed_nonces: Set[int] = field(default_factory=set)
     tickets: Dict[str, NonceTicket] = field(default_factory=dict)
+    leases: Dict[str, 'NonceLease'] = field(default_factory=dict)
+    # Возвращенные неиспользованные nonce ниже next_nonce (min-heap), выдаются первыми
+    free_nonces: List[int] = field(default_factory=list)
     lock: threading.Lock = field(default_factory=threading.Lock)
+    last_sync_mono: float = field(default_factory=time.monotonic)
     
     def needs_resync(self, max_age_seconds: int = 30) -> bool:
         """Проверка необходимости ресинхронизации"""
-        age = (datetime.now() - self.last_sync).total_seconds()
-        return age > max_age_seconds
+        return time.monotonic() - self.last_sync_mono > max_age_seconds
+
+
+class NonceLease:
+    """
+    Непрерывный диапазон nonce, выданный одному конвейеру отправки
+    
+    Выдача nonce из аренды - это инкремент счетчика без блокировок и обращений
+    к сети, поэтому аренда не потокобезопасна: один конвейер - одна аренда.
+    """
+    
+    def __init__(self, manager: 'NonceManager', lease_id: str, address: str, start: int, count: int):
+        self.manager = manager
+        self.id = lease_id
+        self.address = address
+        self.start = start
+        self.end = start + count
+        self.cursor = start
+        self.sent: Dict[int, str] = {}
+        self.closed = False
+        self.created_at = datetime.now()
+        self.last_used = time.monotonic()
+    
+    def __len__(self) -> int:
+        return self.end - self.cursor
+    
+    @property
+    def exhausted(self) -> bool:
+        return self.closed or self.cursor >= self.end
+    
+    def next(self) -> int:
+        """Следующий nonce из диапазона"""
+        if self.exhausted:
+            raise ValueError(f"Nonce lease {self.id} is exhausted")
+        nonce = self.cursor
+        self.cursor += 1
+        self.last_used = time.monotonic()
+        return nonce
+    
+    def complete(self, nonce: int, tx_hash: str, raw_tx: Optional[Union[bytes, str]] = None):
+        """Отметка отправки транзакции с nonce из аренды"""
+        self.sent[nonce] = tx_hash
+        self.manager._lease_sent(self, nonce, tx_hash, raw_tx)
+    
+    def fail(self, nonce: int, reason: str):
+        """
+        Транзакция с nonce не отправлена - аренда закрывается, а менеджер
+        откатывается к этому nonce, чтобы не оставить дыру
+        """
+        self.cursor = nonce
+        self.manager.release_lease(self, reason=reason)
+    
+    def release(self):
+        """Возврат неиспользованного хвоста диапазона"""
+        self.manager.release_lease(self)
 
 
 class NonceManager:
     """Улучшенный менеджер nonce с поддержкой резервирования и восстановления"""
     
-    def __init__(self, web3: Optional[Web3] = None):
+    def __init__(self, web3: Optional[Web3] = None, journal: Optional[NonceJournal] = None):
         """
         Args:
             web3: Web3 экземпляр (может быть установлен позже)
+            journal: Журнал для восстановления состояния после перезапуска
         """
         self.web3 = web3
+        self.journal = journal
         self.states: Dict[str, AddressNonceState] = {}
         self.global_lock = threading.Lock()
+        # Блокировки создания состояния: сетевой запрос блокирует только свой адрес,
+        # после создания состояния блокировка удаляется
+        self._creation_locks: Dict[str, threading.Lock] = {}
         
         # Конфигурация
         self.reservation_timeout = 60  # Таймаут резервирования в секундах
         self.resync_interval = 30      # Интервал ресинхронизации
         self.max_pending_per_address = 20  # Максимум pending транзакций
+        self.max_lease_size = 1000     # Максимальный размер аренды диапазона
         
         # Счетчики для статистики
         self.total_reserved = 0
         self.total_confirmed = 0
         self.total_failed = 0
         self.resync_count = 0
+        self.recovered_count = 0
+        self.total_leased = 0
         
         # История для отладки
         self.history = deque(maxlen=1000)
         
         # Флаг для управления потоком
         self.is_running = True
+        self._stop_event = threading.Event()
         
         # Фоновый поток для очистки
         self.cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
@@ -99,30 +176,128 @@ class NonceManager:
     
     def _get_or_create_state(self, address: str) -> AddressNonceState:
         """Получение или создание состояния для адреса"""
-        address = Web3.to_checksum_address(address)
+        address = _checksum(address)
+        
+        # Быстрый путь: чтение словаря атомарно, блокировка не нужна
+        state = self.states.get(address)
+        if state is not None:
+            return state
         
         with self.global_lock:
-            if address not in self.states:
-                # Создаем новое состояние
-                network_nonce = self._fetch_network_nonce(address)
-                self.states[address] = AddressNonceState(
-                    address=address,
-                    network_nonce=network_nonce,
-                    next_nonce=network_nonce,
-                    last_sync=datetime.now()
-                )
-                logger.info(f"Created nonce state for {address}: starting nonce={network_nonce}")
+            creation_lock = self._creation_locks.setdefault(address, threading.Lock())
+        
+        # Сетевой запрос выполняется вне global_lock
+        with creation_lock:
+            state = self.states.get(address)
+            if state is not None:
+                return state
             
-            return self.states[address]
+            network_nonce = self._fetch_network_nonce(address)
+            state = AddressNonceState(
+                address=address,
+                network_nonce=network_nonce,
+                next_nonce=network_nonce,
+                last_sync=datetime.now()
+            )
+            if self.journal:
+                self._replay_journal(state)
+            
+            with self.global_lock:
+                self.states[address] = state
+                self._creation_locks.pop(address, None)
+            logger.info(f"Created nonce state for {address}: starting nonce={state.next_nonce}")
+            return state
     
-    def _fetch_network_nonce(self, address: str) -> int:
+    def _replay_journal(self, state: AddressNonceState):
+        """
+        Сверка журнала с сетью при первом обращении к адресу
+        
+        Отправленные до сбоя транзакции, о которых сеть (pending) не знает,
+        отправляются повторно из сохраненной подписанной транзакции и
+        восстанавливаются как PENDING тикеты. Выдача продолжается с первого
+        nonce, который сеть не знает и который не удалось отправить заново:
+        более поздние транзакции за такой дырой не смайнятся, поэтому их nonce
+        переиспользуются. Зарезервированные, но не отправленные nonce тоже
+        переиспользуются.
+        """
+        try:
+            journaled = self.journal.load(state.address)
+        except Exception as e:
+            logger.error(f"Failed to replay nonce journal for {state.address}: {e}")
+            return
+        
+        try:
+            mined_nonce = self._fetch_network_nonce(state.address, 'latest')
+        except Exception:
+            mined_nonce = state.network_nonce
+        
+        unknown = sorted(nonce for nonce in journaled.inflight if nonce >= state.network_nonce)
+        restored = []
+        for nonce in unknown:
+            raw_tx = journaled.raw.get(nonce)
+            if nonce != state.next_nonce or not raw_tx or not self._rebroadcast(state.address, nonce, raw_tx):
+                break
+            restored.append(nonce)
+            state.next_nonce = nonce + 1
+        
+        for nonce in unknown[len(restored):]:
+            logger.warning(
+                f"Journal for {state.address} has broadcast nonce {nonce} unknown to network "
+                f"(pending={state.network_nonce}), nonce will be reused"
+            )
+            self.journal.record(FAIL, state.address, nonce, tx_hash=journaled.inflight[nonce])
+        for nonce in sorted(journaled.reserved):
+            self.journal.record(EXPIRE, state.address, nonce)
+        
+        for nonce in restored:
+            tx_hash = journaled.inflight[nonce]
+            ticket_id = f"{state.address}_{nonce}_recovered"
+            state.tickets[ticket_id] = NonceTicket(
+                id=ticket_id,
+                address=state.address,
+                nonce=nonce,
+                status=NonceStatus.PENDING,
+                reserved_at=datetime.now(),
+                tx_hash=tx_hash
+            )
+            state.pending_nonces.add(nonce)
+            self.recovered_count += 1
+            self._add_to_history('recover', state.address, nonce, ticket_id, tx_hash)
+        
+        # Записи по уже смайненным nonce больше не нужны
+        self.journal.compact(state.address, mined_nonce)
+    
+    def _rebroadcast(self, address: str, nonce: int, raw_tx: str) -> bool:
+        """Повторная отправка транзакции из журнала"""
+        try:
+            self.web3.eth.send_raw_transaction(raw_tx)
+            logger.info(f"Rebroadcast journaled nonce {nonce} for {address}")
+            return True
+        except Exception as e:
+            message = str(e).lower()
+            # Узел уже знает транзакцию или она смайнена после запроса nonce
+            if 'already known' in message or 'known transaction' in message or 'nonce too low' in message:
+                return True
+            logger.warning(f"Failed to rebroadcast nonce {nonce} for {address}: {e}")
+            return False
+    
+    def _journal(self, action: str, ticket: NonceTicket, tx_hash: Optional[str] = None,
+                 raw_tx: Optional[Union[bytes, str]] = None):
+        """Запись события в журнал (если подключен)"""
+        if self.journal:
+            try:
+                self.journal.record(action, ticket.address, ticket.nonce, ticket.id, tx_hash, raw_tx=raw_tx)
+            except Exception as e:
+                logger.error(f"Nonce journal write failed: {e}")
+    
+    def _fetch_network_nonce(self, address: str, block_identifier: str = 'pending') -> int:
         """Получение текущего nonce из сети"""
         if not self.web3:
             raise ValueError("Web3 not configured")
         
         try:
-            # Используем 'pending' для учета неподтвержденных транзакций
-            nonce = self.web3.eth.get_transaction_count(address, 'pending')
+            # По умолчанию 'pending' для учета неподтвержденных транзакций
+            nonce = self.web3.eth.get_transaction_count(address, block_identifier)
             return nonce
         except Exception as e:
             logger.error(f"Failed to fetch network nonce for {address}: {e}")
@@ -141,7 +316,7 @@ class NonceManager:
         Raises:
             ValueError: Если достигнут лимит pending транзакций
         """
-        address = Web3.to_checksum_address(address)
+        address = _checksum(address)
         state = self._get_or_create_state(address)
         
         with state.lock:
@@ -153,8 +328,12 @@ class NonceManager:
             if len(state.pending_nonces) >= self.max_pending_per_address:
                 raise ValueError(f"Too many pending transactions ({len(state.pending_nonces)}) for {address}")
             
-            # Получаем nonce для резервирования
-            nonce = state.next_nonce
+            # Получаем nonce для резервирования: сначала возвращенные
+            if state.free_nonces:
+                nonce = heapq.heappop(state.free_nonces)
+            else:
+                nonce = state.next_nonce
+                state.next_nonce += 1
             
             # Создаем ticket
             ticket_id = f"{address}_{nonce}_{int(time.time() * 1000)}"
@@ -167,7 +346,6 @@ class NonceManager:
             )
             
             # Обновляем состояние
-            state.next_nonce += 1
             state.pending_nonces.add(nonce)
             state.tickets[ticket_id] = ticket
             
@@ -176,17 +354,109 @@ class NonceManager:
             
             # Добавляем в историю
             self._add_to_history('reserve', address, nonce, ticket_id)
+            self._journal(RESERVE, ticket)
             
             logger.debug(f"Reserved nonce {nonce} for {address} (ticket: {ticket_id})")
             return ticket
     
-    def complete(self, ticket: NonceTicket, tx_hash: str):
+    def lease(self, address: str, count: int = 100) -> NonceLease:
+        """
+        Аренда непрерывного диапазона nonce для конвейера отправки
+        
+        Одна блокировка на весь диапазон вместо одной на транзакцию. Лимит
+        pending транзакций к аренде не применяется - ее размер ограничен
+        max_lease_size. Если есть возвращенные nonce, аренда начинается с
+        наименьшего из них и может оказаться короче count.
+        
+        Args:
+            address: Адрес отправителя
+            count: Размер диапазона
+            
+        Returns:
+            NonceLease с диапазоном [start, start + count)
+        """
+        count = max(1, min(int(count), self.max_lease_size))
+        address = _checksum(address)
+        state = self._get_or_create_state(address)
+        
+        with state.lock:
+            if state.needs_resync(self.resync_interval):
+                self._resync_state(state)
+            
+            if state.free_nonces:
+                start = heapq.heappop(state.free_nonces)
+                taken = 1
+                while taken < count and state.free_nonces and state.free_nonces[0] == start + taken:
+                    heapq.heappop(state.free_nonces)
+                    taken += 1
+                count = taken
+            else:
+                start = state.next_nonce
+                state.next_nonce += count
+            lease_id = f"{address}_{start}-{start + count - 1}_{int(time.time() * 1000)}"
+            lease = NonceLease(self, lease_id, address, start, count)
+            state.leases[lease_id] = lease
+            
+            self.total_leased += count
+            self._add_to_history('lease', address, start, lease_id, str(count))
+            
+            logger.debug(f"Leased nonces {start}..{start + count - 1} for {address}")
+            return lease
+    
+    def _lease_sent(self, lease: NonceLease, nonce: int, tx_hash: str,
+                    raw_tx: Optional[Union[bytes, str]] = None):
+        """Запись отправки из аренды в журнал (без блокировок)"""
+        if self.journal:
+            try:
+                self.journal.record(BROADCAST, lease.address, nonce, lease.id, tx_hash, raw_tx=raw_tx)
+            except Exception as e:
+                logger.error(f"Nonce journal write failed: {e}")
+    
+    def release_lease(self, lease: NonceLease, reason: Optional[str] = None):
+        """
+        Закрытие аренды и возврат неиспользованных nonce
+        
+        Если после аренды уже выдавались nonce, неиспользованный хвост
+        попадает в список свободных и выдается следующими reserve()/lease(),
+        чтобы не оставить дыру.
+        """
+        if lease.closed:
+            return
+        state = self._get_or_create_state(lease.address)
+        
+        with state.lock:
+            lease.closed = True
+            state.leases.pop(lease.id, None)
+            unused = lease.end - lease.cursor
+            if unused > 0:
+                self._return_nonces(state, range(lease.cursor, lease.end))
+                logger.info(f"Returned {unused} leased nonces to {lease.address}, next_nonce={state.next_nonce}")
+            
+            self._add_to_history('release', lease.address, lease.cursor, lease.id, reason)
+    
+    def _return_nonces(self, state: AddressNonceState, nonces):
+        """
+        Возврат неиспользованных nonce (под state.lock)
+        
+        Nonce в конце выданного диапазона откатывают next_nonce, остальные
+        попадают в список свободных.
+        """
+        free = set(state.free_nonces)
+        free.update(nonce for nonce in nonces if nonce < state.next_nonce)
+        while state.next_nonce - 1 in free:
+            free.discard(state.next_nonce - 1)
+            state.next_nonce -= 1
+        # Отсортированный список - корректная куча
+        state.free_nonces = sorted(free)
+    
+    def complete(self, ticket: NonceTicket, tx_hash: str, raw_tx: Optional[Union[bytes, str]] = None):
         """
         Подтверждение использования nonce
         
         Args:
             ticket: Ticket с зарезервированным nonce
             tx_hash: Хеш отправленной транзакции
+            raw_tx: Подписанная транзакция (журнал отправит ее заново, если узел ее потеряет)
         """
         state = self._get_or_create_state(ticket.address)
         
@@ -202,9 +472,38 @@ class NonceManager:
             
             # Добавляем в историю
             self._add_to_history('complete', ticket.address, ticket.nonce, ticket.id, tx_hash)
+            self._journal(BROADCAST, ticket, tx_hash, raw_tx)
             
             logger.debug(f"Completed nonce {ticket.nonce} for {ticket.address} with tx {tx_hash}")
     
+    def replace(self, ticket: NonceTicket, tx_hash: str, raw_tx: Optional[Union[bytes, str]] = None):
+        """
+        Замена транзакции с тем же nonce (ускорение или отмена)
+        
+        Args:
+            ticket: Ticket с использованным nonce
+            tx_hash: Хеш транзакции-замены
+            raw_tx: Подписанная транзакция-замена
+        """
+        state = self._get_or_create_state(ticket.address)
+        
+        with state.lock:
+            if ticket.id not in state.tickets:
+                logger.warning(f"Ticket {ticket.id} not found")
+                return
+            
+            old_hash = ticket.tx_hash
+            ticket.status = NonceStatus.PENDING
+            ticket.tx_hash = tx_hash
+            state.tickets[ticket.id] = ticket
+            state.pending_nonces.add(ticket.nonce)
+            
+            # Добавляем в историю
+            self._add_to_history('replace', ticket.address, ticket.nonce, ticket.id, f"{old_hash} -> {tx_hash}")
+            self._journal(REPLACE, ticket, tx_hash, raw_tx)
+            
+            logger.debug(f"Replaced nonce {ticket.nonce} for {ticket.address}: {old_hash} -> {tx_hash}")
+    
     def confirm(self, ticket: NonceTicket):
         """
         Подтверждение транзакции (после майнинга)
@@ -233,6 +532,7 @@ class NonceManager:
             
             # Добавляем в историю
             self._add_to_history('confirm', ticket.address, ticket.nonce, ticket.id)
+            self._journal(CONFIRM, ticket)
             
             logger.debug(f"Confirmed nonce {ticket.nonce} for {ticket.address}")
     
@@ -265,10 +565,9 @@ class NonceManager:
             elif 'nonce too high' in reason.lower():
                 # Есть пропущенные nonce
                 logger.warning(f"Nonce too high for {ticket.address}, possible gap")
-                # Откатываем next_nonce если это был последний
-                if state.next_nonce == ticket.nonce + 1:
-                    state.next_nonce = ticket.nonce
-                    logger.info(f"Rolled back next_nonce to {ticket.nonce} for {ticket.address}")
+                # Nonce не использован: выдается снова
+                self._return_nonces(state, [ticket.nonce])
+                logger.info(f"Returned nonce {ticket.nonce} for {ticket.address}, next_nonce={state.next_nonce}")
             
             # Перемещаем в failed
             if ticket.nonce in state.pending_nonces:
@@ -280,6 +579,7 @@ class NonceManager:
             
             # Добавляем в историю
             self._add_to_history('fail', ticket.address, ticket.nonce, ticket.id, reason)
+            self._journal(FAIL, ticket)
             
             logger.warning(f"Failed nonce {ticket.nonce} for {ticket.address}: {reason}")
     
@@ -290,14 +590,21 @@ class NonceManager:
         Args:
             address: Адрес для ресинхронизации
         """
-        address = Web3.to_checksum_address(address)
+        address = _checksum(address)
         state = self._get_or_create_state(address)
         
         with state.lock:
             self._resync_state(state)
     
-    def _resync_state(self, state: AddressNonceState):
-        """Внутренняя ресинхронизация состояния"""
+    def _resync_state(self, state: AddressNonceState, allow_rollback: bool = False):
+        """
+        Внутренняя ресинхронизация состояния
+        
+        Args:
+            state: Состояние адреса
+            allow_rollback: Разрешить откат next_nonce к сетевому значению,
+                если нет активных тикетов и аренд
+        """
         try:
             # Получаем актуальный nonce из сети
             network_nonce = self._fetch_network_nonce(state.address)
@@ -306,15 +613,32 @@ class NonceManager:
             old_nonce = state.network_nonce
             state.network_nonce = network_nonce
             state.last_sync = datetime.now()
+            state.last_sync_mono = time.monotonic()
             
             # Корректируем next_nonce если нужно
             if network_nonce > state.next_nonce:
                 logger.warning(f"Network nonce ({network_nonce}) > next_nonce ({state.next_nonce}) for {state.address}")
                 state.next_nonce = network_nonce
+            elif (allow_rollback and network_nonce < state.next_nonce and not state.leases
+                  and not any(t.status == NonceStatus.RESERVED for t in state.tickets.values())):
+                logger.info(f"Rolled back next_nonce {state.next_nonce} -> {network_nonce} for {state.address}")
+                state.next_nonce = network_nonce
+            
+            # Свободные nonce, уже использованные в сети или выше отката
+            state.free_nonces = [n for n in state.free_nonces if network_nonce <= n < state.next_nonce]
+            heapq.heapify(state.free_nonces)
             
             # Очищаем устаревшие confirmed nonces
             state.confirmed_nonces = {n for n in state.confirmed_nonces if n >= network_nonce}
             
+            # Восстановленные из журнала транзакции, которые сеть уже видит
+            for ticket in state.tickets.values():
+                if (ticket.id.endswith('_recovered') and ticket.status == NonceStatus.PENDING
+                        and ticket.nonce < network_nonce):
+                    ticket.status = NonceStatus.CONFIRMED
+                    state.pending_nonces.discard(ticket.nonce)
+                    self._journal(CONFIRM, ticket)
+            
             # Обновляем статистику
             self.resync_count += 1
             
@@ -327,7 +651,8 @@ class NonceManager:
         """Фоновый поток для очистки устаревших резерваций"""
         while self.is_running:
             try:
-                time.sleep(10)  # Проверка каждые 10 секунд
+                if self._stop_event.wait(10):  # Проверка каждые 10 секунд
+                    break
                 self._cleanup_expired()
             except Exception as e:
                 logger.error(f"Cleanup error: {e}")
@@ -335,9 +660,15 @@ class NonceManager:
     def _cleanup_expired(self):
         """Очистка истекших резерваций"""
         now = datetime.now()
+        idle_leases = []
         
         for address, state in list(self.states.items()):
             with state.lock:
+                idle_leases.extend(
+                    lease for lease in state.leases.values()
+                    if time.monotonic() - lease.last_used > self.reservation_timeout
+                )
+                
                 expired_tickets = []
                 
                 for ticket_id, ticket in state.tickets.items():
@@ -351,13 +682,12 @@ class NonceManager:
                     if ticket.nonce in state.pending_nonces:
                         state.pending_nonces.remove(ticket.nonce)
                     
-                    # Откатываем next_nonce если это был последний
-                    if state.next_nonce == ticket.nonce + 1 and not state.pending_nonces:
-                        state.next_nonce = ticket.nonce
-                        logger.info(f"Rolled back next_nonce to {ticket.nonce} for {address} (expired)")
+                    # Неиспользованный nonce выдается снова
+                    self._return_nonces(state, [ticket.nonce])
                     
                     # Обновляем статус
                     ticket.status = NonceStatus.EXPIRED
+                    self._journal(EXPIRE, ticket)
                     
                     logger.warning(f"Expired nonce reservation {ticket.nonce} for {address}")
                 
@@ -368,6 +698,11 @@ class NonceManager:
                 
                 for ticket_id in old_tickets:
                     del state.tickets[ticket_id]
+        
+        # Брошенные аренды возвращаются, чтобы не оставлять дыр
+        for lease in idle_leases:
+            logger.warning(f"Releasing idle nonce lease {lease.id}")
+            self.release_lease(lease, reason='idle')
     
     def _add_to_history(self, action: str, address: str, nonce: int, 
                        ticket_id: str, extra: Optional[str] = None):
@@ -392,7 +727,7 @@ class NonceManager:
             Словарь со статистикой
         """
         if address:
-            address = Web3.to_checksum_address(address)
+            address = _checksum(address)
             state = self.states.get(address)
             
             if not state:
@@ -408,6 +743,7 @@ class NonceManager:
                     'failed_count': len(state.failed_nonces),
                     'active_tickets': len([t for t in state.tickets.values() 
                                          if t.status in [NonceStatus.RESERVED, NonceStatus.PENDING]]),
+                    'active_leases': len(state.leases),
                     'last_sync': state.last_sync.isoformat()
                 }
         else:
@@ -423,12 +759,15 @@ class NonceManager:
                 'total_pending': total_pending,
                 'total_tickets': total_tickets,
                 'resync_count': self.resync_count,
+                'recovered_count': self.recovered_count,
+                'total_leased': self.total_leased,
+                'journal_enabled': self.journal is not None,
                 'success_rate': f"{(self.total_confirmed / self.total_reserved * 100) if self.total_reserved > 0 else 0:.1f}%"
             }
     
     def get_pending_nonces(self, address: str) -> Set[int]:
         """Получение списка pending nonces для адреса"""
-        address = Web3.to_checksum_address(address)
+        address = _checksum(address)
         state = self.states.get(address)
         
         if state:
@@ -438,18 +777,25 @@ class NonceManager:
     
     def reset_address(self, address: str):
         """Полный сброс состояния для адреса"""
-        address = Web3.to_checksum_address(address)
+        address = _checksum(address)
         
         with self.global_lock:
             if address in self.states:
                 del self.states[address]
                 logger.info(f"Reset nonce state for {address}")
+        
+        # Ручной сброс означает доверие сети - журнал адреса больше не нужен
+        if self.journal:
+            self.journal.forget(address)
     
     def shutdown(self):
         """Остановка менеджера"""
         self.is_running = False
+        self._stop_event.set()
         if self.cleanup_thread.is_alive():
             self.cleanup_thread.join(timeout=5)
+        if self.journal:
+            self.journal.close()
 
 
 # Глобальный экземпляр
@@ -461,7 +807,19 @@ def get_nonce_manager(web3: Optional[Web3] = None) -> NonceManager:
     global _global_manager
     
     if _global_manager is None:
-        _global_manager = NonceManager(web3)
+        with startup_timing.measure('get_nonce_manager'):
+            journal = None
+            try:
+                from ..config import get_config
+                settings = get_config().get('nonce_journal', {}) or {}
+                if settings.get('enabled', True):
+                    journal = NonceJournal(
+                        db_path=settings.get('path') or None,
+                        flush_interval=settings.get('flush_interval_ms', 50) / 1000.0
+                    )
+            except Exception as e:
+                logger.error(f"Nonce journal disabled: {e}")
+            _global_manager = NonceManager(web3, journal=journal)
     elif web3 and not _global_manager.web3:
         _global_manager.set_web3(web3)
     
@@ -22,6 +22,7 @@ from eth_typing import HexStr
 from hexbytes import HexBytes
 
 from ..utils.logger import get_logger
+from ..utils import startup_timing
 from ..config import get_config
 from .models import Settings
 
@@ -254,6 +255,11 @@ class RPCManager:
         self.last_request_times = {}
         self.throttle_lock = threading.Lock()
         
+        # Общие Web3 клиенты (один HTTP пул на endpoint)
+        self._clients: Dict[Tuple[str, int], Web3] = {}
+        self._verified_urls = set()
+        self._clients_lock = threading.Lock()
+        
         self._init_endpoints()
         self.health_checker.start(self.endpoints)
     
@@ -306,18 +312,14 @@ class RPCManager:
             # Применяем троттлинг
             self._apply_throttling(url)
             
-            # Создаем Web3 экземпляр
-            w3 = Web3(Web3.HTTPProvider(
-                url,
-                request_kwargs={'timeout': self.config.get('connection_timeout', 30)}
-            ))
-            
-            # Добавляем middleware для BSC (POA)
-            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+            w3 = self._client_for(url, self.config.get('connection_timeout', 30))
             
-            # Проверяем подключение
-            if not w3.is_connected():
-                raise ConnectionError(f"Failed to connect to {url}")
+            # Проверяем подключение только при первом обращении к endpoint,
+            # дальше состояние отслеживает health checker
+            if url not in self._verified_urls:
+                if not w3.is_connected():
+                    raise ConnectionError(f"Failed to connect to {url}")
+                self._verified_urls.add(url)
             
             return w3
             
@@ -328,6 +330,38 @@ class RPCManager:
             # Пробуем failover
             return self._failover_connect()
     
+    def _client_for(self, url: str, timeout: int) -> Web3:
+        """Общий Web3 клиент для endpoint (создается один раз)"""
+        key = (url, int(timeout))
+        w3 = self._clients.get(key)
+        if w3 is None:
+            with self._clients_lock:
+                w3 = self._clients.get(key)
+                if w3 is None:
+                    w3 = Web3(Web3.HTTPProvider(url, request_kwargs={'timeout': timeout}))
+                    # Добавляем middleware для BSC (POA)
+                    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+                    self._clients[key] = w3
+        return w3
+    
+    def warm_up(self) -> Future:
+        """
+        Фоновый прогрев основного endpoint (TCP/TLS соединение, первый запрос)
+        
+        Returns:
+            Future с Web3 клиентом (или None)
+        """
+        def _warm():
+            w3 = self.get_client()
+            if w3 is not None:
+                try:
+                    logger.info(f"RPC warmed up, block {w3.eth.block_number}")
+                except Exception as e:
+                    logger.warning(f"RPC warm-up request failed: {e}")
+            return w3
+        
+        return self.executor.submit(_warm)
+    
     def _failover_connect(self) -> Optional[Web3]:
         """Failover подключение к резервным RPC"""
         healthy = self.health_checker.get_healthy_endpoints()
@@ -336,14 +370,10 @@ class RPCManager:
             try:
                 logger.info(f"Failover to {stats.name}")
                 
-                w3 = Web3(Web3.HTTPProvider(
-                    stats.url,
-                    request_kwargs={'timeout': 10}
-                ))
-                
-                w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+                w3 = self._client_for(stats.url, 10)
                 
                 if w3.is_connected():
+                    self._verified_urls.add(stats.url)
                     return w3
                     
             except Exception as e:
@@ -411,11 +441,7 @@ class RPCManager:
         start_time = time.time()
         
         try:
-            w3 = Web3(Web3.HTTPProvider(
-                url,
-                request_kwargs={'timeout': 30}
-            ))
-            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+            w3 = self._client_for(url, 30)
             
             result = func(w3, *args, **kwargs)
             
@@ -619,6 +645,7 @@ class RPCPool(RPCManager):
 
 # Глобальный экземпляр
 _rpc_manager: Optional[RPCManager] = None
+_rpc_manager_lock = threading.Lock()
 
 
 def get_rpc_pool() -> RPCManager:
@@ -626,7 +653,10 @@ def get_rpc_pool() -> RPCManager:
     global _rpc_manager
     
     if _rpc_manager is None:
-        _rpc_manager = RPCManager()
+        with _rpc_manager_lock:
+            if _rpc_manager is None:
+                with startup_timing.measure('get_rpc_pool'):
+                    _rpc_manager = RPCManager()
     
     return _rpc_manager
 
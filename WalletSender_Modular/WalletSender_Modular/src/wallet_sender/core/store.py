@@ -1,20 +1,115 @@
 """
 Единое хранилище данных для WalletSender
 Реализует SQLite схему с FTS5 поиском
+
+Соединения выдает общий движок хранения (utils/storage.py): тот же файл
+используют модели SQLAlchemy и AnalyticsManager.
 """
 
-import sqlite3
 import json
 import os
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
-from contextlib import contextmanager
 
 from ..utils.logger import get_logger
+from ..utils import startup_timing
+from ..utils.storage import StorageEngine, get_storage
 
 logger = get_logger(__name__)
 
 
+# Границы гистограммы задержки подтверждения (мс); последняя - "больше 10 минут"
+LATENCY_BUCKETS_MS = (1000, 2000, 3000, 5000, 10000, 20000, 30000, 60000, 120000, 300000, 600000, 3600000)
+
+# Границы почасовых и дневных корзин агрегатов. created_at хранится в UTC
+# (CURRENT_TIMESTAMP, журнал транзакций), функции даты SQLite без модификатора
+# 'localtime' тоже работают в UTC - корзины и границы запросов в UTC.
+ROLLUP_PERIODS = (('hour', "strftime('%Y-%m-%d %H:00:00', {})"), ('day', 'date({})'))
+
+
+def _rollup_minmax_refresh(row: str, period: str, bucket: str) -> str:
+    """
+    SQL пересчета amount_min/amount_max корзины, из которой ушла строка
+    
+    MIN/MAX не вычитаются, поэтому при изменении или удалении строки, сумма
+    которой была крайней в корзине, крайние значения пересчитываются по
+    tx_history (строка к этому моменту уже изменена или удалена). Поиск
+    ограничен сутками created_at по индексу idx_created_at.
+    """
+    created = f"COALESCE({row}.created_at, CURRENT_TIMESTAMP)"
+    match = f'''h.created_at >= date({created}) AND h.created_at < date({created}, '+1 day')
+                              AND {bucket.format('h.created_at')} = tx_rollup.bucket
+                              AND COALESCE(h.token_symbol, 'BNB') = tx_rollup.token
+                              AND COALESCE(h.type, '') = tx_rollup.type
+                              AND COALESCE(h.status, '') = tx_rollup.status
+                              AND COALESCE(h.from_address, '') = tx_rollup.sender'''
+    return f'''
+                    UPDATE tx_rollup SET
+                        amount_min = (SELECT MIN(h.amount) FROM tx_history h WHERE {match}),
+                        amount_max = (SELECT MAX(h.amount) FROM tx_history h WHERE {match})
+                    WHERE period = '{period}' AND bucket = {bucket.format(created)}
+                      AND token = COALESCE({row}.token_symbol, 'BNB') AND type = COALESCE({row}.type, '')
+                      AND status = COALESCE({row}.status, '') AND sender = COALESCE({row}.from_address, '')
+                      AND {row}.amount IS NOT NULL
+                      AND (amount_min IS NULL OR {row}.amount <= amount_min OR {row}.amount >= amount_max);'''
+
+
+def _rollup_upsert(row: str, sign: int) -> str:
+    """
+    SQL для добавления (sign=1) или вычитания (sign=-1) строки tx_history
+    из почасовых и дневных агрегатов (корзины в UTC, см. ROLLUP_PERIODS)
+    
+    Args:
+        row: Псевдоним строки в триггере (new/old)
+        sign: Знак вклада
+    """
+    created = f"COALESCE({row}.created_at, CURRENT_TIMESTAMP)"
+    amount_minmax = f"{row}.amount, {row}.amount" if sign > 0 else "NULL, NULL"
+    statements = []
+    for period, bucket_expr in ROLLUP_PERIODS:
+        bucket = bucket_expr.format(created)
+        statements.append(f'''
+                    INSERT INTO tx_rollup (period, bucket, token, type, status, sender,
+                                           tx_count, amount_sum, gas_cost_sum, gas_price_sum,
+                                           gas_price_count, gas_used_sum, gas_used_count,
+                                           amount_min, amount_max)
+                    VALUES ('{period}', {bucket}, COALESCE({row}.token_symbol, 'BNB'),
+                            COALESCE({row}.type, ''), COALESCE({row}.status, ''),
+                            COALESCE({row}.from_address, ''),
+                            {sign}, {sign} * COALESCE({row}.amount, 0),
+                            {sign} * COALESCE({row}.gas_price, 0) * COALESCE({row}.gas_used, 0),
+                            {sign} * COALESCE({row}.gas_price, 0),
+                            {sign} * ({row}.gas_price IS NOT NULL),
+                            {sign} * COALESCE({row}.gas_used, 0), {sign} * ({row}.gas_used IS NOT NULL),
+                            {amount_minmax})
+                    ON CONFLICT(period, bucket, token, type, status, sender) DO UPDATE SET
+                        tx_count = tx_count + excluded.tx_count,
+                        amount_sum = amount_sum + excluded.amount_sum,
+                        gas_cost_sum = gas_cost_sum + excluded.gas_cost_sum,
+                        gas_price_sum = gas_price_sum + excluded.gas_price_sum,
+                        gas_price_count = gas_price_count + excluded.gas_price_count,
+                        gas_used_sum = gas_used_sum + excluded.gas_used_sum,
+                        gas_used_count = gas_used_count + excluded.gas_used_count,
+                        amount_min = MIN(COALESCE(amount_min, excluded.amount_min), COALESCE(excluded.amount_min, amount_min)),
+                        amount_max = MAX(COALESCE(amount_max, excluded.amount_max), COALESCE(excluded.amount_max, amount_max));''')
+        if sign < 0:
+            statements.append(_rollup_minmax_refresh(row, period, bucket_expr))
+    
+    # Гистограмма цены газа (шаг 0.1 gwei)
+    statements.append(f'''
+                    INSERT INTO tx_gas_hist (bucket, gwei, tx_count)
+                    SELECT strftime('%Y-%m-%d %H:00:00', {created}), ROUND({row}.gas_price / 1e9, 1), {sign}
+                    WHERE {row}.gas_price IS NOT NULL
+                    ON CONFLICT(bucket, gwei) DO UPDATE SET tx_count = tx_count + excluded.tx_count;''')
+    
+    # Уникальные получатели по дням
+    statements.append(f'''
+                    INSERT INTO tx_rollup_receivers (day, to_address, tx_count)
+                    VALUES (date({created}), {row}.to_address, {sign})
+                    ON CONFLICT(day, to_address) DO UPDATE SET tx_count = tx_count + excluded.tx_count;''')
+    return ''.join(statements)
+
+
 class Store:
     """Единое хранилище данных с SQLite и FTS5"""
     
@@ -23,12 +118,10 @@ class Store:
         Инициализация хранилища
         
         Args:
-            db_path: Путь к файлу базы данных
+            db_path: Путь к файлу базы данных (по умолчанию - общий движок хранения)
         """
-        if db_path is None:
-            db_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'wallet_sender_store.db')
-            
-        self.db_path = db_path
+        self.storage = get_storage() if db_path is None else StorageEngine(db_path)
+        self.db_path = self.storage.path
         self._init_database()
         
     def _init_database(self):
@@ -146,23 +239,35 @@ class Store:
                 END
             ''')
             
+            # Для external content FTS5 старые значения удаляются командой 'delete'
+            # (прямой UPDATE/DELETE по tx_search портит индекс). Старые версии
+            # триггеров пересоздаются, а индекс перестраивается.
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'tx_history_au'")
+            row = cursor.fetchone()
+            legacy_fts_triggers = row is not None and 'UPDATE tx_search' in row[0]
+            cursor.execute('DROP TRIGGER IF EXISTS tx_history_au')
             cursor.execute('''
-                CREATE TRIGGER IF NOT EXISTS tx_history_au AFTER UPDATE ON tx_history BEGIN
-                    UPDATE tx_search 
-                    SET tx_hash = new.tx_hash,
-                        from_address = new.from_address,
-                        to_address = new.to_address,
-                        note = new.note
-                    WHERE rowid = new.id;
+                CREATE TRIGGER tx_history_au AFTER UPDATE OF tx_hash, from_address, to_address, note
+                ON tx_history BEGIN
+                    INSERT INTO tx_search(tx_search, rowid, tx_hash, from_address, to_address, note)
+                    VALUES ('delete', old.id, old.tx_hash, old.from_address, old.to_address, old.note);
+                    INSERT INTO tx_search(rowid, tx_hash, from_address, to_address, note)
+                    VALUES (new.id, new.tx_hash, new.from_address, new.to_address, new.note);
                 END
             ''')
             
+            cursor.execute('DROP TRIGGER IF EXISTS tx_history_ad')
             cursor.execute('''
-                CREATE TRIGGER IF NOT EXISTS tx_history_ad AFTER DELETE ON tx_history BEGIN
-                    DELETE FROM tx_search WHERE rowid = old.id;
+                CREATE TRIGGER tx_history_ad AFTER DELETE ON tx_history BEGIN
+                    INSERT INTO tx_search(tx_search, rowid, tx_hash, from_address, to_address, note)
+                    VALUES ('delete', old.id, old.tx_hash, old.from_address, old.to_address, old.note);
                 END
             ''')
             
+            if legacy_fts_triggers:
+                cursor.execute("INSERT INTO tx_search(tx_search) VALUES ('rebuild')")
+                logger.info("FTS индекс tx_search перестроен")
+            
             # Создание индексов для оптимизации
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_tx_hash ON tx_history(tx_hash)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_from_address ON tx_history(from_address)')
@@ -172,6 +277,8 @@ class Store:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_id ON tx_history(job_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON tx_history(created_at)')
             
+            self._init_rollups(cursor)
+            
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_rewards_address ON rewards(address)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_rewards_status ON rewards(status)')
             
@@ -181,15 +288,185 @@ class Store:
             conn.commit()
             logger.info(f"База данных инициализирована: {self.db_path}")
     
-    @contextmanager
+    def _init_rollups(self, cursor):
+        """
+        Агрегаты tx_history для аналитики
+        
+        Поддерживаются триггерами так же, как FTS5 индекс: каждая вставка или
+        изменение транзакции обновляет несколько строк агрегатов, и дашборды
+        читают сотни строк вместо сканирования всей истории.
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'tx_rollup'")
+        needs_backfill = cursor.fetchone() is None
+        
+        # Агрегаты по часу/дню x токен x тип x статус x отправитель
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tx_rollup (
+                period TEXT NOT NULL,  -- hour, day
+                bucket TEXT NOT NULL,
+                token TEXT NOT NULL,
+                type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                sender TEXT NOT NULL,
+                tx_count INTEGER DEFAULT 0,
+                amount_sum REAL DEFAULT 0,
+                gas_cost_sum REAL DEFAULT 0,
+                gas_price_sum REAL DEFAULT 0,
+                gas_price_count INTEGER DEFAULT 0,
+                gas_used_sum REAL DEFAULT 0,
+                gas_used_count INTEGER DEFAULT 0,
+                amount_min REAL,
+                amount_max REAL,
+                PRIMARY KEY (period, bucket, token, type, status, sender)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Гистограмма задержки подтверждения (created_at -> confirmed_at)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tx_latency_hist (
+                bucket TEXT NOT NULL,
+                le_ms INTEGER NOT NULL,
+                tx_count INTEGER DEFAULT 0,
+                PRIMARY KEY (bucket, le_ms)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Гистограмма цены газа
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tx_gas_hist (
+                bucket TEXT NOT NULL,
+                gwei REAL NOT NULL,
+                tx_count INTEGER DEFAULT 0,
+                PRIMARY KEY (bucket, gwei)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Получатели по дням (для уникальных получателей)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tx_rollup_receivers (
+                day TEXT NOT NULL,
+                to_address TEXT NOT NULL,
+                tx_count INTEGER DEFAULT 0,
+                PRIMARY KEY (day, to_address)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Триггеры пересоздаются при каждом запуске; агрегаты, построенные
+        # триггерами без пересчета min/max, перестраиваются один раз
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'tx_history_rollup_au'")
+        row = cursor.fetchone()
+        legacy_rollup_triggers = row is not None and 'SELECT MIN(h.amount)' not in row[0]
+        for trigger in ('tx_history_rollup_ai', 'tx_history_rollup_au', 'tx_history_rollup_ad'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tx_history_rollup_ai AFTER INSERT ON tx_history BEGIN
+                {_rollup_upsert('new', 1)}
+            END
+        ''')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tx_history_rollup_au
+            AFTER UPDATE OF status, amount, gas_price, gas_used, token_symbol, type,
+                            from_address, to_address, created_at ON tx_history BEGIN
+                {_rollup_upsert('old', -1)}
+                {_rollup_upsert('new', 1)}
+            END
+        ''')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tx_history_rollup_ad AFTER DELETE ON tx_history BEGIN
+                {_rollup_upsert('old', -1)}
+            END
+        ''')
+        
+        latency_case = ' '.join(
+            f"WHEN latency_ms <= {edge} THEN {edge}" for edge in LATENCY_BUCKETS_MS[:-1]
+        )
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tx_history_latency_au AFTER UPDATE OF status ON tx_history
+            WHEN new.status IN ('success', 'failed') AND COALESCE(old.status, '') NOT IN ('success', 'failed')
+            BEGIN
+                INSERT INTO tx_latency_hist (bucket, le_ms, tx_count)
+                SELECT strftime('%Y-%m-%d %H:00:00', new.created_at),
+                       CASE {latency_case} ELSE {LATENCY_BUCKETS_MS[-1]} END, 1
+                FROM (SELECT (julianday(COALESCE(new.confirmed_at, CURRENT_TIMESTAMP))
+                              - julianday(new.created_at)) * 86400000 AS latency_ms)
+                WHERE latency_ms >= 0
+                ON CONFLICT(bucket, le_ms) DO UPDATE SET tx_count = tx_count + 1;
+            END
+        ''')
+        
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_rollup_period_bucket ON tx_rollup(period, bucket)')
+        
+        if needs_backfill or legacy_rollup_triggers:
+            cursor.execute('SELECT COUNT(*) FROM tx_history')
+            if cursor.fetchone()[0]:
+                self._backfill_rollups(cursor)
+    
+    def _backfill_rollups(self, cursor):
+        """Построение агрегатов по существующей истории (однократно)"""
+        logger.info("Построение агрегатов tx_history...")
+        for table in ('tx_rollup', 'tx_latency_hist', 'tx_gas_hist', 'tx_rollup_receivers'):
+            cursor.execute(f'DELETE FROM {table}')
+        
+        for period, bucket_expr in ROLLUP_PERIODS:
+            bucket = bucket_expr.format('created_at')
+            cursor.execute(f'''
+                INSERT INTO tx_rollup (period, bucket, token, type, status, sender,
+                                       tx_count, amount_sum, gas_cost_sum, gas_price_sum,
+                                       gas_price_count, gas_used_sum, gas_used_count,
+                                       amount_min, amount_max)
+                SELECT '{period}', {bucket}, COALESCE(token_symbol, 'BNB'), COALESCE(type, ''),
+                       COALESCE(status, ''), COALESCE(from_address, ''),
+                       COUNT(*), SUM(COALESCE(amount, 0)),
+                       SUM(COALESCE(gas_price, 0) * COALESCE(gas_used, 0)),
+                       SUM(COALESCE(gas_price, 0)), COUNT(gas_price),
+                       SUM(COALESCE(gas_used, 0)), COUNT(gas_used), MIN(amount), MAX(amount)
+                FROM tx_history
+                GROUP BY 1, 2, 3, 4, 5, 6
+            ''')
+        
+        cursor.execute('''
+            INSERT INTO tx_gas_hist (bucket, gwei, tx_count)
+            SELECT strftime('%Y-%m-%d %H:00:00', created_at), ROUND(gas_price / 1e9, 1), COUNT(*)
+            FROM tx_history WHERE gas_price IS NOT NULL
+            GROUP BY 1, 2
+        ''')
+        
+        cursor.execute('''
+            INSERT INTO tx_rollup_receivers (day, to_address, tx_count)
+            SELECT date(created_at), to_address, COUNT(*)
+            FROM tx_history
+            GROUP BY 1, 2
+        ''')
+        
+        cursor.execute('''
+            SELECT strftime('%Y-%m-%d %H:00:00', created_at) AS bucket,
+                   (julianday(confirmed_at) - julianday(created_at)) * 86400000 AS latency_ms
+            FROM tx_history
+            WHERE confirmed_at IS NOT NULL AND status IN ('success', 'failed')
+        ''')
+        histogram: Dict[Tuple[str, int], int] = {}
+        for bucket, latency_ms in cursor.fetchall():
+            if latency_ms is None or latency_ms < 0:
+                continue
+            edge = next((e for e in LATENCY_BUCKETS_MS if latency_ms <= e), LATENCY_BUCKETS_MS[-1])
+            histogram[(bucket, edge)] = histogram.get((bucket, edge), 0) + 1
+        cursor.executemany(
+            'INSERT INTO tx_latency_hist (bucket, le_ms, tx_count) VALUES (?, ?, ?)',
+            [(bucket, edge, count) for (bucket, edge), count in histogram.items()]
+        )
+    
+    def rebuild_rollups(self):
+        """Полное перестроение агрегатов по tx_history"""
+        with self.get_connection() as conn:
+            self._backfill_rollups(conn.cursor())
+            conn.commit()
+    
     def get_connection(self):
-        """Контекстный менеджер для получения соединения с БД"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """Контекстный менеджер для получения соединения с БД (соединение потока)"""
+        return self.storage.connection()
     
     # Методы для работы с настройками
     def save_settings(self, settings: Dict[str, Any]):
@@ -563,25 +840,22 @@ class Store:
             
             stats = {}
             
-            # Общее количество транзакций
-            cursor.execute('SELECT COUNT(*) FROM tx_history')
-            stats['total_transactions'] = cursor.fetchone()[0]
-            
-            # Транзакции по статусам
-            cursor.execute('''
-                SELECT status, COUNT(*) as count 
-                FROM tx_history 
-                GROUP BY status
-            ''')
-            stats['transactions_by_status'] = {row['status']: row['count'] for row in cursor.fetchall()}
-            
-            # Транзакции по типам
+            # Транзакции по статусам и типам (из дневных агрегатов)
             cursor.execute('''
-                SELECT type, COUNT(*) as count 
-                FROM tx_history 
-                GROUP BY type
+                SELECT NULLIF(status, '') as status, NULLIF(type, '') as type, SUM(tx_count) as count
+                FROM tx_rollup
+                WHERE period = 'day'
+                GROUP BY status, type
+                HAVING SUM(tx_count) > 0
             ''')
-            stats['transactions_by_type'] = {row['type']: row['count'] for row in cursor.fetchall()}
+            by_status: Dict[Any, int] = {}
+            by_type: Dict[Any, int] = {}
+            for row in cursor.fetchall():
+                by_status[row['status']] = by_status.get(row['status'], 0) + row['count']
+                by_type[row['type']] = by_type.get(row['type'], 0) + row['count']
+            stats['total_transactions'] = sum(by_status.values())
+            stats['transactions_by_status'] = by_status
+            stats['transactions_by_type'] = by_type
             
             # Задачи по статусам
             cursor.execute('''
@@ -614,17 +888,103 @@ class Store:
             
             cursor.execute('''
                 SELECT 
-                    DATE(created_at) as date,
-                    COUNT(*) as count,
-                    SUM(amount) as volume
-                FROM tx_history
-                WHERE created_at >= datetime('now', '-' || ? || ' days')
-                GROUP BY DATE(created_at)
+                    date(bucket) as date,
+                    SUM(tx_count) as count,
+                    SUM(amount_sum) as volume
+                FROM tx_rollup
+                WHERE period = 'hour' AND bucket >= strftime('%Y-%m-%d %H:00:00', 'now', '-' || ? || ' days')
+                GROUP BY date(bucket)
+                HAVING SUM(tx_count) > 0
                 ORDER BY date
             ''', (days,))
             
             return [dict(row) for row in cursor.fetchall()]
     
+    def get_rollups(self, period: str = 'day', start: str = None, end: str = None,
+                    group_by: Tuple[str, ...] = ()) -> List[Dict]:
+        """
+        Чтение агрегатов tx_history
+        
+        Args:
+            period: hour или day
+            start: Начало (включительно, UTC), строка 'YYYY-MM-DD[ HH:MM:SS]'
+            end: Конец (включительно, UTC)
+            group_by: Дополнительные измерения (token, type, status, sender)
+            
+        Returns:
+            Список строк с полями bucket, измерениями и суммами
+        """
+        dimensions = [d for d in group_by if d in ('token', 'type', 'status', 'sender')]
+        columns = ', '.join(['bucket'] + dimensions)
+        query = f'''
+            SELECT {columns},
+                   SUM(tx_count) as tx_count,
+                   SUM(amount_sum) as amount_sum,
+                   SUM(gas_cost_sum) as gas_cost_sum,
+                   SUM(gas_price_sum) as gas_price_sum,
+                   SUM(gas_price_count) as gas_price_count,
+                   SUM(gas_used_sum) as gas_used_sum,
+                   SUM(gas_used_count) as gas_used_count,
+                   MIN(amount_min) as amount_min,
+                   MAX(amount_max) as amount_max
+            FROM tx_rollup
+            WHERE period = ?
+        '''
+        params: List[Any] = [period]
+        if start:
+            query += ' AND bucket >= ?'
+            params.append(start)
+        if end:
+            query += ' AND bucket <= ?'
+            params.append(end)
+        query += f' GROUP BY {columns} HAVING SUM(tx_count) > 0 ORDER BY bucket'
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_latency_histogram(self, start: str = None, end: str = None) -> Dict[int, int]:
+        """Гистограмма задержки подтверждения: верхняя граница (мс) -> количество"""
+        return self._read_histogram('tx_latency_hist', 'le_ms', start, end)
+    
+    def get_gas_price_histogram(self, start: str = None, end: str = None) -> Dict[float, int]:
+        """Гистограмма цены газа: gwei -> количество"""
+        return self._read_histogram('tx_gas_hist', 'gwei', start, end)
+    
+    def _read_histogram(self, table: str, key: str, start: Optional[str], end: Optional[str]) -> Dict:
+        """Суммирование почасовой гистограммы за период"""
+        query = f'SELECT {key} as k, SUM(tx_count) as count FROM {table} WHERE 1=1'
+        params = []
+        if start:
+            query += ' AND bucket >= ?'
+            params.append(start)
+        if end:
+            query += ' AND bucket <= ?'
+            params.append(end)
+        query += f' GROUP BY {key} HAVING SUM(tx_count) > 0 ORDER BY {key}'
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return {row['k']: row['count'] for row in cursor.fetchall()}
+    
+    def count_unique_receivers(self, start_day: str = None, end_day: str = None) -> int:
+        """Количество уникальных получателей за период (по дням)"""
+        query = 'SELECT COUNT(DISTINCT to_address) FROM tx_rollup_receivers WHERE tx_count > 0'
+        params = []
+        if start_day:
+            query += ' AND day >= ?'
+            params.append(start_day)
+        if end_day:
+            query += ' AND day <= ?'
+            params.append(end_day)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return cursor.fetchone()[0]
+    
     # Утилиты
     def vacuum(self):
         """Оптимизация базы данных"""
@@ -638,22 +998,27 @@ class Store:
     
     def export_to_csv(self, table: str, output_path: str):
         """Экспорт таблицы в CSV"""
-        import csv
+        self.export_table(table, output_path, fmt='csv')
+    
+    def export_table(self, table: str, output_path: str, fmt: Optional[str] = None,
+                     where: Optional[str] = None, params: Tuple = (), chunk_size: int = 50_000) -> int:
+        """
+        Потоковый экспорт таблицы (tx_history, found_tx, rewards, ...)
         
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(f'SELECT * FROM {table}')
+        Args:
+            table: Имя таблицы
+            output_path: Файл назначения (.csv, .csv.gz, .parquet, .arrow)
+            fmt: Формат (по умолчанию - по расширению)
+            where: Дополнительное условие WHERE
+            params: Параметры условия
+            chunk_size: Размер порции
             
-            with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Заголовки
-                writer.writerow([description[0] for description in cursor.description])
-                
-                # Данные
-                writer.writerows(cursor.fetchall())
-                
-        logger.info(f"Таблица {table} экспортирована в {output_path}")
+        Returns:
+            Количество выгруженных строк
+        """
+        from ..utils.export import export_table
+        return export_table(self.db_path, table, output_path, fmt=fmt, where=where,
+                            params=params, chunk_size=chunk_size)
 
 
 # Глобальный экземпляр хранилища
@@ -665,7 +1030,8 @@ def get_store() -> Store:
     global _store_instance
     
     if _store_instance is None:
-        _store_instance = Store()
+        with startup_timing.measure('get_store'):
+            _store_instance = Store()
         
     return _store_instance
 
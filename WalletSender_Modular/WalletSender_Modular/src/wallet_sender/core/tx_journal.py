@@ -0,0 +1,603 @@
+"""
+Журнал событий транзакций
+
+Единый append-only источник фактов о жизненном цикле транзакции: reserved,
+signed, broadcast, mined, failed, replaced. Горячий путь отправки только
+кладет событие в буфер (append); фоновый писатель дописывает накопленную
+пачку в JSON-lines файл одним write и одним fsync (групповой коммит) и
+передает ее проекциям. Проекции строят таблицы tx_history (Store),
+transactions (Database) и operations (AnalyticsManager), каждая одной
+транзакцией SQLite на пачку.
+
+Позиция каждой проекции (последний примененный seq и байтовое смещение
+после него) хранится рядом с журналом. Если проекция отстала (ошибка записи,
+падение между fsync журнала и коммитом проекции), недостающие события
+дочитываются из файла с этого смещения, поэтому любая таблица
+восстанавливается из журнала. Проекция, раз за разом падающая на одних и
+тех же событиях, паркуется и не задерживает писателя.
+
+Когда файл вырос до segment_bytes и все проекции применили его события,
+журнал сохраняет checkpoint (последний seq) и усекает файл; при старте
+последний seq читается с конца файла.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# События жизненного цикла
+RESERVED = 'reserved'
+SIGNED = 'signed'
+BROADCAST = 'broadcast'
+MINED = 'mined'
+FAILED = 'failed'
+REPLACED = 'replaced'
+
+EVENTS = (RESERVED, SIGNED, BROADCAST, MINED, FAILED, REPLACED)
+
+
+def _utc(event: Dict[str, Any]) -> datetime:
+    return datetime.utcfromtimestamp(event['ts'])
+
+
+def _sql_time(event: Dict[str, Any]) -> str:
+    """Время события в формате CURRENT_TIMESTAMP SQLite (UTC)"""
+    return _utc(event).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class TxJournal:
+    """Append-only журнал событий транзакций с групповыми коммитами и проекциями"""
+
+    # Сколько байт с конца файла читается при поиске последнего seq
+    TAIL_CHUNK = 64 * 1024
+
+    def __init__(self, path: Optional[str] = None, flush_interval: float = 0.05,
+                 max_batch: int = 1000, fsync: bool = True, segment_bytes: int = 64 * 1024 * 1024,
+                 max_projection_failures: int = 5):
+        """
+        Args:
+            path: Путь к файлу журнала (JSON lines)
+            flush_interval: Максимальная задержка коммита пачки (сек)
+            max_batch: Размер пачки, при котором коммит выполняется сразу
+            fsync: Синхронизировать файл с диском на каждом коммите
+            segment_bytes: Размер файла, после которого он усекается, когда все
+                проекции применили его события (0 - не усекать)
+            max_projection_failures: Ошибок подряд, после которых проекция
+                паркуется до resume_projection или перезапуска
+        """
+        if path is None:
+            path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'tx_journal.jsonl')
+
+        self.path = path
+        self.offsets_path = path + '.offsets'
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, int(max_batch))
+        self.fsync = fsync
+        self.segment_bytes = segment_bytes
+        self.max_projection_failures = max(1, int(max_projection_failures))
+
+        # Позиции проекций: имя -> (последний примененный seq, байтовое смещение после него)
+        self._positions: Dict[str, Tuple[int, Optional[int]]] = {}
+        # Последний seq усеченной части журнала
+        self._checkpoint = 0
+        self._load_offsets()
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self._seq = self._recover()
+        self._flushed_seq = self._seq
+        self._file = open(self.path, 'ab')
+        self._size = self._file.tell()
+
+        self.projections: List[Any] = []
+        self._failures: Dict[str, int] = {}
+        self.parked: Set[str] = set()
+        self._project_lock = threading.Lock()
+
+        # Статистика
+        self.total_events = 0
+        self.total_commits = 0
+        self.total_compactions = 0
+
+        self.is_running = True
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="TxJournal")
+        self._writer.start()
+
+    def _recover(self) -> int:
+        """
+        Последний seq журнала (по хвосту файла, без чтения всей истории);
+        оборванная при падении строка закрывается переводом строки
+        """
+        if not os.path.exists(self.path):
+            return self._checkpoint
+        last_seq = self._checkpoint
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+            start = end
+            while start > 0:
+                start = max(0, start - self.TAIL_CHUNK)
+                f.seek(start)
+                lines = f.read(end - start).split(b'\n')
+                # Первая строка куска может быть неполной, если кусок не с начала файла
+                complete = lines if start == 0 else lines[1:]
+                seq = next((seq for seq in map(self._line_seq, reversed(complete)) if seq), None)
+                if seq is not None:
+                    return max(last_seq, seq)
+        return last_seq
+
+    @staticmethod
+    def _line_seq(line: bytes) -> Optional[int]:
+        try:
+            return int(json.loads(line)['seq'])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _load_offsets(self):
+        try:
+            with open(self.offsets_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Позиции проекций журнала не прочитаны, проекции будут перестроены: {e}")
+            return
+        if 'projections' not in data:
+            # Старый формат: {имя: seq} без байтовых смещений
+            self._positions = {name: (int(seq), None) for name, seq in data.items()}
+            return
+        self._checkpoint = int(data.get('checkpoint', 0))
+        self._positions = {name: (int(seq), offset) for name, (seq, offset) in data['projections'].items()}
+
+    def _save_offsets(self):
+        temp_path = self.offsets_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'checkpoint': self._checkpoint,
+                       'projections': {name: list(pos) for name, pos in self._positions.items()}}, f)
+        os.replace(temp_path, self.offsets_path)
+
+    def append(self, event: str, tx_hash: Optional[str] = None, sync: bool = False, **fields) -> int:
+        """
+        Добавление события в журнал
+
+        Args:
+            event: Событие (reserved, signed, broadcast, mined, failed, replaced)
+            tx_hash: Хеш транзакции
+            sync: Дождаться записи на диск
+            **fields: Поля события (from_address, to_address, nonce, amount, ...)
+
+        Returns:
+            Порядковый номер события
+        """
+        if event not in EVENTS:
+            raise ValueError(f"Неизвестное событие журнала: {event}")
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+            entry = {'seq': seq, 'ts': time.time(), 'event': event}
+            if tx_hash:
+                entry['tx_hash'] = tx_hash
+            entry.update((key, value) for key, value in fields.items() if value is not None)
+            self._buffer.append(entry)
+            if len(self._buffer) >= self.max_batch:
+                self._cond.notify_all()
+        if sync:
+            self.wait_flushed(seq)
+        return seq
+
+    def wait_flushed(self, seq: Optional[int] = None, timeout: float = 5.0):
+        """Ожидание записи событий вплоть до seq (по умолчанию - всех текущих)"""
+        deadline = time.time() + timeout
+        with self._cond:
+            target = self._seq if seq is None else seq
+            self._cond.notify_all()
+            while self._flushed_seq < target and self.is_running:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    logger.warning("Таймаут ожидания записи журнала транзакций")
+                    return
+                self._cond.wait(remaining)
+
+    def flush(self):
+        """Синхронная запись буфера и применение проекций"""
+        self.wait_flushed()
+
+    def _writer_loop(self):
+        """Фоновый писатель пачек"""
+        while self.is_running:
+            with self._cond:
+                if not self._buffer:
+                    self._cond.wait(self.flush_interval)
+                batch, self._buffer = self._buffer, []
+            if batch and not self._commit(batch):
+                # Файл недоступен: события возвращаются в буфер до следующей попытки
+                with self._cond:
+                    self._buffer[:0] = batch
+                time.sleep(self.flush_interval)
+                continue
+            if batch:
+                self._project(batch)
+                self._maybe_compact(batch[-1]['seq'])
+            with self._cond:
+                if batch:
+                    self._flushed_seq = max(self._flushed_seq, batch[-1]['seq'])
+                self._cond.notify_all()
+
+    def _commit(self, batch: List[Dict[str, Any]]) -> bool:
+        """Запись пачки одним write и одним fsync"""
+        data = ''.join(json.dumps(event, ensure_ascii=False, default=str) + '\n'
+                       for event in batch).encode('utf-8')
+        try:
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        except Exception as e:
+            logger.error(f"Ошибка записи журнала транзакций ({len(batch)} событий): {e}")
+            return False
+        self._size = self._file.tell()
+        self.total_events += len(batch)
+        self.total_commits += 1
+        return True
+
+    def add_projection(self, projection):
+        """
+        Подключение проекции с догоняющим применением событий из файла
+
+        Args:
+            projection: Объект с атрибутом name и методом apply(events)
+        """
+        with self._project_lock:
+            self.projections.append(projection)
+            done = self._positions.get(projection.name, (0, None))[0]
+            if done < self._checkpoint:
+                logger.warning(f"Проекция {projection.name}: события до seq {self._checkpoint} "
+                               f"усечены из журнала, перестраивается только хвост")
+            self._apply(projection, [])
+
+    def resume_projection(self, name: str):
+        """Снятие проекции с парковки (повторное применение пропущенных событий)"""
+        with self._project_lock:
+            self.parked.discard(name)
+            self._failures.pop(name, None)
+            for projection in self.projections:
+                if projection.name == name:
+                    self._apply(projection, [])
+
+    def _project(self, batch: List[Dict[str, Any]]):
+        with self._project_lock:
+            for projection in self.projections:
+                if projection.name not in self.parked:
+                    self._apply(projection, batch)
+
+    def _apply(self, projection, batch: List[Dict[str, Any]]):
+        """
+        Применение событий после позиции проекции
+
+        Актуальная проекция получает пачку из памяти; отставшая дочитывает
+        файл с сохраненного байтового смещения (без просмотра всей истории).
+        """
+        done, offset = self._positions.get(projection.name, (0, None))
+        if batch and done >= batch[0]['seq'] - 1:
+            events = [event for event in batch if event['seq'] > done]
+            end_offset = self._size
+        else:
+            upto = batch[-1]['seq'] if batch else self._seq
+            if offset is None or offset > self._size:
+                offset = 0
+            events, end_offset = self._read(offset, done, upto)
+        if not events:
+            return
+        try:
+            projection.apply(events)
+        except Exception as e:
+            failures = self._failures.get(projection.name, 0) + 1
+            self._failures[projection.name] = failures
+            if failures >= self.max_projection_failures:
+                # Не блокируем писателя: проекция догонит журнал после resume_projection
+                self.parked.add(projection.name)
+                logger.error(f"Проекция {projection.name} припаркована после {failures} ошибок "
+                             f"(seq {events[0]['seq']}-{events[-1]['seq']}): {e}")
+            else:
+                logger.error(f"Проекция {projection.name}: ошибка применения {len(events)} событий: {e}")
+            return
+        self._failures.pop(projection.name, None)
+        self._positions[projection.name] = (events[-1]['seq'], end_offset)
+        try:
+            self._save_offsets()
+        except Exception as e:
+            logger.error(f"Ошибка сохранения позиций проекций журнала: {e}")
+
+    def _read(self, offset: int, since_seq: int, upto_seq: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        События (since_seq, upto_seq] начиная с байтового смещения
+
+        Returns:
+            (события, смещение после последнего прочитанного события)
+        """
+        events = []
+        position = offset
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Пачка дописывается прямо сейчас
+                        break
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Оборванная строка при падении во время записи
+                        position += len(line)
+                        continue
+                    seq = event.get('seq', 0)
+                    if seq > upto_seq:
+                        break
+                    position += len(line)
+                    if seq > since_seq:
+                        events.append(event)
+        except FileNotFoundError:
+            pass
+        return events, position
+
+    def _maybe_compact(self, last_seq: int):
+        """
+        Усечение файла, когда все проекции применили все его события
+
+        Сначала сохраняется checkpoint (seq усеченной части), затем файл
+        усекается: после падения между шагами старые события отфильтруются по seq.
+        """
+        if not self.segment_bytes or self._size < self.segment_bytes:
+            return
+        with self._project_lock:
+            if any(self._positions.get(p.name, (0, None))[0] < last_seq for p in self.projections):
+                return
+            self._checkpoint = last_seq
+            self._positions = {name: (seq, 0) for name, (seq, _) in self._positions.items()}
+            try:
+                self._save_offsets()
+                self._file.truncate(0)
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            except Exception as e:
+                logger.error(f"Ошибка усечения журнала транзакций: {e}")
+                return
+            self._size = 0
+            self.total_compactions += 1
+            logger.info(f"Журнал транзакций усечен до seq {last_seq}")
+
+    def replay(self, since_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        """События из файла журнала после since_seq"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Оборванная строка при падении во время записи
+                        continue
+                    if event.get('seq', 0) > since_seq:
+                        yield event
+        except FileNotFoundError:
+            return
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._buffer)
+        return {
+            'pending': pending,
+            'last_seq': self._seq,
+            'total_events': self.total_events,
+            'total_commits': self.total_commits,
+            'total_compactions': self.total_compactions,
+            'file_bytes': self._size,
+            'checkpoint': self._checkpoint,
+            'projections': {p.name: self._positions.get(p.name, (0, None))[0] for p in self.projections},
+            'parked': sorted(self.parked),
+        }
+
+    def close(self):
+        """Запись остатка и закрытие"""
+        self.flush()
+        self.is_running = False
+        with self._cond:
+            self._cond.notify_all()
+        self._writer.join(timeout=5)
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            if self._commit(batch):
+                self._project(batch)
+        self._file.close()
+
+
+class StoreProjection:
+    """Проекция в tx_history (Store)"""
+
+    name = 'store'
+    COLUMNS = ('tx_hash', 'from_address', 'to_address', 'token_address', 'token_symbol', 'amount',
+               'gas_price', 'gas_used', 'gas_limit', 'status', 'type', 'job_id', 'note', 'block_number')
+
+    def __init__(self, store=None):
+        self.store = store
+
+    def apply(self, events: List[Dict[str, Any]]):
+        from .store import get_store
+        store = self.store or get_store()
+        with store.get_connection() as conn:
+            for event in events:
+                if not event.get('tx_hash'):
+                    continue
+                kind = event['event']
+                if kind == BROADCAST:
+                    self._insert(conn, event)
+                elif kind == REPLACED:
+                    # Финализированные строки (добытая транзакция) не трогаем
+                    conn.execute(
+                        "UPDATE tx_history SET status = 'replaced', note = ? "
+                        "WHERE lower(tx_hash) = lower(?) AND status = 'pending'",
+                        (f"replaced by {event.get('replaced_by')}", event['tx_hash'])
+                    )
+                elif kind in (MINED, FAILED):
+                    values = {key: event.get(key) for key in ('status', 'gas_used', 'block_number')}
+                    values['confirmed_at'] = _sql_time(event)
+                    # Добытым может оказаться исходный хеш, уже помеченный замененным:
+                    # его пометка "replaced by" снимается
+                    note = ("note = ?" if event.get('note')
+                            else "note = CASE WHEN status = 'replaced' THEN NULL ELSE note END")
+                    params = [*values.values(), *([event['note']] if event.get('note') else []), event['tx_hash']]
+                    conn.execute(
+                        f"UPDATE tx_history SET {', '.join(f'{key} = ?' for key in values)}, {note} "
+                        f"WHERE lower(tx_hash) = lower(?) AND status IN ('pending', 'replaced')",
+                        params
+                    )
+            conn.commit()
+
+    def _insert(self, conn, event: Dict[str, Any]):
+        row = {column: event[column] for column in self.COLUMNS if column in event}
+        row.setdefault('status', 'pending')
+        row['created_at'] = _sql_time(event)
+        # Повторное применение (догоняющая проекция) не дублирует строки
+        conn.execute(
+            f"INSERT INTO tx_history ({', '.join(row)}) SELECT {', '.join('?' * len(row))} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM tx_history WHERE tx_hash = ?)",
+            [*row.values(), row['tx_hash']]
+        )
+
+
+class DatabaseProjection:
+    """Проекция финальных статусов в transactions (SQLAlchemy Database)"""
+
+    name = 'database'
+
+    def apply(self, events: List[Dict[str, Any]]):
+        final = [event for event in events if event['event'] in (MINED, FAILED) and event.get('tx_hash')]
+        if not final:
+            return
+        try:
+            from ..database.database import get_database
+            from ..database.models import Transaction
+        except ImportError:
+            return
+        session = get_database().get_session()
+        try:
+            for event in final:
+                tx_hash = event['tx_hash'].lower()
+                session.query(Transaction).filter(
+                    Transaction.tx_hash.in_([tx_hash, tx_hash[2:]]),
+                    Transaction.status == 'pending'
+                ).update({
+                    'status': event.get('status'),
+                    'gas_used': event.get('gas_used'),
+                    'block_number': event.get('block_number'),
+                    'confirmed_at': _utc(event),
+                }, synchronize_session=False)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+class AnalyticsProjection:
+    """Проекция в operations (AnalyticsManager)"""
+
+    name = 'analytics'
+    OPERATION_TYPES = {'buy': 'buy', 'sell': 'sell', 'approve': 'approve'}
+
+    def __init__(self, manager=None):
+        self.manager = manager
+
+    def apply(self, events: List[Dict[str, Any]]):
+        inserts, updates = [], []
+        for event in events:
+            tx_hash, kind = event.get('tx_hash'), event['event']
+            if not tx_hash:
+                continue
+            if kind == BROADCAST and event.get('type') != 'cancel':
+                inserts.append((
+                    tx_hash, event['ts'], self.OPERATION_TYPES.get(event.get('type'), 'transfer'), 'pending',
+                    event.get('token_address') or '', event.get('token_symbol') or '', event.get('amount') or 0.0,
+                    None, None, event.get('gas_price'), None, tx_hash, None,
+                    event.get('from_address') or '', None, None
+                ))
+            elif kind in (MINED, FAILED):
+                updates.append((event.get('status'), event.get('gas_used'), event.get('error') or event.get('note'),
+                                tx_hash))
+            elif kind == REPLACED:
+                updates.append(('cancelled', None, f"replaced by {event.get('replaced_by')}", tx_hash))
+        if not inserts and not updates:
+            return
+
+        if self.manager is None:
+            from ..utils.analytics import analytics_manager
+            self.manager = analytics_manager
+        self.manager.apply_operation_rows(inserts, updates)
+
+
+# Проекции по имени (секция tx_journal.projections конфига)
+PROJECTIONS = {
+    StoreProjection.name: StoreProjection,
+    DatabaseProjection.name: DatabaseProjection,
+    AnalyticsProjection.name: AnalyticsProjection,
+}
+
+
+# Глобальный экземпляр
+_tx_journal: Optional[TxJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_tx_journal() -> TxJournal:
+    """Получение глобального журнала транзакций с проекциями из конфига"""
+    global _tx_journal
+
+    with _journal_lock:
+        if _tx_journal is None:
+            settings = {}
+            try:
+                from ..config import get_config
+                settings = get_config().get('tx_journal', {}) or {}
+            except Exception:
+                pass
+            _tx_journal = TxJournal(
+                path=settings.get('path') or None,
+                flush_interval=settings.get('flush_interval_ms', 50) / 1000.0,
+                max_batch=settings.get('max_batch', 1000),
+                fsync=settings.get('fsync', True),
+                segment_bytes=int(settings.get('segment_mb', 64) * 1024 * 1024),
+                max_projection_failures=settings.get('max_projection_failures', 5)
+            )
+            for name in settings.get('projections', list(PROJECTIONS)):
+                if name in PROJECTIONS:
+                    _tx_journal.add_projection(PROJECTIONS[name]())
+                else:
+                    logger.warning(f"Неизвестная проекция журнала транзакций: {name}")
+
+    return _tx_journal
+
+
+def close_tx_journal():
+    """Запись остатка и закрытие глобального журнала"""
+    global _tx_journal
+
+    with _journal_lock:
+        if _tx_journal:
+            _tx_journal.close()
+            _tx_journal = None
+
+
+atexit.register(close_tx_journal)
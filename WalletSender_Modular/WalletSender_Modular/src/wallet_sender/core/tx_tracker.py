@@ -0,0 +1,386 @@
+"""
+Отслеживание отправленных транзакций и замена зависших
+
+Трекер хранит все транзакции в полете по отправителям. Если транзакция не
+попала в блок за stuck_blocks блоков, она переподписывается с тем же nonce и
+повышенной ценой газа (режим 'bump') либо заменяется 0-value переводом самому
+себе (режим 'cancel'). История (события журнала транзакций) и NonceManager
+согласуются при замене и при майнинге.
+
+Трекер - единственный владелец отслеживаемых транзакций: замены и разбор
+nonce передаются сервису подтверждений, чтобы тот не объявил замененный
+хеш выброшенным и не финализировал тикет второй раз.
+
+Трекер не хранит приватные ключи: для переподписи вызывающий передает
+signer - функцию подписи словаря транзакции (например, account.sign_transaction).
+"""
+
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Callable
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from .confirmation_service import current_confirmation_service
+from .nonce_manager import NonceManager, NonceTicket, get_nonce_manager
+from .tx_journal import BROADCAST, FAILED, MINED, REPLACED, get_tx_journal
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Подпись словаря транзакции: возвращает объект с rawTransaction
+Signer = Callable[[Dict[str, Any]], Any]
+
+
+@dataclass
+class TrackedTx:
+    """Транзакция в полете"""
+    sender: str
+    nonce: int
+    tx: Dict[str, Any]
+    signer: Signer = field(repr=False)
+    # None - блок неизвестен, берется при первой проверке
+    sent_block: Optional[int]
+    tx_hashes: List[str] = field(default_factory=list)
+    ticket: Optional[NonceTicket] = None
+    bumps: int = 0
+    cancelled: bool = False
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def current_hash(self) -> str:
+        """Хеш последней отправленной версии"""
+        return self.tx_hashes[-1]
+
+
+class TxTracker:
+    """Фоновый трекер транзакций в полете с заменой зависших"""
+
+    def __init__(self, web3: Optional[Web3] = None, nonce_manager: Optional[NonceManager] = None,
+                 stuck_blocks: int = 20, bump_percent: float = 12.5, max_bumps: int = 5,
+                 mode: str = 'bump', poll_interval: float = 3.0):
+        """
+        Args:
+            web3: Web3 экземпляр (может быть установлен позже)
+            nonce_manager: NonceManager для согласования состояния
+            stuck_blocks: Через сколько блоков без майнинга транзакция считается зависшей
+            bump_percent: Повышение цены газа при замене (минимум 10% для узлов geth)
+            max_bumps: Максимум повышений; после него транзакция отменяется
+            mode: 'bump' - повышать газ, 'cancel' - сразу заменять переводом самому себе
+            poll_interval: Интервал проверки в секундах
+        """
+        self.web3 = web3
+        self.nonce_manager = nonce_manager or get_nonce_manager(web3)
+        self.stuck_blocks = stuck_blocks
+        self.bump_percent = bump_percent
+        self.max_bumps = max_bumps
+        self.mode = mode
+        self.poll_interval = poll_interval
+
+        # {sender: {nonce: TrackedTx}}
+        self.inflight: Dict[str, Dict[int, TrackedTx]] = {}
+        self.lock = threading.Lock()
+
+        # Колбеки: on_mined(tracked, receipt), on_replaced(tracked, old_hash, new_hash)
+        self.callbacks: Dict[str, List[Callable]] = {'mined': [], 'replaced': [], 'dropped': []}
+
+        # Счетчики
+        self.total_tracked = 0
+        self.total_mined = 0
+        self.total_replaced = 0
+
+        self.is_running = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_web3(self, web3: Web3):
+        """Установка Web3 экземпляра"""
+        self.web3 = web3
+
+    def start(self):
+        """Запуск фонового потока"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="TxTracker")
+        self._thread.start()
+        logger.info(f"TxTracker запущен: зависание после {self.stuck_blocks} блоков, режим {self.mode}")
+
+    def stop(self):
+        """Остановка фонового потока"""
+        self.is_running = False
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+    def register_callback(self, event: str, callback: Callable):
+        """Регистрация колбека ('mined', 'replaced', 'dropped')"""
+        if event in self.callbacks:
+            self.callbacks[event].append(callback)
+
+    def _trigger_callback(self, event: str, *args):
+        for callback in self.callbacks.get(event, []):
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Ошибка в колбеке TxTracker {event}: {e}")
+
+    def track(self, tx: Dict[str, Any], tx_hash: str, sender: str, signer: Signer,
+              ticket: Optional[NonceTicket] = None, sent_block: Optional[int] = None):
+        """
+        Постановка отправленной транзакции на отслеживание
+
+        Вызывается на каждую отправку, поэтому не делает RPC запросов.
+
+        Args:
+            tx: Подписанный словарь транзакции (nonce, gasPrice, gas, to, value, data)
+            tx_hash: Хеш отправленной транзакции
+            sender: Checksum адрес отправителя
+            signer: Подпись замены (например, account.sign_transaction)
+            ticket: NonceTicket, под которым отправлена транзакция
+            sent_block: Номер блока на момент отправки (None - блок первой проверки)
+        """
+        tracked = TrackedTx(
+            sender=sender,
+            nonce=int(tx['nonce']),
+            tx=dict(tx),
+            signer=signer,
+            sent_block=sent_block,
+            tx_hashes=[tx_hash],
+            ticket=ticket
+        )
+        with self.lock:
+            self.inflight.setdefault(sender, {})[tracked.nonce] = tracked
+            self.total_tracked += 1
+        logger.debug(f"Отслеживается {tx_hash} (nonce {tracked.nonce}, блок {sent_block})")
+
+    def _run(self):
+        """Цикл проверки"""
+        while self.is_running:
+            try:
+                if self.web3 and self.inflight:
+                    self.check_once()
+            except Exception as e:
+                logger.error(f"Ошибка TxTracker: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def check_once(self):
+        """Одна проверка всех транзакций в полете"""
+        current_block = self.web3.eth.block_number
+
+        with self.lock:
+            senders = {sender: list(txs.values()) for sender, txs in self.inflight.items() if txs}
+
+        for sender, tracked_list in senders.items():
+            # Nonce, подтвержденный сетью: все транзакции ниже уже смайнены
+            try:
+                mined_nonce = self.web3.eth.get_transaction_count(sender, 'latest')
+            except Exception as e:
+                logger.debug(f"Не удалось получить nonce {sender}: {e}")
+                continue
+
+            for tracked in sorted(tracked_list, key=lambda t: t.nonce):
+                if tracked.sent_block is None:
+                    tracked.sent_block = current_block
+                if tracked.nonce < mined_nonce:
+                    self._resolve_mined(tracked)
+                elif current_block - tracked.sent_block >= self.stuck_blocks:
+                    # Заменяем только самую нижнюю зависшую транзакцию: она блокирует остальные
+                    if tracked.nonce == mined_nonce:
+                        self._replace(tracked, current_block)
+                    break
+
+    def _resolve_mined(self, tracked: TrackedTx):
+        """Nonce израсходован: находим какая из версий попала в блок"""
+        receipt = None
+        mined_hash = None
+        for tx_hash in reversed(tracked.tx_hashes):
+            try:
+                receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                receipt = None
+            except Exception as e:
+                logger.debug(f"Receipt {tx_hash}: {e}")
+                return
+            if receipt:
+                mined_hash = tx_hash
+                break
+
+        journal = get_tx_journal()
+        if mined_hash is None:
+            # Nonce занят транзакцией, отправленной в обход трекера
+            logger.warning(f"Nonce {tracked.nonce} {tracked.sender} израсходован другой транзакцией")
+            for tx_hash in tracked.tx_hashes:
+                journal.append(FAILED, tx_hash, status='failed', note='nonce consumed externally',
+                               nonce=tracked.nonce)
+            if tracked.ticket:
+                self.nonce_manager.fail(tracked.ticket, 'nonce consumed externally')
+            self._trigger_callback('dropped', tracked)
+        else:
+            success = receipt.get('status') == 1
+            journal.append(
+                MINED,
+                mined_hash,
+                status='success' if success and not tracked.cancelled else 'failed',
+                gas_used=receipt.get('gasUsed'),
+                block_number=receipt.get('blockNumber'),
+                nonce=tracked.nonce
+            )
+            for tx_hash in tracked.tx_hashes:
+                if tx_hash != mined_hash:
+                    journal.append(REPLACED, tx_hash, replaced_by=mined_hash, nonce=tracked.nonce)
+            if tracked.ticket:
+                if success:
+                    self.nonce_manager.confirm(tracked.ticket)
+                else:
+                    self.nonce_manager.fail(tracked.ticket, 'reverted')
+            self.total_mined += 1
+            self._trigger_callback('mined', tracked, receipt)
+
+        confirmations = current_confirmation_service()
+        if confirmations:
+            confirmations.settle(tracked.tx_hashes, receipt if mined_hash else None)
+
+        with self.lock:
+            sender_txs = self.inflight.get(tracked.sender, {})
+            sender_txs.pop(tracked.nonce, None)
+            if not sender_txs:
+                self.inflight.pop(tracked.sender, None)
+
+    def _bumped_gas_price(self, gas_price: int) -> int:
+        """Цена газа для замены (не ниже текущей сетевой)"""
+        bumped = int(gas_price * (1 + self.bump_percent / 100)) + 1
+        try:
+            bumped = max(bumped, int(self.web3.eth.gas_price))
+        except Exception:
+            pass
+        return bumped
+
+    def _replace(self, tracked: TrackedTx, current_block: int):
+        """Переподпись зависшей транзакции с тем же nonce"""
+        old_hash = tracked.current_hash
+        new_tx = dict(tracked.tx)
+        new_tx['gasPrice'] = self._bumped_gas_price(int(tracked.tx['gasPrice']))
+
+        cancel = self.mode == 'cancel' or tracked.bumps >= self.max_bumps
+        if cancel:
+            # 0-value перевод самому себе освобождает nonce
+            new_tx = {
+                'to': tracked.sender,
+                'value': 0,
+                'gas': 21000,
+                'gasPrice': new_tx['gasPrice'],
+                'nonce': tracked.nonce,
+                'chainId': tracked.tx.get('chainId') or self.web3.eth.chain_id
+            }
+        new_tx.pop('from', None)
+
+        try:
+            signed = tracked.signer(new_tx)
+            new_hash = self.web3.eth.send_raw_transaction(signed.rawTransaction).hex()
+        except Exception as e:
+            error = str(e).lower()
+            if 'nonce too low' in error or 'already known' in error:
+                # Исходная транзакция уже смайнена или в мемпуле: разберемся на следующем цикле
+                logger.debug(f"Замена nonce {tracked.nonce} не нужна: {e}")
+            elif 'underpriced' in error:
+                # Повышения недостаточно — в следующий раз поднимем от новой цены
+                tracked.tx['gasPrice'] = new_tx['gasPrice']
+                tracked.bumps += 1
+            else:
+                logger.error(f"Не удалось заменить {old_hash}: {e}")
+            return
+
+        tracked.tx = new_tx
+        tracked.tx_hashes.append(new_hash)
+        tracked.sent_block = current_block
+        tracked.bumps += 1
+        tracked.cancelled = tracked.cancelled or cancel
+        self.total_replaced += 1
+
+        # Согласование истории (через журнал транзакций) и NonceManager
+        journal = get_tx_journal()
+        journal.append(REPLACED, old_hash, replaced_by=new_hash, nonce=tracked.nonce)
+        original = tracked.tx_hashes[0]
+        journal.append(
+            BROADCAST,
+            new_hash,
+            from_address=tracked.sender,
+            to_address=new_tx.get('to', ''),
+            amount=0 if cancel else None,
+            gas_price=new_tx['gasPrice'],
+            gas_limit=new_tx.get('gas'),
+            nonce=tracked.nonce,
+            type='cancel' if cancel else 'replacement',
+            note=f'replaces {original} (nonce {tracked.nonce})'
+        )
+        if tracked.ticket:
+            self.nonce_manager.replace(tracked.ticket, new_hash, signed.rawTransaction)
+        confirmations = current_confirmation_service()
+        if confirmations:
+            confirmations.replace(old_hash, new_hash)
+
+        action = 'Отменена' if cancel else 'Ускорена'
+        logger.warning(f"{action} зависшая транзакция {old_hash} -> {new_hash} "
+                       f"(nonce {tracked.nonce}, газ {new_tx['gasPrice']})")
+        self._trigger_callback('replaced', tracked, old_hash, new_hash)
+
+    def get_inflight(self, sender: Optional[str] = None) -> List[TrackedTx]:
+        """Список транзакций в полете"""
+        with self.lock:
+            if sender:
+                return list(self.inflight.get(Web3.to_checksum_address(sender), {}).values())
+            return [t for txs in self.inflight.values() for t in txs.values()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика трекера"""
+        with self.lock:
+            inflight = sum(len(txs) for txs in self.inflight.values())
+        return {
+            'inflight': inflight,
+            'senders': len(self.inflight),
+            'total_tracked': self.total_tracked,
+            'total_mined': self.total_mined,
+            'total_replaced': self.total_replaced
+        }
+
+
+# Глобальный экземпляр
+_tx_tracker: Optional[TxTracker] = None
+
+
+def get_tx_tracker(web3: Optional[Web3] = None) -> TxTracker:
+    """Получение глобального трекера транзакций"""
+    global _tx_tracker
+
+    if _tx_tracker is None:
+        settings = {}
+        try:
+            from ..config import get_config
+            settings = get_config().get('stuck_tx', {}) or {}
+        except Exception:
+            pass
+        _tx_tracker = TxTracker(
+            web3,
+            stuck_blocks=settings.get('blocks', 20),
+            bump_percent=settings.get('bump_percent', 12.5),
+            max_bumps=settings.get('max_bumps', 5),
+            mode=settings.get('mode', 'bump')
+        )
+        _tx_tracker.start()
+    elif web3 and not _tx_tracker.web3:
+        _tx_tracker.set_web3(web3)
+
+    return _tx_tracker
+
+
+def close_tx_tracker():
+    """Остановка глобального трекера"""
+    global _tx_tracker
+
+    if _tx_tracker:
+        _tx_tracker.stop()
+        _tx_tracker = None
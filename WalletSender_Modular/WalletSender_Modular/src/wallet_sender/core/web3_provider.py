@@ -1,6 +1,6 @@
 """Web3 Provider for BSC network"""
 
-from typing import Optional, Dict, Union
+from typing import Optional, Dict, List, Union
 from web3 import Web3
 from web3.types import TxReceipt
 from hexbytes import HexBytes
@@ -11,12 +11,16 @@ logger = logging.getLogger(__name__)
 class Web3Provider:
     """Провайдер для подключения к BSC сети"""
     
-    def __init__(self):
-        self.rpc_urls = [
+    def __init__(self, rpc_urls: Optional[List[str]] = None):
+        """
+        Args:
+            rpc_urls: RPC узлы по порядку (по умолчанию - публичные узлы BSC)
+        """
+        self.rpc_urls = list(rpc_urls or [
             'https://bsc-dataseed.binance.org/',
             'https://bsc-dataseed1.defibit.io/',
             'https://bsc-dataseed1.ninicoin.io/'
-        ]
+        ])
         # Сетевые параметры, ожидаемые сервисами
         self.network_config: Dict[str, Union[int, str]] = {
             'chain_id': 56,
@@ -61,11 +65,21 @@ class Web3Provider:
     def wait_for_transaction_receipt(self, tx_hash: Union[str, bytes, HexBytes], timeout: int = 300) -> Optional[TxReceipt]:
         """Ожидание квитанции по транзакции с таймаутом.
 
-        Возвращает Receipt или None при ошибке/таймауте.
+        Квитанцию находит общий сервис подтверждений по новым блокам, поток
+        вызывающего только ждет результата. Возвращает Receipt или None при
+        ошибке/таймауте.
         """
         try:
             if not self.w3:
                 return None
+            try:
+                from .confirmation_service import get_confirmation_service
+                service = get_confirmation_service(self.w3)
+            except Exception as e:
+                logger.debug(f"Сервис подтверждений недоступен: {e}")
+                service = None
+            if service is not None:
+                return service.wait(tx_hash, timeout=timeout)
             # web3.py вернёт исключение по таймауту, перехватываем и возвращаем None
             # Приводим к bytes (HexBytes совместим с bytes) для строгой типизации
             if isinstance(tx_hash, str):
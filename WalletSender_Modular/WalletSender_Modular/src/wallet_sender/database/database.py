@@ -1,15 +1,22 @@
 """
 Управление подключением к базе данных
+
+По умолчанию модели хранятся в общем файле движка хранения
+(utils/storage.py) рядом с tx_history; соединения создает тот же движок.
+Сессии берут соединения из ограниченного пула QueuePool (размеры из секции
+storage конфига) и ждут свободное при исчерпании; SingletonThreadPool
+закрывал бы соединения других потоков сверх pool_size, даже занятые.
 """
 
 import os
 from typing import Optional
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 
 from .models import Base
 from ..utils.logger import get_logger
+from ..utils.storage import get_storage
 
 logger = get_logger(__name__)
 
@@ -17,17 +24,30 @@ logger = get_logger(__name__)
 class Database:
     """Класс для управления подключением к базе данных"""
     
+    # Колонки и индексы, добавленные в модели после создания существующих БД
+    # (create_all не изменяет уже созданные таблицы)
+    ADDED_COLUMNS = [
+        ('distribution_addresses', 'lease_owner', 'VARCHAR(64)'),
+        ('distribution_addresses', 'lease_expires_at', 'TIMESTAMP'),
+    ]
+    ADDED_INDEXES = [
+        ('ix_distribution_addresses_task_status', 'distribution_addresses', 'task_id, status'),
+    ]
+    
+    # Прежний отдельный файл моделей: переносится в общее хранилище при первом запуске
+    LEGACY_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'wallet_sender.db')
+    LEGACY_RENAMES = {'settings': 'app_settings', 'rewards': 'tx_rewards'}
+    
     def __init__(self, db_url: Optional[str] = None):
         """
         Инициализация подключения к БД
         
         Args:
-            db_url: URL подключения к БД (по умолчанию SQLite)
+            db_url: URL подключения к БД (по умолчанию - общий движок хранения)
         """
-        if db_url is None:
-            # По умолчанию используем SQLite
-            db_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'wallet_sender.db')
-            db_url = f'sqlite:///{db_path}'
+        self.storage = get_storage() if db_url is None else None
+        if self.storage is not None:
+            db_url = f'sqlite:///{self.storage.path}'
             
         self.db_url = db_url
         self.engine = None
@@ -40,16 +60,29 @@ class Database:
         """Инициализация базы данных"""
         try:
             # Создаем engine
-            self.engine = create_engine(
-                self.db_url,
-                poolclass=QueuePool,
-                pool_size=10,
-                max_overflow=20,
-                echo=False  # Установить True для отладки SQL запросов
-            )
+            if self.storage is not None:
+                self.engine = create_engine(
+                    'sqlite://',
+                    creator=self.storage.open_connection,
+                    poolclass=QueuePool,
+                    pool_size=self.storage.orm_pool_size,
+                    max_overflow=self.storage.orm_max_overflow,
+                    pool_timeout=self.storage.orm_pool_timeout,
+                    echo=False  # Установить True для отладки SQL запросов
+                )
+                self.storage.attach_pool(self.engine.pool)
+            else:
+                self.engine = create_engine(self.db_url, echo=False)
             
             # Создаем таблицы если их нет
             Base.metadata.create_all(bind=self.engine)
+            self._migrate()
+            if self.storage is not None:
+                self.storage.import_legacy(
+                    self.LEGACY_PATH,
+                    [table.name for table in Base.metadata.sorted_tables] + list(self.LEGACY_RENAMES),
+                    renames=self.LEGACY_RENAMES
+                )
             
             # Создаем фабрику сессий
             self.SessionLocal = sessionmaker(
@@ -67,6 +100,18 @@ class Database:
             logger.error(f"Ошибка инициализации базы данных: {e}")
             raise
             
+    def _migrate(self):
+        """Добавление недостающих колонок и индексов в существующие таблицы"""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table, column, ddl_type in self.ADDED_COLUMNS:
+                existing = {c['name'] for c in inspector.get_columns(table)}
+                if column not in existing:
+                    conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type}'))
+                    logger.info(f"Добавлена колонка {table}.{column}")
+            for name, table, columns in self.ADDED_INDEXES:
+                conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})'))
+            
     def get_session(self) -> Session:
         """
         Получение сессии базы данных
@@ -82,6 +127,8 @@ class Database:
     def close(self):
         """Закрытие подключения к БД"""
         if self.engine:
+            if self.storage is not None:
+                self.storage.detach_pool(self.engine.pool)
             self.engine.dispose()
             logger.info("Подключение к базе данных закрыто")
             
@@ -2,7 +2,7 @@
 Модели базы данных
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -66,7 +66,8 @@ class Balance(Base):
 
 class Reward(Base):
     """Модель награды"""
-    __tablename__ = 'rewards'
+    # rewards в общем хранилище занята таблицей наград Store
+    __tablename__ = 'tx_rewards'
     
     id = Column(Integer, primary_key=True)
     transaction_id = Column(Integer, ForeignKey('transactions.id'))
@@ -108,15 +109,22 @@ class DistributionTask(Base):
 class DistributionAddress(Base):
     """Модель адреса для массовой рассылки"""
     __tablename__ = 'distribution_addresses'
+    __table_args__ = (
+        # Выборка pending адресов задачи при аренде пачки воркером
+        Index('ix_distribution_addresses_task_status', 'task_id', 'status'),
+    )
     
     id = Column(Integer, primary_key=True)
     task_id = Column(Integer, ForeignKey('distribution_tasks.id'))
     address = Column(String(42))
     amount = Column(Float)
-    status = Column(String(20))  # pending, sent, failed
+    status = Column(String(20))  # pending, processing, sent, failed
     tx_hash = Column(String(66))
     error_message = Column(Text)
     processed_at = Column(DateTime)
+    # Аренда адреса воркером QueueExecutor (processing до lease_expires_at)
+    lease_owner = Column(String(64))
+    lease_expires_at = Column(DateTime)
     
     # Связь с задачей
     task = relationship("DistributionTask", back_populates="addresses")
@@ -158,7 +166,8 @@ class AutoSaleTask(Base):
 
 class Settings(Base):
     """Модель настроек приложения"""
-    __tablename__ = 'settings'
+    # settings в общем хранилище занята таблицей настроек Store
+    __tablename__ = 'app_settings'
     
     id = Column(Integer, primary_key=True)
     key = Column(String(100), unique=True)
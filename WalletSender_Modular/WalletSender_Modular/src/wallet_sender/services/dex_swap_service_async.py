@@ -6,13 +6,14 @@ from __future__ import annotations
 from typing import Optional, List, Dict, Any, Callable
 import time
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from web3 import Web3
 from eth_account import Account
 from ..utils.gas_manager import GasManager
 from ..core.nonce_manager import get_nonce_manager, NonceStatus, NonceTicket
 from ..utils.logger import get_logger
 from ..constants import ERC20_ABI
+from .swap_templates import SwapTemplateCache
 
 PANCAKE_ROUTER_ABI = [
     {"name": "swapExactTokensForETH", "type": "function", "stateMutability": "nonpayable",
@@ -77,6 +78,9 @@ class DexSwapServiceAsync:
         # Кеш последнего успешного nonce
         self._last_successful_nonce = None
         self._nonce_lock = asyncio.Lock() if asyncio._get_running_loop() else None
+        
+        # Шаблоны swap транзакций (calldata собирается без ABI-энкодинга)
+        self.templates = SwapTemplateCache(web3, self.router_address, self.address)
 
     def __del__(self):
         """Закрытие executor при удалении объекта"""
@@ -108,37 +112,28 @@ class DexSwapServiceAsync:
             return self.web3.eth.get_transaction_count(self.address, 'pending')
 
     def _reserve_nonce(self) -> int:
-        """Резервирование nonce с проверкой синхронизации"""
-        # Сначала синхронизируемся с сетью
-        network_nonce = self._sync_nonce_with_network()
-        
+        """
+        Резервирование nonce
+
+        NonceManager выдает nonce из локального состояния (сверка с сетью - по
+        интервалу ресинхронизации и при 'nonce too low'), без RPC на каждую
+        транзакцию. Без менеджера nonce запрашивается у сети.
+        """
         if self.nonce_manager:
             try:
-                # Проверяем, что nonce manager синхронизирован
                 self._last_ticket = self.nonce_manager.reserve(self.address)
-                manager_nonce = self._last_ticket.nonce  # type: ignore[attr-defined]
-                
-                # Если manager отстал, используем сетевой
-                if manager_nonce < network_nonce:
-                    logger.warning(f"Nonce manager отстал: {manager_nonce} < {network_nonce}, ресинхронизация...")
-                    # Принудительная синхронизация nonce manager
-                    if hasattr(self.nonce_manager, 'resync'):
-                        self.nonce_manager.resync(self.address)
-                    return network_nonce
-                    
-                return manager_nonce
-                
+                return self._last_ticket.nonce  # type: ignore[attr-defined]
             except Exception as e:
                 logger.warning(f"NonceManager reserve fallback: {e}")
                 self._last_ticket = None
                 
-        return network_nonce
+        return self._sync_nonce_with_network()
 
-    def _mark_pending(self, tx_hash: str) -> None:
+    def _mark_pending(self, tx_hash: str, raw_tx=None) -> None:
         """Отметка транзакции как pending"""
         if self.nonce_manager and self._last_ticket and self._last_ticket.status == NonceStatus.RESERVED:
             try:
-                self.nonce_manager.complete(self._last_ticket, tx_hash)
+                self.nonce_manager.complete(self._last_ticket, tx_hash, raw_tx)
             except Exception as e:
                 logger.debug(f"Complete ticket warn: {e}")
 
@@ -174,7 +169,7 @@ class DexSwapServiceAsync:
             signed = self.web3.eth.account.sign_transaction(tx, self.account.key)
             raw_hash = self.web3.eth.send_raw_transaction(signed.rawTransaction)
             tx_hash = raw_hash.hex()
-            self._mark_pending(tx_hash)
+            self._mark_pending(tx_hash, signed.rawTransaction)
             logger.info(f"Транзакция отправлена: {tx_hash}, nonce={tx_params['nonce']}")
             return tx_hash
         except Exception as e:
@@ -184,10 +179,57 @@ class DexSwapServiceAsync:
             if 'nonce too low' in error_str:
                 logger.error("Nonce слишком низкий, требуется ресинхронизация")
                 self._last_successful_nonce = None  # Сбрасываем кеш
+                self._finalize(False, reason=str(e))
             elif 'nonce too high' in error_str:
                 logger.error("Nonce слишком высокий")
             raise
 
+    def _send_swap(self, method: str, amount_in: int, amount_out_min: int, path: List[str],
+                   deadline: Optional[int], gas_price: Optional[int], gas_limit: Optional[int]) -> str:
+        """
+        Отправка swap по готовому шаблону: подставляются суммы, nonce, цена и лимит газа
+
+        gas_limit=None - лимит шаблона (кэш оценок маршрута или значение по умолчанию).
+        Прогретый шаблон собирается без RPC: оценка газа выполняется только при прогреве.
+        """
+        template = self.templates.get(method, path)
+        gas_price_final = self._gas_price(gas_price, 'swap')
+        nonce = self._reserve_nonce()
+        tx = template.build_transaction(amount_in, amount_out_min, nonce, gas_price_final, deadline,
+                                        gas_limit=gas_limit)
+        try:
+            signed = self.account.sign_transaction(tx)
+            tx_hash = self.web3.eth.send_raw_transaction(signed.rawTransaction).hex()
+            self._mark_pending(tx_hash, signed.rawTransaction)
+            logger.info(f"Транзакция отправлена: {tx_hash}, nonce={nonce}")
+            return tx_hash
+        except Exception as e:
+            logger.error(f"Ошибка отправки транзакции: {e}")
+            if 'nonce too low' in str(e).lower():
+                logger.error("Nonce слишком низкий, требуется ресинхронизация")
+                self._last_successful_nonce = None
+                self._finalize(False, reason=str(e))
+            raise
+
+    def warm_swap_template(self, method: str, path: List[str],
+                           sample_amount_in: Optional[int] = None) -> None:
+        """
+        Заблаговременная подготовка шаблона (до сделки, не в момент срабатывания)
+
+        Запрашивает chainId и строит шаблон. При sample_amount_in оценка
+        eth_estimateGas добавляется в кэш маршрута (нужны баланс и allowance,
+        без них лимит остается прежним).
+        """
+        self.templates.prime()
+        template = self.templates.get(method, path)
+        if sample_amount_in:
+            self.templates.estimate_gas(template, sample_amount_in)
+
+    def warm_swap_template_async(self, method: str, path: List[str],
+                                 sample_amount_in: Optional[int] = None) -> Future:
+        """Прогрев шаблона в фоне (executor сервиса), вызывающий поток не ждет RPC"""
+        return self.executor.submit(self.warm_swap_template, method, path, sample_amount_in)
+
     async def _wait_receipt_async(self, tx_hash: str, timeout: int = 30, max_attempts: int = 10) -> Optional[Dict[str, Any]]:
         """Асинхронное ожидание receipt с несколькими попытками"""
         attempt = 0
@@ -246,7 +288,7 @@ class DexSwapServiceAsync:
             'nonce': nonce,
             'gas': gas_limit,
             'gasPrice': self._gas_price(gas_price, 'approve'),
-            'chainId': self.web3.eth.chain_id
+            'chainId': self.templates.chain_id
         }
         
         tx_hash = self._build_and_send(token.functions.approve(spender_final, amount_final), tx_params)
@@ -259,68 +301,28 @@ class DexSwapServiceAsync:
 
     def swap_exact_tokens_for_tokens(self, amount_in: int, amount_out_min: int, path: List[str],
                                      deadline: Optional[int] = None, gas_price: Optional[int] = None,
-                                     gas_limit: int = 300_000) -> str:
+                                     gas_limit: Optional[int] = None) -> str:
         """Swap токен на токен"""
-        deadline_final = deadline or int(time.time()) + 1200
-        nonce = self._reserve_nonce()
-        
-        tx_params = {
-            'from': self.address,
-            'nonce': nonce,
-            'gas': gas_limit,
-            'gasPrice': self._gas_price(gas_price, 'swap'),
-            'chainId': self.web3.eth.chain_id
-        }
-        
-        fn = self.router.functions.swapExactTokensForTokens(
-            amount_in, amount_out_min, path, self.address, deadline_final
-        )
-        tx_hash = self._build_and_send(fn, tx_params)
+        tx_hash = self._send_swap('swapExactTokensForTokens', amount_in, amount_out_min, path,
+                                  deadline, gas_price, gas_limit)
         logger.info(f"swapExactTokensForTokens sent: {tx_hash}")
         return tx_hash
 
     def swap_exact_tokens_for_eth(self, amount_in: int, amount_out_min: int, path: List[str],
                                   deadline: Optional[int] = None, gas_price: Optional[int] = None,
-                                  gas_limit: int = 300_000) -> str:
+                                  gas_limit: Optional[int] = None) -> str:
         """Swap токен на ETH/BNB"""
-        deadline_final = deadline or int(time.time()) + 1200
-        nonce = self._reserve_nonce()
-        
-        tx_params = {
-            'from': self.address,
-            'nonce': nonce,
-            'gas': gas_limit,
-            'gasPrice': self._gas_price(gas_price, 'swap'),
-            'chainId': self.web3.eth.chain_id
-        }
-        
-        fn = self.router.functions.swapExactTokensForETH(
-            amount_in, amount_out_min, path, self.address, deadline_final
-        )
-        tx_hash = self._build_and_send(fn, tx_params)
+        tx_hash = self._send_swap('swapExactTokensForETH', amount_in, amount_out_min, path,
+                                  deadline, gas_price, gas_limit)
         logger.info(f"swapExactTokensForETH sent: {tx_hash}")
         return tx_hash
 
     def swap_exact_eth_for_tokens(self, amount_in_wei: int, amount_out_min: int, path: List[str],
                                   deadline: Optional[int] = None, gas_price: Optional[int] = None,
-                                  gas_limit: int = 300_000) -> str:
+                                  gas_limit: Optional[int] = None) -> str:
         """Swap ETH/BNB на токен"""
-        deadline_final = deadline or int(time.time()) + 1200
-        nonce = self._reserve_nonce()
-        
-        tx_params = {
-            'from': self.address,
-            'nonce': nonce,
-            'value': amount_in_wei,
-            'gas': gas_limit,
-            'gasPrice': self._gas_price(gas_price, 'swap'),
-            'chainId': self.web3.eth.chain_id
-        }
-        
-        fn = self.router.functions.swapExactETHForTokens(
-            amount_out_min, path, self.address, deadline_final
-        )
-        tx_hash = self._build_and_send(fn, tx_params)
+        tx_hash = self._send_swap('swapExactETHForTokens', amount_in_wei, amount_out_min, path,
+                                  deadline, gas_price, gas_limit)
         logger.info(f"swapExactETHForTokens sent: {tx_hash}")
         return tx_hash
 
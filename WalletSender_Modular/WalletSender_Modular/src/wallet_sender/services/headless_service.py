@@ -0,0 +1,439 @@
+"""
+Headless режим - управление задачами JobEngine без Qt GUI
+
+HeadlessService оборачивает JobRouter: создание задач рассылки, наград,
+автопокупок и автопродаж, пауза/возобновление/отмена, прогресс задач.
+HeadlessServer публикует сервис как локальный HTTP API (TCP или Unix socket),
+чтобы процесс мог работать демоном на сервере рядом с RPC узлом.
+
+API (JSON):
+    GET  /health                     - состояние сервиса
+    GET  /stats                      - статистика роутера
+    GET  /jobs?state=&mode=&limit=   - список задач
+    GET  /jobs/<id>                  - задача и ее прогресс
+    GET  /jobs/<id>/events           - поток прогресса (JSON lines) до завершения
+    POST /jobs                       - {"mode", "params", "tag", "priority"}
+    POST /jobs/<id>/pause|resume|cancel
+
+Приватные ключи из конфигурации задач в ответах API не возвращаются.
+Запросы с заголовком Origin (из браузера) отклоняются: без токена на
+loopback любая открытая страница могла бы создавать и отменять задачи.
+"""
+
+import hmac
+import json
+import os
+import re
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Режим задачи -> метод JobRouter
+SUBMITTERS = {
+    'distribution': 'submit_distribution',
+    'sharded_distribution': 'submit_sharded_distribution',
+    'rewards': 'submit_rewards',
+    'auto_buy': 'submit_auto_buy',
+    'auto_sell': 'submit_auto_sell',
+}
+
+# Поле конфигурации с приватными ключами для каждого режима
+KEY_FIELDS = {
+    'distribution': 'sender_key',
+    'sharded_distribution': 'sender_keys',
+    'rewards': 'sender_key',
+    'auto_buy': 'buyer_keys',
+    'auto_sell': 'seller_keys',
+}
+
+TERMINAL_STATES = ('completed', 'failed', 'cancelled')
+
+DEFAULT_SETTINGS = {
+    'host': '127.0.0.1',
+    'port': 8765,
+    'unix_socket': '',
+    'token': '',
+    'poll_interval': 1.0,
+}
+
+_SECRET_FIELD = re.compile(r'(^|_)(key|keys|private_key|secret|password)$')
+
+
+def load_settings(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Настройки headless режима: DEFAULT_SETTINGS <- config["headless"] <- overrides
+
+    Токен доступа также берется из переменной WALLET_SENDER_API_TOKEN.
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        from ..config import get_config
+        settings.update(get_config().get('headless', {}) or {})
+    except Exception as e:
+        logger.debug(f"Настройки headless из конфигурации недоступны: {e}")
+    if os.environ.get('WALLET_SENDER_API_TOKEN'):
+        settings['token'] = os.environ['WALLET_SENDER_API_TOKEN']
+    for name, value in (overrides or {}).items():
+        if value is not None:
+            settings[name] = value
+    return settings
+
+
+def redact(value: Any) -> Any:
+    """Копия конфигурации задачи без приватных ключей"""
+    if isinstance(value, dict):
+        return {
+            k: ('***' if _SECRET_FIELD.search(str(k)) else redact(v))
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+
+class HeadlessError(Exception):
+    """Ошибка запроса к headless сервису (с HTTP статусом)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class HeadlessService:
+    """Операции над задачами для CLI и HTTP API"""
+
+    def __init__(self, router=None, poll_interval: float = 1.0):
+        """
+        Args:
+            router: JobRouter (по умолчанию глобальный get_job_router())
+            poll_interval: Максимальный интервал между снимками прогресса
+        """
+        if router is None:
+            from .job_router import get_job_router
+            router = get_job_router()
+        self.router = router
+        self.poll_interval = poll_interval
+        self.started_at = time.time()
+
+        # События движка будят потоки прогресса, опрос остается запасным путем
+        self._changed = threading.Condition()
+        self._version = 0
+        for event in ('job_started', 'job_progress', 'job_completed',
+                      'job_failed', 'job_paused', 'job_resumed'):
+            self.router.register_callback(event, self._on_engine_event)
+
+    def _on_engine_event(self, *args, **kwargs):
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+    @property
+    def store(self):
+        return self.router.engine.store
+
+    def submit(self, mode: str, params: Dict[str, Any], tag: Optional[str] = None,
+               priority: Optional[int] = None) -> int:
+        """
+        Создание задачи
+
+        Args:
+            mode: distribution, rewards, auto_buy или auto_sell
+            params: Аргументы соответствующего метода JobRouter.submit_*
+            tag: Тег для группировки задач
+            priority: Приоритет (по умолчанию - приоритет режима в JobRouter)
+
+        Returns:
+            ID созданной задачи
+        """
+        method = SUBMITTERS.get(mode)
+        if method is None:
+            raise HeadlessError(f"Неизвестный режим задачи: {mode}")
+        if not isinstance(params, dict):
+            raise HeadlessError("params должен быть объектом")
+
+        kwargs = dict(params)
+        kwargs['tag'] = tag
+        if priority is not None:
+            kwargs['priority'] = int(priority)
+        try:
+            job_id = getattr(self.router, method)(**kwargs)
+        except TypeError as e:
+            raise HeadlessError(f"Неверные параметры задачи {mode}: {e}")
+
+        logger.info(f"[HEADLESS] Задача #{job_id} ({mode}) создана")
+        return job_id
+
+    def get_job(self, job_id: int) -> Dict[str, Any]:
+        """Задача с конфигурацией без ключей и текущим прогрессом"""
+        job = self.store.get_job(job_id)
+        if not job:
+            raise HeadlessError(f"Задача #{job_id} не найдена", 404)
+        job = redact(job)
+        job['progress'] = self.router.get_progress(job_id)
+        return job
+
+    def list_jobs(self, state: Optional[str] = None, mode: Optional[str] = None,
+                  limit: int = 50) -> List[Dict[str, Any]]:
+        """Последние задачи (без конфигурации)"""
+        jobs = self.store.get_jobs(state=state, mode=mode, limit=limit)
+        for job in jobs:
+            job.pop('config', None)
+        return jobs
+
+    def control(self, job_id: int, action: str) -> bool:
+        """Пауза, возобновление или отмена задачи"""
+        if action not in ('pause', 'resume', 'cancel'):
+            raise HeadlessError(f"Неизвестное действие: {action}")
+        if not self.store.get_job(job_id):
+            raise HeadlessError(f"Задача #{job_id} не найдена", 404)
+        result = getattr(self.router, f'{action}_job')(job_id)
+        logger.info(f"[HEADLESS] {action} задачи #{job_id}: {result}")
+        return bool(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.router.stats()
+
+    def snapshot(self, job_id: int) -> Dict[str, Any]:
+        """Снимок состояния задачи для потока прогресса"""
+        job = self.store.get_job(job_id)
+        if not job:
+            raise HeadlessError(f"Задача #{job_id} не найдена", 404)
+        progress = self.router.get_progress(job_id) or {}
+        return {
+            'job_id': job_id,
+            'state': job.get('state'),
+            'total': progress.get('total', job.get('total', 0)),
+            'done': progress.get('done', job.get('done', 0)),
+            'failed': progress.get('failed', job.get('failed', 0)),
+            'eta': progress.get('eta'),
+            'is_paused': progress.get('is_paused', False),
+        }
+
+    def stream(self, job_id: int, interval: Optional[float] = None,
+               stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Поток снимков прогресса задачи до ее завершения
+
+        Снимок отдается при изменении; между изменениями поток ждет события
+        движка, но не дольше interval секунд.
+        """
+        interval = self.poll_interval if interval is None else interval
+        last = None
+        while stop is None or not stop.is_set():
+            with self._changed:
+                version = self._version
+            current = self.snapshot(job_id)
+            if current != last:
+                yield current
+                last = current
+            if current['state'] in TERMINAL_STATES:
+                return
+            with self._changed:
+                if self._version == version:
+                    self._changed.wait(interval)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            'status': 'ok',
+            'uptime': round(time.time() - self.started_at, 1),
+            'active_jobs': len(self.router.engine.active_jobs),
+        }
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    """Обработчик HTTP запросов headless API"""
+
+    server_version = 'WalletSenderHeadless/1.0'
+
+    @property
+    def service(self) -> HeadlessService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.debug(f"[HEADLESS] {format % args}")
+
+    def _send_json(self, status: int, payload: Any):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if not token:
+            return True
+        provided = self.headers.get('Authorization', '').encode('utf-8')
+        return hmac.compare_digest(provided, f'Bearer {token}'.encode('utf-8'))
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length).decode('utf-8'))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise HeadlessError(f"Некорректный JSON: {e}")
+        if not isinstance(body, dict):
+            raise HeadlessError("Тело запроса должно быть объектом")
+        return body
+
+    def _dispatch(self, method: str):
+        # Браузер добавляет Origin к запросам страниц; CLI и скрипты его не шлют
+        if self.headers.get('Origin') is not None:
+            self._send_json(403, {'error': 'browser requests are not allowed'})
+            return
+        if not self._authorized():
+            self._send_json(401, {'error': 'unauthorized'})
+            return
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            handled = self._route(method, parts, query)
+        except HeadlessError as e:
+            self._send_json(e.status, {'error': str(e)})
+            return
+        except Exception as e:
+            logger.error(f"[HEADLESS] Ошибка обработки {method} {url.path}: {e}")
+            self._send_json(500, {'error': str(e)})
+            return
+        if not handled:
+            self._send_json(404, {'error': f'unknown endpoint {method} {url.path}'})
+
+    def _route(self, method: str, parts: List[str], query: Dict[str, str]) -> bool:
+        if method == 'GET' and parts == ['health']:
+            self._send_json(200, self.service.health())
+        elif method == 'GET' and parts == ['stats']:
+            self._send_json(200, self.service.stats())
+        elif method == 'GET' and parts == ['jobs']:
+            self._send_json(200, self.service.list_jobs(
+                state=query.get('state'), mode=query.get('mode'),
+                limit=int(query.get('limit', 50))))
+        elif method == 'POST' and parts == ['jobs']:
+            body = self._read_body()
+            job_id = self.service.submit(body.get('mode', ''), body.get('params', {}),
+                                         tag=body.get('tag'), priority=body.get('priority'))
+            self._send_json(201, {'job_id': job_id})
+        elif len(parts) >= 2 and parts[0] == 'jobs' and parts[1].isdigit():
+            return self._route_job(method, int(parts[1]), parts[2:], query)
+        else:
+            return False
+        return True
+
+    def _route_job(self, method: str, job_id: int, rest: List[str], query: Dict[str, str]) -> bool:
+        if method == 'GET' and not rest:
+            self._send_json(200, self.service.get_job(job_id))
+        elif method == 'GET' and rest == ['events']:
+            self._stream_events(job_id, query)
+        elif method == 'POST' and len(rest) == 1:
+            ok = self.service.control(job_id, rest[0])
+            self._send_json(200, {'job_id': job_id, 'action': rest[0], 'ok': ok})
+        else:
+            return False
+        return True
+
+    def _stream_events(self, job_id: int, query: Dict[str, str]):
+        interval = float(query['interval']) if 'interval' in query else None
+        events = self.service.stream(job_id, interval=interval, stop=self.server.stopping)
+        first = next(events)  # 404 до отправки заголовков
+
+        # HTTP/1.0 без Content-Length: конец потока - закрытие соединения
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        try:
+            for event in _chain(first, events):
+                self.wfile.write((json.dumps(event, default=str) + '\n').encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug(f"[HEADLESS] Клиент отключился от потока задачи #{job_id}")
+        self.close_connection = True
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+class _ServerMixin:
+    """Общие поля TCP и Unix серверов"""
+
+    daemon_threads = True
+
+    def setup_service(self, service: HeadlessService, token: str):
+        self.service = service
+        self.token = token
+        self.stopping = threading.Event()
+
+
+class _TCPServer(_ServerMixin, ThreadingHTTPServer):
+    pass
+
+
+class _UnixServer(_ServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler ожидает client_address в виде (host, port)
+        return request, ('unix', 0)
+
+
+class HeadlessServer:
+    """HTTP API headless режима на TCP порту или Unix socket"""
+
+    def __init__(self, service: HeadlessService, host: str = '127.0.0.1', port: int = 8765,
+                 unix_socket: str = '', token: str = ''):
+        if unix_socket:
+            if not hasattr(socket, 'AF_UNIX'):
+                raise HeadlessError("Unix socket не поддерживается на этой платформе")
+            if os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            self.httpd = _UnixServer(unix_socket, _ApiHandler)
+            os.chmod(unix_socket, 0o600)
+            self.address = unix_socket
+        else:
+            if not token and host not in ('127.0.0.1', 'localhost', '::1'):
+                raise HeadlessError(f"Для адреса {host} требуется токен доступа (WALLET_SENDER_API_TOKEN)")
+            self.httpd = _TCPServer((host, port), _ApiHandler)
+            self.address = f'http://{host}:{self.httpd.server_address[1]}'
+        self.unix_socket = unix_socket
+        self.httpd.setup_service(service, token)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Запуск сервера в фоновом потоке"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever,
+                                        name='HeadlessServer', daemon=True)
+        self._thread.start()
+        logger.info(f"[HEADLESS] API доступен по адресу {self.address}")
+
+    def stop(self):
+        """Остановка сервера и открытых потоков прогресса"""
+        self.httpd.stopping.set()
+        with self.httpd.service._changed:
+            self.httpd.service._changed.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+        logger.info("[HEADLESS] API остановлен")
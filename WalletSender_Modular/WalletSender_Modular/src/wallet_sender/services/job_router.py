@@ -5,9 +5,13 @@ JobRouter - централизованный маршрутизатор для 
 from typing import Dict, Optional, List, Any
 from datetime import datetime
 import logging
+import threading
 
 from ..core.job_engine import get_job_engine, JobState
 from ..utils.logger import get_logger
+from ..utils.address_classifier import (
+    MODE_DROP, MODE_FLAG, MODE_OFF, get_address_classifier, get_contract_mode
+)
 
 logger = get_logger(__name__)
 
@@ -25,11 +29,12 @@ class JobRouter:
                           token_address: str,
                           amount_per_address: float,
                           sender_key: str,
-                          gas_price: int = 5,
+                          gas_price: Optional[float] = None,
                           gas_limit: int = 100000,
                           delay_between_tx: float = 1.0,
                           tag: Optional[str] = None,
-                          priority: int = 5) -> int:
+                          priority: int = 5,
+                          contracts: Optional[str] = None) -> int:
         """
         Отправка задачи массовой рассылки
         
@@ -38,15 +43,18 @@ class JobRouter:
             token_address: Адрес токена (или "BNB")
             amount_per_address: Сумма на каждый адрес
             sender_key: Приватный ключ отправителя
-            gas_price: Цена газа в gwei
+            gas_price: Цена газа в gwei (None - по оракулу газа)
             gas_limit: Лимит газа
             delay_between_tx: Задержка между транзакциями
             tag: Тег для группировки задач
             priority: Приоритет выполнения
+            contracts: Адреса контрактов среди получателей: drop, flag или off
+                (по умолчанию - address_classifier.mode из конфига)
             
         Returns:
             ID созданной задачи
         """
+        addresses = self._screen_recipients(addresses, contracts)
         config = {
             'addresses': addresses,
             'token_address': token_address,
@@ -69,6 +77,100 @@ class JobRouter:
         logger.info(f"Submitted distribution job #{job_id} with tag '{tag}'")
         return job_id
     
+    def submit_sharded_distribution(self,
+                                    addresses: List[str],
+                                    token_address: str,
+                                    amount_per_address: float,
+                                    sender_keys: List[str],
+                                    gas_price: Optional[float] = None,
+                                    gas_limit: int = 100000,
+                                    delay_between_tx: float = 1.0,
+                                    tag: Optional[str] = None,
+                                    priority: int = 5,
+                                    contracts: Optional[str] = None) -> int:
+        """
+        Отправка задачи массовой рассылки с нескольких кошельков
+        
+        Получатели делятся между отправителями, каждый шард выполняется в
+        отдельном процессе со своей полосой nonce; прогресс сводится в одну задачу.
+        
+        Args:
+            addresses: Список адресов получателей
+            token_address: Адрес токена (или "BNB")
+            amount_per_address: Сумма на каждый адрес
+            sender_keys: Приватные ключи отправителей (по одному шарду на ключ)
+            gas_price: Цена газа в gwei (None - по оракулу газа)
+            gas_limit: Лимит газа
+            delay_between_tx: Задержка между транзакциями внутри шарда
+            tag: Тег для группировки задач
+            priority: Приоритет выполнения
+            contracts: Адреса контрактов среди получателей: drop, flag или off
+            
+        Returns:
+            ID созданной задачи
+        """
+        if not sender_keys:
+            raise ValueError("Нужен хотя бы один ключ отправителя")
+        
+        addresses = self._screen_recipients(addresses, contracts)
+        config = {
+            'addresses': addresses,
+            'token_address': token_address,
+            'amount_per_address': amount_per_address,
+            'sender_keys': sender_keys,
+            'gas_price': gas_price,
+            'gas_limit': gas_limit,
+            'delay_between_tx': delay_between_tx
+        }
+        
+        shards = min(len(sender_keys), len(addresses)) or 1
+        title = f"Distribution to {len(addresses)} addresses from {shards} senders"
+        job_id = self.engine.submit_job(title, 'sharded_distribution', config, priority)
+        
+        # Сохраняем тег если указан
+        if tag:
+            if tag not in self.active_tags:
+                self.active_tags[tag] = []
+            self.active_tags[tag].append(job_id)
+        
+        logger.info(f"Submitted sharded distribution job #{job_id} with tag '{tag}'")
+        return job_id
+    
+    def _screen_recipients(self, addresses: List[str], contracts: Optional[str]) -> List[str]:
+        """
+        Проверка получателей на адреса контрактов перед постановкой задачи
+        
+        В режиме drop список фильтруется до постановки. В режиме flag список
+        не меняется, поэтому проверка идет в фоне и не задерживает submit.
+        Ошибка классификатора не мешает постановке задачи.
+        """
+        mode = contracts or get_contract_mode()
+        if mode == MODE_OFF or not addresses:
+            return list(addresses)
+        if mode != MODE_DROP:
+            threading.Thread(target=self._flag_contracts, args=(list(addresses),),
+                             daemon=True, name="FlagContracts").start()
+            return list(addresses)
+        
+        try:
+            recipients, found = get_address_classifier().filter_recipients(addresses, MODE_DROP)
+        except Exception as e:
+            logger.warning(f"Проверка получателей на контракты не выполнена, список не изменен: {e}")
+            return list(addresses)
+        if found:
+            logger.warning(f"Среди получателей {len(found)} адресов контрактов, исключены из рассылки")
+        return recipients
+    
+    def _flag_contracts(self, addresses: List[str]):
+        """Фоновая проверка получателей в режиме flag (только предупреждение)"""
+        try:
+            _, found = get_address_classifier().filter_recipients(addresses, MODE_FLAG)
+        except Exception as e:
+            logger.warning(f"Проверка получателей на контракты не выполнена: {e}")
+            return
+        if found:
+            logger.warning(f"Среди получателей {len(found)} адресов контрактов, оставлены в рассылке")
+    
     def submit_auto_buy(self,
                        token_address: str,
                        buy_amount: float,
@@ -295,7 +397,7 @@ class JobRouter:
         }
         
         # Получаем все задачи из хранилища
-        all_jobs = self.engine.store.get_recent_jobs(limit=100)
+        all_jobs = self.engine.store.get_jobs(limit=100)
         
         for job in all_jobs:
             state = job.get('state', '').lower()
@@ -2,35 +2,63 @@
 Фоновый исполнитель задач очереди
 """
 
+import os
+import socket
 import threading
 import time
-from typing import Optional, Dict, Any
-from datetime import datetime
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+from datetime import datetime, timedelta
 
-from ..database.database import Database
-from ..database.models import DistributionTask, DistributionAddress, Transaction
+from sqlalchemy import and_, exists, or_, select, update
+
+from ..database.database import get_database
+from ..database.models import DistributionTask, DistributionAddress
 from ..core.web3_provider import Web3Provider
 from ..core.wallet_manager import WalletManager
+from ..core.nonce_manager import get_nonce_manager
+from ..core.confirmation_service import get_confirmation_service
 from ..services.token_service import TokenService
-from ..config import Config
+from ..services.queue_writeback import StatusWriteBuffer
+from ..config import get_config
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class QueuedTask:
+    """Снимок задачи рассылки для воркера (без привязки к сессии ORM)"""
+    id: int
+    token_address: str
+    token_symbol: str
+    amount_per_address: float
+
+
+@dataclass
+class ClaimedAddress:
+    """Адрес, арендованный воркером"""
+    id: int
+    address: str
+    amount: Optional[float] = None
+
+
 class QueueExecutor:
     """Класс для фонового выполнения задач из очереди"""
     
-    def __init__(self, wallet_manager: WalletManager = None):
+    def __init__(self, wallet_manager: WalletManager = None, web3_provider: Web3Provider = None):
         """
         Инициализация исполнителя
         
         Args:
             wallet_manager: Менеджер кошелька (опционально)
+            web3_provider: Web3 провайдер (по умолчанию - публичные узлы BSC)
         """
-        self.config = Config()
-        self.db = Database()
-        self.web3_provider = Web3Provider()
+        self.config = get_config()
+        self.db = get_database()
+        self.web3_provider = web3_provider or Web3Provider()
         
         # Менеджер кошелька
         self.wallet_manager = wallet_manager or WalletManager()
@@ -48,6 +76,20 @@ class QueueExecutor:
         self.worker_count = 1  # Количество воркеров
         self.check_interval = 5  # Интервал проверки новых задач (сек)
         self.send_interval = 2  # Интервал между отправками (сек)
+        self.claim_batch_size = int(self.config.get('txqueue.claim_batch_size', 20))
+        self.lease_seconds = int(self.config.get('txqueue.lease_seconds', 300))
+        
+        # Владелец аренды: процесс + воркер
+        self._owner_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        
+        # Пакетная запись результатов вместо трех коммитов на адрес
+        self.write_buffer = StatusWriteBuffer(
+            self.db,
+            journal_path=self.config.get('txqueue.writeback.journal_path') or None,
+            flush_rows=self.config.get('txqueue.writeback.flush_rows', 50),
+            flush_interval_ms=self.config.get('txqueue.writeback.flush_interval_ms', 500),
+            fsync=self.config.get('txqueue.writeback.fsync', True)
+        )
         
     def start(self, worker_count: int = 1):
         """
@@ -68,6 +110,9 @@ class QueueExecutor:
         self.stop_flag.clear()
         self.is_running = True
         
+        # Результаты, не записанные до падения, применяются до аренды адресов
+        self.write_buffer.start()
+        
         # Запускаем воркеры
         for i in range(self.worker_count):
             thread = threading.Thread(
@@ -94,6 +139,7 @@ class QueueExecutor:
             thread.join(timeout=10)
             
         self.worker_threads.clear()
+        self.write_buffer.close()
         self.is_running = False
         logger.info("Исполнитель остановлен")
         
@@ -126,12 +172,11 @@ class QueueExecutor:
                 # Получаем задачу для обработки
                 task = self._get_next_task()
                 
-                if task:
-                    logger.info(f"Воркер {worker_id} обрабатывает задачу #{task.id}")
-                    self._process_task(task)
-                else:
-                    # Нет задач, ждем
-                    time.sleep(self.check_interval)
+                if task and self._process_task(task, worker_id):
+                    continue
+                
+                # Нет задач или свободных адресов, ждем
+                self.stop_flag.wait(self.check_interval)
                     
             except Exception as e:
                 logger.error(f"Ошибка в воркере {worker_id}: {e}")
@@ -139,126 +184,261 @@ class QueueExecutor:
                 
         logger.info(f"Воркер {worker_id} завершен")
         
-    def _get_next_task(self) -> Optional[DistributionTask]:
+    @contextmanager
+    def _session_scope(self):
+        """Отдельная сессия на операцию (воркеры не делят сессию Database)"""
+        session = self.db.get_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+            
+    def _get_next_task(self) -> Optional[QueuedTask]:
         """
         Получение следующей задачи для обработки
         
+        Несколько воркеров могут работать над одной задачей: адреса
+        распределяются между ними атомарной арендой (claim_addresses).
+        
         Returns:
-            DistributionTask или None
+            QueuedTask или None
         """
+        tasks = DistributionTask.__table__
         try:
-            with self.db as session:
-                # Ищем задачу со статусом pending или running
-                task = session.query(DistributionTask).filter(
-                    DistributionTask.status.in_(['pending', 'running'])
+            with self._session_scope() as session:
+                row = session.execute(
+                    select(tasks.c.id, tasks.c.status, tasks.c.token_address,
+                           tasks.c.token_symbol, tasks.c.amount_per_address)
+                    .where(tasks.c.status.in_(['pending', 'running']))
+                    .order_by(tasks.c.id)
+                    .limit(1)
                 ).first()
                 
-                if task:
-                    # Помечаем как running
-                    if task.status == 'pending':
-                        task.status = 'running'
-                        task.started_at = datetime.utcnow()
-                        
-                    return task
+                if row is None:
+                    return None
+                    
+                if row.status == 'pending':
+                    # Условный переход: started_at ставит только первый воркер
+                    session.execute(
+                        update(tasks)
+                        .where(tasks.c.id == row.id, tasks.c.status == 'pending')
+                        .values(status='running', started_at=datetime.utcnow())
+                    )
                     
+                return QueuedTask(row.id, row.token_address, row.token_symbol, row.amount_per_address)
+                
         except Exception as e:
             logger.error(f"Ошибка получения задачи: {e}")
             
         return None
         
-    def _process_task(self, task: DistributionTask):
+    def _process_task(self, task: QueuedTask, worker_id: int = 0) -> bool:
         """
         Обработка задачи рассылки
         
+        Воркер арендует пачку адресов и обрабатывает ее локально, затем
+        берет следующую.
+        
         Args:
             task: Задача для обработки
+            worker_id: ID воркера
+            
+        Returns:
+            True если воркер отправил хотя бы одну транзакцию
         """
+        claim = None
+        did_work = False
         try:
             # Получаем приватный ключ
             private_key = self.wallet_manager.get_private_key()
             if not private_key:
                 logger.error("Не удалось получить приватный ключ")
                 self._mark_task_failed(task.id, "Нет приватного ключа")
-                return
+                return False
                 
-            # Обрабатываем адреса
             while not self.stop_flag.is_set():
-                # Проверка паузы
-                if self.pause_flag.is_set():
-                    self._mark_task_paused(task.id)
-                    return
-                    
-                # Получаем следующий адрес для обработки
-                address = self._get_next_address(task.id)
+                claim = f"{self._owner_prefix}:{worker_id}:{uuid.uuid4().hex[:8]}"
+                batch = self.claim_addresses(task.id, claim)
                 
-                if not address:
-                    # Все адреса обработаны
+                if not batch:
+                    # Свободных адресов нет; задача завершена, когда нет и арендованных
                     self._mark_task_completed(task.id)
+                    claim = None
                     break
                     
-                # Отправляем токены
-                result = self._send_tokens(
-                    address,
-                    task.token_address,
-                    task.token_symbol,
-                    task.amount_per_address,
-                    private_key
-                )
+                logger.info(f"Воркер {worker_id} арендовал {len(batch)} адресов задачи #{task.id}")
+                lease_deadline = time.monotonic() + self.lease_seconds
                 
-                # Обновляем статус адреса
-                self._update_address_status(
-                    address.id,
-                    'sent' if result['success'] else 'failed',
-                    result.get('tx_hash'),
-                    result.get('error')
-                )
-                
-                # Обновляем счетчики задачи
-                self._update_task_counters(
-                    task.id,
-                    success=result['success']
-                )
-                
-                # Пауза между отправками
-                if not self.stop_flag.is_set():
-                    time.sleep(self.send_interval)
+                for address in batch:
+                    if self.stop_flag.is_set():
+                        break
+                        
+                    # Проверка паузы
+                    if self.pause_flag.is_set():
+                        self._mark_task_paused(task.id)
+                        return did_work
+                        
+                    # Продлеваем аренду, пока пачка обрабатывается
+                    if time.monotonic() > lease_deadline - self.lease_seconds / 2:
+                        self._extend_claim(claim)
+                        lease_deadline = time.monotonic() + self.lease_seconds
+                        
+                    # Отправляем токены
+                    result = self._send_tokens(
+                        address,
+                        task.token_address,
+                        task.token_symbol,
+                        task.amount_per_address,
+                        private_key
+                    )
+                    did_work = True
+                    
+                    # Статус адреса, счетчики и транзакция - в буфер пакетной записи
+                    transaction = None
+                    if result['success']:
+                        transaction = {
+                            'tx_hash': result['tx_hash'],
+                            'from_address': self.wallet_manager.get_address(),
+                            'to_address': address.address,
+                            'token_address': task.token_address,
+                            'token_symbol': task.token_symbol,
+                            'amount': task.amount_per_address,
+                            'type': 'distribution',
+                            'status': 'success'
+                        }
+                    self.write_buffer.add(
+                        task.id,
+                        address.id,
+                        'sent' if result['success'] else 'failed',
+                        result.get('tx_hash'),
+                        result.get('error'),
+                        transaction
+                    )
                     
+                    # Пауза между отправками
+                    if not self.stop_flag.is_set():
+                        time.sleep(self.send_interval)
+                        
         except Exception as e:
             logger.error(f"Ошибка обработки задачи #{task.id}: {e}")
             self._mark_task_failed(task.id, str(e))
+        finally:
+            # Необработанный остаток пачки возвращается в очередь
+            if claim:
+                self._release_claim(claim)
+                
+        return did_work
             
-    def _get_next_address(self, task_id: int) -> Optional[DistributionAddress]:
+    def claim_addresses(self, task_id: int, claim: str,
+                        batch_size: Optional[int] = None) -> List[ClaimedAddress]:
         """
-        Получение следующего адреса для обработки
+        Атомарная аренда пачки адресов задачи
+        
+        Один UPDATE ... WHERE status='pending' переводит до batch_size адресов
+        (а также адреса с истекшей арендой упавших воркеров) в processing с
+        владельцем claim, поэтому два воркера не получат один адрес.
         
         Args:
             task_id: ID задачи
+            claim: Уникальный идентификатор аренды
+            batch_size: Размер пачки (по умолчанию claim_batch_size)
             
         Returns:
-            DistributionAddress или None
+            Арендованные адреса в порядке добавления
         """
+        addresses = DistributionAddress.__table__
+        now = datetime.utcnow()
+        candidates = (
+            select(addresses.c.id)
+            .where(addresses.c.task_id == task_id)
+            .where(or_(
+                addresses.c.status == 'pending',
+                and_(addresses.c.status == 'processing', addresses.c.lease_expires_at < now)
+            ))
+        )
+        # Отправленные адреса, чьи результаты еще в буфере, не переарендуются
+        buffered = self.write_buffer.pending_address_ids()
+        if buffered:
+            candidates = candidates.where(addresses.c.id.notin_(buffered))
+        candidates = (
+            candidates
+            .order_by(addresses.c.id)
+            .limit(batch_size or self.claim_batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(addresses)
+            .where(addresses.c.id.in_(candidates))
+            .values(
+                status='processing',
+                lease_owner=claim,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                processed_at=now
+            )
+        )
+        columns = (addresses.c.id, addresses.c.address, addresses.c.amount)
+        
         try:
-            with self.db as session:
-                address = session.query(DistributionAddress).filter(
-                    DistributionAddress.task_id == task_id,
-                    DistributionAddress.status == 'pending'
-                ).first()
-                
-                if address:
-                    # Помечаем как обрабатываемый
-                    address.status = 'processing'
-                    address.processed_at = datetime.utcnow()
-                    
-                return address
-                
+            with self._session_scope() as session:
+                if getattr(self.db.engine.dialect, 'update_returning', False):
+                    rows = session.execute(stmt.returning(*columns)).all()
+                else:
+                    # Без RETURNING: claim уникален, поэтому выборка по нему точна
+                    session.execute(stmt)
+                    rows = session.execute(
+                        select(*columns).where(addresses.c.lease_owner == claim,
+                                               addresses.c.status == 'processing')
+                    ).all()
         except Exception as e:
-            logger.error(f"Ошибка получения адреса: {e}")
+            logger.error(f"Ошибка аренды адресов задачи #{task_id}: {e}")
+            return []
             
-        return None
+        return sorted((ClaimedAddress(row.id, row.address, row.amount) for row in rows),
+                      key=lambda item: item.id)
+        
+    def _extend_claim(self, claim: str):
+        """Продление аренды необработанных адресов пачки"""
+        addresses = DistributionAddress.__table__
+        try:
+            with self._session_scope() as session:
+                session.execute(
+                    update(addresses)
+                    .where(addresses.c.lease_owner == claim, addresses.c.status == 'processing')
+                    .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                )
+        except Exception as e:
+            logger.error(f"Ошибка продления аренды {claim}: {e}")
+            
+    def _release_claim(self, claim: str):
+        """Возврат необработанных адресов пачки в pending"""
+        addresses = DistributionAddress.__table__
+        # Обработанные адреса пачки еще в processing, пока результаты в буфере
+        self.write_buffer.flush()
+        # При ошибке записи результаты остаются в буфере: такие адреса уже
+        # отправлены и не возвращаются в очередь
+        buffered = self.write_buffer.pending_address_ids()
+        stmt = (
+            update(addresses)
+            .where(addresses.c.lease_owner == claim, addresses.c.status == 'processing')
+            .values(status='pending', lease_owner=None, lease_expires_at=None)
+        )
+        if buffered:
+            stmt = stmt.where(addresses.c.id.notin_(buffered))
+        try:
+            with self._session_scope() as session:
+                result = session.execute(stmt)
+                if result.rowcount:
+                    logger.info(f"Возвращено в очередь {result.rowcount} адресов ({claim})")
+        except Exception as e:
+            logger.error(f"Ошибка возврата аренды {claim}: {e}")
         
     def _send_tokens(
         self,
-        address: DistributionAddress,
+        address: ClaimedAddress,
         token_address: str,
         token_symbol: str,
         amount: float,
@@ -267,6 +447,11 @@ class QueueExecutor:
         """
         Отправка токенов на адрес
         
+        Nonce резервируется через NonceManager: воркеры подписывают одним
+        ключом, счетчик 'latest' выдал бы им одинаковые nonce. Ticket
+        закрывается ошибкой при неудаче отправки или передается сервису
+        подтверждений, который подтвердит его после майнинга.
+        
         Args:
             address: Объект адреса
             token_address: Адрес контракта токена
@@ -277,11 +462,21 @@ class QueueExecutor:
         Returns:
             Dict с результатом отправки
         """
+        ticket = None
+        failure = 'send failed'
+        nonce_manager = get_nonce_manager()
         try:
+            from eth_account import Account
+            
             # Параметры газа из конфига
             gas_price = self.config.get('gas_settings.default_gas_price', 5) * 10**9
             gas_limit = self.config.get('gas_settings.default_gas_limit', 100000)
             
+            web3 = self.web3_provider.web3
+            if not nonce_manager.web3:
+                nonce_manager.set_web3(web3)
+            ticket = nonce_manager.reserve(Account.from_key(private_key).address)
+            
             # Отправляем через TokenService
             result = self.token_service.transfer(
                 token_address=token_address,
@@ -290,26 +485,21 @@ class QueueExecutor:
                 private_key=private_key,
                 gas_price=gas_price,
                 gas_limit=gas_limit,
-                retry_count=2
+                retry_count=2,
+                nonce=ticket.nonce
             )
             
             if result['success']:
+                nonce_manager.complete(ticket, result['tx_hash'])
+                get_confirmation_service(web3).watch(result['tx_hash'], ticket=ticket, sent_at=time.time())
+                ticket = None
                 logger.info(
                     f"[OK] Отправлено {amount} {token_symbol} на {address.address[:10]}... "
                     f"TX: {result['tx_hash'][:10]}..."
                 )
-                
-                # Сохраняем транзакцию в БД
-                self._save_transaction(
-                    tx_hash=result['tx_hash'],
-                    from_address=self.wallet_manager.get_address(),
-                    to_address=address.address,
-                    token_address=token_address,
-                    token_symbol=token_symbol,
-                    amount=amount,
-                    tx_type='distribution'
-                )
+
             else:
+                failure = result.get('error') or failure
                 logger.error(
                     f"[ERROR] Ошибка отправки на {address.address[:10]}...: "
                     f"{result.get('error', 'Unknown')}"
@@ -318,87 +508,36 @@ class QueueExecutor:
             return result
             
         except Exception as e:
+            failure = str(e)
             logger.error(f"Ошибка отправки токенов: {e}")
             return {'success': False, 'error': str(e)}
-            
-    def _save_transaction(
-        self,
-        tx_hash: str,
-        from_address: str,
-        to_address: str,
-        token_address: str,
-        token_symbol: str,
-        amount: float,
-        tx_type: str = 'distribution'
-    ):
-        """Сохранение транзакции в БД"""
-        try:
-            with self.db as session:
-                transaction = Transaction(
-                    tx_hash=tx_hash,
-                    from_address=from_address,
-                    to_address=to_address,
-                    token_address=token_address,
-                    token_symbol=token_symbol,
-                    amount=amount,
-                    type=tx_type,
-                    status='success',
-                    created_at=datetime.utcnow()
-                )
-                session.add(transaction)
-                
-        except Exception as e:
-            logger.error(f"Ошибка сохранения транзакции: {e}")
-            
-    def _update_address_status(
-        self,
-        address_id: int,
-        status: str,
-        tx_hash: Optional[str] = None,
-        error: Optional[str] = None
-    ):
-        """Обновление статуса адреса"""
-        try:
-            with self.db as session:
-                address = session.query(DistributionAddress).filter_by(
-                    id=address_id
-                ).first()
-                
-                if address:
-                    address.status = status
-                    address.tx_hash = tx_hash
-                    address.error_message = error
-                    address.processed_at = datetime.utcnow()
-                    
-        except Exception as e:
-            logger.error(f"Ошибка обновления статуса адреса: {e}")
-            
-    def _update_task_counters(self, task_id: int, success: bool):
-        """Обновление счетчиков задачи"""
-        try:
-            with self.db as session:
-                task = session.query(DistributionTask).filter_by(id=task_id).first()
-                
-                if task:
-                    task.processed_addresses = (task.processed_addresses or 0) + 1
-                    
-                    if success:
-                        task.successful_sends = (task.successful_sends or 0) + 1
-                    else:
-                        task.failed_sends = (task.failed_sends or 0) + 1
-                        
-        except Exception as e:
-            logger.error(f"Ошибка обновления счетчиков: {e}")
+        finally:
+            # Транзакция не отправлена - nonce возвращается менеджеру
+            if ticket is not None:
+                nonce_manager.fail(ticket, failure)
             
     def _mark_task_completed(self, task_id: int):
-        """Пометка задачи как завершенной"""
+        """
+        Пометка задачи как завершенной
+        
+        Задача завершается, только если не осталось pending адресов и адресов,
+        арендованных другими воркерами.
+        """
+        self.write_buffer.flush()
+        tasks = DistributionTask.__table__
+        addresses = DistributionAddress.__table__
+        unfinished = exists().where(
+            addresses.c.task_id == task_id,
+            addresses.c.status.in_(['pending', 'processing'])
+        )
         try:
-            with self.db as session:
-                task = session.query(DistributionTask).filter_by(id=task_id).first()
-                
-                if task:
-                    task.status = 'completed'
-                    task.completed_at = datetime.utcnow()
+            with self._session_scope() as session:
+                result = session.execute(
+                    update(tasks)
+                    .where(tasks.c.id == task_id, tasks.c.status == 'running', ~unfinished)
+                    .values(status='completed', completed_at=datetime.utcnow())
+                )
+                if result.rowcount:
                     logger.info(f"Задача #{task_id} завершена")
                     
         except Exception as e:
@@ -406,26 +545,30 @@ class QueueExecutor:
             
     def _mark_task_failed(self, task_id: int, error: str):
         """Пометка задачи как неудачной"""
+        tasks = DistributionTask.__table__
         try:
-            with self.db as session:
-                task = session.query(DistributionTask).filter_by(id=task_id).first()
-                
-                if task:
-                    task.status = 'failed'
-                    task.completed_at = datetime.utcnow()
-                    logger.error(f"Задача #{task_id} завершена с ошибкой: {error}")
+            with self._session_scope() as session:
+                session.execute(
+                    update(tasks)
+                    .where(tasks.c.id == task_id)
+                    .values(status='failed', completed_at=datetime.utcnow())
+                )
+                logger.error(f"Задача #{task_id} завершена с ошибкой: {error}")
                     
         except Exception as e:
             logger.error(f"Ошибка пометки задачи как неудачной: {e}")
             
     def _mark_task_paused(self, task_id: int):
         """Пометка задачи как приостановленной"""
+        tasks = DistributionTask.__table__
         try:
-            with self.db as session:
-                task = session.query(DistributionTask).filter_by(id=task_id).first()
-                
-                if task:
-                    task.status = 'paused'
+            with self._session_scope() as session:
+                result = session.execute(
+                    update(tasks)
+                    .where(tasks.c.id == task_id, tasks.c.status.in_(['pending', 'running']))
+                    .values(status='paused')
+                )
+                if result.rowcount:
                     logger.info(f"Задача #{task_id} приостановлена")
                     
         except Exception as e:
@@ -0,0 +1,260 @@
+"""
+Отложенная пакетная запись результатов QueueExecutor
+
+Вместо трех коммитов на получателя (статус адреса, счетчики задачи,
+транзакция) результаты копятся в буфере и записываются одной транзакцией
+каждые flush_rows записей или flush_interval_ms миллисекунд:
+bulk_update_mappings для адресов, bulk_insert_mappings для транзакций и
+один UPDATE счетчиков на задачу.
+
+Согласованность с блокчейном после падения: каждый результат сначала
+дописывается в журнал (JSON lines, flush + fsync), журнал очищается только
+после коммита в БД. При запуске recover() повторно применяет журнал, иначе
+адреса с уже отправленными транзакциями остались бы в processing и после
+истечения аренды были бы отправлены повторно. Повторное применение
+идемпотентно: счетчики задачи пересчитываются по статусам адресов, а уже
+сохраненные транзакции пропускаются.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import and_, func, select, update
+
+from ..database.models import DistributionAddress, DistributionTask, Transaction
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StatusWriteBuffer:
+    """Буфер результатов отправки с журналом и пакетной записью в БД"""
+
+    def __init__(self, db, journal_path: Optional[str] = None, flush_rows: int = 50,
+                 flush_interval_ms: int = 500, fsync: bool = True):
+        """
+        Args:
+            db: Database (источник сессий)
+            journal_path: Путь журнала (по умолчанию рядом с wallet_sender.db)
+            flush_rows: Количество записей, при котором буфер сбрасывается сразу
+            flush_interval_ms: Максимальная задержка записи в БД
+            fsync: Синхронизировать журнал с диском после каждой записи
+        """
+        if not journal_path:
+            journal_path = os.path.join(os.path.dirname(__file__), '..', '..', '..',
+                                        'queue_writeback.jsonl')
+        self.db = db
+        self.journal_path = journal_path
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval = max(0.01, flush_interval_ms / 1000.0)
+        self.fsync = fsync
+
+        self.pending: List[Dict[str, Any]] = []
+        self.lock = threading.RLock()
+        self._journal = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Статистика
+        self.total_flushed = 0
+        self.total_flushes = 0
+
+    def start(self):
+        """Восстановление журнала и запуск фонового сброса по времени"""
+        self.recover()
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="QueueWriteBack")
+        self._thread.start()
+
+    def close(self):
+        """Остановка фонового потока и финальный сброс"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+        with self.lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка фонового сброса результатов: {e}")
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        return self._journal
+
+    def add(self, task_id: int, address_id: int, status: str, tx_hash: Optional[str] = None,
+            error: Optional[str] = None, transaction: Optional[Dict[str, Any]] = None):
+        """
+        Результат отправки на адрес
+
+        Args:
+            task_id: ID задачи
+            address_id: ID адреса
+            status: sent или failed
+            tx_hash: Хеш транзакции
+            error: Текст ошибки
+            transaction: Поля модели Transaction для сохранения
+        """
+        entry = {
+            'task_id': task_id,
+            'address_id': address_id,
+            'status': status,
+            'tx_hash': tx_hash,
+            'error': error,
+            'processed_at': datetime.utcnow().isoformat(),
+            'transaction': transaction,
+        }
+        with self.lock:
+            journal = self._open_journal()
+            journal.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            journal.flush()
+            if self.fsync:
+                os.fsync(journal.fileno())
+            self.pending.append(entry)
+            full = len(self.pending) >= self.flush_rows
+
+        if full:
+            self.flush()
+
+    def recover(self) -> int:
+        """
+        Применение журнала, оставшегося после аварийного завершения
+
+        Returns:
+            Количество восстановленных записей
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        entries = []
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Оборванная последняя строка при падении во время записи
+                    logger.warning("Пропущена поврежденная строка журнала результатов")
+        with self.lock:
+            known = {entry['address_id'] for entry in self.pending}
+            self.pending[:0] = [entry for entry in entries if entry['address_id'] not in known]
+        if entries:
+            logger.info(f"Восстановление {len(entries)} результатов из журнала {self.journal_path}")
+        self.flush()
+        return len(entries)
+
+    def flush(self) -> int:
+        """
+        Запись накопленных результатов одной транзакцией
+
+        Returns:
+            Количество записанных результатов
+        """
+        with self.lock:
+            if not self.pending:
+                return 0
+            entries = list(self.pending)
+            try:
+                self._write(entries)
+            except Exception as e:
+                # Записи остаются в буфере и журнале до следующей попытки
+                logger.error(f"Ошибка пакетной записи {len(entries)} результатов: {e}")
+                return 0
+
+            self.pending.clear()
+            journal = self._open_journal()
+            journal.seek(0)
+            journal.truncate()
+            journal.flush()
+            if self.fsync:
+                os.fsync(journal.fileno())
+
+            self.total_flushed += len(entries)
+            self.total_flushes += 1
+            return len(entries)
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        address_rows = []
+        transactions = []
+        for entry in entries:
+            address_rows.append({
+                'id': entry['address_id'],
+                'status': entry['status'],
+                'tx_hash': entry['tx_hash'],
+                'error_message': entry['error'],
+                'processed_at': datetime.fromisoformat(entry['processed_at']),
+                'lease_owner': None,
+                'lease_expires_at': None,
+            })
+            if entry.get('transaction'):
+                transactions.append(dict(entry['transaction'], created_at=address_rows[-1]['processed_at']))
+
+        session = self.db.get_session()
+        try:
+            session.bulk_update_mappings(DistributionAddress, address_rows)
+
+            if transactions:
+                hashes = [tx['tx_hash'] for tx in transactions]
+                saved = set(session.execute(
+                    select(Transaction.tx_hash).where(Transaction.tx_hash.in_(hashes))
+                ).scalars())
+                transactions = [tx for tx in transactions if tx['tx_hash'] not in saved]
+                if transactions:
+                    session.bulk_insert_mappings(Transaction, transactions)
+
+            for task_id in {entry['task_id'] for entry in entries}:
+                self._recount_task(session, task_id)
+
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _recount_task(session, task_id: int):
+        """Счетчики задачи по статусам адресов (идемпотентно при повторе журнала)"""
+        addresses = DistributionAddress.__table__
+        tasks = DistributionTask.__table__
+
+        def count(*statuses):
+            return (
+                select(func.count())
+                .where(and_(addresses.c.task_id == task_id, addresses.c.status.in_(statuses)))
+                .scalar_subquery()
+            )
+
+        session.execute(
+            update(tasks)
+            .where(tasks.c.id == task_id)
+            .values(
+                processed_addresses=count('sent', 'failed'),
+                successful_sends=count('sent'),
+                failed_sends=count('failed')
+            )
+        )
+
+    def pending_address_ids(self) -> Set[int]:
+        """ID адресов, результаты которых еще не записаны в БД"""
+        with self.lock:
+            return {entry['address_id'] for entry in self.pending}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'pending': len(self.pending),
+                'total_flushed': self.total_flushed,
+                'total_flushes': self.total_flushes,
+            }
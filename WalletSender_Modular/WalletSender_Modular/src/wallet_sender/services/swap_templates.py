@@ -0,0 +1,287 @@
+"""
+Кэш шаблонов swap транзакций PancakeSwap
+
+Шаблон заранее содержит селектор функции, закодированные path и адрес получателя,
+лимит газа и chainId. В момент срабатывания в шаблон подставляются только суммы,
+deadline, nonce и цена газа — без создания контракта, ABI-энкодинга и checksum.
+
+Лимит газа берется из кэша оценок по маршруту (пространство 'swap_gas' TieredCache):
+несколько последних eth_estimateGas маршрута, снятых при прогреве до сделки.
+"""
+
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Any
+
+from web3 import Web3
+
+from ..utils.cache_manager import get_cache
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Пространство имен кэша оценок газа по маршруту и число хранимых оценок
+ROUTE_GAS_NAMESPACE = 'swap_gas'
+ROUTE_GAS_SAMPLES = 5
+
+
+# Сигнатуры поддерживаемых методов роутера и признак наличия amountIn в аргументах
+SWAP_SIGNATURES: Dict[str, Tuple[str, bool]] = {
+    'swapExactTokensForTokens': ('swapExactTokensForTokens(uint256,uint256,address[],address,uint256)', True),
+    'swapExactTokensForETH': ('swapExactTokensForETH(uint256,uint256,address[],address,uint256)', True),
+    'swapExactETHForTokens': ('swapExactETHForTokens(uint256,address[],address,uint256)', False),
+    'swapExactTokensForTokensSupportingFeeOnTransferTokens': (
+        'swapExactTokensForTokensSupportingFeeOnTransferTokens(uint256,uint256,address[],address,uint256)', True),
+    'swapExactTokensForETHSupportingFeeOnTransferTokens': (
+        'swapExactTokensForETHSupportingFeeOnTransferTokens(uint256,uint256,address[],address,uint256)', True),
+    'swapExactETHForTokensSupportingFeeOnTransferTokens': (
+        'swapExactETHForTokensSupportingFeeOnTransferTokens(uint256,address[],address,uint256)', False),
+}
+
+_MAX_UINT256 = 2 ** 256 - 1
+
+
+def _word(value: int) -> bytes:
+    """Кодирование uint256 в 32-байтовое слово ABI"""
+    if value < 0 or value > _MAX_UINT256:
+        raise ValueError(f"Значение вне диапазона uint256: {value}")
+    return value.to_bytes(32, 'big')
+
+
+def _address_word(address: str) -> bytes:
+    """Кодирование адреса в 32-байтовое слово ABI"""
+    return b'\x00' * 12 + bytes.fromhex(address[2:])
+
+
+@dataclass
+class SwapTemplate:
+    """Предвычисленный шаблон swap транзакции"""
+    method: str
+    router: str
+    sender: str
+    recipient: str
+    path: Tuple[str, ...]
+    chain_id: int
+    gas_limit: int
+    deadline_seconds: int
+    selector: bytes
+    recipient_word: bytes
+    path_tail: bytes
+    has_amount_in: bool
+    created_at: float = field(default_factory=time.time)
+    uses: int = 0
+    gas_estimated: bool = False
+
+    def encode_calldata(self, amount_in: int, amount_out_min: int, deadline: int) -> bytes:
+        """Сборка calldata из заготовленных частей"""
+        if self.has_amount_in:
+            # amountIn, amountOutMin, offset(path)=5*32, to, deadline, path...
+            head = (_word(amount_in) + _word(amount_out_min) + _word(0xa0)
+                    + self.recipient_word + _word(deadline))
+        else:
+            # amountOutMin, offset(path)=4*32, to, deadline, path...
+            head = _word(amount_out_min) + _word(0x80) + self.recipient_word + _word(deadline)
+        return self.selector + head + self.path_tail
+
+    def build_transaction(self, amount_in: int, amount_out_min: int, nonce: int,
+                          gas_price: int, deadline: Optional[int] = None,
+                          gas_limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Формирование готового к подписи словаря транзакции
+
+        Args:
+            amount_in: Сумма на входе (для ETH-методов передается как value)
+            amount_out_min: Минимальный выход
+            nonce: Nonce отправителя
+            gas_price: Цена газа в wei
+            deadline: Абсолютный deadline (None = сейчас + deadline_seconds)
+            gas_limit: Лимит газа этой транзакции (None = лимит шаблона)
+        """
+        if deadline is None:
+            deadline = int(time.time()) + self.deadline_seconds
+        self.uses += 1
+        return {
+            'from': self.sender,
+            'to': self.router,
+            'value': 0 if self.has_amount_in else amount_in,
+            'data': '0x' + self.encode_calldata(amount_in, amount_out_min, deadline).hex(),
+            'gas': gas_limit or self.gas_limit,
+            'gasPrice': gas_price,
+            'nonce': nonce,
+            'chainId': self.chain_id
+        }
+
+
+class SwapTemplateCache:
+    """Кэш шаблонов swap транзакций по (метод, path, получатель)"""
+
+    def __init__(self, web3: Web3, router_address: str, sender: str,
+                 default_gas_limit: int = 300_000, deadline_seconds: int = 1200,
+                 gas_buffer: float = 1.2):
+        """
+        Args:
+            web3: Web3 экземпляр (используется только при прогреве)
+            router_address: Адрес роутера
+            sender: Адрес отправителя
+            default_gas_limit: Лимит газа, если для маршрута нет оценок
+            deadline_seconds: Срок действия swap относительно момента отправки
+            gas_buffer: Запас к максимальной оценке маршрута
+        """
+        self.web3 = web3
+        self.router = Web3.to_checksum_address(router_address)
+        self.sender = Web3.to_checksum_address(sender)
+        self.default_gas_limit = default_gas_limit
+        self.deadline_seconds = deadline_seconds
+        self.gas_buffer = gas_buffer
+
+        self._templates: Dict[Tuple[str, Tuple[str, ...], str], SwapTemplate] = {}
+        self._selectors: Dict[str, bytes] = {}
+        self._chain_id: Optional[int] = None
+        self._lock = threading.Lock()
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def chain_id(self) -> int:
+        """chainId сети (запрашивается один раз)"""
+        if self._chain_id is None:
+            self._chain_id = int(self.web3.eth.chain_id)
+        return self._chain_id
+
+    def _selector(self, method: str) -> bytes:
+        """4-байтовый селектор метода"""
+        selector = self._selectors.get(method)
+        if selector is None:
+            signature, _ = SWAP_SIGNATURES[method]
+            selector = bytes(Web3.keccak(text=signature)[:4])
+            self._selectors[method] = selector
+        return selector
+
+    def _route_key(self, method: str, path: Tuple[str, ...]) -> str:
+        """Ключ маршрута в кэше оценок газа"""
+        return f"{self.router}:{method}:{','.join(path)}".lower()
+
+    def route_gas_limit(self, method: str, path: List[str]) -> Optional[int]:
+        """Лимит газа маршрута из кэша оценок (None - оценок нет)"""
+        entry = get_cache().get(ROUTE_GAS_NAMESPACE, self._route_key(method, tuple(path)))
+        if not entry:
+            return None
+        return int(max(entry['samples']) * self.gas_buffer)
+
+    def _record_estimate(self, template: SwapTemplate, estimated: int) -> int:
+        """Добавление оценки в кэш маршрута и обновление лимита шаблона"""
+        cache = get_cache()
+        key = self._route_key(template.method, template.path)
+        entry = cache.get(ROUTE_GAS_NAMESPACE, key) or {'samples': []}
+        samples = (entry['samples'] + [int(estimated)])[-ROUTE_GAS_SAMPLES:]
+        cache.set(ROUTE_GAS_NAMESPACE, key, {'samples': samples})
+        template.gas_limit = int(max(samples) * self.gas_buffer)
+        template.gas_estimated = True
+        return template.gas_limit
+
+    @staticmethod
+    def _encode_path(path: Tuple[str, ...]) -> bytes:
+        """ABI-кодирование address[] (длина + элементы)"""
+        return _word(len(path)) + b''.join(_address_word(addr) for addr in path)
+
+    def get(self, method: str, path: List[str], recipient: Optional[str] = None) -> SwapTemplate:
+        """
+        Получение шаблона (создается при первом обращении)
+
+        Лимит газа шаблона - из кэша оценок маршрута, иначе default_gas_limit;
+        лимит конкретной транзакции передается в build_transaction. RPC выполняется
+        только для chainId при первом шаблоне (см. prime).
+
+        Args:
+            method: Имя метода роутера (см. SWAP_SIGNATURES)
+            path: Путь обмена
+            recipient: Получатель (None = отправитель)
+        """
+        path_key = tuple(path)
+        recipient_key = recipient or self.sender
+        key = (method, path_key, recipient_key)
+
+        template = self._templates.get(key)
+        if template is not None:
+            self.hits += 1
+            return template
+
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self.hits += 1
+                return template
+
+            if method not in SWAP_SIGNATURES:
+                raise ValueError(f"Неподдерживаемый метод swap: {method}")
+
+            checksum_path = tuple(Web3.to_checksum_address(addr) for addr in path_key)
+            checksum_recipient = Web3.to_checksum_address(recipient_key)
+            route_gas = self.route_gas_limit(method, list(checksum_path))
+
+            template = SwapTemplate(
+                method=method,
+                router=self.router,
+                sender=self.sender,
+                recipient=checksum_recipient,
+                path=checksum_path,
+                chain_id=self.chain_id,
+                gas_limit=route_gas or self.default_gas_limit,
+                deadline_seconds=self.deadline_seconds,
+                selector=self._selector(method),
+                recipient_word=_address_word(checksum_recipient),
+                path_tail=self._encode_path(checksum_path),
+                has_amount_in=SWAP_SIGNATURES[method][1],
+                gas_estimated=route_gas is not None
+            )
+            self._templates[key] = template
+            self.misses += 1
+            logger.debug(f"Создан шаблон {method} для пути {' -> '.join(checksum_path)}")
+            return template
+
+    def prime(self):
+        """Запрос chainId заранее, чтобы построение шаблонов обходилось без RPC"""
+        return self.chain_id
+
+    def estimate_gas(self, template: SwapTemplate, sample_amount_in: int) -> int:
+        """
+        Оценка газа маршрута через eth_estimateGas
+
+        Вызывается заранее (при прогреве), а не в момент срабатывания. Оценка
+        добавляется в кэш маршрута, лимит шаблона - максимум последних оценок
+        с запасом gas_buffer. При ошибке (нет allowance, нет баланса) лимит не меняется.
+        """
+        tx = template.build_transaction(sample_amount_in, 0, nonce=0, gas_price=0)
+        tx.pop('nonce', None)
+        tx.pop('gas', None)
+        tx.pop('gasPrice', None)
+        try:
+            estimated = self.web3.eth.estimate_gas(tx)
+            self._record_estimate(template, estimated)
+            logger.debug(f"Лимит газа шаблона {template.method}: {template.gas_limit}")
+        except Exception as e:
+            logger.debug(f"Оценка газа шаблона {template.method} не удалась: {e}")
+        finally:
+            template.uses -= 1
+        return template.gas_limit
+
+    def invalidate(self, path: Optional[List[str]] = None):
+        """Сброс шаблонов (всех или для конкретного пути)"""
+        with self._lock:
+            if path is None:
+                self._templates.clear()
+                return
+            path_key = tuple(path)
+            for key in [k for k in self._templates if k[1] == path_key]:
+                del self._templates[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        return {
+            'templates': len(self._templates),
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -9,6 +9,8 @@ from decimal import Decimal
 from ..core.web3_provider import Web3Provider
 from ..constants import ERC20_ABI
 from ..utils.logger import get_logger
+from ..utils.cache_manager import get_cache
+from ..utils import balance_reader
 
 logger = get_logger(__name__)
 
@@ -25,7 +27,6 @@ class TokenService:
         """
         self.web3_provider = web3_provider
         self.web3 = web3_provider.web3
-        self._token_cache = {}  # Кэш информации о токенах
         
     def get_token_info(self, token_address: str) -> Dict[str, Any]:
         """
@@ -38,38 +39,16 @@ class TokenService:
             Dict: Информация о токене (name, symbol, decimals, totalSupply)
         """
         try:
-            # Проверяем кэш
-            if token_address in self._token_cache:
-                return self._token_cache[token_address]
-                
             # Проверка адреса
             if not self.web3.is_address(token_address):
                 raise ValueError(f"Неверный адрес токена: {token_address}")
                 
-            token_address = self.web3.to_checksum_address(token_address)
-            
-            # Создание контракта токена
-            token_contract = self.web3.eth.contract(
-                address=token_address,
-                abi=ERC20_ABI
+            # Одновременные запросы одного токена выполняют одно чтение
+            return get_cache().get_or_load(
+                'token_metadata', token_address.lower(),
+                lambda: self._load_token_info(token_address)
             )
             
-            # Получение информации о токене
-            info = {
-                'address': token_address,
-                'name': self._safe_call(token_contract.functions.name()),
-                'symbol': self._safe_call(token_contract.functions.symbol()),
-                'decimals': self._safe_call(token_contract.functions.decimals()),
-                'totalSupply': self._safe_call(token_contract.functions.totalSupply())
-            }
-            
-            # Сохраняем в кэш
-            self._token_cache[token_address] = info
-            
-            logger.info(f"Получена информация о токене {info['symbol']}: {token_address}")
-            
-            return info
-            
         except Exception as e:
             logger.error(f"Ошибка получения информации о токене: {e}")
             return {
@@ -80,6 +59,29 @@ class TokenService:
                 'totalSupply': 0
             }
             
+    def _load_token_info(self, token_address: str) -> Dict[str, Any]:
+        """Чтение информации о токене из блокчейна"""
+        token_address = self.web3.to_checksum_address(token_address)
+        
+        # Создание контракта токена
+        token_contract = self.web3.eth.contract(
+            address=token_address,
+            abi=ERC20_ABI
+        )
+        
+        # Получение информации о токене
+        info = {
+            'address': token_address,
+            'name': self._safe_call(token_contract.functions.name()),
+            'symbol': self._safe_call(token_contract.functions.symbol()),
+            'decimals': self._safe_call(token_contract.functions.decimals()),
+            'totalSupply': self._safe_call(token_contract.functions.totalSupply())
+        }
+        
+        logger.info(f"Получена информация о токене {info['symbol']}: {token_address}")
+        
+        return info
+            
     def get_balance(self, token_address: str, wallet_address: str) -> float:
         """
         Получение баланса токена для кошелька
@@ -99,26 +101,11 @@ class TokenService:
             if not self.web3.is_address(wallet_address):
                 raise ValueError(f"Неверный адрес кошелька: {wallet_address}")
                 
-            token_address = self.web3.to_checksum_address(token_address)
-            wallet_address = self.web3.to_checksum_address(wallet_address)
-            
-            # Создание контракта токена
-            token_contract = self.web3.eth.contract(
-                address=token_address,
-                abi=ERC20_ABI
+            # Чтение в пределах блока объединяется с другими запросами
+            return balance_reader.get_token_balance(
+                self.web3, token_address, wallet_address, default_decimals=18
             )
             
-            # Получение баланса
-            balance_wei = token_contract.functions.balanceOf(wallet_address).call()
-            
-            # Получение decimals
-            decimals = self._safe_call(token_contract.functions.decimals(), 18)
-            
-            # Конвертация в читаемый формат
-            balance = balance_wei / (10 ** decimals)
-            
-            return balance
-            
         except Exception as e:
             logger.error(f"Ошибка получения баланса токена: {e}")
             return 0.0
@@ -354,7 +341,8 @@ class TokenService:
         private_key: str,
         gas_price: Optional[int] = None,
         gas_limit: Optional[int] = None,
-        retry_count: int = 2
+        retry_count: int = 2,
+        nonce: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Отправка ERC20 токенов
@@ -367,6 +355,7 @@ class TokenService:
             gas_price: Цена газа в wei (опционально)
             gas_limit: Лимит газа (опционально)
             retry_count: Количество попыток при ошибке
+            nonce: Зарезервированный nonce (по умолчанию - счетчик транзакций 'latest')
             
         Returns:
             Dict: {'success': bool, 'tx_hash': str, 'error': str}
@@ -405,8 +394,8 @@ class TokenService:
                 if balance_wei < amount_wei:
                     return {'success': False, 'error': f'Недостаточный баланс токенов'}
                 
-                # Получение nonce
-                nonce = self.web3.eth.get_transaction_count(account.address)
+                # Получение nonce (зарезервированный вызывающим сохраняется между попытками)
+                tx_nonce = nonce if nonce is not None else self.web3.eth.get_transaction_count(account.address)
                 
                 # Параметры газа
                 if gas_price is None:
@@ -434,7 +423,7 @@ class TokenService:
                     'chainId': self.web3_provider.network_config['chain_id'],
                     'gas': gas_limit,
                     'gasPrice': gas_price,
-                    'nonce': nonce,
+                    'nonce': tx_nonce,
                     'from': account.address
                 })
                 
@@ -449,6 +438,8 @@ class TokenService:
                 
                 logger.info(f"Отправлена транзакция transfer: {tx_hash.hex()}")
                 
+                balance_reader.invalidate_balances(account.address)
+                
                 return {
                     'success': True, 
                     'tx_hash': tx_hash.hex(),
@@ -538,6 +529,8 @@ class TokenService:
             
             logger.info(f"Отправлена транзакция BNB: {tx_hash.hex()}")
             
+            balance_reader.invalidate_balances(account.address)
+            
             return {
                 'success': True,
                 'tx_hash': tx_hash.hex(),
@@ -574,5 +567,5 @@ class TokenService:
             
     def clear_cache(self):
         """Очистка кэша информации о токенах"""
-        self._token_cache.clear()
+        get_cache().clear('token_metadata')
         logger.info("Кэш информации о токенах очищен")
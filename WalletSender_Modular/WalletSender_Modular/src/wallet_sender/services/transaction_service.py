@@ -2,6 +2,7 @@
 Сервис для работы с транзакциями
 """
 
+import time
 from typing import Optional, Dict, Any, List, Callable
 from web3 import Web3
 from eth_account import Account
@@ -36,7 +37,7 @@ class TransactionService:
                 self.nonce_manager = None
         # Тикет последней транзакции (для финализации nonce)
         self._last_ticket: Optional[NonceTicket] = None
-        # Автофинализация (опционально) — если True, ticket подтверждается сразу после отправки
+        # Автофинализация (опционально) — если True, ticket после отправки передается сервису подтверждений
         self.auto_finalize_on_send = auto_finalize_on_send
         
         if private_key:
@@ -89,10 +90,10 @@ class TransactionService:
                 self._last_ticket = None
         return self.web3.eth.get_transaction_count(address, 'pending')
 
-    def _mark_pending(self, tx_hash: str):
+    def _mark_pending(self, tx_hash: str, raw_tx=None):
         if self.nonce_manager and self._last_ticket and self._last_ticket.status == NonceStatus.RESERVED:
             try:
-                self.nonce_manager.complete(self._last_ticket, tx_hash)
+                self.nonce_manager.complete(self._last_ticket, tx_hash, raw_tx)
             except Exception:
                 pass
 
@@ -166,12 +167,12 @@ class TransactionService:
             
             # Отправка транзакции
             tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            self._mark_pending(tx_hash.hex())
+            self._mark_pending(tx_hash.hex(), signed_tx.rawTransaction)
             
             logger.info(f"Отправлена транзакция: {tx_hash.hex()}")
             if self.auto_finalize_on_send:
-                # если пользователь не будет явно ждать подтверждения — считаем success условно
-                self._mark_final(True)
+                # Пользователь не ждет подтверждения: тикет финализирует сервис подтверждений
+                self.track_confirmation(tx_hash.hex())
             return tx_hash.hex()
             
         except Exception as e:
@@ -253,11 +254,11 @@ class TransactionService:
             
             # Отправка транзакции
             tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            self._mark_pending(tx_hash.hex())
+            self._mark_pending(tx_hash.hex(), signed_tx.rawTransaction)
             
             logger.info(f"Отправлена транзакция токена: {tx_hash.hex()}")
             if self.auto_finalize_on_send:
-                self._mark_final(True)
+                self.track_confirmation(tx_hash.hex())
             return tx_hash.hex()
             
         except Exception as e:
@@ -301,6 +302,18 @@ class TransactionService:
             self._mark_final(False, str(e))
             return None
             
+    def track_confirmation(self, tx_hash: str):
+        """
+        Подтверждение без ожидания: тикет nonce последней транзакции
+        финализирует сервис подтверждений, когда транзакция попадет в блок
+        
+        Returns:
+            Future с квитанцией
+        """
+        from ..core.confirmation_service import get_confirmation_service
+        ticket, self._last_ticket = self._last_ticket, None
+        return get_confirmation_service(self.web3).watch(tx_hash, ticket=ticket, sent_at=time.time())
+            
     def get_transaction_status(self, tx_hash: str) -> str:
         """
         Получение статуса транзакции
@@ -404,6 +417,8 @@ class TransactionService:
                     gas_price,
                     gas_limit
                 )
+                # Подтверждения не ждем: тикет nonce финализирует сервис подтверждений
+                self.track_confirmation(tx_hash)
                 
                 tx_hashes.append(tx_hash)
                 
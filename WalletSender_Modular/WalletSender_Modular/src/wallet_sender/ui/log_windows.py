@@ -16,6 +16,34 @@ from PyQt5.QtGui import QFont, QIcon, QTextCursor, QKeySequence, QTextDocument
 from datetime import datetime
 import re
 
+# Цветовая схема уровней
+LOG_COLORS = {
+    "DEBUG": "#888",
+    "INFO": "#ff8c00",
+    "SUCCESS": "#0a0",
+    "WARNING": "#f90",
+    "ERROR": "#f00",
+    "SALE": "#00ff88",
+    "PROFIT": "#00ffff"
+}
+
+
+def _render_batch(log_text: QTextEdit, autoscroll: bool, batch: list):
+    """Добавление пачки логов в поле: одна перерисовка и одна прокрутка"""
+    scrollbar = log_text.verticalScrollBar()
+    was_at_bottom = scrollbar.value() >= scrollbar.maximum() - 10
+    
+    log_text.setUpdatesEnabled(False)
+    try:
+        for timestamp, message, level in batch:
+            color = LOG_COLORS.get(level, "#ff8c00")
+            log_text.append(f'<span style="color: {color}">[{timestamp}] {message}</span>')
+    finally:
+        log_text.setUpdatesEnabled(True)
+    
+    if autoscroll and was_at_bottom:
+        scrollbar.setValue(scrollbar.maximum())
+
 
 class LogWindow(QDialog):
     """Отдельное окно для отображения логов"""
@@ -154,13 +182,13 @@ class LogWindow(QDialog):
             try:
                 from ..utils.unified_logger import get_log_manager
                 self.log_manager = get_log_manager()
-                # Подписываемся на получение логов
-                self.log_manager.subscribe(self.add_log)
+                self.log_text.document().setMaximumBlockCount(self.log_manager.max_pending)
                 
-                # Загружаем историю логов
-                history = self.log_manager.get_history()
-                for timestamp, message, level in history:
-                    self.add_log(message, level)
+                # Загружаем историю логов одной пачкой
+                self.add_log_batch(self.log_manager.get_history())
+                
+                # Подписываемся на получение логов пачками
+                self.log_manager.subscribe_batch(self.add_log_batch)
             except ImportError:
                 # Fallback на старую синхронизацию
                 self.sync_timer = QTimer()
@@ -171,18 +199,7 @@ class LogWindow(QDialog):
         """Добавление лога в окно"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         
-        # Цветовая схема
-        colors = {
-            "DEBUG": "#888",
-            "INFO": "#ff8c00",
-            "SUCCESS": "#0a0",
-            "WARNING": "#f90",
-            "ERROR": "#f00",
-            "SALE": "#00ff88",
-            "PROFIT": "#00ffff"
-        }
-        
-        color = colors.get(level, "#ff8c00")
+        color = LOG_COLORS.get(level, "#ff8c00")
         formatted_message = f'<span style="color: {color}">[{timestamp}] {message}</span>'
         
         # Сохраняем позицию курсора
@@ -200,6 +217,10 @@ class LogWindow(QDialog):
         else:
             scrollbar.setValue(scroll_pos)
             
+    def add_log_batch(self, batch: list):
+        """Добавление пачки логов от менеджера"""
+        _render_batch(self.log_text, self.autoscroll_cb.isChecked(), batch)
+            
     def sync_with_parent(self):
         """Синхронизация с логами главного окна"""
         if not self.sync_cb.isChecked() or not self.parent_window:
@@ -430,13 +451,13 @@ class FloatingLogWindow(QDockWidget):
             try:
                 from ..utils.unified_logger import get_log_manager
                 self.log_manager = get_log_manager()
-                # Подписываемся на получение логов
-                self.log_manager.subscribe(self.add_log)
+                self.log_text.document().setMaximumBlockCount(self.log_manager.max_pending)
                 
-                # Загружаем историю логов
-                history = self.log_manager.get_history()
-                for timestamp, message, level in history:
-                    self.add_log(message, level)
+                # Загружаем историю логов одной пачкой
+                self.add_log_batch(self.log_manager.get_history())
+                
+                # Подписываемся на получение логов пачками
+                self.log_manager.subscribe_batch(self.add_log_batch)
             except ImportError:
                 # Fallback на старую синхронизацию
                 self.sync_timer = QTimer()
@@ -447,18 +468,7 @@ class FloatingLogWindow(QDockWidget):
         """Добавление лога в окно"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         
-        # Цветовая схема
-        colors = {
-            "DEBUG": "#888",
-            "INFO": "#ff8c00",
-            "SUCCESS": "#0a0",
-            "WARNING": "#f90",
-            "ERROR": "#f00",
-            "SALE": "#00ff88",
-            "PROFIT": "#00ffff"
-        }
-        
-        color = colors.get(level, "#ff8c00")
+        color = LOG_COLORS.get(level, "#ff8c00")
         formatted_message = f'<span style="color: {color}">[{timestamp}] {message}</span>'
         
         # Сохраняем позицию курсора
@@ -472,6 +482,10 @@ class FloatingLogWindow(QDockWidget):
         if self.autoscroll_cb.isChecked() and was_at_bottom:
             scrollbar.setValue(scrollbar.maximum())
             
+    def add_log_batch(self, batch: list):
+        """Добавление пачки логов от менеджера"""
+        _render_batch(self.log_text, self.autoscroll_cb.isChecked(), batch)
+            
     def change_opacity(self, value):
         """Изменение прозрачности окна"""
         self.opacity_label.setText(f"{value}%")
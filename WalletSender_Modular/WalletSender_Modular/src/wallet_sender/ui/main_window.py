@@ -4,8 +4,12 @@
 Главное окно WalletSender Modular
 """
 
+import time
+import threading
+
 # Всегда используем слой совместимости Qt
 from PyQt5.QtWidgets import (
+    QApplication,
     QMainWindow,
     QWidget,
     QVBoxLayout,
@@ -30,21 +34,41 @@ from ..utils.logger import get_logger
 from ..utils.unified_logger import get_log_manager, unified_log
 from ..utils.logger_enhanced import set_ui_log_handler, log_action, log_click, log_window_action, log_tab_change
 from .log_windows import LogWindow, FloatingLogWindow
+from ..utils import startup_timing
 from .. import __version__
 from ..config import Config
-from ..core.web3_provider import Web3Provider
 
 # Импорт вкладок
-# Вкладки импортируем лениво внутри _load_tabs, чтобы избежать создания QWidget до QApplication
+# Вкладки создаются лениво при первой активации (см. _load_tabs)
 
 logger = get_logger(__name__)
 
 
+# Вкладки: (атрибут окна, класс, заголовок, аргументы конструктора)
+TAB_SPECS = [
+    ('mass_distribution_tab', 'MassDistributionTab', "[MASS] Массовая рассылка", {'slot_number': 1}),
+    ('mass_distribution_tab2', 'MassDistributionTab', "[MASS] Массовая рассылка 2", {'slot_number': 2}),
+    ('mass_distribution_tab3', 'MassDistributionTab', "[MASS] Массовая рассылка 3", {'slot_number': 3}),
+    ('direct_send_tab', 'DirectSendTab', "📫 Прямая отправка", {}),
+    ('auto_buy_tab', 'AutoBuyTab', "🛌 Автопокупки", {}),
+    ('auto_sales_tab', 'AutoSalesTab', "[MONEY] Автопродажи", {}),
+    ('analysis_tab', 'AnalysisTab', "[SEARCH] Анализ", {}),
+    ('search_tab', 'SearchTab', "🔎 Поиск", {}),
+    ('rewards_tab', 'RewardsTab', "🎁 Награды", {}),
+    ('queue_tab', 'QueueTab', "[INFO] Очередь", {}),
+    ('history_tab', 'HistoryTab', "[HISTORY] История", {}),
+    ('found_tx_tab', 'FoundTxTab', "[SEARCH] Найденные TX", {}),
+    ('settings_tab', 'SettingsTab', "[SETTINGS] Настройки", {}),
+]
+
+
 class MainWindow(QMainWindow):
     """Главное окно приложения WalletSender"""
     
     # Сигналы для логирования
     log_message = pyqtSignal(str, str)  # message, level
+    # Фоновые сервисы запущены (из потока прогрева)
+    services_ready = pyqtSignal()
     
     def __init__(self):
         super().__init__()
@@ -52,15 +76,17 @@ class MainWindow(QMainWindow):
         # Инициализация конфигурации
         self.config = Config()
         
-        # Инициализация Web3 провайдера
-        self.web3_provider = Web3Provider()
+        # Web3 провайдер и фоновые сервисы создаются лениво (после показа окна)
+        self._web3_provider = None
+        self._services_ready = False
+        self._pending_tabs = {}
         
         # Настраиваем улучшенное логирование
         set_ui_log_handler(self._enhanced_log_handler)
         
         # Подключаемся к единому менеджеру логирования
         self.log_manager = get_log_manager()
-        self.log_manager.subscribe(self._unified_log_handler)
+        self.log_manager.subscribe_batch(self._render_log_batch)
         
         # Инициализация UI
         self.init_ui()
@@ -70,6 +96,63 @@ class MainWindow(QMainWindow):
         
         logger.info(f"[START] WalletSender Modular v{__version__} запущен")
         
+    @property
+    def web3_provider(self):
+        """Web3 провайдер (создается при первом обращении)"""
+        if self._web3_provider is None:
+            from ..core.web3_provider import Web3Provider
+            self._web3_provider = Web3Provider()
+        return self._web3_provider
+        
+    def showEvent(self, event):
+        """Первый показ окна: отчет о запуске и фоновый прогрев сервисов"""
+        super().showEvent(event)
+        if not getattr(self, '_first_shown', False):
+            self._first_shown = True
+            # singleShot(0) срабатывает после первой отрисовки
+            QTimer.singleShot(0, self._on_first_paint)
+            
+    def _on_first_paint(self):
+        """Окно отрисовано"""
+        startup_timing.mark(startup_timing.FIRST_WINDOW)
+        startup_timing.report()
+        self.services_ready.connect(self._on_services_ready)
+        threading.Thread(target=self._warm_up_services, daemon=True, name="ServiceWarmUp").start()
+        
+    def _warm_up_services(self):
+        """Фоновый запуск тяжелых сервисов (импорт web3, пул RPC, очередь задач)"""
+        started = time.perf_counter()
+        try:
+            from ..core.rpc import get_rpc_pool
+            get_rpc_pool().warm_up()
+            
+            from ..services.job_router import get_job_router
+            get_job_router()
+            
+            # Подключения уже созданных вкладок (до отрисовки они не создаются)
+            for attr, *_ in TAB_SPECS:
+                warm_up = getattr(getattr(self, attr, None), 'warm_up', None)
+                if warm_up:
+                    warm_up()
+            
+            from ..core.limiter import get_rate_limiter
+            get_rate_limiter()
+            
+            logger.info(f"[OK] Фоновые сервисы готовы за {(time.perf_counter() - started) * 1000:.0f} мс")
+        except Exception as e:
+            logger.warning(f"[WARN] Ошибка фонового запуска сервисов: {e}")
+        finally:
+            self._services_ready = True
+            startup_timing.mark('services_ready')
+            self.services_ready.emit()
+            
+    def _on_services_ready(self):
+        """Фоновые сервисы готовы: профиль запуска (если включен)"""
+        startup_timing.finish()
+        if startup_timing.should_exit_after_paint():
+            logger.info("[TIME] Профилирование запуска завершено, выход")
+            QApplication.instance().quit()
+        
     def init_ui(self):
         """Инициализация пользовательского интерфейса"""
         # Настройка окна
@@ -143,6 +226,8 @@ class MainWindow(QMainWindow):
         self.log_area = QTextEdit()
         self.log_area.setReadOnly(True)
         self.log_area.setMaximumHeight(200)
+        # Кольцевой буфер: старые строки удаляются самим документом
+        self.log_area.document().setMaximumBlockCount(self.log_manager.max_pending)
         log_layout.addWidget(self.log_area)
         
         splitter.addWidget(log_container)
@@ -255,8 +340,12 @@ class MainWindow(QMainWindow):
         
     def _check_network_connection(self):
         """Проверка подключения к сети"""
+        if not self._services_ready:
+            return
         try:
-            if self.web3_provider and self.web3_provider.w3.is_connected():
+            # Состояние берем из health checker общего пула RPC (без запроса в UI потоке)
+            from ..core.rpc import get_rpc_pool
+            if get_rpc_pool().current_primary():
                 self.network_status_label.setText("🟢 BSC подключена")
             else:
                 self.network_status_label.setText("🔴 BSC отключена")
@@ -265,6 +354,8 @@ class MainWindow(QMainWindow):
     
     def _update_status_indicators(self):
         """Обновление индикаторов статуса"""
+        if not self._services_ready:
+            return
         try:
             # Обновляем статус очереди
             from ..services.job_router import get_job_router
@@ -312,73 +403,41 @@ class MainWindow(QMainWindow):
     
     def _load_tabs(self):
         """Загрузка вкладок приложения"""
-        # Ленивая загрузка модулей вкладок (после создания QApplication)
-        from .tabs import (
-            AutoBuyTab,
-            AutoSalesTab,
-            DirectSendTab,
-            MassDistributionTab,
-            AnalysisTab,
-            SearchTab,
-            RewardsTab,
-            QueueTab,
-            HistoryTab,
-            SettingsTab,
-            FoundTxTab,
-        )
-        # Массовая рассылка (основная)
-        self.mass_distribution_tab = MassDistributionTab(self, slot_number=1)
-        self.tab_widget.addTab(self.mass_distribution_tab, "[MASS] Массовая рассылка")
-        
-        # Массовая рассылка 2
-        self.mass_distribution_tab2 = MassDistributionTab(self, slot_number=2)
-        self.tab_widget.addTab(self.mass_distribution_tab2, "[MASS] Массовая рассылка 2")
-        
-        # Массовая рассылка 3
-        self.mass_distribution_tab3 = MassDistributionTab(self, slot_number=3)
-        self.tab_widget.addTab(self.mass_distribution_tab3, "[MASS] Массовая рассылка 3")
-        
-        # Прямая отправка
-        self.direct_send_tab = DirectSendTab(self)
-        self.tab_widget.addTab(self.direct_send_tab, "📫 Прямая отправка")
-        
-        # Автопокупки
-        self.auto_buy_tab = AutoBuyTab(self)
-        self.tab_widget.addTab(self.auto_buy_tab, "🛌 Автопокупки")
-        
-        # Автопродажи
-        self.auto_sales_tab = AutoSalesTab(self)
-        self.tab_widget.addTab(self.auto_sales_tab, "[MONEY] Автопродажи")
-        
-        # Анализ
-        self.analysis_tab = AnalysisTab(self)
-        self.tab_widget.addTab(self.analysis_tab, "[SEARCH] Анализ")
-        
-        # Поиск
-        self.search_tab = SearchTab(self)
-        self.tab_widget.addTab(self.search_tab, "🔎 Поиск")
-        
-        # Награды
-        self.rewards_tab = RewardsTab(self)
-        self.tab_widget.addTab(self.rewards_tab, "🎁 Награды")
-        
-        # Очередь
-        self.queue_tab = QueueTab(self)
-        self.tab_widget.addTab(self.queue_tab, "[INFO] Очередь")
-        
-        # История
-        self.history_tab = HistoryTab(self)
-        self.tab_widget.addTab(self.history_tab, "[HISTORY] История")
-        
-        # Найденные транзакции
-        self.found_tx_tab = FoundTxTab(self)
-        self.tab_widget.addTab(self.found_tx_tab, "[SEARCH] Найденные TX")
-        
-        # Настройки
-        self.settings_tab = SettingsTab(self)
-        self.tab_widget.addTab(self.settings_tab, "[SETTINGS] Настройки")
+        # Вкладки добавляются заглушками, сами вкладки (и их модули) создаются
+        # при первой активации в _ensure_tab
+        for attr, class_name, title, kwargs in TAB_SPECS:
+            setattr(self, attr, None)
+            index = self.tab_widget.addTab(QWidget(), title)
+            self._pending_tabs[index] = (attr, class_name, title, kwargs)
+        
+        # Текущая вкладка создается сразу
+        self._ensure_tab(self.tab_widget.currentIndex())
+        
+        logger.info(f"[INFO] Зарегистрировано {self.tab_widget.count()} вкладок")
+        
+    def _ensure_tab(self, index: int):
+        """Создание вкладки при первой активации"""
+        spec = self._pending_tabs.pop(index, None)
+        if spec is None:
+            return
+        attr, class_name, title, kwargs = spec
+        
+        started = time.perf_counter()
+        from . import tabs
+        tab = getattr(tabs, class_name)(self, **kwargs)
+        setattr(self, attr, tab)
+        
+        placeholder = self.tab_widget.widget(index)
+        self.tab_widget.blockSignals(True)
+        try:
+            self.tab_widget.removeTab(index)
+            self.tab_widget.insertTab(index, tab, title)
+            self.tab_widget.setCurrentIndex(index)
+        finally:
+            self.tab_widget.blockSignals(False)
+        placeholder.deleteLater()
         
-        logger.info(f"[INFO] Загружено {self.tab_widget.count()} вкладок")
+        logger.info(f"[INFO] Вкладка {title} создана за {(time.perf_counter() - started) * 1000:.0f} мс")
         
     def _create_menu(self) -> None:
         """Создание меню приложения"""
@@ -435,12 +494,6 @@ class MainWindow(QMainWindow):
         """Подключение сигналов"""
         self.log_message.connect(self.add_log)
     
-    def _unified_log_handler(self, message: str, level: str = "INFO"):
-        """Обработчик для единого логгера"""
-        # Добавляем лог в основное окно через внутренний метод
-        # чтобы избежать повторной отправки в менеджер
-        self._add_log_impl(message, level)
-    
     def _enhanced_log_handler(self, message: str, level: str = "INFO"):
         """Обработчик для улучшенного логирования"""
         # Отправляем лог в единый менеджер, который уведомит всех подписчиков
@@ -453,24 +506,45 @@ class MainWindow(QMainWindow):
     @log_tab_change
     def _on_tab_changed(self, index: int):
         """Обработка переключения вкладок"""
-        pass  # Логирование выполняется через декоратор
+        # Логирование выполняется через декоратор
+        self._ensure_tab(index)
         
     @pyqtSlot(str, str)
     def add_log(self, message: str, level: str = "INFO") -> None:
         """Добавление сообщения в лог"""
-        # Отправляем лог в единый менеджер, который уведомит всех подписчиков
-        # включая это основное окно через _unified_log_handler
+        # Отправляем лог в единый менеджер; окно получит его пачкой через _render_log_batch
         if hasattr(self, 'log_manager'):
             self.log_manager.add_log(message, level)
         else:
             # Fallback если менеджер еще не инициализирован
             self._add_log_impl(message, level)
         
+    def _render_log_batch(self, batch: list) -> None:
+        """Вывод пачки логов от менеджера: одна перерисовка и одна прокрутка"""
+        self.log_area.setUpdatesEnabled(False)
+        try:
+            for timestamp, message, level in batch:
+                self.log_area.append(self._format_log_line(timestamp, message, level))
+        finally:
+            self.log_area.setUpdatesEnabled(True)
+        
+        # Прокрутка вниз
+        scrollbar: QScrollBar = self.log_area.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+        
     def _add_log_impl(self, message: str, level: str) -> None:
         """Реализация добавления лога"""
         from datetime import datetime
         timestamp = datetime.now().strftime("%H:%M:%S")
+        self.log_area.append(self._format_log_line(timestamp, message, level))
+        
+        # Прокрутка вниз
+        scrollbar: QScrollBar = self.log_area.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
         
+    @staticmethod
+    def _format_log_line(timestamp: str, message: str, level: str) -> str:
+        """HTML строка лога с цветом уровня"""
         # Цветовая схема для уровней
         colors = {
             "DEBUG": "#888",
@@ -483,13 +557,7 @@ class MainWindow(QMainWindow):
         }
         
         color = colors.get(level, "#ff8c00")  # Оранжевый для неизвестных уровней
-        formatted_message = f'<span style="color: {color}">[{timestamp}] {message}</span>'
-        
-        self.log_area.append(formatted_message)
-        
-        # Прокрутка вниз
-        scrollbar: QScrollBar = self.log_area.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
+        return f'<span style="color: {color}">[{timestamp}] {message}</span>'
         
     @log_action("Экспорт логов")
     def export_logs(self, checked=False):
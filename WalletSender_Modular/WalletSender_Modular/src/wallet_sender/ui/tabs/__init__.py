@@ -1,18 +1,39 @@
 """Tabs package public exports for UI imports.
 
 This avoids import errors like `from .tabs import MassDistributionTab` by
-re-exporting tab classes here.
+re-exporting tab classes here. Tab modules are imported on first attribute
+access, so heavy dependencies (web3, pandas, ...) of a tab are loaded only
+when that tab is actually built.
 """
 
-from .mass_distribution_tab import MassDistributionTab  # noqa: F401
-from .direct_send_tab import DirectSendTab  # noqa: F401
-from .auto_buy_tab import AutoBuyTab  # noqa: F401
-from .auto_sales_tab import AutoSalesTab  # noqa: F401
-from .settings_tab import SettingsTab  # noqa: F401
-from .base_tab import BaseTab  # noqa: F401
-from .analysis_tab import AnalysisTab  # noqa: F401
-from .search_tab import SearchTab  # noqa: F401
-from .rewards_tab import RewardsTab  # noqa: F401
-from .queue_tab import QueueTab  # noqa: F401
-from .history_tab import HistoryTab  # noqa: F401
-from .found_tx_tab import FoundTxTab  # noqa: F401
+import importlib
+
+_TAB_MODULES = {
+    'MassDistributionTab': 'mass_distribution_tab',
+    'DirectSendTab': 'direct_send_tab',
+    'AutoBuyTab': 'auto_buy_tab',
+    'AutoSalesTab': 'auto_sales_tab',
+    'SettingsTab': 'settings_tab',
+    'BaseTab': 'base_tab',
+    'AnalysisTab': 'analysis_tab',
+    'SearchTab': 'search_tab',
+    'RewardsTab': 'rewards_tab',
+    'QueueTab': 'queue_tab',
+    'HistoryTab': 'history_tab',
+    'FoundTxTab': 'found_tx_tab',
+}
+
+__all__ = list(_TAB_MODULES)
+
+
+def __getattr__(name):
+    module_name = _TAB_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_TAB_MODULES))
@@ -5,7 +5,7 @@
 import threading
 import time
 import asyncio
-from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
+from typing import Dict, List, Optional, Any, TYPE_CHECKING
 from datetime import datetime
 
 from PyQt5.QtWidgets import (
@@ -26,6 +26,8 @@ if TYPE_CHECKING:  # only for type checkers
     from ...services.token_service import TokenService
 from ...constants import PLEX_CONTRACT, USDT_CONTRACT
 from ...utils.logger import get_logger
+from ...utils.tx_columns import TxColumns, INCOMING
+from ...utils.sender_index import SenderIndex, SenderStats
 from ...services.bscscan_service import get_bscscan_service
 from ...config import get_config
 
@@ -35,10 +37,13 @@ class AnalysisTab(BaseTab):
     """Вкладка для анализа транзакций и токенов BSC"""
     
     # Сигналы для обновления UI из потоков
-    update_table_signal = pyqtSignal(list, dict, dict)
+    update_table_signal = pyqtSignal(list, int, int)  # top-K отправителей, всего отправителей, переводов
     search_finished_signal = pyqtSignal()
     found_tx_added_signal = pyqtSignal()
     
+    # Сколько отправителей показывается в таблице (полный список - в экспорте)
+    TABLE_TOP_K = 1000
+    
     def __init__(self, main_window, parent=None):
         super().__init__(main_window, parent)
         # Инициализация переменных
@@ -47,6 +52,7 @@ class AnalysisTab(BaseTab):
         self.is_searching: bool = False
         self.stop_search_event: threading.Event = threading.Event()
         self.search_thread: Optional[threading.Thread] = None
+        self.sender_index = SenderIndex()
         # Безопасная инициализация BscScanService, чтобы не падала вкладка при ошибке импорта/конфигурации
         try:  # noqa: WPS501
             self.bscscan_service = get_bscscan_service()
@@ -351,8 +357,10 @@ class AnalysisTab(BaseTab):
         # Запускаем анализ
         self.is_searching = True
         self.stop_search_event.clear()
+        self.sender_index = SenderIndex()
         
         # Обновляем UI
+        self.results_table.setRowCount(0)
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.progress_bar.setValue(0)
@@ -414,19 +422,23 @@ class AnalysisTab(BaseTab):
             asyncio.set_event_loop(loop)
             
             try:
-                # Выполняем постраничный поиск
-                transactions, sender_counter, sender_details = loop.run_until_complete(
+                # Выполняем постраничный поиск, таблица обновляется после каждой страницы
+                index = self.sender_index
+                loop.run_until_complete(
                     self._search_transactions_async(
                         wallet_address=address,
                         token_contract=token_filter,
-                        search_params=params
+                        search_params=params,
+                        index=index
                     )
                 )
                 
-                # Обновляем результаты в UI
-                self.update_table_signal.emit(transactions, sender_counter, sender_details)
+                # Финальное состояние таблицы
+                self._emit_index(index)
                 
-                self._log_to_search(f"[OK] Анализ завершен. Найдено {len(transactions)} транзакций")
+                self._log_to_search(
+                    f"[OK] Анализ завершен. Найдено {index.transfers} транзакций от {len(index)} отправителей"
+                )
             finally:
                 loop.close()
             
@@ -436,21 +448,30 @@ class AnalysisTab(BaseTab):
         finally:
             self.search_finished_signal.emit()
     
+    def _emit_index(self, index: SenderIndex):
+        """Передача top-K отправителей в UI поток"""
+        self.update_table_signal.emit(index.top(self.TABLE_TOP_K), len(index), index.transfers)
+    
     async def _search_transactions_async(
         self, 
         wallet_address: str, 
         token_contract: Optional[str],
-        search_params: Dict[str, Any]
-    ) -> Tuple[List[Dict[str, Any]], Dict[str, int], Dict[str, List[Dict[str, Any]]]]:
-        """Асинхронный постраничный поиск транзакций через BscScanService"""
-        
-        matching_transactions: List[Dict[str, Any]] = []
-        sender_counter: Dict[str, int] = {}
-        sender_details: Dict[str, List[Dict[str, Any]]] = {}
-        
+        search_params: Dict[str, Any],
+        index: SenderIndex
+    ) -> int:
+        """
+        Асинхронный постраничный поиск транзакций через BscScanService
+        
+        Отобранные переводы агрегируются в index по отправителям, детали
+        отдельных транзакций не сохраняются.
+        
+        Returns:
+            Количество отобранных переводов
+        """
         page = 1
         max_pages = search_params['max_pages']
         delay = search_params['delay_seconds']
+        predicates = self._amount_predicates(search_params)
         
         while page <= max_pages:
             if self.stop_search_event.is_set():
@@ -473,25 +494,12 @@ class AnalysisTab(BaseTab):
                     self._log_to_search("Больше транзакций не найдено")
                     break
                 
-                # Обрабатываем транзакции
-                for tx in result:
-                    if self._filter_transaction(tx, wallet_address, search_params):
-                        matching_transactions.append(tx)
-                        sender = tx.get('from', '').lower()
-                        
-                        # Обновляем счетчик
-                        sender_counter[sender] = sender_counter.get(sender, 0) + 1
-                        
-                        # Сохраняем детали
-                        if sender not in sender_details:
-                            sender_details[sender] = []
-                        sender_details[sender].append({
-                            'hash': tx.get('hash', ''),
-                            'timestamp': tx.get('timeStamp', ''),
-                            'value': float(tx.get('value', 0)) / (10 ** int(tx.get('tokenDecimal', 18))),
-                            'token': tx.get('tokenSymbol', ''),
-                            'block': tx.get('blockNumber', '')
-                        })
+                # Страница разбирается в колонки, входящие и сумма фильтруются векторно
+                columns = TxColumns(result)
+                matched = columns.filter_indices(direction=INCOMING, address=wallet_address, **predicates)
+                if index.add(columns, matched):
+                    # Прогрессивная отрисовка: текущий top-K после каждой страницы
+                    self._emit_index(index)
                 
                 # Обновляем прогресс
                 progress = int((page / max_pages) * 100)
@@ -508,82 +516,61 @@ class AnalysisTab(BaseTab):
                 self._log_to_search(f"Ошибка при запросе страницы {page}: {e}")
                 await asyncio.sleep(delay * 2)
         
-        return matching_transactions, sender_counter, sender_details
+        return index.transfers
     
-    def _filter_transaction(self, tx: Dict[str, Any], wallet_address: str, params: Dict[str, Any]) -> bool:
-        """Фильтрация транзакции по параметрам"""
-        # Проверяем, что это входящая транзакция
-        if tx.get('to', '').lower() != wallet_address.lower():
-            return False
-        
-        # Проверяем сумму если нужно
+    @staticmethod
+    def _amount_predicates(params: Dict[str, Any]) -> Dict[str, Any]:
+        """Фильтр суммы для TxColumns.mask() по режиму поиска"""
         mode = params.get('mode', 'all')
-        if mode == 'all':
-            return True
-        
-        tx_value = float(tx.get('value', 0)) / (10 ** int(tx.get('tokenDecimal', 18)))
-        
         if mode == 'exact':
-            exact = params.get('exact_amount', 0)
-            return abs(tx_value - exact) < 0.0000001
-        elif mode == 'range':
-            min_val = params.get('min_amount', 0)
-            max_val = params.get('max_amount', 0)
-            return min_val <= tx_value <= max_val
-        
-        return True
+            return {'amount_exact': params.get('exact_amount', 0)}
+        if mode == 'range':
+            return {'amount_min': params.get('min_amount', 0), 'amount_max': params.get('max_amount', 0)}
+        return {}
     
     def _log_to_search(self, message: str):
         """Логирование в поле поиска"""
         QTimer.singleShot(0, lambda: self.search_log.append(message))
     
-    @pyqtSlot(list, dict, dict)
-    def _update_search_results(self, transactions: List[Dict[str, Any]], counter: Dict[str, int], details: Dict[str, List[Dict[str, Any]]]) -> None:
-        """Обновление таблицы результатов"""
+    @pyqtSlot(list, int, int)
+    def _update_search_results(self, rows: List[SenderStats], senders: int, transfers: int) -> None:
+        """Обновление таблицы результатов (top-K отправителей по количеству транзакций)"""
         try:
-            self.results_table.setRowCount(0)
-            
-            # Сортируем по количеству транзакций
-            sorted_senders: List[Tuple[str, int]] = sorted(counter.items(), key=lambda x: x[1], reverse=True)
+            self.results_table.setUpdatesEnabled(False)
+            self.results_table.setRowCount(len(rows))
             
-            for sender, count in sorted_senders:
-                row = self.results_table.rowCount()
-                self.results_table.insertRow(row)
-                
+            for row, stats in enumerate(rows):
                 # Адрес отправителя
-                self.results_table.setItem(row, 0, QTableWidgetItem(sender))
+                self.results_table.setItem(row, 0, QTableWidgetItem(stats.address))
                 
                 # Количество транзакций
-                self.results_table.setItem(row, 1, QTableWidgetItem(str(count)))
+                self.results_table.setItem(row, 1, QTableWidgetItem(str(stats.count)))
                 
-                # Считаем общую сумму
-                if sender in details:
-                    total_sum = float(sum(float(tx.get('value', 0)) for tx in details[sender]))
-                    self.results_table.setItem(row, 2, QTableWidgetItem(f"{total_sum:.4f}"))
-                    
-                    # Первая транзакция
-                    first_tx = min(details[sender], key=lambda x: float(x.get('timestamp', 0)))
-                    first_date = datetime.fromtimestamp(int(first_tx['timestamp'])).strftime('%Y-%m-%d')
-                    self.results_table.setItem(row, 3, QTableWidgetItem(first_date))
-                    
-                    # Последняя транзакция
-                    last_tx = max(details[sender], key=lambda x: float(x.get('timestamp', 0)))
-                    last_date = datetime.fromtimestamp(int(last_tx['timestamp'])).strftime('%Y-%m-%d')
-                    self.results_table.setItem(row, 4, QTableWidgetItem(last_date))
+                # Общая сумма
+                self.results_table.setItem(row, 2, QTableWidgetItem(f"{stats.total:.4f}"))
+                
+                # Первая и последняя транзакции
+                first_date = datetime.fromtimestamp(stats.first_timestamp).strftime('%Y-%m-%d')
+                self.results_table.setItem(row, 3, QTableWidgetItem(first_date))
+                last_date = datetime.fromtimestamp(stats.last_timestamp).strftime('%Y-%m-%d')
+                self.results_table.setItem(row, 4, QTableWidgetItem(last_date))
                 
                 # Статус
-                status = "[OK] Активный" if count > 5 else "[WARN] Обычный"
+                status = "[OK] Активный" if stats.count > 5 else "[WARN] Обычный"
                 status_item = QTableWidgetItem(status)
-                if count > 10:
+                if stats.count > 10:
                     status_item.setBackground(QColor('#004400'))
-                elif count > 5:
+                elif stats.count > 5:
                     status_item.setBackground(QColor('#444400'))
                 self.results_table.setItem(row, 5, status_item)
             
-            self.log(f"Результаты обновлены: {len(sorted_senders)} отправителей", "SUCCESS")
+            shown = f", показаны первые {len(rows)}" if len(rows) < senders else ""
+            self.log(f"Результаты обновлены: {senders} отправителей, {transfers} транзакций{shown}", "SUCCESS")
             
         except Exception as e:
             logger.error(f"Ошибка обновления результатов: {e}")
+        finally:
+            self.results_table.setUpdatesEnabled(True)
     
     @pyqtSlot()
     def _on_search_finished(self):
@@ -628,13 +615,14 @@ class AnalysisTab(BaseTab):
     def clear_results(self):
         """Очистка результатов"""
         self.results_table.setRowCount(0)
+        self.sender_index = SenderIndex()
         self.search_log.clear()
         self.progress_bar.setValue(0)
         self.log("Результаты очищены", "INFO")
     
     def export_results(self):
         """Экспорт результатов в CSV"""
-        if self.results_table.rowCount() == 0:
+        if not len(self.sender_index):
             QMessageBox.warning(self, "Предупреждение", "Нет данных для экспорта!")
             return
         
@@ -653,16 +641,17 @@ class AnalysisTab(BaseTab):
                     # Заголовки
                     f.write("Address,TX Count,Total Amount,First TX,Last TX,Status\n")
                     
-                    # Данные
-                    for row in range(self.results_table.rowCount()):
-                        line = []
-                        for col in range(self.results_table.columnCount()):
-                            item = self.results_table.item(row, col)
-                            if item:
-                                line.append(item.text())
-                            else:
-                                line.append('')
-                        f.write(','.join(line) + '\n')
+                    # Данные: все отправители из индекса, а не только показанные в таблице
+                    for stats in self.sender_index.top():
+                        status = "[OK] Активный" if stats.count > 5 else "[WARN] Обычный"
+                        f.write(','.join([
+                            stats.address,
+                            str(stats.count),
+                            f"{stats.total:.4f}",
+                            datetime.fromtimestamp(stats.first_timestamp).strftime('%Y-%m-%d'),
+                            datetime.fromtimestamp(stats.last_timestamp).strftime('%Y-%m-%d'),
+                            status
+                        ]) + '\n')
                 
                 self.log(f"Результаты экспортированы: {path}", "SUCCESS")
                 QMessageBox.information(self, "Успех", "Результаты успешно экспортированы!")
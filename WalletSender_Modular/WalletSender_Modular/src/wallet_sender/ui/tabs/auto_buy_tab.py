@@ -28,6 +28,7 @@ from eth_typing import HexStr, HexAddress
 
 from .base_tab import BaseTab
 from ...utils.logger import get_logger
+from ...utils import balance_reader
 from ...utils.logger_enhanced import (
     log_action, log_click, log_dropdown_change, log_checkbox_change,
     log_spinbox_change, log_input_change, log_validation, log_api_call,
@@ -200,6 +201,13 @@ class AutoBuyTab(BaseTab):
         
     def _init_web3(self):
         """Инициализация Web3 подключения с множественными RPC endpoints"""
+        # Общий пул RPC: одно соединение на endpoint для всех вкладок
+        self.web3 = self._shared_web3()
+        if self.web3 is not None:
+            self.log("[OK] Подключен к BSC через общий пул RPC", "SUCCESS")
+            self._init_managers()
+            return
+        
         # Список RPC endpoints для надежности
         rpc_urls = [
             'https://bsc-dataseed.binance.org/',
@@ -225,18 +233,7 @@ class AutoBuyTab(BaseTab):
                     self.log(f"[OK] Подключен к BSC через {rpc_url} (блок: {latest_block})", "SUCCESS")
                     
                     # Инициализируем менеджеры
-                    try:
-                        from ...utils.gas_manager import GasManager
-                        from ...utils.token_safety import TokenSafetyChecker
-                        from ...utils.async_manager import get_async_manager
-                        
-                        self.gas_manager = GasManager(self.web3)
-                        self.safety_checker = TokenSafetyChecker(self.web3)
-                        self.async_manager = get_async_manager(self.web3)
-                        
-                        self.log("[OK] Менеджеры инициализированы", "SUCCESS")
-                    except Exception as e:
-                        self.log(f"[WARN] Ошибка инициализации менеджеров: {str(e)}", "WARNING")
+                    self._init_managers()
                     
                     return
                 else:
@@ -256,6 +253,21 @@ class AutoBuyTab(BaseTab):
             self.log(f"[ERROR] Ошибка создания fallback подключения: {str(e)}", "ERROR")
             self.web3 = None
             
+    def _init_managers(self):
+        """Инициализация менеджеров газа, безопасности и асинхронных задач"""
+        try:
+            from ...utils.gas_manager import GasManager
+            from ...utils.token_safety import TokenSafetyChecker
+            from ...utils.async_manager import get_async_manager
+            
+            self.gas_manager = GasManager(self.web3)
+            self.safety_checker = TokenSafetyChecker(self.web3)
+            self.async_manager = get_async_manager(self.web3)
+            
+            self.log("[OK] Менеджеры инициализированы", "SUCCESS")
+        except Exception as e:
+            self.log(f"[WARN] Ошибка инициализации менеджеров: {str(e)}", "WARNING")
+            
     def init_ui(self):
         """Инициализация интерфейса вкладки"""
         layout = QVBoxLayout(self)
@@ -690,14 +702,13 @@ class AutoBuyTab(BaseTab):
             
         try:
             # Проверяем и обновляем Web3 подключение
-            if not self.web3 or not self.web3.is_connected():
+            if not self.web3 or not balance_reader.is_connected(self.web3):
                 self.log("[WARN] Web3 не подключен, переподключаемся...", "WARNING")
                 self._init_web3()
             
             # Обновляем BNB баланс
             try:
-                checksum_address = Web3.to_checksum_address(self.account.address)
-                bnb_balance = self.web3.eth.get_balance(checksum_address)
+                bnb_balance = balance_reader.get_native_balance(self.web3, self.account.address)
                 bnb_formatted = self.web3.from_wei(bnb_balance, 'ether')
                 self.bnb_balance_label.setText(f"{bnb_formatted:.6f}")
                 self.log(f"[MONEY] BNB баланс: {bnb_formatted:.6f}", "SUCCESS")
@@ -799,7 +810,7 @@ class AutoBuyTab(BaseTab):
                 return 0
             
             # Проверяем подключение к сети
-            if not self.web3.is_connected():
+            if not balance_reader.is_connected(self.web3):
                 self.log("[ERROR] Нет подключения к BSC сети", "ERROR")
                 return 0
             
@@ -813,31 +824,23 @@ class AutoBuyTab(BaseTab):
             
             # Проверяем, что контракт существует
             try:
-                code = self.web3.eth.get_code(checksum_address)
-                if code == b'':
+                if not balance_reader.has_code(self.web3, checksum_address):
                     self.log(f"[ERROR] Контракт не найден по адресу: {checksum_address}", "ERROR")
                     return 0
             except Exception as e:
                 self.log(f"[ERROR] Ошибка проверки контракта: {str(e)}", "ERROR")
                 return 0
             
-            # Создаем контракт
-            token_contract = self.web3.eth.contract(
-                address=checksum_address,
-                abi=ERC20_ABI
-            )
-            
             # Получаем decimals
             try:
-                decimals = token_contract.functions.decimals().call()
+                decimals = balance_reader.get_token_decimals(self.web3, checksum_address)
             except Exception as e:
                 self.log(f"[ERROR] Ошибка получения decimals: {str(e)}", "ERROR")
                 decimals = 18  # Fallback на стандартные 18 decimals
             
-            # Получаем баланс
-            wallet_address = Web3.to_checksum_address(self.account.address)
+            # Получаем баланс (одинаковые запросы вкладок в пределах блока объединяются)
             try:
-                balance = token_contract.functions.balanceOf(wallet_address).call()
+                balance = balance_reader.get_token_balance_raw(self.web3, checksum_address, self.account.address)
             except Exception as e:
                 self.log(f"[ERROR] Ошибка получения баланса: {str(e)}", "ERROR")
                 return 0
@@ -863,32 +866,20 @@ class AutoBuyTab(BaseTab):
         try:
             address = self.account.address
             
-            # Получаем баланс BNB
-            bnb_balance_wei = self.web3.eth.get_balance(address)
+            # Получаем баланс BNB (общий с другими вкладками в пределах блока)
+            bnb_balance_wei = balance_reader.get_native_balance(self.web3, address)
             bnb_balance = self.web3.from_wei(bnb_balance_wei, 'ether')
             
             # Получаем баланс PLEX ONE
             try:
-                plex_contract = self.web3.eth.contract(
-                    address=CONTRACTS['PLEX_ONE'],
-                    abi=ERC20_ABI
-                )
-                plex_balance_raw = plex_contract.functions.balanceOf(address).call()
-                plex_decimals = plex_contract.functions.decimals().call()
-                plex_balance = plex_balance_raw / (10 ** plex_decimals)
+                plex_balance = balance_reader.get_token_balance(self.web3, CONTRACTS['PLEX_ONE'], address)
             except Exception as e:
                 plex_balance = 0.0
                 self.log(f"[WARN] Ошибка получения баланса PLEX: {str(e)}", "WARNING")
                 
             # Получаем баланс USDT
             try:
-                usdt_contract = self.web3.eth.contract(
-                    address=CONTRACTS['USDT'],
-                    abi=ERC20_ABI
-                )
-                usdt_balance_raw = usdt_contract.functions.balanceOf(address).call()
-                usdt_decimals = usdt_contract.functions.decimals().call()
-                usdt_balance = usdt_balance_raw / (10 ** usdt_decimals)
+                usdt_balance = balance_reader.get_token_balance(self.web3, CONTRACTS['USDT'], address)
             except Exception as e:
                 usdt_balance = 0.0
                 self.log(f"[WARN] Ошибка получения баланса USDT: {str(e)}", "WARNING")
@@ -1303,6 +1294,16 @@ class AutoBuyTab(BaseTab):
                 if not token_address or not Web3.is_address(token_address):
                     self.log("[ERROR] Неверный адрес пользовательского токена", "ERROR")
                     return {'success': False, 'error': 'Неверный адрес токена'}
+                
+                # Проверка безопасности (повторные покупки берут отчет из кеша)
+                if getattr(self, 'safety_checker', None):
+                    from ...utils.token_safety import SafetyLevel
+                    report = self.safety_checker.check_token_safety(token_address)
+                    self.log(f"[CHECK] Безопасность токена: {report.overall_level.value}", "INFO")
+                    if report.overall_level == SafetyLevel.DANGEROUS:
+                        failed = [check.message for check in report.checks if check.level == SafetyLevel.DANGEROUS]
+                        self.log(f"[ERROR] Опасный токен: {'; '.join(failed)}", "ERROR")
+                        return {'success': False, 'error': 'Токен не прошел проверку безопасности'}
             
             # Проверяем что не покупаем тот же токен, которым платим
             if buy_with == 'USDT' and selected_token == 'USDT':
@@ -1456,35 +1457,14 @@ class AutoBuyTab(BaseTab):
                     raise Exception("Не удалось отправить approve транзакцию")
                 self.log(f" https://bscscan.com/tx/{approve_hash}", "INFO")
                 self.log("⏳ Ожидание подтверждения approve...", "INFO")
-                approve_receipt = self.web3.eth.wait_for_transaction_receipt(approve_hash, timeout=180)
+                approve_receipt = self.wait_receipt(approve_hash, timeout=180)
                 if not (approve_receipt and approve_receipt['status'] == 1):
                     raise Exception("Approve транзакция провалилась")
                 self.log(f"[OK] Approve завершен. Gas used: {approve_receipt['gasUsed']}", "SUCCESS")
                 time.sleep(1)
                 self.log(f"[STATS] Pending nonce после approve: {self.web3.eth.get_transaction_count(self.account.address,'pending')}", "INFO")
                 
-                # Теперь основная транзакция
-                router_abi = [
-                    {
-                        "inputs": [
-                            {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-                            {"internalType": "uint256", "name": "amountOutMin", "type": "uint256"},
-                            {"internalType": "address[]", "name": "path", "type": "address[]"},
-                            {"internalType": "address", "name": "to", "type": "address"},
-                            {"internalType": "uint256", "name": "deadline", "type": "uint256"}
-                        ],
-                        "name": "swapExactTokensForTokens",
-                        "outputs": [{"internalType": "uint256[]", "name": "amounts", "type": "uint256[]"}],
-                        "stateMutability": "nonpayable",
-                        "type": "function"
-                    }
-                ]
-                
-                router_contract = self.web3.eth.contract(
-                    address=router_address,
-                    abi=router_abi
-                )
-                
+                # Теперь основная транзакция (calldata собирается по шаблону в DexSwapService)
                 # Создаем путь обмена - используем тот же путь, что был найден при проверке
                 if 'path' in locals() and path:
                     self.log(f"🔄 Используем найденный путь: {' -> '.join([self._get_token_symbol(p) for p in path])}", "INFO")
@@ -1500,6 +1480,9 @@ class AutoBuyTab(BaseTab):
                 # Выполняем swap через сервис
                 swap_hash = None
                 if hasattr(self, '_dex_service') and self._dex_service:
+                    # Approve подтвержден: оценка газа маршрута обновляется в фоне для
+                    # следующих покупок, эта берет лимит из кэша оценок без RPC
+                    self._dex_service.warm_swap_template_async('swapExactTokensForTokens', path, amount_in_units)
                     try:
                         swap_hash = self._dex_service.swap_exact_tokens_for_tokens(
                             amount_in=amount_in_units,
@@ -1516,7 +1499,7 @@ class AutoBuyTab(BaseTab):
                 else:
                     raise Exception("DexSwapService не инициализирован для USDT swap")
                 self.log("⏳ Ожидание подтверждения транзакции...", "INFO")
-                receipt = self.web3.eth.wait_for_transaction_receipt(swap_hash, timeout=300)
+                receipt = self.wait_receipt(swap_hash, timeout=300)
                 if not (receipt and receipt.get('status') == 1):
                     raise Exception("Swap транзакция не подтверждена")
                 gas_used = receipt['gasUsed']
@@ -1561,7 +1544,8 @@ class AutoBuyTab(BaseTab):
         # Логируем результат
         self.log(f"[OK] Покупка #{buy_number} завершена. Tx: {tx_hash[:20]}...", "SUCCESS")
         
-        # Обновляем балансы
+        # Обновляем балансы (кешированные значения уже неактуальны)
+        balance_reader.invalidate_balances(self.account.address)
         self.update_balances()
         
     @log_click("Сбросить статистику")
@@ -18,6 +18,7 @@ from PyQt5.QtGui import QColor
 from web3 import Web3
 from .base_tab import BaseTab
 from ...utils.gas_manager import GasManager
+from ...utils import balance_reader
 
 # Условный импорт сервисов
 try:
@@ -104,7 +105,16 @@ class AutoSalesTab(BaseTab):
     def _init_web3(self):
         """Инициализация Web3 подключения"""
         try:
-            # Всегда создаем собственный Web3 провайдер для надежности
+            # Общий пул RPC: одно соединение на endpoint для всех вкладок
+            self.web3 = self._shared_web3()
+            if self.web3 is not None:
+                self.log("[OK] Подключен к BSC через общий пул RPC", "SUCCESS")
+                self.gas_manager = GasManager(self.web3)
+                self.safety_checker = None  # TokenSafetyChecker отключен
+                self.async_manager = None  # get_async_manager отключен
+                return
+            
+            # Резервный вариант - собственный Web3 провайдер
             rpc_urls = [
                 'https://bsc-dataseed.binance.org/',
                 'https://bsc-dataseed1.binance.org/',
@@ -670,13 +680,13 @@ class AutoSalesTab(BaseTab):
         
         try:
             # Проверяем и обновляем Web3 подключение
-            if not self.web3 or not self.web3.is_connected():
+            if not self.web3 or not balance_reader.is_connected(self.web3):
                 self.log("[WARN] Web3 не подключен, переподключаемся...", "WARNING")
                 self._init_web3()
             
             # Обновляем BNB баланс
             try:
-                bnb_balance = self.web3.eth.get_balance(self.account.address)
+                bnb_balance = balance_reader.get_native_balance(self.web3, self.account.address)
                 bnb_formatted = self.web3.from_wei(bnb_balance, 'ether')
                 self.bnb_balance_label.setText(f"BNB: {bnb_formatted:.6f}")
                 self.log(f"[MONEY] BNB баланс: {bnb_formatted:.6f}", "SUCCESS")
@@ -991,8 +1001,55 @@ class AutoSalesTab(BaseTab):
         self.monitoring_thread = threading.Thread(target=self._monitoring_worker, daemon=True)
         self.monitoring_thread.start()
         
+        # Шаблоны swap и оценки газа маршрутов готовятся до первой продажи
+        threading.Thread(target=self._warm_swap_templates, daemon=True).start()
+        
         self.log("[START] Мониторинг запущен", "SUCCESS")
     
+    def _warm_swap_templates(self):
+        """Прогрев шаблонов swap отслеживаемых токенов (в фоне, до срабатывания)"""
+        if not self._ensure_dex_service():
+            return
+        for token_address, settings in list(self.monitored_tokens.items()):
+            try:
+                path, swap_method, _ = self._sell_route(token_address, settings['target'])
+                token_contract = self.web3.eth.contract(address=Web3.to_checksum_address(token_address), abi=ERC20_ABI)
+                balance = token_contract.functions.balanceOf(self.account.address).call()
+                if settings.get('sell_type', 'percentage') == 'percentage':
+                    sample = int(balance * settings.get('sell_amount', 100) / 100)
+                else:
+                    decimals = token_contract.functions.decimals().call()
+                    sample = min(int(settings.get('sell_amount', 0) * (10 ** decimals)), balance)
+                self._dex_service.warm_swap_template(swap_method, path, sample or None)
+            except Exception as e:  # noqa: BLE001
+                self.log(f"[WARN] Не удалось подготовить шаблон swap для {settings['name']}: {e}", "WARNING")
+    
+    def _ensure_dex_service(self):
+        """Ленивая инициализация DexSwapService (если приватный ключ / account уже установлен)"""
+        if getattr(self, '_dex_service', None) is None:
+            if self.account and self.web3:
+                try:
+                    # Получаем кастомную цену газа из интерфейса
+                    custom_gas_price = self.gas_price_input.value()
+                    self._dex_service = DexSwapService(self.web3, self.PANCAKE_ROUTER, self.account.key, custom_gas_price_gwei=custom_gas_price)  # type: ignore[attr-defined]
+                    self.log(f"[CONFIG] DexSwapService инициализирован с ценой газа {custom_gas_price} gwei", "INFO")
+                except Exception as e:  # noqa: BLE001
+                    self._dex_service = None
+                    self.log(f"[WARN] DexSwapService init fail: {e}", "WARNING")
+            else:
+                self._dex_service = None
+        return self._dex_service
+    
+    def _sell_route(self, token_address: str, target: str):
+        """Путь обмена, метод роутера и целевой токен продажи"""
+        token = Web3.to_checksum_address(token_address)
+        if target == 'BNB':
+            return [token, self.WBNB], 'swapExactTokensForETH', self.WBNB
+        # USDT: для PLEX ONE прямой путь, для остальных через WBNB
+        if token_address.lower() == self.PLEX_ONE.lower():
+            return [token, self.USDT], 'swapExactTokensForTokens', self.USDT
+        return [token, self.WBNB, self.USDT], 'swapExactTokensForTokens', self.USDT
+    
     def stop_monitoring_func(self):
         """Остановка мониторинга"""
         if not self.is_monitoring:
@@ -1337,7 +1394,7 @@ class AutoSalesTab(BaseTab):
                 
                 # Ждем подтверждения с таймаутом
                 self.log("⏳ Ожидание подтверждения approve...", "INFO")
-                receipt = self.web3.eth.wait_for_transaction_receipt(approve_hash, timeout=60)
+                receipt = self.wait_receipt(approve_hash, timeout=60)
                 
                 if receipt and receipt['status'] == 1:
                     self.log(f"[OK] Approve успешно выполнен. Gas used: {receipt['gasUsed']}", "SUCCESS")
@@ -1474,19 +1531,8 @@ class AutoSalesTab(BaseTab):
         try:
             self.log(f"=== [START] Начало операции продажи {settings['name']}: {amount:.4f} ===", "INFO")
 
-            # Ленивая инициализация DexSwapService (если приватный ключ / account уже установлен)
-            if not hasattr(self, '_dex_service') or getattr(self, '_dex_service') is None:
-                if self.account and self.web3:
-                    try:
-                        # Получаем кастомную цену газа из интерфейса
-                        custom_gas_price = self.gas_price_input.value()
-                        self._dex_service = DexSwapService(self.web3, self.PANCAKE_ROUTER, self.account.key, custom_gas_price_gwei=custom_gas_price)  # type: ignore[attr-defined]
-                        self.log(f"[CONFIG] DexSwapService инициализирован с ценой газа {custom_gas_price} gwei", "INFO")
-                    except Exception as e:  # noqa: BLE001
-                        self._dex_service = None
-                        self.log(f"[WARN] DexSwapService init fail: {e}", "WARNING")
-                else:
-                    self._dex_service = None
+            if getattr(self, '_dex_service', None) is None:
+                self._ensure_dex_service()
             else:
                 # Обновляем цену газа в существующем DexSwapService
                 custom_gas_price = self.gas_price_input.value()
@@ -1517,22 +1563,7 @@ class AutoSalesTab(BaseTab):
                 return
             
             # Определяем путь обмена
-            if settings['target'] == 'BNB':
-                target_token = self.WBNB
-                # Для PLEX ONE используем прямой путь к WBNB
-                if token_address.lower() == self.PLEX_ONE.lower():
-                    path = [Web3.to_checksum_address(token_address), self.WBNB]
-                else:
-                    path = [Web3.to_checksum_address(token_address), self.WBNB]
-                swap_method = 'swapExactTokensForETH'
-            else:  # USDT
-                target_token = self.USDT
-                # Для PLEX ONE используем прямой путь к USDT
-                if token_address.lower() == self.PLEX_ONE.lower():
-                    path = [Web3.to_checksum_address(token_address), self.USDT]
-                else:
-                    path = [Web3.to_checksum_address(token_address), self.WBNB, self.USDT]
-                swap_method = 'swapExactTokensForTokens'
+            path, swap_method, target_token = self._sell_route(token_address, settings['target'])
             
             # Проверяем существование пула ликвидности
             has_pool, pair_address = self._check_liquidity_pool(token_address, target_token)
@@ -1543,12 +1574,6 @@ class AutoSalesTab(BaseTab):
             
             self.log(f"[OK] Пул ликвидности найден: {pair_address}", "SUCCESS")
             
-            # Получаем Router контракт
-            router_contract = self.web3.eth.contract(
-                address=self.PANCAKE_ROUTER,
-                abi=PANCAKE_ROUTER_ABI
-            )
-            
             # Проверяем и выполняем approve через сервис при наличии
             self.log(f"📝 Проверка approve для {settings['name']}...", "INFO")
             if hasattr(self, '_dex_service') and self._dex_service:
@@ -1560,7 +1585,7 @@ class AutoSalesTab(BaseTab):
                         self.log("🔑 Выполняем approve через сервис", "INFO")
                         approve_hash = self._dex_service.approve(token_address)
                         self.log(f"[SEND] Approve tx: {approve_hash}", "INFO")
-                        receipt = self.web3.eth.wait_for_transaction_receipt(approve_hash, timeout=60)
+                        receipt = self.wait_receipt(approve_hash, timeout=60)
                         if not (receipt and receipt.get('status') == 1):
                             raise Exception("Approve транзакция не подтверждена")
                 except Exception as e:  # noqa: BLE001
@@ -1571,6 +1596,11 @@ class AutoSalesTab(BaseTab):
                 if not self._check_and_approve(token_address, amount_wei):
                     raise Exception(f"Не удалось выполнить approve для {settings['name']}")
             
+            # Allowance есть: оценка газа маршрута обновляется в фоне для следующих продаж,
+            # эта продажа берет лимит из кэша оценок без RPC
+            if hasattr(self, '_dex_service') and self._dex_service:
+                self._dex_service.warm_swap_template_async(swap_method, path, amount_wei)
+            
             # Получаем ожидаемый выход с retry
             self.log("[SEARCH] Расчет выходного количества...", "INFO")
             self.log(f"[SEARCH] Путь обмена: {' -> '.join(path)}", "INFO")
@@ -1625,6 +1655,10 @@ class AutoSalesTab(BaseTab):
                         self.log(f"[WARN] Ошибка swap через сервис: {e}. Fallback к локальному пути", "WARNING")
             if not swap_hash:
                 # Fallback локальная отправка - используем обычный механизм получения nonce
+                router_contract = self.web3.eth.contract(
+                    address=self.PANCAKE_ROUTER,
+                    abi=PANCAKE_ROUTER_ABI
+                )
                 reserved_nonce = None
                 try:
                     # Получаем текущий nonce без резервирования через менеджер
@@ -1668,11 +1702,7 @@ class AutoSalesTab(BaseTab):
             
             # Ждем подтверждения
             self.log("⏳ Ожидание подтверждения транзакции...", "INFO")
-            # Конвертируем hex строку обратно в bytes если нужно
-            if isinstance(swap_hash, str):
-                receipt = self.web3.eth.wait_for_transaction_receipt(swap_hash, timeout=60)
-            else:
-                receipt = self.web3.eth.wait_for_transaction_receipt(swap_hash, timeout=60)
+            receipt = self.wait_receipt(swap_hash, timeout=60)
             
             if receipt and receipt['status'] == 1:
                 gas_used = receipt['gasUsed']
@@ -1691,6 +1721,7 @@ class AutoSalesTab(BaseTab):
                         self.log(f"[WARN] Не удалось confirm nonce ticket: {e}", "WARNING")
                 self.log(f"[SEARCH] Gas used: {gas_used}", "INFO")
                 self.log(f"[MONEY] Стоимость газа: {gas_cost_bnb:.6f} BNB", "INFO")
+                balance_reader.invalidate_balances(self.account.address)
                 
                 # Проверяем новый баланс с задержкой
                 time.sleep(3)
@@ -1838,7 +1869,7 @@ class AutoSalesTab(BaseTab):
                 
                 # Проверяем подключение к сети с retry
                 try:
-                    if not self.web3.is_connected():
+                    if not balance_reader.is_connected(self.web3):
                         if attempt == 0:
                             self.log("[WARN] Нет подключения к BSC сети - попытка переподключения", "WARNING")
                         time.sleep(retry_delay * (attempt + 1))
@@ -1859,8 +1890,7 @@ class AutoSalesTab(BaseTab):
                 
                 # Проверяем, что контракт существует
                 try:
-                    code = self.web3.eth.get_code(checksum_address)
-                    if code == b'':
+                    if not balance_reader.has_code(self.web3, checksum_address):
                         if attempt == 0:
                             self.log(f"[ERROR] Контракт не найден по адресу: {checksum_address}", "ERROR")
                         return 0
@@ -1870,24 +1900,17 @@ class AutoSalesTab(BaseTab):
                     time.sleep(retry_delay * (attempt + 1))
                     continue
                 
-                # Создаем контракт
-                token_contract = self.web3.eth.contract(
-                    address=checksum_address,
-                    abi=ERC20_ABI
-                )
-                
                 # Получаем decimals
                 try:
-                    decimals = token_contract.functions.decimals().call()
+                    decimals = balance_reader.get_token_decimals(self.web3, checksum_address)
                 except Exception as e:
                     if attempt == 0:
                         self.log(f"[WARN] Ошибка получения decimals: {str(e)}, используем 18", "WARNING")
                     decimals = 18  # Fallback на стандартные 18 decimals
                 
-                # Получаем баланс
-                wallet_address = Web3.to_checksum_address(self.account.address)
+                # Получаем баланс (одинаковые запросы в пределах блока объединяются)
                 try:
-                    balance = token_contract.functions.balanceOf(wallet_address).call()
+                    balance = balance_reader.get_token_balance_raw(self.web3, checksum_address, self.account.address)
                 except Exception as e:
                     if attempt == max_retries - 1:
                         self.log(f"[ERROR] Ошибка получения баланса: {str(e)}", "ERROR")
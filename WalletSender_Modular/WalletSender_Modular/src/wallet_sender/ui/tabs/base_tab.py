@@ -140,9 +140,39 @@ class BaseTab(QWidget):
 			return self.gas_limit_input.value()
 		return 100000  # Default gas limit
 	
+	# ----- Web3 helpers -----
+	def _shared_web3(self):
+		"""Web3 клиент из общего пула RPC (None, если пул недоступен)"""
+		try:
+			from ...core.rpc import get_web3
+			return get_web3()
+		except Exception as e:
+			self.log(f"[WARN] Общий пул RPC недоступен: {e}", "WARNING")
+			return None
+
+	def wait_receipt(self, tx_hash, timeout: float = 60):
+		"""
+		Квитанция транзакции через общий сервис подтверждений
+
+		Сервис находит квитанцию по новым блокам, поток вкладки только ждет.
+
+		Raises:
+			TimeoutError: Квитанции нет за timeout секунд или транзакция выброшена из сети
+		"""
+		from ...core.confirmation_service import get_confirmation_service
+		receipt = get_confirmation_service(getattr(self, "web3", None)).wait(tx_hash, timeout=timeout)
+		if receipt is None:
+			raise TimeoutError(f"Транзакция не подтверждена за {timeout} с")
+		return receipt
+
 	# ----- Logging helper -----
 	def log(self, message: str, level: str = "INFO"):
 		try:
+			# Менеджер логов потокобезопасен: без отдельного события Qt на каждое сообщение
+			log_manager = getattr(self.main_window, "log_manager", None)
+			if log_manager is not None:
+				log_manager.add_log(message, level)
+				return
 			if hasattr(self.main_window, "log_message"):
 				self.main_window.log_message.emit(message, level)  # type: ignore[attr-defined]
 				return
@@ -520,7 +520,7 @@ class DirectSendTab(BaseTab):
             tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
             
             # Ждем подтверждения
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            tx_receipt = self.wait_receipt(tx_hash, timeout=60)
             
             if tx_receipt['status'] == 1:
                 # Увеличиваем nonce после успешной отправки
@@ -569,7 +569,7 @@ class DirectSendTab(BaseTab):
             tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
             
             # Ждем подтверждения
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            tx_receipt = self.wait_receipt(tx_hash, timeout=60)
             
             if tx_receipt['status'] == 1:
                 # Увеличиваем nonce после успешной отправки
@@ -16,7 +16,7 @@ from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QColor
 
 from .base_tab import BaseTab
-from ...database.database import Database
+from ...database.database import get_database
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -30,7 +30,7 @@ class FoundTxTab(BaseTab):
     
     def __init__(self, main_window, parent=None):
         super().__init__(main_window, parent)
-        self.db_manager = Database()
+        self.db_manager = get_database()
         self.found_transactions = []
         
     def init_ui(self):
@@ -14,58 +14,40 @@ from PyQt5.QtWidgets import (
     QDateEdit, QMessageBox, QHeaderView, QMenu, QFileDialog,
     QApplication
 )
-from PyQt5.QtCore import Qt, QDate, pyqtSignal, QThread
+from PyQt5.QtCore import Qt, QDate, pyqtSignal
 from PyQt5.QtGui import QColor
 
 from .base_tab import BaseTab
 from ...database.models import Transaction
-from ...database.database import Database
+from ...database.database import get_database
+from ...core.confirmation_service import DROPPED, get_confirmation_service
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-class TransactionStatusChecker(QThread):
-    """Поток для проверки статусов транзакций"""
-    status_updated = pyqtSignal(str, str)  # tx_hash, new_status
-    
-    def __init__(self, web3_provider, tx_hashes):
-        super().__init__()
-        self.web3_provider = web3_provider
-        self.tx_hashes = tx_hashes
-        self.is_running = True
-        
-    def run(self):
-        """Проверка статусов"""
-        for tx_hash in self.tx_hashes:
-            if not self.is_running:
-                break
-                
-            try:
-                receipt = self.web3_provider.w3.eth.get_transaction_receipt(tx_hash)
-                if receipt:
-                    status = "success" if receipt.status == 1 else "failed"
-                    self.status_updated.emit(tx_hash, status)
-            except Exception as e:
-                logger.error(f"Ошибка проверки статуса {tx_hash}: {e}")
-                
-        logger.info(f"Проверка {len(self.tx_hashes)} транзакций завершена")
-        
-    def stop(self):
-        """Остановка потока"""
-        self.is_running = False
-
-
 class HistoryTab(BaseTab):
     """Вкладка истории операций"""
     
+    # Результат из потока сервиса подтверждений: tx_hash, new_status
+    status_resolved = pyqtSignal(str, str)
+    
     def __init__(self, main_window, parent=None):
         # Важно: создать менеджер БД до вызова BaseTab.__init__,
         # т.к. BaseTab вызывает init_ui(), где используется db_manager (load_history)
-        self.db_manager = Database()
-        self.status_checker = None
+        self.db_manager = get_database()
         super().__init__(main_window, parent)
         
+        # Pending транзакции подтверждает общий сервис по новым блокам
+        provider = getattr(main_window, 'web3_provider', None)
+        self.confirmations = get_confirmation_service(getattr(provider, 'w3', None))
+        self.status_resolved.connect(self.update_transaction_status)
+        self.confirmations.subscribe(self._on_confirmation)
+        
+    def _on_confirmation(self, tx_hash: str, status: str, receipt):
+        """Колбек сервиса подтверждений (вызывается в его потоке)"""
+        self.status_resolved.emit(tx_hash, 'failed' if status == DROPPED else status)
+        
     def init_ui(self):
         """Инициализация интерфейса"""
         layout = QVBoxLayout(self)
@@ -330,24 +312,10 @@ class HistoryTab(BaseTab):
                 self.log_message("Нет хешей для проверки", "WARNING")
                 return
                 
-            # Запускаем проверку в отдельном потоке
-            self.status_checker = TransactionStatusChecker(
-                self.main_window.web3_provider, tx_hashes
-            )
-            self.status_checker.status_updated.connect(self.update_transaction_status)
-            self.status_checker.start()
+            # Внеочередная проверка в сервисе подтверждений; результаты придут через status_resolved
+            self.confirmations.recheck(tx_hashes)
             
             self.log_message(f"Запущена проверка {len(tx_hashes)} транзакций", "INFO")
-            self.check_status_btn.setEnabled(False)
-            self.check_status_btn.setText("⏳ Проверка...")
-            
-            # Восстановим кнопку после завершения
-            self.status_checker.finished.connect(
-                lambda: self.check_status_btn.setEnabled(True)
-            )
-            self.status_checker.finished.connect(
-                lambda: self.check_status_btn.setText("[OK] Проверить статусы")
-            )
             
             session.close()
             
@@ -362,7 +330,7 @@ class HistoryTab(BaseTab):
             
             # Обновляем в БД
             tx = session.query(Transaction).filter(
-                Transaction.tx_hash == tx_hash
+                Transaction.tx_hash.in_([tx_hash, tx_hash.lower(), tx_hash[2:]])
             ).first()
             
             if tx:
@@ -373,7 +341,7 @@ class HistoryTab(BaseTab):
                 # Обновляем в таблице
                 for row in range(self.history_table.rowCount()):
                     hash_item = self.history_table.item(row, 8)
-                    if hash_item and hash_item.data(Qt.UserRole) == tx_hash:
+                    if hash_item and (hash_item.data(Qt.UserRole) or '').lower() == tx.tx_hash.lower():
                         status_item = self.history_table.item(row, 7)
                         status_item.setText(new_status)
                         
@@ -483,6 +451,4 @@ class HistoryTab(BaseTab):
             
     def cleanup(self):
         """Очистка ресурсов при закрытии вкладки"""
-        if self.status_checker and self.status_checker.isRunning():
-            self.status_checker.stop()
-            self.status_checker.wait()
+        self.confirmations.unsubscribe(self._on_confirmation)
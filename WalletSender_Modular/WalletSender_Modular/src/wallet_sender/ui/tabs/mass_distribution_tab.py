@@ -28,6 +28,10 @@ from ...services.token_service import TokenService
 from ...services.transaction_service import TransactionService
 from ...constants import PLEX_CONTRACT, USDT_CONTRACT
 from ...utils.logger import get_logger
+from ...utils import balance_reader
+from ...utils.address_classifier import (
+    CONTRACT, MODE_DROP, MODE_FLAG, MODE_OFF, UNKNOWN, get_address_classifier, get_contract_mode
+)
 from ...utils.logger_enhanced import (
     log_action, log_click, log_dropdown_change, log_checkbox_change,
     log_spinbox_change, log_input_change, log_validation, log_api_call,
@@ -70,21 +74,25 @@ class MassDistributionTab(BaseTab):
     transaction_completed = pyqtSignal(dict)  # transaction info
     distribution_finished = pyqtSignal()
     balance_updated = pyqtSignal(dict)  # balance updates
+    contracts_classified = pyqtSignal(list, str)  # адреса контрактов, режим
+    classification_failed = pyqtSignal(str)  # ошибка фоновой проверки на контракты
+    
+    # Web3 создается при первом обращении: первая вкладка строится до отрисовки окна
+    _web3 = None
+    _web3_ready = False
     
     def __init__(self, main_window, parent=None, slot_number=1):
         # Номер слота для отображения (должен быть установлен ДО вызова super())
         self.slot_number = slot_number
+        self._web3_lock = threading.Lock()
         
         super().__init__(main_window, parent)
         
         # Инициализация переменных для кошелька
-        self.web3 = None
         self.account = None
         self.balances = {}
         
-        # Инициализация JobRouter и NonceManager
-        self.job_router = get_job_router()
-        self.nonce_manager = get_nonce_manager()
+        # JobRouter и NonceManager - глобальные, запрашиваются при обращении
         self.active_jobs = {}  # Словарь активных задач
         
         # Настройка таймера для обновления балансов
@@ -93,12 +101,44 @@ class MassDistributionTab(BaseTab):
         
         # Подключение сигналов
         self.balance_updated.connect(self._update_balance_display)
-        
-        # Инициализация Web3
-        self._init_web3()
+        self.contracts_classified.connect(self._on_contracts_classified)
+        self.classification_failed.connect(self._on_classification_failed)
+        
+    @property
+    def web3(self):
+        """Web3 подключение (создается при первом обращении)"""
+        if not self._web3_ready:
+            with self._web3_lock:
+                if not self._web3_ready:
+                    self._init_web3()
+                    self._web3_ready = True
+        return self._web3
+        
+    @web3.setter
+    def web3(self, value):
+        self._web3 = value
+        self._web3_ready = True
+        
+    @property
+    def job_router(self):
+        return get_job_router()
+        
+    @property
+    def nonce_manager(self):
+        return get_nonce_manager()
+        
+    def warm_up(self):
+        """Подключение к RPC из фонового прогрева окна (после первой отрисовки)"""
+        return self.web3
         
     def _init_web3(self):
         """Инициализация Web3 подключения с множественными RPC endpoints"""
+        # Общий пул RPC: одно соединение на endpoint для всех вкладок
+        self._web3 = self._shared_web3()
+        if self._web3 is not None:
+            self.log(f"[OK] Слот {self.slot_number}: подключен к BSC через общий пул RPC", "SUCCESS")
+            return
+        
         # Список RPC endpoints для надежности
         rpc_urls = [
             'https://bsc-dataseed.binance.org/',
@@ -116,11 +156,11 @@ class MassDistributionTab(BaseTab):
         for rpc_url in rpc_urls:
             try:
                 self.log(f"[CONNECT] Пробуем подключиться к {rpc_url}", "INFO")
-                self.web3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': 10}))
+                self._web3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': 10}))
                 
-                if self.web3.is_connected():
+                if self._web3.is_connected():
                     # Проверяем что можем получить блок
-                    latest_block = self.web3.eth.block_number
+                    latest_block = self._web3.eth.block_number
                     self.log(f"[OK] Подключен к BSC через {rpc_url} (блок: {latest_block})", "SUCCESS")
                     return
                 else:
@@ -134,11 +174,11 @@ class MassDistributionTab(BaseTab):
         self.log("[ERROR] Не удалось подключиться ни к одному RPC endpoint", "ERROR")
         # Создаем fallback подключение
         try:
-            self.web3 = Web3(Web3.HTTPProvider('https://bsc-dataseed.binance.org/'))
+            self._web3 = Web3(Web3.HTTPProvider('https://bsc-dataseed.binance.org/'))
             self.log("[WARN] Создано fallback подключение", "WARNING")
         except Exception as e:
             self.log(f"[ERROR] Ошибка создания fallback подключения: {str(e)}", "ERROR")
-            self.web3 = None
+            self._web3 = None
     
     def init_ui(self):
         """Инициализация интерфейса"""
@@ -250,6 +290,15 @@ class MassDistributionTab(BaseTab):
         self.clear_addresses_btn.clicked.connect(self.clear_addresses)
         import_buttons_layout.addWidget(self.clear_addresses_btn)
         
+        import_buttons_layout.addWidget(QLabel("Контракты:"))
+        self.contract_mode_combo = QComboBox()
+        self.contract_mode_combo.addItem("Пометить", MODE_FLAG)
+        self.contract_mode_combo.addItem("Удалить", MODE_DROP)
+        self.contract_mode_combo.addItem("Не проверять", MODE_OFF)
+        self.contract_mode_combo.setCurrentIndex(max(0, self.contract_mode_combo.findData(get_contract_mode())))
+        self.contract_mode_combo.setToolTip("Проверка импортированных адресов на код контракта (eth_getCode)")
+        import_buttons_layout.addWidget(self.contract_mode_combo)
+        
         addresses_layout.addLayout(import_buttons_layout)
         
         # Таблица адресов
@@ -316,6 +365,7 @@ class MassDistributionTab(BaseTab):
         self.stop_flag = threading.Event()
         self.distribution_thread = None
         self.slot_id = f"slot{self.slot_number}"  # Уникальный ID слота
+        self.pending_classifications = 0  # Фоновые проверки на контракты в работе
         
         # Подключение сигналов
         self.token_combo.currentTextChanged.connect(self.on_token_changed)
@@ -429,9 +479,11 @@ class MassDistributionTab(BaseTab):
             
     def add_addresses(self, addresses: List[str]):
         """Добавление адресов в таблицу"""
+        added = []
         for addr in addresses:
             if addr not in self.addresses:
                 self.addresses.append(addr)
+                added.append(addr)
                 
                 row = self.addresses_table.rowCount()
                 self.addresses_table.insertRow(row)
@@ -447,6 +499,63 @@ class MassDistributionTab(BaseTab):
                 self.addresses_table.setItem(row, 2, QTableWidgetItem(""))
                 
         self.update_statistics()
+        self._classify_addresses(added)
+        
+    def _classify_addresses(self, addresses: List[str]):
+        """Фоновая проверка новых адресов на контракты"""
+        mode = self.contract_mode_combo.currentData()
+        if mode == MODE_OFF or not addresses:
+            return
+        
+        def worker():
+            try:
+                _, contracts = get_address_classifier().filter_recipients(addresses, MODE_FLAG)
+            except Exception as e:
+                logger.error(f"Ошибка проверки адресов на контракты: {e}")
+                self.classification_failed.emit(str(e))
+                return
+            self.contracts_classified.emit(contracts, mode)
+                
+        self.pending_classifications += 1
+        threading.Thread(target=worker, daemon=True, name="AddressClassifier").start()
+        self.log(f"[{self.slot_id}] Проверка {len(addresses)} адресов на контракты...", "INFO")
+        
+    @pyqtSlot(str)
+    def _on_classification_failed(self, error: str):
+        """Фоновая проверка не выполнена (в режиме drop рассылка проверит адреса сама)"""
+        self.pending_classifications = max(0, self.pending_classifications - 1)
+        self.log(f"[{self.slot_id}] Ошибка проверки адресов на контракты: {error}", "ERROR")
+        
+    @pyqtSlot(list, str)
+    def _on_contracts_classified(self, contracts: List[str], mode: str):
+        """Пометка или удаление адресов контрактов из списка"""
+        self.pending_classifications = max(0, self.pending_classifications - 1)
+        if not contracts:
+            self.log(f"[{self.slot_id}] Адресов контрактов не найдено", "SUCCESS")
+            return
+            
+        found = {address.lower() for address in contracts}
+        if mode == MODE_DROP and self.is_distributing:
+            # Во время рассылки строки таблицы не удаляются (индексы строк используются потоком),
+            # поток рассылки сам проверяет и пропускает контракты
+            mode = MODE_FLAG
+            
+        for row in range(self.addresses_table.rowCount() - 1, -1, -1):
+            item = self.addresses_table.item(row, 0)
+            if item is None or item.text().lower() not in found:
+                continue
+            if mode == MODE_DROP:
+                self.addresses_table.removeRow(row)
+            else:
+                item.setBackground(QColor('#663300'))
+                item.setToolTip("Адрес контракта")
+                
+        if mode == MODE_DROP:
+            self.addresses = [address for address in self.addresses if address.lower() not in found]
+            self.update_statistics()
+            self.log(f"[{self.slot_id}] Удалено {len(contracts)} адресов контрактов", "WARNING")
+        else:
+            self.log(f"[{self.slot_id}] Найдено {len(contracts)} адресов контрактов (помечены)", "WARNING")
         
     def clear_addresses(self):
         """Очистка списка адресов"""
@@ -524,6 +633,12 @@ class MassDistributionTab(BaseTab):
         if not self.account:
             self.log("Кошелек не подключен! Загрузите приватный ключ.", "ERROR")
             return
+        
+        # В режиме "Удалить" контракты должны быть убраны до первой отправки
+        drop_contracts = self.contract_mode_combo.currentData() == MODE_DROP
+        if drop_contracts and self.pending_classifications:
+            self.log("Дождитесь окончания проверки адресов на контракты", "WARNING")
+            return
             
         # Инициализируем сервисы если не созданы
         self._init_services()
@@ -544,17 +659,47 @@ class MassDistributionTab(BaseTab):
         self.stop_flag.clear()
         self.distribution_thread = threading.Thread(
             target=self._distribution_worker,
-            args=(token_type, token_address, amount, cycles, interval),
+            args=(token_type, token_address, amount, cycles, interval, drop_contracts),
             daemon=False  # Важно: не daemon поток
         )
         self.distribution_thread.start()
         
         
-    def _distribution_worker(self, token_type: str, token_address: str, amount: float, cycles: int, interval: int):
+    def _screen_contracts(self, screened: Dict[str, bool]) -> bool:
+        """
+        Проверка еще не проверенных адресов списка на контракты (режим drop)
+        
+        Args:
+            screened: Адрес в нижнем регистре -> контракт ли он (дополняется)
+            
+        Returns:
+            False - проверка не выполнена, рассылку нужно остановить
+        """
+        pending = [address for address in self.addresses if address.lower() not in screened]
+        try:
+            kinds = get_address_classifier().classify(pending)
+        except Exception as e:
+            self.log(f"[ERROR] Проверка адресов на контракты не выполнена: {e}. Рассылка остановлена", "ERROR")
+            return False
+        unknown = [address for address in pending if kinds.get(address.lower(), UNKNOWN) == UNKNOWN]
+        if unknown:
+            self.log(f"[ERROR] Не удалось проверить {len(unknown)} адресов на контракты. Рассылка остановлена",
+                     "ERROR")
+            return False
+        contracts = [address for address in pending if kinds[address.lower()] == CONTRACT]
+        screened.update((address.lower(), kinds[address.lower()] == CONTRACT) for address in pending)
+        if contracts:
+            self.contracts_classified.emit(contracts, MODE_FLAG)
+            self.log(f"[{self.slot_id}] {len(contracts)} адресов контрактов будут пропущены", "WARNING")
+        return True
+        
+    def _distribution_worker(self, token_type: str, token_address: str, amount: float, cycles: int, interval: int,
+                             drop_contracts: bool = False):
         """Основной рабочий поток массовой рассылки"""
         try:
             total_sent = 0
             total_errors = 0
+            screened: Dict[str, bool] = {}  # Режим drop: адрес -> контракт
             
             self.log(f"🔄 Начат рабочий поток массовой рассылки (Слот {self.slot_number})", "INFO")
             
@@ -575,6 +720,15 @@ class MassDistributionTab(BaseTab):
                         
                     if self.stop_flag.is_set():
                         break
+                    
+                    # Режим drop: адреса, добавленные позже, проверяются перед отправкой
+                    if drop_contracts:
+                        if address.lower() not in screened and not self._screen_contracts(screened):
+                            self.stop_flag.set()
+                            break
+                        if screened[address.lower()]:
+                            self.address_status_update.emit(i, "Пропущен: контракт")
+                            continue
                         
                     # Обновляем статус адреса
                     self.address_status_update.emit(i, "Отправка...")
@@ -828,14 +982,14 @@ class MassDistributionTab(BaseTab):
             
         try:
             # Проверяем и обновляем Web3 подключение
-            if not self.web3 or not self.web3.is_connected():
+            if not self.web3 or not balance_reader.is_connected(self.web3):
                 self.log("[WARN] Web3 не подключен, переподключаемся...", "WARNING")
                 self._init_web3()
             
             checksum_address = Web3.to_checksum_address(self.account.address)
             
-            # Получение баланса BNB
-            bnb_balance = self.web3.eth.get_balance(checksum_address)
+            # Получение баланса BNB (общий с другими вкладками в пределах блока)
+            bnb_balance = balance_reader.get_native_balance(self.web3, checksum_address)
             bnb_formatted = self.web3.from_wei(bnb_balance, 'ether')
             
             # Получение баланса PLEX ONE
@@ -843,15 +997,11 @@ class MassDistributionTab(BaseTab):
                 plex_checksum = Web3.to_checksum_address(CONTRACTS['PLEX_ONE'])
                 
                 # Проверяем что контракт существует
-                contract_code = self.web3.eth.get_code(plex_checksum)
-                if not contract_code or contract_code == b'':
+                if not balance_reader.has_code(self.web3, plex_checksum):
                     self.log(f"[ERROR] Контракт PLEX ONE не найден по адресу {plex_checksum}", "ERROR")
                     plex_formatted = 0
                 else:
-                    plex_contract = self.web3.eth.contract(address=plex_checksum, abi=ERC20_ABI)
-                    plex_balance = plex_contract.functions.balanceOf(checksum_address).call()
-                    plex_decimals = plex_contract.functions.decimals().call()
-                    plex_formatted = plex_balance / (10 ** plex_decimals)
+                    plex_formatted = balance_reader.get_token_balance(self.web3, plex_checksum, checksum_address)
             except Exception as e:
                 self.log(f"[ERROR] Ошибка получения PLEX ONE баланса: {str(e)}", "ERROR")
                 plex_formatted = 0
@@ -861,15 +1011,11 @@ class MassDistributionTab(BaseTab):
                 usdt_checksum = Web3.to_checksum_address(CONTRACTS['USDT'])
                 
                 # Проверяем что контракт существует
-                contract_code = self.web3.eth.get_code(usdt_checksum)
-                if not contract_code or contract_code == b'':
+                if not balance_reader.has_code(self.web3, usdt_checksum):
                     self.log(f"[ERROR] Контракт USDT не найден по адресу {usdt_checksum}", "ERROR")
                     usdt_formatted = 0
                 else:
-                    usdt_contract = self.web3.eth.contract(address=usdt_checksum, abi=ERC20_ABI)
-                    usdt_balance = usdt_contract.functions.balanceOf(checksum_address).call()
-                    usdt_decimals = usdt_contract.functions.decimals().call()
-                    usdt_formatted = usdt_balance / (10 ** usdt_decimals)
+                    usdt_formatted = balance_reader.get_token_balance(self.web3, usdt_checksum, checksum_address)
             except Exception as e:
                 self.log(f"[ERROR] Ошибка получения USDT баланса: {str(e)}", "ERROR")
                 usdt_formatted = 0
@@ -1007,7 +1153,7 @@ class MassDistributionTab(BaseTab):
             tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
             
             # Ждем подтверждения
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            tx_receipt = self.wait_receipt(tx_hash, timeout=60)
             
             if tx_receipt['status'] == 1:
                 # Увеличиваем nonce после успешной отправки
@@ -1067,7 +1213,7 @@ class MassDistributionTab(BaseTab):
             tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
             
             # Ждем подтверждения
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            tx_receipt = self.wait_receipt(tx_hash, timeout=60)
             
             if tx_receipt['status'] == 1:
                 # Увеличиваем nonce после успешной отправки
@@ -20,7 +20,7 @@ from PyQt5.QtCore import pyqtSignal, pyqtSlot, Qt, QTimer
 from PyQt5.QtGui import QColor
 
 from .base_tab import BaseTab
-from ...database.database import Database
+from ...database.database import get_database
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -60,7 +60,7 @@ class QueueTab(BaseTab):
         super().__init__(main_window, parent)
         
         # Инициализация
-        self.database = Database()
+        self.database = get_database()
         self.task_queue = []
         self.current_task = None
         self.is_processing = False
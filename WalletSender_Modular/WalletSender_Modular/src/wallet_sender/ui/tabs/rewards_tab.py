@@ -26,7 +26,7 @@ from ...core.wallet_manager import WalletManager
 from ...services.token_service import TokenService
 from ...services.job_router import get_job_router
 from ...constants import PLEX_CONTRACT, USDT_CONTRACT
-from ...database.database import Database
+from ...database.database import get_database
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -47,7 +47,7 @@ class RewardsTab(BaseTab):
         self.wallet_manager = None
         self.wallet_sender = None
         self.token_service = None
-        self.database = Database()
+        self.database = get_database()
         self.job_router = get_job_router()
         self.current_job_id = None
         self.current_job_tag = None
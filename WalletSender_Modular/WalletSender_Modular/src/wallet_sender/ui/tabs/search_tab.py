@@ -26,6 +26,7 @@ from .base_tab import BaseTab
 from ...constants import PLEX_CONTRACT, USDT_CONTRACT, BSCSCAN_URL, BSCSCAN_KEYS
 from ...services import get_bscscan_service
 from ...utils.logger import get_logger
+from ...utils.tx_columns import TxColumns, INCOMING, OUTGOING, day_bounds
 
 logger = get_logger(__name__)
 
@@ -47,6 +48,9 @@ class SearchTab(BaseTab):
         self.stop_search_event = threading.Event()
         self.search_thread = None
         self.search_results = []
+        # Загруженные транзакции в колоночном виде: повторная фильтрация без запросов к API
+        self.tx_columns = TxColumns()
+        self.search_address = ''
         self.current_search_future: Optional[Future] = None
         
         # Получаем глобальный BscScanService
@@ -352,6 +356,11 @@ class SearchTab(BaseTab):
         extra_layout.addWidget(self.min_tx_count)
         
         extra_layout.addStretch()
+        
+        self.refilter_btn = QPushButton("Применить фильтры")
+        self.refilter_btn.setToolTip("Отфильтровать уже загруженные транзакции без повторного поиска")
+        self.refilter_btn.clicked.connect(self.refilter_results)
+        extra_layout.addWidget(self.refilter_btn)
         layout.addLayout(extra_layout)
         
         return group
@@ -376,6 +385,8 @@ class SearchTab(BaseTab):
         self.is_searching = True
         self.stop_search_event.clear()
         self.search_results.clear()
+        self.tx_columns = TxColumns()
+        self.search_address = address
         
         # Обновление UI
         self.search_btn.setEnabled(False)
@@ -403,7 +414,7 @@ class SearchTab(BaseTab):
         """Запуск асинхронного поиска"""
         # Получаем параметры
         token_filter = self._get_token_filter()
-        direction = self.direction_combo.currentText()
+        filters = self._filter_settings()
         max_pages = self.max_pages.value()
         page_size = self.page_size.value()
         delay = self.delay.value()
@@ -446,13 +457,9 @@ class SearchTab(BaseTab):
                 
                 self._log_to_search(f"Получено {len(transactions)} транзакций от API")
                 
-                # Применяем дополнительные фильтры
-                filtered = self._filter_transactions(transactions, address, direction)
-                
-                # Применяем расширенные фильтры
-                final_results = self._apply_filters(filtered)
-                
-                return final_results
+                # Разбор в колонки и векторная фильтрация
+                self.tx_columns.extend(transactions)
+                return self._apply_filters(address, filters)
                 
             except asyncio.CancelledError:
                 self._log_to_search("Поиск отменен")
@@ -463,7 +470,7 @@ class SearchTab(BaseTab):
                 
                 # Fallback на пагинацию
                 return await self._search_with_pagination_async(
-                    address, token_filter, direction, 
+                    address, token_filter, filters, 
                     max_pages, page_size, delay
                 )
         
@@ -475,10 +482,10 @@ class SearchTab(BaseTab):
         )
     
     async def _search_with_pagination_async(self, address: str, token_filter: Optional[str], 
-                                           direction: str, max_pages: int, 
+                                           filters: Dict[str, Any], max_pages: int, 
                                            page_size: int, delay: float):
         """Асинхронный поиск с пагинацией"""
-        all_transactions = []
+        self.tx_columns = TxColumns()
         
         for page in range(1, max_pages + 1):
             if self.stop_search_event.is_set():
@@ -503,11 +510,11 @@ class SearchTab(BaseTab):
                     self._log_to_search("Больше транзакций не найдено")
                     break
                 
-                # Фильтруем транзакции
-                filtered = self._filter_transactions(transactions, address, direction)
-                all_transactions.extend(filtered)
+                # Страница разбирается в колонки один раз, фильтруются только новые строки
+                start = self.tx_columns.extend(transactions)
+                found = len(self.tx_columns.filter_indices(**self._row_predicates(address, filters), start=start))
                 
-                self._log_to_search(f"Страница {page}: найдено {len(filtered)} транзакций")
+                self._log_to_search(f"Страница {page}: найдено {found} транзакций")
                 
             except Exception as e:
                 logger.error(f"Ошибка на странице {page}: {e}")
@@ -517,7 +524,7 @@ class SearchTab(BaseTab):
             await asyncio.sleep(delay)
         
         # Применяем дополнительные фильтры
-        return self._apply_filters(all_transactions)
+        return self._apply_filters(address, filters)
     
     def _on_search_complete(self, results: List[Dict]):
         """Обработка успешного завершения поиска"""
@@ -543,78 +550,69 @@ class SearchTab(BaseTab):
             return self.custom_token_input.text().strip()
         return None
         
-    def _filter_transactions(self, transactions: List[Dict], address: str, direction: str) -> List[Dict]:
-        """Фильтрация транзакций по направлению"""
-        filtered = []
-        
-        for tx in transactions:
-            # Проверяем направление
-            if direction == "Входящие" and tx.get('to', '').lower() != address.lower():
-                continue
-            elif direction == "Исходящие" and tx.get('from', '').lower() != address.lower():
-                continue
-                
-            # Проверяем статус
-            if self.only_success.isChecked():
-                if tx.get('isError', '0') != '0' or tx.get('txreceipt_status', '1') != '1':
-                    continue
-                    
-            filtered.append(tx)
-            
-        return filtered
-        
-    def _apply_filters(self, transactions: List[Dict]) -> List[Dict]:
-        """Применение дополнительных фильтров"""
-        filtered = transactions.copy()
-        
-        # Фильтр по сумме
+    def _filter_settings(self) -> Dict[str, Any]:
+        """Снимок значений фильтров (читается в UI потоке)"""
+        direction = self.direction_combo.currentText()
+        settings = {
+            'direction': INCOMING if direction == "Входящие" else OUTGOING if direction == "Исходящие" else None,
+            'only_success': self.only_success.isChecked(),
+            'amount_min': None,
+            'amount_max': None,
+            'date_from': None,
+            'date_to': None,
+            'unique_senders': self.unique_senders.isChecked(),
+            'min_tx_per_sender': self.min_tx_count.value() if self.min_tx_check.isChecked() else 0,
+        }
         if self.amount_filter_check.isChecked():
-            min_val = self.min_amount.value()
-            max_val = self.max_amount.value()
-            
-            filtered = [
-                tx for tx in filtered
-                if min_val <= self._get_tx_value(tx) <= max_val
-            ]
-            
-        # Фильтр по дате
+            settings['amount_min'] = self.min_amount.value()
+            settings['amount_max'] = self.max_amount.value()
         if self.date_filter_check.isChecked():
-            date_from = self.date_from.date().toPyDate()
-            date_to = self.date_to.date().toPyDate()
-            
-            filtered = [
-                tx for tx in filtered
-                if self._check_tx_date(tx, date_from, date_to)
-            ]
-            
-        # Уникальные отправители
-        if self.unique_senders.isChecked():
-            seen_senders = set()
-            unique_filtered = []
-            
-            for tx in filtered:
-                sender = tx.get('from', '').lower()
-                if sender not in seen_senders:
-                    seen_senders.add(sender)
-                    unique_filtered.append(tx)
-                    
-            filtered = unique_filtered
-            
-        # Минимум транзакций от отправителя
-        if self.min_tx_check.isChecked():
-            min_count = self.min_tx_count.value()
-            sender_counts = {}
-            
-            for tx in filtered:
-                sender = tx.get('from', '').lower()
-                sender_counts[sender] = sender_counts.get(sender, 0) + 1
-                
-            filtered = [
-                tx for tx in filtered
-                if sender_counts.get(tx.get('from', '').lower(), 0) >= min_count
-            ]
+            settings['date_from'] = self.date_from.date().toPyDate()
+            settings['date_to'] = self.date_to.date().toPyDate()
+        return settings
+        
+    @staticmethod
+    def _row_predicates(address: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Построчные предикаты TxColumns.mask() из снимка фильтров"""
+        ts_from, ts_to = day_bounds(filters['date_from'], filters['date_to'])
+        return {
+            'direction': filters['direction'],
+            'address': address,
+            'only_success': filters['only_success'],
+            'amount_min': filters['amount_min'],
+            'amount_max': filters['amount_max'],
+            'ts_from': ts_from,
+            'ts_to': ts_to,
+        }
+        
+    def _apply_filters(self, address: str, filters: Dict[str, Any]) -> List[Dict]:
+        """Применение всех фильтров к загруженным транзакциям"""
+        indices = self.tx_columns.filter_indices(
+            unique_senders=filters['unique_senders'],
+            min_tx_per_sender=filters['min_tx_per_sender'],
+            **self._row_predicates(address, filters)
+        )
+        return self.tx_columns.rows(indices)
+        
+    def refilter_results(self):
+        """Повторная фильтрация загруженных транзакций без запросов к API"""
+        if self.is_searching:
+            QMessageBox.warning(self, "Предупреждение", "Дождитесь завершения поиска!")
+            return
+        if not len(self.tx_columns):
+            QMessageBox.information(self, "Информация", "Нет загруженных транзакций. Выполните поиск.")
+            return
             
-        return filtered
+        started = time.perf_counter()
+        results = self._apply_filters(self.search_address, self._filter_settings())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        self.search_results = results
+        self._update_results_table(results)
+        self.status_label.setText(f"Найдено: {len(results)} из {len(self.tx_columns)}")
+        self._log_to_search(
+            f"Фильтры применены к {len(self.tx_columns)} транзакциям за {elapsed_ms:.1f} мс: {len(results)}"
+        )
         
     def _get_tx_value(self, tx: Dict) -> float:
         """Получение суммы транзакции"""
@@ -625,15 +623,6 @@ class SearchTab(BaseTab):
         except:
             return 0
             
-    def _check_tx_date(self, tx: Dict, date_from, date_to) -> bool:
-        """Проверка даты транзакции"""
-        try:
-            timestamp = int(tx.get('timeStamp', 0))
-            tx_date = datetime.fromtimestamp(timestamp).date()
-            return date_from <= tx_date <= date_to
-        except:
-            return False
-            
     def _log_to_search(self, message: str):
         """Логирование в поле поиска"""
         QTimer.singleShot(0, lambda: self.search_log.append(message))
@@ -762,6 +751,7 @@ class SearchTab(BaseTab):
         """Очистка результатов"""
         self.results_table.setRowCount(0)
         self.search_results.clear()
+        self.tx_columns = TxColumns()
         self.search_log.clear()
         self.progress_bar.setValue(0)
         self.status_label.setText("Готов к поиску")
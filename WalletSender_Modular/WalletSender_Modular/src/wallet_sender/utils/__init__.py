@@ -1,21 +1,37 @@
 """
 Utils package for WalletSender
+
+Импорт пакета не загружает модули: имена из __all__ подгружаются при первом
+обращении. Поэтому main.py может подключить профилировщик импортов из
+wallet_sender.utils.startup_timing до logger_enhanced, asyncio и остальных.
 """
 
-from .logger import get_logger
-from .logger_enhanced import (
-    EnhancedLogger,
-    set_ui_log_handler,
-    log_action,
-    log_click,
-    log_input_change,
-    log_tab_change,
-    log_window_action,
-    log_network_action,
-    log_transaction,
-    log_file_operation,
-    log_settings_change
-)
+import importlib
+
+_EXPORTS = {
+    'get_logger': '.logger',
+    'EnhancedLogger': '.logger_enhanced',
+    'set_ui_log_handler': '.logger_enhanced',
+    'log_action': '.logger_enhanced',
+    'log_click': '.logger_enhanced',
+    'log_input_change': '.logger_enhanced',
+    'log_tab_change': '.logger_enhanced',
+    'log_window_action': '.logger_enhanced',
+    'log_network_action': '.logger_enhanced',
+    'log_transaction': '.logger_enhanced',
+    'log_file_operation': '.logger_enhanced',
+    'log_settings_change': '.logger_enhanced',
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'get_logger',
@@ -0,0 +1,291 @@
+"""
+Массовая классификация адресов получателей: EOA или контракт
+
+Перед рассылкой из списков нужно убирать адреса контрактов (токены, пулы,
+мультисиги), иначе переводы уходят туда, откуда их не вернуть. Проверка
+выполняется пакетными JSON-RPC запросами eth_getCode (batch_size вызовов
+в одном HTTP запросе, несколько пакетов параллельно), а результаты
+сохраняются в SQLite по адресу. Повторный импорт того же списка
+обращается к RPC только за новыми адресами.
+
+Вердикт "контракт" не устаревает, вердикт "EOA" перепроверяется после
+eoa_ttl секунд: по адресу EOA позже может появиться код (CREATE2,
+делегирование EIP-7702).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+EOA = 'eoa'
+CONTRACT = 'contract'
+UNKNOWN = 'unknown'
+
+# Режимы обработки контрактов в списке получателей
+MODE_DROP = 'drop'
+MODE_FLAG = 'flag'
+MODE_OFF = 'off'
+
+# Лимит параметров одного SQL запроса SQLite
+_SQL_CHUNK = 900
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class AddressClassifier:
+    """Пакетная проверка наличия кода по адресам с постоянным кешем"""
+
+    def __init__(self, rpc_url: Optional[str] = None, db_path: Optional[str] = None,
+                 batch_size: int = 200, workers: int = 4, eoa_ttl: float = 86400,
+                 timeout: int = 30, transport: Optional[Callable[[List[dict]], object]] = None):
+        """
+        Args:
+            rpc_url: JSON-RPC endpoint (по умолчанию - из конфига)
+            db_path: Файл SQLite с результатами
+            batch_size: Вызовов eth_getCode в одном HTTP запросе
+            workers: Параллельных HTTP запросов
+            eoa_ttl: Срок действия вердикта EOA (секунды)
+            timeout: Таймаут HTTP запроса
+            transport: Отправка JSON-RPC запроса (список вызовов -> ответ);
+                по умолчанию HTTP POST через requests
+        """
+        if not rpc_url:
+            from ..config import get_config
+            rpc_url = get_config().get_rpc_url()
+        if not db_path:
+            db_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'address_kinds.db')
+
+        self.rpc_url = rpc_url
+        self.db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.workers = max(1, int(workers))
+        self.eoa_ttl = eoa_ttl
+        self.timeout = timeout
+        self.transport = transport or self._http_transport
+        self._session = None
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS address_kinds (
+                address TEXT PRIMARY KEY,
+                is_contract INTEGER NOT NULL,
+                checked_at REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        self.conn.commit()
+
+        # Статистика
+        self.cache_hits = 0
+        self.rpc_checks = 0
+        self.rpc_errors = 0
+
+    def _http_transport(self, payload: List[dict]) -> object:
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        response = self._session.post(self.rpc_url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _cached(self, addresses: List[str]) -> Dict[str, str]:
+        """Действующие вердикты из SQLite"""
+        known: Dict[str, str] = {}
+        eoa_since = time.time() - self.eoa_ttl
+        with self.lock:
+            for chunk in _chunks(addresses, _SQL_CHUNK):
+                rows = self.conn.execute(
+                    f"SELECT address, is_contract, checked_at FROM address_kinds "
+                    f"WHERE address IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for address, is_contract, checked_at in rows:
+                    if is_contract:
+                        known[address] = CONTRACT
+                    elif checked_at >= eoa_since:
+                        known[address] = EOA
+        return known
+
+    def _store(self, verdicts: Dict[str, str]):
+        now = time.time()
+        rows = [(address, 1 if kind == CONTRACT else 0, now)
+                for address, kind in verdicts.items() if kind != UNKNOWN]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO address_kinds (address, is_contract, checked_at) VALUES (?, ?, ?)',
+                rows
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def _verdict(result: Optional[dict]) -> str:
+        if not isinstance(result, dict) or 'result' not in result:
+            return UNKNOWN
+        code = result['result'] or '0x'
+        return CONTRACT if code not in ('0x', '0x0') else EOA
+
+    def _check_batch(self, batch: List[str]) -> Dict[str, str]:
+        """Один пакет eth_getCode; при отказе endpoint от пакетов - по одному вызову"""
+        payload = [
+            {'jsonrpc': '2.0', 'id': i, 'method': 'eth_getCode', 'params': [address, 'latest']}
+            for i, address in enumerate(batch)
+        ]
+        verdicts = {address: UNKNOWN for address in batch}
+        try:
+            response = self.transport(payload)
+            if isinstance(response, list):
+                for item in response:
+                    index = item.get('id') if isinstance(item, dict) else None
+                    if isinstance(index, int) and 0 <= index < len(batch):
+                        verdicts[batch[index]] = self._verdict(item)
+            else:
+                # Endpoint не поддерживает batch запросы
+                for call, address in zip(payload, batch):
+                    try:
+                        verdicts[address] = self._verdict(self.transport(call))
+                    except Exception as e:
+                        logger.debug(f"eth_getCode {address}: {e}")
+        except Exception as e:
+            logger.warning(f"Ошибка пакета eth_getCode ({len(batch)} адресов): {e}")
+
+        unknown = sum(1 for kind in verdicts.values() if kind == UNKNOWN)
+        with self.lock:
+            self.rpc_checks += len(batch) - unknown
+            self.rpc_errors += unknown
+        self._store(verdicts)
+        return verdicts
+
+    def classify(self, addresses: Iterable[str],
+                 progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, str]:
+        """
+        Классификация адресов
+
+        Args:
+            addresses: Адреса (регистр не важен)
+            progress: Обратный вызов (проверено, всего) по мере проверки через RPC
+
+        Returns:
+            Словарь адрес в нижнем регистре -> EOA, CONTRACT или UNKNOWN (ошибка RPC)
+        """
+        unique = list(dict.fromkeys(address.lower() for address in addresses if address))
+        result = self._cached(unique)
+        self.cache_hits += len(result)
+
+        missing = [address for address in unique if address not in result]
+        if missing:
+            started = time.time()
+            done = 0
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="AddrClassify") as pool:
+                for verdicts in pool.map(self._check_batch, _chunks(missing, self.batch_size)):
+                    result.update(verdicts)
+                    done += len(verdicts)
+                    if progress:
+                        progress(done, len(missing))
+            logger.info(
+                f"Классифицировано {len(missing)} адресов через RPC за {time.time() - started:.1f} с "
+                f"({len(unique) - len(missing)} из кеша)"
+            )
+        return result
+
+    def filter_recipients(self, addresses: List[str], mode: str = MODE_DROP,
+                          progress: Optional[Callable[[int, int], None]] = None) -> Tuple[List[str], List[str]]:
+        """
+        Этап импорта списка получателей
+
+        Args:
+            addresses: Список получателей
+            mode: MODE_DROP - убрать контракты, MODE_FLAG - только найти, MODE_OFF - не проверять
+            progress: Обратный вызов прогресса
+
+        Returns:
+            (получатели, найденные контракты); адреса с ошибкой проверки остаются в получателях
+        """
+        if mode == MODE_OFF or not addresses:
+            return list(addresses), []
+        kinds = self.classify(addresses, progress)
+        contracts = [address for address in addresses if kinds.get(address.lower()) == CONTRACT]
+        if mode == MODE_DROP and contracts:
+            dropped = {address.lower() for address in contracts}
+            addresses = [address for address in addresses if address.lower() not in dropped]
+        unknown = sum(1 for kind in kinds.values() if kind == UNKNOWN)
+        if unknown:
+            logger.warning(f"Не удалось проверить {unknown} адресов, они оставлены в списке")
+        return list(addresses), contracts
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            stored = self.conn.execute('SELECT COUNT(*) FROM address_kinds').fetchone()[0]
+        return {
+            'stored': stored,
+            'cache_hits': self.cache_hits,
+            'rpc_checks': self.rpc_checks,
+            'rpc_errors': self.rpc_errors,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+# Глобальный экземпляр
+_address_classifier: Optional[AddressClassifier] = None
+_address_classifier_lock = threading.Lock()
+
+
+def get_address_classifier() -> AddressClassifier:
+    """Получение глобального классификатора (настройки из секции "address_classifier" конфига)"""
+    global _address_classifier
+
+    if _address_classifier is None:
+        with _address_classifier_lock:
+            if _address_classifier is None:
+                settings = {}
+                try:
+                    from ..config import get_config
+                    settings = get_config().get('address_classifier', {}) or {}
+                except Exception:
+                    pass
+                _address_classifier = AddressClassifier(
+                    rpc_url=settings.get('rpc_url') or None,
+                    db_path=settings.get('db_path') or None,
+                    batch_size=settings.get('batch_size', 200),
+                    workers=settings.get('workers', 4),
+                    eoa_ttl=settings.get('eoa_ttl', 86400)
+                )
+
+    return _address_classifier
+
+
+def get_contract_mode() -> str:
+    """Режим обработки контрактов по умолчанию из конфига"""
+    try:
+        from ..config import get_config
+        mode = get_config().get('address_classifier.mode', MODE_FLAG)
+    except Exception:
+        mode = MODE_FLAG
+    return mode if mode in (MODE_DROP, MODE_FLAG, MODE_OFF) else MODE_FLAG
+
+
+def close_address_classifier():
+    """Закрытие глобального классификатора"""
+    global _address_classifier
+    if _address_classifier:
+        _address_classifier.close()
+        _address_classifier = None
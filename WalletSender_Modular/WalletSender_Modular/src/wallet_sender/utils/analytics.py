@@ -2,6 +2,7 @@
 Система аналитики и отчетности
 """
 
+import os
 import time
 import json
 import sqlite3
@@ -11,6 +12,9 @@ from datetime import datetime, timedelta
 from enum import Enum
 import threading
 
+from .cache_manager import get_cache
+from .storage import get_storage
+
 class OperationType(Enum):
     """Типы операций"""
     BUY = "buy"
@@ -61,19 +65,34 @@ class PerformanceMetrics:
 class AnalyticsManager:
     """Менеджер аналитики"""
     
-    def __init__(self, db_path: str = "analytics.db"):
-        self.db_path = db_path
+    # Прежний отдельный файл аналитики (относительно рабочего каталога)
+    LEGACY_PATH = "analytics.db"
+    
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Args:
+            db_path: Отдельный файл базы (по умолчанию - общий движок хранения)
+        """
+        self.storage = get_storage() if db_path is None else None
+        self.db_path = self.storage.path if self.storage is not None else db_path
         self._lock = threading.RLock()
         self._init_database()
+        if self.storage is not None:
+            self.storage.import_legacy(self.LEGACY_PATH,
+                                       ['operations', 'token_prices', 'performance_metrics'])
         
-        # Кеш для быстрого доступа
-        self._cache = {}
-        self._cache_ttl = 60.0  # 1 минута
-        self._last_cache_update = 0
+        # Кеш для быстрого доступа (пространство имен 'analytics' общего кеша)
+        self._cache_prefix = f"{os.path.abspath(self.db_path)}:"
+    
+    def _connect(self):
+        """Соединение с общим хранилищем или с отдельным файлом db_path"""
+        if self.storage is not None:
+            return self.storage.connection()
+        return sqlite3.connect(self.db_path)
     
     def _init_database(self):
         """Инициализирует базу данных"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # Таблица операций
@@ -129,7 +148,7 @@ class AnalyticsManager:
     def record_operation(self, operation: Operation) -> None:
         """Записывает операцию в базу данных"""
         with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -158,10 +177,33 @@ class AnalyticsManager:
             # Инвалидируем кеш
             self._invalidate_cache()
     
+    def apply_operation_rows(self, inserts: List[tuple], updates: List[tuple]) -> None:
+        """
+        Пакетная запись операций одной транзакцией (проекция журнала транзакций)
+        
+        Args:
+            inserts: Строки operations в порядке колонок таблицы
+            updates: Кортежи (status, gas_used, error_message, id)
+        """
+        with self._lock:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO operations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', inserts)
+                cursor.executemany('''
+                    UPDATE operations SET status = ?, gas_used = COALESCE(?, gas_used),
+                        error_message = COALESCE(?, error_message)
+                    WHERE id = ?
+                ''', updates)
+                conn.commit()
+            
+            self._invalidate_cache()
+    
     def record_token_price(self, token_address: str, price_usd: float) -> None:
         """Записывает цену токена"""
         with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -177,7 +219,7 @@ class AnalyticsManager:
                       limit: int = 1000) -> List[Operation]:
         """Получает операции по фильтрам"""
         with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 query = "SELECT * FROM operations WHERE 1=1"
@@ -234,14 +276,15 @@ class AnalyticsManager:
         cache_key = f"metrics_{days}"
         
         # Проверяем кеш
-        if self._is_cache_valid(cache_key):
-            return self._cache[cache_key]
+        cached = get_cache().get('analytics', self._cache_prefix + cache_key)
+        if cached is not None:
+            return cached
         
         with self._lock:
             end_time = time.time()
             start_time = end_time - (days * 24 * 3600)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Общее количество операций
@@ -299,8 +342,7 @@ class AnalyticsManager:
                 )
                 
                 # Кешируем результат
-                self._cache[cache_key] = metrics
-                self._last_cache_update = time.time()
+                get_cache().set('analytics', self._cache_prefix + cache_key, metrics)
                 
                 return metrics
     
@@ -310,7 +352,7 @@ class AnalyticsManager:
             end_time = time.time()
             start_time = end_time - (days * 24 * 3600)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Операции с токеном
@@ -356,7 +398,7 @@ class AnalyticsManager:
             start_time = datetime.strptime(date, "%Y-%m-%d").timestamp()
             end_time = start_time + 24 * 3600
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Операции за день
@@ -432,22 +474,39 @@ class AnalyticsManager:
         else:
             raise ValueError(f"Неподдерживаемый формат: {format}")
     
-    def _is_cache_valid(self, key: str) -> bool:
-        """Проверяет валидность кеша"""
-        return (key in self._cache and 
-                time.time() - self._last_cache_update < self._cache_ttl)
+    def export_to_file(self, output_path: str, start_time: Optional[float] = None,
+                       end_time: Optional[float] = None, fmt: Optional[str] = None) -> int:
+        """
+        Потоковый экспорт операций в CSV/Parquet/Arrow без загрузки в память
+        
+        Returns:
+            Количество выгруженных операций
+        """
+        from .export import export_table
+        
+        conditions = []
+        params = []
+        if start_time:
+            conditions.append("timestamp >= ?")
+            params.append(start_time)
+        if end_time:
+            conditions.append("timestamp <= ?")
+            params.append(end_time)
+        
+        return export_table(self.db_path, 'operations', output_path, fmt=fmt,
+                            where=' AND '.join(conditions) or None, params=params)
     
     def _invalidate_cache(self):
         """Инвалидирует кеш"""
-        self._cache.clear()
-        self._last_cache_update = 0
+        prefix = self._cache_prefix
+        get_cache().invalidate_where('analytics', lambda key: key.startswith(prefix))
     
     def cleanup_old_data(self, days_to_keep: int = 90):
         """Очищает старые данные"""
         with self._lock:
             cutoff_time = time.time() - (days_to_keep * 24 * 3600)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Удаляем старые операции
@@ -202,7 +202,8 @@ class BlockchainAsyncManager:
         task_id = f"balance_{address}_{int(time.time())}"
         
         def get_balance():
-            return self.web3.eth.get_balance(address)
+            from .balance_reader import get_native_balance
+            return get_native_balance(self.web3, address)
         
         return self.async_manager.submit_task(
             task_id=task_id,
@@ -216,27 +217,10 @@ class BlockchainAsyncManager:
         task_id = f"token_balance_{token_address}_{wallet_address}_{int(time.time())}"
         
         def get_token_balance():
-            from .cache_manager import token_cache
-            
-            # Проверяем кеш
-            cached_balance = token_cache.get_token_balance(token_address, wallet_address)
-            if cached_balance is not None:
-                return cached_balance
-            
-            # Получаем баланс из блокчейна
-            contract = self.web3.eth.contract(
-                address=token_address,
-                abi=[{"constant": True, "inputs": [{"name": "_owner", "type": "address"}], "name": "balanceOf", "outputs": [{"name": "balance", "type": "uint256"}], "type": "function"}]
-            )
-            
-            balance_wei = contract.functions.balanceOf(wallet_address).call()
-            decimals = contract.functions.decimals().call()
-            balance = balance_wei / (10 ** decimals)
-            
-            # Сохраняем в кеш
-            token_cache.set_token_balance(token_address, wallet_address, balance)
+            from .balance_reader import get_token_balance
             
-            return balance
+            # Одинаковые запросы в пределах блока выполняют один RPC вызов
+            return get_token_balance(self.web3, token_address, wallet_address)
         
         return self.async_manager.submit_task(
             task_id=task_id,
@@ -248,14 +232,7 @@ class BlockchainAsyncManager:
         """Асинхронно получает информацию о токене"""
         task_id = f"token_info_{token_address}_{int(time.time())}"
         
-        def get_token_info():
-            from .cache_manager import token_cache
-            
-            # Проверяем кеш
-            cached_info = token_cache.get_token_info(token_address)
-            if cached_info is not None:
-                return cached_info
-            
+        def load_token_info():
             # Получаем информацию из блокчейна
             contract = self.web3.eth.contract(
                 address=token_address,
@@ -274,11 +251,14 @@ class BlockchainAsyncManager:
                 'total_supply': contract.functions.totalSupply().call()
             }
             
-            # Сохраняем в кеш
-            token_cache.set_token_info(token_address, info)
-            
             return info
         
+        def get_token_info():
+            from .cache_manager import get_cache
+            
+            # Одновременные запросы одного токена объединяются
+            return get_cache().get_or_load('token_info', token_address.lower(), load_token_info)
+        
         return self.async_manager.submit_task(
             task_id=task_id,
             func=get_token_info,
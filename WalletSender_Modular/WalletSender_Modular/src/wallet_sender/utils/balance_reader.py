@@ -0,0 +1,121 @@
+"""
+Объединение чтений балансов и данных токенов
+
+Несколько вкладок и таймеров одновременно запрашивают одни и те же балансы.
+Чтения идут через общий кеш (get_cache().get_or_load): одновременные
+одинаковые запросы выполняют один RPC вызов, а результат переиспользуется в
+пределах одного блока - ключ баланса включает номер блока, поэтому с новым
+блоком значение перечитывается. Номер блока запрашивается не чаще раза в
+секунду на endpoint (TTL пространства имен block_number).
+
+Неизменяемые данные (decimals, наличие кода контракта) кешируются надолго.
+"""
+
+from typing import Any, Optional
+
+from .cache_manager import get_cache
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Минимальный ABI для чтения балансов
+BALANCE_ABI = [
+    {"constant": True, "inputs": [{"name": "_owner", "type": "address"}], "name": "balanceOf",
+     "outputs": [{"name": "balance", "type": "uint256"}], "type": "function"},
+    {"constant": True, "inputs": [], "name": "decimals",
+     "outputs": [{"name": "", "type": "uint8"}], "type": "function"},
+]
+
+NATIVE = 'native'
+
+
+def _endpoint_key(web3) -> str:
+    """Ключ RPC endpoint (разные узлы могут быть на разной высоте)"""
+    provider = getattr(web3, 'provider', None)
+    endpoint = getattr(provider, 'endpoint_uri', None)
+    return str(endpoint) if endpoint else f'w3:{id(web3)}'
+
+
+def get_block_number(web3) -> int:
+    """Номер последнего блока (один запрос на endpoint за окно свежести)"""
+    return get_cache().get_or_load('block_number', _endpoint_key(web3),
+                                   lambda: web3.eth.block_number)
+
+
+def is_connected(web3) -> bool:
+    """Проверка подключения через общий запрос номера блока"""
+    try:
+        get_block_number(web3)
+        return True
+    except Exception as e:
+        logger.debug(f"Нет ответа от RPC: {e}")
+        return False
+
+
+def _balance_key(web3, token: str, owner: str) -> str:
+    return f'{_endpoint_key(web3)}|{get_block_number(web3)}|{token.lower()}|{owner.lower()}'
+
+
+def get_native_balance(web3, owner: str) -> int:
+    """Баланс BNB в wei"""
+    owner = web3.to_checksum_address(owner)
+    return get_cache().get_or_load('balance', _balance_key(web3, NATIVE, owner),
+                                   lambda: web3.eth.get_balance(owner))
+
+
+def _contract(web3, token: str, abi: Optional[Any] = None):
+    return web3.eth.contract(address=web3.to_checksum_address(token), abi=abi or BALANCE_ABI)
+
+
+def get_token_decimals(web3, token: str) -> int:
+    """Decimals токена (кешируются надолго, в том числе на диске)"""
+    return get_cache().get_or_load('token_decimals', token.lower(),
+                                   lambda: int(_contract(web3, token).functions.decimals().call()))
+
+
+def get_token_balance_raw(web3, token: str, owner: str) -> int:
+    """Баланс токена в минимальных единицах"""
+    owner = web3.to_checksum_address(owner)
+    return get_cache().get_or_load(
+        'balance', _balance_key(web3, token, owner),
+        lambda: _contract(web3, token).functions.balanceOf(owner).call()
+    )
+
+
+def get_token_balance(web3, token: str, owner: str, default_decimals: Optional[int] = None) -> float:
+    """
+    Баланс токена в единицах токена
+
+    Args:
+        web3: Экземпляр Web3
+        token: Адрес контракта токена
+        owner: Адрес кошелька
+        default_decimals: Значение при ошибке чтения decimals (None - пробросить ошибку)
+    """
+    try:
+        decimals = get_token_decimals(web3, token)
+    except Exception:
+        if default_decimals is None:
+            raise
+        decimals = default_decimals
+    return get_token_balance_raw(web3, token, owner) / (10 ** decimals)
+
+
+def has_code(web3, address: str) -> bool:
+    """Есть ли у адреса код контракта (кешируются только найденные контракты)"""
+    address = web3.to_checksum_address(address)
+    found = get_cache().get_or_load('contract_code', address.lower(),
+                                    lambda: True if len(web3.eth.get_code(address)) > 0 else None)
+    return bool(found)
+
+
+def invalidate_balances(owner: str) -> int:
+    """
+    Сброс закешированных балансов адреса (после собственной отправки)
+
+    Returns:
+        Количество удаленных записей
+    """
+    suffix = f'|{owner.lower()}'
+    return get_cache().invalidate_where('balance', lambda key: key.endswith(suffix))
@@ -1,185 +1,597 @@
 """
 Менеджер кеширования для оптимизации запросов к блокчейну
+
+Единый многоуровневый кеш: ограниченный LRU в памяти на каждое пространство
+имен (namespace) с собственным TTL, опциональный дисковый уровень (SQLite) и
+объединение одновременных промахов (single-flight) - при N параллельных
+запросах одного ключа загрузка выполняется один раз. Устаревшие записи
+удаляются лениво при обращении, фоновое сканирование не нужно.
 """
 
+import os
+import json
 import time
+import sqlite3
 import threading
-from typing import Dict, Any, Optional, Tuple
-from dataclasses import dataclass
-from collections import defaultdict
+import itertools
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+_MISSING = object()
+
+# Номера безымянных пространств CacheManager (id() объекта переиспользуется после GC)
+_anonymous_namespaces = itertools.count(1)
+
 
 @dataclass
-class CacheEntry:
-    """Запись в кеше"""
-    value: Any
-    timestamp: float
-    ttl: float  # Time to live в секундах
+class NamespaceConfig:
+    """Настройки пространства имен кеша"""
+    ttl: float = 30.0
+    max_size: int = 1000
+    disk: bool = False
+
+
+@dataclass
+class NamespaceStats:
+    """Метрики пространства имен"""
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    load_errors: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+# Пространства имен по умолчанию (переопределяются секцией "cache" конфига)
+DEFAULT_NAMESPACES: Dict[str, NamespaceConfig] = {
+    'block_number': NamespaceConfig(ttl=1.0, max_size=64),
+    'balance': NamespaceConfig(ttl=10.0, max_size=10000),
+    'token_decimals': NamespaceConfig(ttl=86400.0, max_size=5000, disk=True),
+    'contract_code': NamespaceConfig(ttl=3600.0, max_size=5000, disk=True),
+    'token_info': NamespaceConfig(ttl=300.0, max_size=5000, disk=True),
+    'token_metadata': NamespaceConfig(ttl=3600.0, max_size=5000, disk=True),
+    'code_audit': NamespaceConfig(ttl=604800.0, max_size=5000, disk=True),
+    'token_safety': NamespaceConfig(ttl=60.0, max_size=1000),
+    'swap_simulation': NamespaceConfig(ttl=120.0, max_size=2000),
+    'gas_price': NamespaceConfig(ttl=15.0, max_size=64),
+    'gas_estimate': NamespaceConfig(ttl=15.0, max_size=64),
+    'swap_gas': NamespaceConfig(ttl=3600.0, max_size=2000, disk=True),
+    'analytics': NamespaceConfig(ttl=60.0, max_size=256),
+}
+
+
+class _Namespace:
+    """LRU уровень одного пространства имен"""
+
+    def __init__(self, name: str, config: NamespaceConfig):
+        self.name = name
+        self.config = config
+        self.stats = NamespaceStats()
+        self.lock = threading.Lock()
+        # key -> (value, expires_at)
+        self.entries: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+
+    def lookup(self, key: str, now: float) -> Any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if now >= expires_at:
+                del self.entries[key]
+                self.stats.expirations += 1
+                return _MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def store(self, key: str, value: Any, expires_at: float):
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.config.max_size:
+                self.entries.popitem(last=False)
+                self.stats.evictions += 1
+
+
+class _DiskTier:
+    """
+    Дисковый уровень кеша (JSON значения в SQLite)
+
+    Записи копятся в буфере и коммитятся пачкой фоновым потоком раз в
+    flush_interval (или сразу при max_batch записях) - один коммит на пачку,
+    а не на каждую запись. Чтение сначала смотрит в буфер.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.05, max_batch: int = 500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, int(max_batch))
+        self.lock = threading.Lock()
+        # (namespace, key) -> (payload, expires_at), ожидающие коммита
+        self._pending: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._cond = threading.Condition()
+        self.total_commits = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        ''')
+        self.conn.commit()
+
+        self.is_running = True
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="CacheDiskTier")
+        self._writer.start()
+
+    def get(self, namespace: str, key: str, now: float) -> Tuple[Any, float]:
+        with self._cond:
+            pending = self._pending.get((namespace, key))
+        if pending is not None:
+            if pending[1] <= now:
+                return _MISSING, 0.0
+            return json.loads(pending[0]), pending[1]
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                (namespace, key)
+            ).fetchone()
+        if row is None or row[1] <= now:
+            return _MISSING, 0.0
+        return json.loads(row[0]), row[1]
+
+    def set(self, namespace: str, key: str, value: Any, expires_at: float):
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError):
+            return  # Несериализуемые значения живут только в памяти
+        with self._cond:
+            self._pending[(namespace, key)] = (payload, expires_at)
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+    def _writer_loop(self):
+        """Фоновый коммит накопленных записей"""
+        while self.is_running:
+            with self._cond:
+                if len(self._pending) < self.max_batch:
+                    self._cond.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Коммит буфера одной транзакцией"""
+        with self.lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                    [(namespace, key, payload, expires_at)
+                     for (namespace, key), (payload, expires_at) in batch.items()]
+                )
+                self.conn.commit()
+                self.total_commits += 1
+            except sqlite3.Error as e:
+                # Кеш не критичен: пачка теряется, значения остаются в памяти
+                logger.warning(f"Ошибка записи дискового кеша: {e}")
+
+    def delete(self, namespace: str, key: Optional[str] = None):
+        with self._cond:
+            if key is None:
+                for pending_key in [k for k in self._pending if k[0] == namespace]:
+                    del self._pending[pending_key]
+            else:
+                self._pending.pop((namespace, key), None)
+        with self.lock:
+            if key is None:
+                self.conn.execute('DELETE FROM cache_entries WHERE namespace = ?', (namespace,))
+            else:
+                self.conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (namespace, key))
+            self.conn.commit()
+
+    def purge_expired(self, now: float) -> int:
+        self.flush()
+        with self.lock:
+            cursor = self.conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,))
+            self.conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        self.is_running = False
+        with self._cond:
+            self._cond.notify_all()
+        self._writer.join(timeout=5)
+        self.flush()
+        with self.lock:
+            self.conn.close()
+
+
+class _Flight:
+    """Загрузка, которую ожидают несколько потоков"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class TieredCache:
+    """Единый кеш: LRU в памяти + диск, TTL по пространствам имен, single-flight"""
+
+    def __init__(self, namespaces: Optional[Dict[str, NamespaceConfig]] = None,
+                 disk_path: Optional[str] = None, disk_flush_interval: float = 0.05):
+        """
+        Args:
+            namespaces: Настройки пространств имен
+            disk_path: Путь к файлу дискового уровня (None - без диска)
+            disk_flush_interval: Максимальная задержка коммита записей на диск (сек)
+        """
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+        self._disk: Optional[_DiskTier] = None
+
+        if disk_path:
+            try:
+                self._disk = _DiskTier(disk_path, flush_interval=disk_flush_interval)
+            except Exception as e:
+                logger.warning(f"Дисковый кеш недоступен ({disk_path}): {e}")
+
+        for name, config in (namespaces or {}).items():
+            self.configure(name, **asdict(config))
+
+    def configure(self, namespace: str, ttl: Optional[float] = None,
+                  max_size: Optional[int] = None, disk: Optional[bool] = None):
+        """Создание или изменение пространства имен"""
+        ns = self._namespace(namespace)
+        with ns.lock:
+            if ttl is not None:
+                ns.config.ttl = float(ttl)
+            if max_size is not None:
+                ns.config.max_size = max(1, int(max_size))
+            if disk is not None:
+                ns.config.disk = bool(disk)
+
+    def _namespace(self, namespace: str) -> _Namespace:
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            with self._lock:
+                ns = self._namespaces.get(namespace)
+                if ns is None:
+                    default = DEFAULT_NAMESPACES.get(namespace, NamespaceConfig())
+                    ns = _Namespace(namespace, NamespaceConfig(**asdict(default)))
+                    self._namespaces[namespace] = ns
+        return ns
+
+    def _lookup(self, ns: _Namespace, key: str) -> Any:
+        """Поиск по уровням с учетом метрик"""
+        now = time.time()
+        value = ns.lookup(key, now)
+        if value is not _MISSING:
+            ns.stats.hits += 1
+            return value
+
+        if ns.config.disk and self._disk:
+            value, expires_at = self._disk.get(ns.name, key, now)
+            if value is not _MISSING:
+                ns.stats.disk_hits += 1
+                ns.store(key, value, expires_at)
+                return value
+
+        ns.stats.misses += 1
+        return _MISSING
+
+    def get(self, namespace: str, key: Any, default: Any = None) -> Any:
+        """Получение значения (default при промахе)"""
+        value = self._lookup(self._namespace(namespace), str(key))
+        return default if value is _MISSING else value
+
+    def set(self, namespace: str, key: Any, value: Any, ttl: Optional[float] = None):
+        """Сохранение значения"""
+        ns = self._namespace(namespace)
+        key = str(key)
+        expires_at = time.time() + (ns.config.ttl if ttl is None else ttl)
+        ns.store(key, value, expires_at)
+        if ns.config.disk and self._disk:
+            self._disk.set(ns.name, key, value, expires_at)
+
+    def get_or_load(self, namespace: str, key: Any, loader: Callable[[], Any],
+                    ttl: Optional[float] = None, cache_none: bool = False) -> Any:
+        """
+        Получение значения с загрузкой при промахе
+
+        Одновременные промахи по одному ключу объединяются: loader вызывается
+        один раз, остальные потоки получают его результат (или исключение).
+
+        Args:
+            namespace: Пространство имен
+            key: Ключ
+            loader: Функция загрузки значения
+            ttl: TTL (по умолчанию - из настроек пространства имен)
+            cache_none: Кешировать ли None
+        """
+        ns = self._namespace(namespace)
+        key = str(key)
+        value = self._lookup(ns, key)
+        if value is not _MISSING:
+            return value
+
+        flight_key = (namespace, key)
+        with self._lock:
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[flight_key] = flight
+
+        if not leader:
+            ns.stats.coalesced += 1
+            return flight.wait()
+
+        try:
+            # Значение могло появиться, пока мы регистрировали загрузку
+            value = ns.lookup(key, time.time())
+            if value is _MISSING:
+                ns.stats.loads += 1
+                value = loader()
+                if value is not None or cache_none:
+                    self.set(namespace, key, value, ttl)
+            flight.value = value
+            return value
+        except BaseException as e:
+            ns.stats.load_errors += 1
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(flight_key, None)
+            flight.event.set()
+
+    def invalidate(self, namespace: str, key: Any):
+        """Удаление записи"""
+        ns = self._namespace(namespace)
+        key = str(key)
+        with ns.lock:
+            ns.entries.pop(key, None)
+        if ns.config.disk and self._disk:
+            self._disk.delete(ns.name, key)
+
+    def invalidate_where(self, namespace: str, predicate: Callable[[str], bool]) -> int:
+        """Удаление записей пространства имен, ключ которых удовлетворяет условию"""
+        ns = self._namespace(namespace)
+        with ns.lock:
+            keys = [key for key in ns.entries if predicate(key)]
+            for key in keys:
+                del ns.entries[key]
+        if ns.config.disk and self._disk:
+            for key in keys:
+                self._disk.delete(ns.name, key)
+        return len(keys)
+
+    def clear(self, namespace: Optional[str] = None):
+        """Очистка пространства имен или всего кеша"""
+        names = [namespace] if namespace else list(self._namespaces)
+        for name in names:
+            ns = self._namespace(name)
+            with ns.lock:
+                ns.entries.clear()
+            if self._disk:
+                self._disk.delete(name)
+
+    def drop(self, namespace: str):
+        """Удаление пространства имен вместе с записями и настройками"""
+        with self._lock:
+            ns = self._namespaces.pop(namespace, None)
+        if ns is not None:
+            with ns.lock:
+                ns.entries.clear()
+        if self._disk:
+            self._disk.delete(namespace)
+
+    def purge_expired(self) -> int:
+        """Удаление устаревших записей во всех уровнях"""
+        now = time.time()
+        removed = 0
+        for ns in list(self._namespaces.values()):
+            with ns.lock:
+                expired = [key for key, (_, expires_at) in ns.entries.items() if expires_at <= now]
+                for key in expired:
+                    del ns.entries[key]
+                ns.stats.expirations += len(expired)
+                removed += len(expired)
+        if self._disk:
+            removed += self._disk.purge_expired(now)
+        return removed
+
+    def get_stats(self, namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Метрики по пространствам имен"""
+        names = [namespace] if namespace else sorted(self._namespaces)
+        result = {}
+        for name in names:
+            ns = self._namespace(name)
+            stats = asdict(ns.stats)
+            lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+            stats.update(
+                size=len(ns.entries),
+                max_size=ns.config.max_size,
+                ttl=ns.config.ttl,
+                disk=ns.config.disk and self._disk is not None,
+                hit_rate=((stats['hits'] + stats['disk_hits']) / lookups * 100) if lookups else 0.0
+            )
+            result[name] = stats
+        return result
+
+    def close(self):
+        """Закрытие дискового уровня"""
+        if self._disk:
+            self._disk.close()
+            self._disk = None
+
+
+# Глобальный кеш
+_global_cache: Optional[TieredCache] = None
+_global_cache_lock = threading.Lock()
+
+
+def get_cache() -> TieredCache:
+    """Получение глобального кеша (настройки из секции "cache" конфига)"""
+    global _global_cache
+
+    if _global_cache is None:
+        with _global_cache_lock:
+            if _global_cache is None:
+                settings = {}
+                try:
+                    from ..config import get_config
+                    settings = get_config().get('cache', {}) or {}
+                except Exception:
+                    pass
+
+                namespaces = {name: NamespaceConfig(**asdict(cfg)) for name, cfg in DEFAULT_NAMESPACES.items()}
+                for name, overrides in (settings.get('namespaces') or {}).items():
+                    base = asdict(namespaces.get(name, NamespaceConfig()))
+                    base.update({k: v for k, v in overrides.items() if k in base})
+                    namespaces[name] = NamespaceConfig(**base)
+
+                disk_path = None
+                if settings.get('disk', True):
+                    disk_path = settings.get('disk_path') or os.path.join(
+                        os.path.dirname(__file__), '..', '..', '..', 'cache.db'
+                    )
+                _global_cache = TieredCache(
+                    namespaces, disk_path=disk_path,
+                    disk_flush_interval=settings.get('disk_flush_interval_ms', 50) / 1000.0
+                )
+
+    return _global_cache
+
+
+def close_cache():
+    """Закрытие глобального кеша"""
+    global _global_cache
+
+    if _global_cache:
+        _global_cache.close()
+        _global_cache = None
+
 
 class CacheManager:
-    """Менеджер кеширования с TTL и автоматической очисткой"""
-    
-    def __init__(self, default_ttl: float = 10.0):
-        self._cache: Dict[str, CacheEntry] = {}
+    """
+    Менеджер кеширования с TTL (представление пространства имен общего кеша)
+
+    Без явного namespace создается собственное пространство, которое
+    удаляется из общего кеша при close().
+    """
+
+    def __init__(self, default_ttl: float = 10.0, namespace: Optional[str] = None,
+                 max_size: int = 10000):
+        self._owned = namespace is None
+        self._namespace = namespace or f"cache_{next(_anonymous_namespaces)}"
         self._default_ttl = default_ttl
-        self._lock = threading.RLock()
-        self._cleanup_thread = None
-        self._running = False
-        
+        get_cache().configure(self._namespace, ttl=default_ttl, max_size=max_size)
+
     def start_cleanup(self):
-        """Запускает фоновую очистку кеша"""
-        if self._cleanup_thread is None or not self._cleanup_thread.is_alive():
-            self._running = True
-            self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
-            self._cleanup_thread.start()
-    
+        """Совместимость: устаревшие записи удаляются лениво"""
+
     def stop_cleanup(self):
-        """Останавливает фоновую очистку кеша"""
-        self._running = False
-        if self._cleanup_thread:
-            self._cleanup_thread.join(timeout=1)
-    
-    def _cleanup_loop(self):
-        """Цикл очистки устаревших записей"""
-        while self._running:
-            try:
-                self._cleanup_expired()
-                time.sleep(5)  # Очистка каждые 5 секунд
-            except Exception:
-                pass
-    
-    def _cleanup_expired(self):
-        """Удаляет устаревшие записи из кеша"""
-        with self._lock:
-            current_time = time.time()
-            expired_keys = []
-            
-            for key, entry in self._cache.items():
-                if current_time - entry.timestamp > entry.ttl:
-                    expired_keys.append(key)
-            
-            for key in expired_keys:
-                del self._cache[key]
-    
+        """Совместимость: фонового потока нет"""
+
     def get(self, key: str) -> Optional[Any]:
         """Получает значение из кеша"""
-        with self._lock:
-            if key in self._cache:
-                entry = self._cache[key]
-                if time.time() - entry.timestamp <= entry.ttl:
-                    return entry.value
-                else:
-                    # Запись устарела, удаляем
-                    del self._cache[key]
-            return None
-    
+        return get_cache().get(self._namespace, key)
+
     def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
         """Сохраняет значение в кеш"""
-        with self._lock:
-            if ttl is None:
-                ttl = self._default_ttl
-            
-            self._cache[key] = CacheEntry(
-                value=value,
-                timestamp=time.time(),
-                ttl=ttl
-            )
-    
+        get_cache().set(self._namespace, key, value, ttl)
+
     def invalidate(self, key: str) -> None:
         """Удаляет запись из кеша"""
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-    
+        get_cache().invalidate(self._namespace, key)
+
     def clear(self) -> None:
         """Очищает весь кеш"""
-        with self._lock:
-            self._cache.clear()
-    
+        get_cache().clear(self._namespace)
+
     def get_stats(self) -> Dict[str, Any]:
         """Возвращает статистику кеша"""
-        with self._lock:
-            current_time = time.time()
-            total_entries = len(self._cache)
-            expired_entries = sum(
-                1 for entry in self._cache.values()
-                if current_time - entry.timestamp > entry.ttl
-            )
-            
-            return {
-                'total_entries': total_entries,
-                'expired_entries': expired_entries,
-                'active_entries': total_entries - expired_entries,
-                'memory_usage': sum(
-                    len(str(entry.value)) for entry in self._cache.values()
-                )
-            }
+        return get_cache().get_stats(self._namespace)[self._namespace]
+
+    def close(self) -> None:
+        """Удаляет собственное пространство имен из общего кеша"""
+        if self._owned:
+            get_cache().drop(self._namespace)
+            self._owned = False
+
 
 class TokenCacheManager:
     """Специализированный менеджер кеша для токенов"""
-    
-    def __init__(self):
-        self.cache = CacheManager(default_ttl=30.0)  # 30 секунд для токенов
-        self.cache.start_cleanup()
-        
-        # Разные TTL для разных типов данных
-        self.balance_ttl = 10.0      # Балансы - 10 секунд
-        self.token_info_ttl = 300.0  # Информация о токенах - 5 минут
-        self.gas_price_ttl = 15.0    # Цены газа - 15 секунд
-        
+
+    NAMESPACES = ('balance', 'token_info', 'gas_price')
+
     def get_token_balance(self, token_address: str, wallet_address: str) -> Optional[float]:
         """Получает баланс токена из кеша"""
-        key = f"balance:{token_address}:{wallet_address}"
-        return self.cache.get(key)
-    
+        return get_cache().get('balance', f"{token_address}:{wallet_address}")
+
     def set_token_balance(self, token_address: str, wallet_address: str, balance: float) -> None:
         """Сохраняет баланс токена в кеш"""
-        key = f"balance:{token_address}:{wallet_address}"
-        self.cache.set(key, balance, self.balance_ttl)
-    
+        get_cache().set('balance', f"{token_address}:{wallet_address}", balance)
+
     def get_token_info(self, token_address: str) -> Optional[Dict[str, Any]]:
         """Получает информацию о токене из кеша"""
-        key = f"token_info:{token_address}"
-        return self.cache.get(key)
-    
+        return get_cache().get('token_info', token_address.lower())
+
     def set_token_info(self, token_address: str, info: Dict[str, Any]) -> None:
         """Сохраняет информацию о токене в кеш"""
-        key = f"token_info:{token_address}"
-        self.cache.set(key, info, self.token_info_ttl)
-    
+        get_cache().set('token_info', token_address.lower(), info)
+
     def get_gas_price(self, network: str = "bsc") -> Optional[int]:
         """Получает цену газа из кеша"""
-        key = f"gas_price:{network}"
-        return self.cache.get(key)
-    
+        return get_cache().get('gas_price', network)
+
     def set_gas_price(self, gas_price: int, network: str = "bsc") -> None:
         """Сохраняет цену газа в кеш"""
-        key = f"gas_price:{network}"
-        self.cache.set(key, gas_price, self.gas_price_ttl)
-    
+        get_cache().set('gas_price', network, gas_price)
+
     def invalidate_token_balance(self, token_address: str, wallet_address: str) -> None:
         """Инвалидирует кеш баланса токена"""
-        key = f"balance:{token_address}:{wallet_address}"
-        self.cache.invalidate(key)
-    
+        get_cache().invalidate('balance', f"{token_address}:{wallet_address}")
+
     def invalidate_all_balances(self, wallet_address: str) -> None:
         """Инвалидирует все балансы для кошелька"""
-        with self.cache._lock:
-            keys_to_remove = []
-            for key in self.cache._cache.keys():
-                if key.startswith("balance:") and key.endswith(f":{wallet_address}"):
-                    keys_to_remove.append(key)
-            
-            for key in keys_to_remove:
-                self.cache.invalidate(key)
-    
+        suffix = f":{wallet_address}"
+        get_cache().invalidate_where('balance', lambda key: key.endswith(suffix))
+
     def get_cache_stats(self) -> Dict[str, Any]:
         """Возвращает статистику кеша"""
-        return self.cache.get_stats()
-    
+        cache = get_cache()
+        return {name: cache.get_stats(name)[name] for name in self.NAMESPACES}
+
     def cleanup(self):
         """Очищает кеш"""
-        self.cache.stop_cleanup()
-        self.cache.clear()
+        cache = get_cache()
+        for name in self.NAMESPACES:
+            cache.clear(name)
+
 
 # Глобальный экземпляр менеджера кеша
 token_cache = TokenCacheManager()
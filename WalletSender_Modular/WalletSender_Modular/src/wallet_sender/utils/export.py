@@ -0,0 +1,329 @@
+"""
+Потоковый экспорт таблиц SQLite и аналитика по выгруженным файлам
+
+Экспорт читает таблицу порциями по rowid или по первичному ключу для таблиц
+WITHOUT ROWID (каждая порция - отдельное короткое чтение, живая БД не
+блокируется на время выгрузки) и пишет их в CSV (.csv,
+.csv.gz) или в колоночные форматы Parquet (.parquet) и Arrow IPC (.arrow,
+.feather). Память не зависит от размера таблицы.
+
+aggregate_export выполняет group-by агрегации по выгруженному файлу пачками
+(pandas/pyarrow), не обращаясь к рабочей БД.
+"""
+
+import csv
+import gzip
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Поддерживаемые агрегаты для aggregate_export
+AGGREGATES = ('count', 'sum', 'min', 'max', 'mean')
+
+
+def detect_format(path: str) -> str:
+    """Определение формата по расширению файла"""
+    lower = path.lower()
+    if lower.endswith('.parquet'):
+        return 'parquet'
+    if lower.endswith(('.arrow', '.feather', '.ipc')):
+        return 'arrow'
+    return 'csv'
+
+
+def _connect_readonly(db_path: str) -> sqlite3.Connection:
+    """Соединение только для чтения (экспорт не берет блокировок записи)"""
+    return sqlite3.connect(f'{Path(db_path).resolve().as_uri()}?mode=ro', uri=True)
+
+
+def _require_pyarrow():
+    """Импорт pyarrow с понятной ошибкой"""
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise ImportError("Для Parquet/Arrow экспорта установите pyarrow: pip install pyarrow")
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[Tuple[str, str]]:
+    """Колонки таблицы и их объявленные типы"""
+    cursor = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    )
+    if cursor.fetchone() is None:
+        raise ValueError(f"Таблица не найдена: {table}")
+    return [(row[1], (row[2] or '').upper()) for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def _page_key(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Ключ keyset-пагинации: rowid или первичный ключ таблицы WITHOUT ROWID"""
+    try:
+        conn.execute(f'SELECT rowid FROM "{table}" LIMIT 0')
+        return ['rowid']
+    except sqlite3.OperationalError:
+        primary = sorted((row[5], row[1]) for row in conn.execute(f'PRAGMA table_info("{table}")') if row[5])
+        return [name for _, name in primary]
+
+
+def iter_table_chunks(db_path: str, table: str, where: Optional[str] = None,
+                      params: Sequence[Any] = (), chunk_size: int = DEFAULT_CHUNK_SIZE
+                      ) -> Iterator[Tuple[List[str], List[tuple]]]:
+    """
+    Чтение таблицы порциями (keyset-пагинация по rowid или первичному ключу)
+
+    Args:
+        db_path: Путь к БД
+        table: Имя таблицы
+        where: Дополнительное условие WHERE (с плейсхолдерами)
+        params: Параметры условия
+        chunk_size: Размер порции
+
+    Yields:
+        (имена колонок, строки порции)
+    """
+    conn = _connect_readonly(db_path)
+    try:
+        columns = [name for name, _ in _table_columns(conn, table)]
+        key = _page_key(conn, table)
+        select = ', '.join(f'"{name}"' for name in columns)
+        key_select = ', '.join(name if name == 'rowid' else f'"{name}"' for name in key)
+        condition = f' AND ({where})' if where else ''
+        first_query = (f'SELECT {key_select}, {select} FROM "{table}" '
+                       f'WHERE 1{condition} ORDER BY {key_select} LIMIT ?')
+        next_query = (f'SELECT {key_select}, {select} FROM "{table}" '
+                      f'WHERE ({key_select}) > ({", ".join("?" * len(key))}){condition} '
+                      f'ORDER BY {key_select} LIMIT ?')
+        last_key: Optional[tuple] = None
+        while True:
+            if last_key is None:
+                rows = conn.execute(first_query, (*params, chunk_size)).fetchall()
+            else:
+                rows = conn.execute(next_query, (*last_key, *params, chunk_size)).fetchall()
+            if not rows:
+                break
+            last_key = rows[-1][:len(key)]
+            yield columns, [row[len(key):] for row in rows]
+            if len(rows) < chunk_size:
+                break
+    finally:
+        conn.close()
+
+
+def _arrow_schema(pa, declared: List[Tuple[str, str]]):
+    """Схема Arrow по объявленным типам SQLite"""
+    fields = []
+    for name, decl in declared:
+        if 'INT' in decl or 'BOOL' in decl:
+            arrow_type = pa.int64()
+        elif any(t in decl for t in ('REAL', 'FLOA', 'DOUB', 'NUMERIC')):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _to_record_batch(pa, schema, rows: List[tuple]):
+    """Порция строк SQLite -> RecordBatch"""
+    arrays = []
+    for index, field in enumerate(schema):
+        values = [row[index] for row in rows]
+        if pa.types.is_string(field.type):
+            values = [None if v is None else str(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_table(db_path: str, table: str, output_path: str, fmt: Optional[str] = None,
+                 where: Optional[str] = None, params: Sequence[Any] = (),
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, compression: str = 'zstd') -> int:
+    """
+    Потоковый экспорт таблицы SQLite
+
+    Args:
+        db_path: Путь к БД
+        table: Имя таблицы
+        output_path: Файл назначения
+        fmt: csv, parquet или arrow (по умолчанию - по расширению)
+        where: Дополнительное условие WHERE
+        params: Параметры условия
+        chunk_size: Размер порции (строк)
+        compression: Сжатие для Parquet/Arrow
+
+    Returns:
+        Количество выгруженных строк
+    """
+    fmt = fmt or detect_format(output_path)
+    chunks = iter_table_chunks(db_path, table, where, params, chunk_size)
+
+    if fmt == 'csv':
+        total = _write_csv(chunks, db_path, table, output_path)
+    elif fmt in ('parquet', 'arrow'):
+        total = _write_arrow(chunks, db_path, table, output_path, fmt, compression)
+    else:
+        raise ValueError(f"Неподдерживаемый формат: {fmt}")
+
+    logger.info(f"Таблица {table} экспортирована в {output_path} ({total} строк, {fmt})")
+    return total
+
+
+def _write_csv(chunks, db_path: str, table: str, output_path: str) -> int:
+    """Запись порций в CSV (gzip для .gz)"""
+    opener = gzip.open if output_path.lower().endswith('.gz') else open
+    total = 0
+    with opener(output_path, 'wt', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        header_written = False
+        for columns, rows in chunks:
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows(rows)
+            total += len(rows)
+        if not header_written:
+            conn = _connect_readonly(db_path)
+            try:
+                writer.writerow([name for name, _ in _table_columns(conn, table)])
+            finally:
+                conn.close()
+    return total
+
+
+def _write_arrow(chunks, db_path: str, table: str, output_path: str, fmt: str,
+                 compression: str) -> int:
+    """Запись порций в Parquet (row group на порцию) или Arrow IPC"""
+    pa = _require_pyarrow()
+    conn = _connect_readonly(db_path)
+    try:
+        schema = _arrow_schema(pa, _table_columns(conn, table))
+    finally:
+        conn.close()
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(output_path, schema, compression=compression)
+        write = writer.write_batch
+    else:
+        import pyarrow.ipc as ipc
+        sink = pa.OSFile(output_path, 'wb')
+        writer = ipc.new_file(sink, schema, options=ipc.IpcWriteOptions(compression=compression))
+        write = writer.write_batch
+
+    total = 0
+    try:
+        for _, rows in chunks:
+            write(_to_record_batch(pa, schema, rows))
+            total += len(rows)
+    finally:
+        writer.close()
+        if fmt == 'arrow':
+            sink.close()
+    return total
+
+
+def iter_export_frames(path: str, columns: Optional[List[str]] = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Чтение выгруженного файла пачками pandas.DataFrame
+
+    Args:
+        path: Файл экспорта (csv/parquet/arrow)
+        columns: Нужные колонки (None - все)
+        chunk_size: Размер пачки для CSV/Parquet
+    """
+    fmt = detect_format(path)
+    if fmt == 'csv':
+        import pandas as pd
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+    elif fmt == 'parquet':
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        pa = _require_pyarrow()
+        import pyarrow.ipc as ipc
+        with pa.memory_map(path, 'r') as source:
+            reader = ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                if columns:
+                    batch = batch.select(columns)
+                yield batch.to_pandas()
+
+
+def aggregate_export(path: str, group_by: Sequence[str], metrics: Dict[str, Sequence[str]],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, Any]]:
+    """
+    Group-by агрегация по файлу экспорта без загрузки его целиком
+
+    Каждая пачка агрегируется векторно и сразу сливается с накопленным
+    результатом, поэтому память пропорциональна числу групп, а не строк.
+
+    Args:
+        path: Файл экспорта
+        group_by: Колонки группировки
+        metrics: {колонка: [агрегаты]}, агрегаты из AGGREGATES
+        chunk_size: Размер пачки
+
+    Returns:
+        Список словарей: колонки группировки + '<колонка>_<агрегат>'
+
+    Example:
+        aggregate_export('tx.parquet', ['token_symbol', 'status'],
+                         {'amount': ['sum', 'mean'], 'id': ['count']})
+    """
+    import pandas as pd
+
+    group_by = list(group_by)
+    partial_aggs: Dict[str, List[str]] = {}
+    for column, aggs in metrics.items():
+        for agg in aggs:
+            if agg not in AGGREGATES:
+                raise ValueError(f"Неподдерживаемый агрегат: {agg}")
+            # mean собирается из sum и count
+            for part in (('sum', 'count') if agg == 'mean' else (agg,)):
+                partial_aggs.setdefault(column, [])
+                if part not in partial_aggs[column]:
+                    partial_aggs[column].append(part)
+
+    needed = list(dict.fromkeys(group_by + list(metrics)))
+    combined = None
+    for frame in iter_export_frames(path, columns=needed, chunk_size=chunk_size):
+        grouped = frame.groupby(group_by, dropna=False) if group_by else frame.groupby(lambda _: 0)
+        partial = grouped.agg(partial_aggs)
+        if combined is None:
+            combined = partial
+            continue
+        # Слияние с накопленным результатом: count/sum суммируются, min/max - min/max
+        merged = pd.concat([combined, partial])
+        merge = {key: ('sum' if key[1] in ('sum', 'count') else key[1]) for key in merged.columns}
+        combined = merged.groupby(level=list(range(merged.index.nlevels)), dropna=False).agg(merge)
+
+    if combined is None:
+        return []
+
+    results = []
+    for index, row in combined.iterrows():
+        keys = index if isinstance(index, tuple) else (index,)
+        keys = [None if pd.isna(key) else key for key in keys]
+        record = dict(zip(group_by, keys)) if group_by else {}
+        for column, aggs in metrics.items():
+            for agg in aggs:
+                if agg == 'mean':
+                    count = row[(column, 'count')]
+                    value = row[(column, 'sum')] / count if count else None
+                elif agg == 'count':
+                    value = int(row[(column, agg)])
+                else:
+                    value = row[(column, agg)]
+                record[f'{column}_{agg}'] = value.item() if hasattr(value, 'item') else value
+        results.append(record)
+    return results
@@ -3,11 +3,18 @@
 """
 
 import time
+import threading
+import logging
 import requests
-from typing import Dict, Any, Optional, List
+from collections import deque
+from typing import Dict, Any, Optional, List, Deque, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from .cache_manager import get_cache
+
+logger = logging.getLogger(__name__)
+
 class GasPriority(Enum):
     """Приоритеты газа"""
     SLOW = "slow"
@@ -24,14 +31,251 @@ class GasEstimate:
     instant: int
     timestamp: float
 
+@dataclass(frozen=True)
+class GasTiers:
+    """Снимок перцентильных уровней цены газа (в wei)"""
+    slow: int
+    standard: int
+    fast: int
+    instant: int
+    block_number: int
+    sample_size: int
+    timestamp: float
+
+    def get(self, priority: 'GasPriority') -> int:
+        """Цена для приоритета"""
+        return getattr(self, priority.value)
+
+
+def _percentile(sorted_values: List[int], pct: float) -> int:
+    """Перцентиль (nearest-rank) по отсортированному списку"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class GasOracle:
+    """
+    Оракул газа по истории последних блоков
+
+    Фоновый поток раз в interval секунд обновляет перцентили эффективной цены газа
+    за последние block_count блоков (через eth_feeHistory, а при его ошибке —
+    по транзакциям блоков из eth_getBlockByNumber; eth_feeHistory повторяется с
+    растущей паузой). Готовый снимок хранится как неизменяемый объект и
+    читается без блокировок.
+    """
+
+    # Перцентили для уровней slow / standard / fast / instant
+    PERCENTILES: Tuple[float, float, float, float] = (10.0, 50.0, 75.0, 95.0)
+    # Максимальная пауза перед повтором eth_feeHistory после ошибки (сек)
+    FEE_HISTORY_MAX_BACKOFF = 300.0
+
+    def __init__(self, web3_instance, block_count: int = 20, interval: float = 3.0,
+                 max_age: float = 60.0):
+        """
+        Args:
+            web3_instance: Web3 экземпляр
+            block_count: Размер окна в блоках
+            interval: Интервал обновления в секундах
+            max_age: Возраст снимка, после которого он считается устаревшим
+        """
+        self.web3 = web3_instance
+        self.block_count = block_count
+        self.interval = interval
+        self.max_age = max_age
+
+        self._snapshot: Optional[GasTiers] = None
+        self._fee_history_backoff = 0.0
+        self._fee_history_retry_at = 0.0
+        # Окно цен по блокам для режима eth_getBlockByNumber: (номер блока, цены)
+        self._block_prices: Deque[Tuple[int, List[int]]] = deque(maxlen=block_count)
+
+        self.is_running = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Запуск фонового обновления"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="GasOracle")
+        self._thread.start()
+        logger.info(f"GasOracle запущен: окно {self.block_count} блоков, интервал {self.interval}с")
+
+    def stop(self):
+        """Остановка фонового обновления"""
+        self.is_running = False
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        """Цикл обновления"""
+        while self.is_running:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.debug(f"GasOracle: ошибка обновления: {e}")
+            self._stop_event.wait(self.interval)
+
+    def get_tiers(self) -> Optional[GasTiers]:
+        """Актуальный снимок или None, если он отсутствует/устарел"""
+        snapshot = self._snapshot
+        if snapshot is None or time.time() - snapshot.timestamp > self.max_age:
+            return None
+        return snapshot
+
+    def refresh(self) -> Optional[GasTiers]:
+        """Синхронное обновление снимка"""
+        snapshot = None
+        use_fee_history = time.monotonic() >= self._fee_history_retry_at
+        if use_fee_history:
+            try:
+                snapshot = self._sample_fee_history()
+                self._fee_history_backoff = 0.0
+            except Exception as e:
+                # Узел без eth_feeHistory или временная ошибка — читаем блоки до повтора
+                self._fee_history_backoff = min(max(self._fee_history_backoff * 2, self.interval),
+                                                self.FEE_HISTORY_MAX_BACKOFF)
+                self._fee_history_retry_at = time.monotonic() + self._fee_history_backoff
+                logger.info(f"GasOracle: eth_feeHistory недоступен ({e}), используем блоки, "
+                            f"повтор через {self._fee_history_backoff:.0f}с")
+                use_fee_history = False
+        if snapshot is None and not use_fee_history:
+            snapshot = self._sample_blocks()
+        if snapshot is not None:
+            self._snapshot = snapshot
+        return snapshot
+
+    def _build_tiers(self, prices: List[int], block_number: int) -> Optional[GasTiers]:
+        """Расчет уровней по выборке цен"""
+        if not prices:
+            return None
+        prices.sort()
+        slow, standard, fast, instant = (_percentile(prices, p) for p in self.PERCENTILES)
+        return GasTiers(
+            slow=slow,
+            standard=max(standard, slow),
+            fast=max(fast, standard),
+            instant=max(instant, fast),
+            block_number=block_number,
+            sample_size=len(prices),
+            timestamp=time.time()
+        )
+
+    def _sample_fee_history(self) -> Optional[GasTiers]:
+        """Уровни по eth_feeHistory: baseFee + награда на каждом перцентиле"""
+        history = self.web3.eth.fee_history(self.block_count, 'latest', list(self.PERCENTILES))
+        base_fees = history.get('baseFeePerGas') or []
+        rewards = history.get('reward') or []
+        if not rewards:
+            return None
+
+        # Для каждого уровня берем медиану по блокам окна
+        tiers = []
+        for tier_index in range(len(self.PERCENTILES)):
+            values = sorted(
+                int(base_fees[i] if i < len(base_fees) else 0) + int(block_rewards[tier_index])
+                for i, block_rewards in enumerate(rewards)
+                if block_rewards and len(block_rewards) > tier_index
+            )
+            tiers.append(_percentile(values, 50.0))
+        if not any(tiers):
+            return None
+
+        slow, standard, fast, instant = tiers
+        oldest = int(history.get('oldestBlock', 0))
+        return GasTiers(
+            slow=slow,
+            standard=max(standard, slow),
+            fast=max(fast, standard),
+            instant=max(instant, fast),
+            block_number=oldest + len(rewards) - 1,
+            sample_size=len(rewards),
+            timestamp=time.time()
+        )
+
+    def _sample_blocks(self) -> Optional[GasTiers]:
+        """Уровни по эффективным ценам транзакций последних блоков"""
+        latest = int(self.web3.eth.block_number)
+        last_sampled = self._block_prices[-1][0] if self._block_prices else latest - self.block_count
+        # Догружаем только новые блоки
+        for number in range(max(last_sampled + 1, latest - self.block_count + 1), latest + 1):
+            block = self.web3.eth.get_block(number, full_transactions=True)
+            base_fee = int(block.get('baseFeePerGas') or 0)
+            prices = []
+            for tx in block.get('transactions', []):
+                if isinstance(tx, (str, bytes)):
+                    continue
+                gas_price = tx.get('gasPrice')
+                if tx.get('maxFeePerGas') is not None:
+                    tip = int(tx.get('maxPriorityFeePerGas') or 0)
+                    gas_price = min(int(tx['maxFeePerGas']), base_fee + tip)
+                if gas_price:
+                    prices.append(int(gas_price))
+            self._block_prices.append((number, prices))
+
+        all_prices = [price for _, prices in self._block_prices for price in prices]
+        return self._build_tiers(all_prices, latest)
+
+
+# Глобальный экземпляр оракула
+_gas_oracle: Optional[GasOracle] = None
+_gas_oracle_lock = threading.Lock()
+
+
+def start_gas_oracle(web3_instance) -> GasOracle:
+    """
+    Запуск глобального оракула газа
+
+    Вызывается явно при старте сервисов с клиентом пула RPC; повторный вызов
+    перепривязывает оракул к новому web3.
+    """
+    global _gas_oracle
+
+    with _gas_oracle_lock:
+        if _gas_oracle is None:
+            block_count, interval = 20, 3.0
+            try:
+                from ..config import get_config
+                gas_settings = get_config().get('gas_settings', {}) or {}
+                block_count = int(gas_settings.get('oracle_blocks', block_count))
+                interval = float(gas_settings.get('oracle_interval', interval))
+            except Exception:
+                pass
+            _gas_oracle = GasOracle(web3_instance, block_count=block_count, interval=interval)
+        else:
+            _gas_oracle.web3 = web3_instance
+        _gas_oracle.start()
+
+    return _gas_oracle
+
+
+def get_gas_oracle() -> Optional[GasOracle]:
+    """Глобальный оракул газа (None, пока не вызван start_gas_oracle)"""
+    return _gas_oracle
+
+
+def close_gas_oracle():
+    """Остановка глобального оракула газа"""
+    global _gas_oracle
+
+    if _gas_oracle:
+        _gas_oracle.stop()
+        _gas_oracle = None
+
+
 class GasManager:
     """Менеджер для работы с газом"""
     
-    def __init__(self, web3_instance):
+    def __init__(self, web3_instance, oracle: Optional[GasOracle] = None):
         self.web3 = web3_instance
-        self._gas_cache = {}
-        self._last_update = 0
+        self._oracle = oracle
         self._update_interval = 15  # Обновляем каждые 15 секунд
+        self._cache_key: Optional[str] = None
         
         # Fallback цены газа (в gwei) - понижены для экономии
         self.fallback_prices = {
@@ -49,9 +293,21 @@ class GasManager:
             'complex_swap': 1.5
         }
     
+    @property
+    def oracle(self) -> Optional[GasOracle]:
+        """Переданный оракул или глобальный (если уже запущен)"""
+        return self._oracle if self._oracle is not None else get_gas_oracle()
+    
     def get_optimal_gas_price(self, priority: GasPriority = GasPriority.STANDARD, 
                             operation_type: str = 'transfer') -> int:
         """Получает оптимальную цену газа"""
+        # Перцентили оракула (в wei, без округления до целых gwei)
+        tiers = self.oracle.get_tiers() if self.oracle else None
+        if tiers is not None:
+            multiplier = self.operation_multipliers.get(operation_type, 1.0)
+            max_gas_price_wei = self.web3.to_wei(10, 'gwei')  # Максимум 10 gwei
+            return min(int(tiers.get(priority) * multiplier), max_gas_price_wei)
+        
         try:
             # Получаем актуальные данные о газе
             gas_data = self._get_gas_data()
@@ -93,18 +349,24 @@ class GasManager:
     
     def _get_gas_data(self) -> GasEstimate:
         """Получает данные о газе из различных источников"""
-        current_time = time.time()
-        
-        # Проверяем кеш
-        if (current_time - self._last_update < self._update_interval and 
-            'gas_estimate' in self._gas_cache):
-            return self._gas_cache['gas_estimate']
-        
+        return get_cache().get_or_load(
+            'gas_estimate', self._gas_cache_key(), self._load_gas_data, ttl=self._update_interval
+        )
+    
+    def _gas_cache_key(self) -> str:
+        """Ключ оценки газа: RPC URL, иначе chain id (один на сеть для всех менеджеров)"""
+        if self._cache_key is None:
+            endpoint = getattr(getattr(self.web3, 'provider', None), 'endpoint_uri', None)
+            self._cache_key = str(endpoint) if endpoint else f"chain:{self.web3.eth.chain_id}"
+        return self._cache_key
+    
+    def _load_gas_data(self) -> GasEstimate:
+        """Загрузка данных о газе (без кеша)"""
         # Пробуем получить данные из разных источников
         gas_estimate = None
         
-        # 1. Пробуем BSCScan API
-        gas_estimate = self._get_gas_from_bscscan()
+        # 1. Пробуем оракул по истории блоков
+        gas_estimate = self._get_gas_from_oracle()
         
         # 2. Если не получилось, пробуем Web3
         if gas_estimate is None:
@@ -114,19 +376,20 @@ class GasManager:
         if gas_estimate is None:
             gas_estimate = self._get_fallback_gas()
         
-        # Кешируем результат
-        self._gas_cache['gas_estimate'] = gas_estimate
-        self._last_update = current_time
-        
         return gas_estimate
     
-    def _get_gas_from_bscscan(self) -> Optional[GasEstimate]:
-        """Получает данные о газе из BSCScan API"""
-        try:
-            # BSCScan не предоставляет API для газа, но можем попробовать другие источники
-            return None
-        except Exception:
+    def _get_gas_from_oracle(self) -> Optional[GasEstimate]:
+        """Получает данные о газе из оракула (перцентили последних блоков)"""
+        tiers = self.oracle.get_tiers() if self.oracle else None
+        if tiers is None:
             return None
+        return GasEstimate(
+            slow=max(1, int(self.web3.from_wei(tiers.slow, 'gwei'))),
+            standard=max(1, int(self.web3.from_wei(tiers.standard, 'gwei'))),
+            fast=max(1, int(self.web3.from_wei(tiers.fast, 'gwei'))),
+            instant=max(1, int(self.web3.from_wei(tiers.instant, 'gwei'))),
+            timestamp=tiers.timestamp
+        )
     
     def _get_gas_from_web3(self) -> Optional[GasEstimate]:
         """Получает данные о газе из Web3"""
@@ -184,7 +447,12 @@ class GasManager:
             current_gas = self.web3.eth.gas_price
             current_gas_gwei = self.web3.from_wei(current_gas, 'gwei')
             
+            tiers = self.oracle.get_tiers() if self.oracle else None
+            
             return {
+                'source': 'oracle' if tiers else 'gas_price',
+                'oracle_block': tiers.block_number if tiers else None,
+                'oracle_sample_size': tiers.sample_size if tiers else 0,
                 'current_gas_gwei': current_gas_gwei,
                 'estimated_slow': gas_data.slow,
                 'estimated_standard': gas_data.standard,
@@ -1,10 +1,21 @@
 """
 Logging utilities for WalletSender
+
+Корневой логгер пишет в очередь (QueueHandler), а консоль, файл и
+JSON-lines журнал обслуживаются фоновым потоком QueueListener. Вызов
+logger.info() в рабочем потоке рассылки сводится к добавлению записи в
+очередь; файлы пишутся пакетами (BatchingFileHandler).
 """
 
+import atexit
+import json
 import logging
+import queue
 import sys
-from typing import Optional
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
 from pathlib import Path
 
 
@@ -12,6 +23,13 @@ from pathlib import Path
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# Стандартные атрибуты LogRecord (остальные - поля extra для JSON журнала)
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+# Асинхронный конвейер: слушатель очереди и конечные обработчики
+_listener: Optional[QueueListener] = None
+_sinks: List[logging.Handler] = []
+
 
 class UnicodeFormatter(logging.Formatter):
     """Форматтер логов с поддержкой Unicode и безопасной обработкой эмодзи"""
@@ -71,13 +89,152 @@ class UnicodeFormatter(logging.Formatter):
         return formatted
 
 
-def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None):
+class BatchingFileHandler(logging.Handler):
+    """
+    Файловый обработчик с пакетной записью
+    
+    Строки копятся в буфере и записываются одним вызовом write, когда
+    набралось batch_size записей, прошло flush_interval секунд с первой
+    записи буфера или пришла запись уровня ERROR и выше.
+    """
+    
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 0.5,
+                 encoding: str = 'utf-8'):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._first_at = 0.0
+        self._stream = open(self.path, 'a', encoding=encoding)
+    
+    def render(self, record: logging.LogRecord) -> str:
+        return self.format(record)
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            line = self.render(record)
+        except Exception:
+            self.handleError(record)
+            return
+        
+        self.acquire()
+        try:
+            if not self._buffer:
+                self._first_at = time.monotonic()
+            self._buffer.append(line)
+            if (len(self._buffer) >= self.batch_size or record.levelno >= logging.ERROR
+                    or time.monotonic() - self._first_at >= self.flush_interval):
+                self._write()
+        finally:
+            self.release()
+    
+    def _write(self):
+        if self._buffer and self._stream:
+            self._stream.write('\n'.join(self._buffer) + '\n')
+            self._stream.flush()
+        self._buffer.clear()
+    
+    def flush(self):
+        self.acquire()
+        try:
+            self._write()
+        finally:
+            self.release()
+    
+    def close(self):
+        self.acquire()
+        try:
+            self._write()
+            if self._stream:
+                self._stream.close()
+                self._stream = None
+        finally:
+            self.release()
+        super().close()
+
+
+class JsonLinesHandler(BatchingFileHandler):
+    """Структурированный журнал: одна JSON запись на строку, поля extra сохраняются"""
+    
+    def render(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 6),
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BufferedQueueListener(QueueListener):
+    """Слушатель очереди логов, сбрасывающий буферы обработчиков при простое"""
+    
+    def __init__(self, log_queue, *handlers, flush_interval: float = 0.5):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+    
+    def dequeue(self, block: bool):
+        while True:
+            try:
+                if not block:
+                    return self.queue.get_nowait()
+                return self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if not block:
+                    raise
+                self.flush()
+    
+    def flush(self):
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+
+
+def _pipeline_settings() -> dict:
+    """Настройки конвейера из секции "logging" конфига"""
+    try:
+        from ..config import get_config
+        return get_config().get('logging', {}) or {}
+    except Exception:
+        return {}
+
+
+def shutdown_logging():
+    """Остановка фонового потока логов с записью буферов"""
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+        _listener = None
+    for handler in _sinks:
+        try:
+            handler.close()
+        except Exception:
+            pass
+    _sinks.clear()
+
+
+def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None,
+                  json_file: Optional[str] = None, async_mode: Optional[bool] = None):
     """
     Настройка системы логирования
     
     Args:
         log_level: Уровень логирования (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Путь к файлу для сохранения логов
+        json_file: Путь к JSON-lines журналу (по умолчанию рядом с log_file, *.jsonl)
+        async_mode: Запись через очередь и фоновый поток (по умолчанию из конфига)
     """
     # Получаем числовой уровень
     numeric_level = getattr(logging, log_level.upper(), None)
@@ -93,8 +250,8 @@ def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None):
         has_file_handler = False
         has_console_handler = False
         
-        for handler in root_logger.handlers:
-            if isinstance(handler, logging.FileHandler):
+        for handler in _sinks or root_logger.handlers:
+            if isinstance(handler, (logging.FileHandler, BatchingFileHandler)):
                 has_file_handler = True
             elif isinstance(handler, logging.StreamHandler):
                 has_console_handler = True
@@ -105,24 +262,51 @@ def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None):
             return
         
         # Иначе очищаем старые хендлеры
+        shutdown_logging()
         root_logger.handlers.clear()
     
     # Настраиваем новые хендлеры
     root_logger.setLevel(numeric_level)
+    settings = _pipeline_settings() if log_file else {}
+    if async_mode is None:
+        async_mode = settings.get('async', True)
+    flush_interval = settings.get('flush_interval', 0.5)
+    batch_size = settings.get('batch_size', 200)
     
     # Консольный обработчик с UTF-8 поддержкой
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(UnicodeFormatter(LOG_FORMAT, DATE_FORMAT))
-    root_logger.addHandler(console_handler)
+    handlers: List[logging.Handler] = [console_handler]
     
     # Файловый обработчик (если указан)
     if log_file:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         
-        file_handler = logging.FileHandler(log_path, encoding='utf-8')
+        if async_mode:
+            file_handler = BatchingFileHandler(log_path, batch_size, flush_interval)
+        else:
+            file_handler = logging.FileHandler(log_path, encoding='utf-8')
         file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))  # В файл записываем с эмодзи
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+        
+        if json_file is None and settings.get('json_log', True):
+            json_file = str(log_path.with_suffix('.jsonl'))
+    
+    # Структурированный журнал
+    if json_file:
+        handlers.append(JsonLinesHandler(json_file, batch_size, flush_interval))
+    
+    global _listener
+    if async_mode:
+        log_queue: queue.Queue = queue.Queue()
+        root_logger.addHandler(QueueHandler(log_queue))
+        _sinks.extend(handlers)
+        _listener = BufferedQueueListener(log_queue, *handlers, flush_interval=flush_interval)
+        _listener.start()
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
     
     # Устанавливаем уровень для библиотек
     logging.getLogger("web3").setLevel(logging.WARNING)
@@ -166,3 +350,4 @@ def setup_logger(name: str = "WalletSender", log_file: Optional[str] = None,
 
 # Глобальная настройка при импорте
 setup_logging()
+atexit.register(shutdown_logging)
@@ -353,6 +353,16 @@ class CacheOptimizer:
                 except Exception as e:
                     total_stats['cache_results'][cache_name] = {'error': str(e)}
             
+            # Общий кеш (utils.cache_manager) ограничен по размеру сам, здесь
+            # только удаляем устаревшие записи
+            try:
+                from .cache_manager import get_cache
+                purged = get_cache().purge_expired()
+                total_stats['cache_results']['shared'] = {'items_removed': purged}
+                total_stats['total_items_removed'] += purged
+            except Exception as e:
+                total_stats['cache_results']['shared'] = {'error': str(e)}
+            
             return total_stats
     
     def get_cache_stats(self) -> Dict[str, Any]:
@@ -368,6 +378,11 @@ class CacheOptimizer:
                     'access_count': metadata['access_count'],
                     'age_seconds': time.time() - metadata['created_at']
                 }
+            try:
+                from .cache_manager import get_cache
+                stats['shared'] = get_cache().get_stats()
+            except Exception as e:
+                stats['shared'] = {'error': str(e)}
             return stats
 
 # Глобальные экземпляры
@@ -0,0 +1,153 @@
+"""
+Индекс агрегатов по отправителям для анализа входящих переводов
+
+Вместо словаря со списком деталей каждой транзакции на отправителя индекс
+хранит по одной строке на отправителя в массивах numpy: количество,
+сумма, первый/последний блок и время. Страницы explorer API добавляются
+инкрементально (группировка страницы через np.unique и ufunc.at), а
+таблица строится запросом top-K через argpartition, поэтому анализ
+адреса с миллионами входящих переводов занимает память пропорционально
+числу отправителей, а не переводов.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .tx_columns import TxColumns
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+_NO_BLOCK = np.iinfo(np.int64).max
+
+
+@dataclass
+class SenderStats:
+    """Агрегаты одного отправителя"""
+    address: str
+    count: int
+    total: float
+    first_block: int
+    last_block: int
+    first_timestamp: int
+    last_timestamp: int
+
+
+class SenderIndex:
+    """Потокобезопасный индекс агрегатов по отправителям"""
+
+    def __init__(self, capacity: int = 1024):
+        self.addresses: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.transfers = 0
+        self.lock = threading.Lock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._total = np.zeros(capacity, dtype=np.float64)
+        self._first_block = np.full(capacity, _NO_BLOCK, dtype=np.int64)
+        self._last_block = np.zeros(capacity, dtype=np.int64)
+        self._first_ts = np.full(capacity, _NO_BLOCK, dtype=np.int64)
+        self._last_ts = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self, size: int):
+        capacity = len(self._count)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        old = (self._count, self._total, self._first_block, self._last_block,
+               self._first_ts, self._last_ts)
+        self._allocate(capacity)
+        for new, array in zip((self._count, self._total, self._first_block, self._last_block,
+                               self._first_ts, self._last_ts), old):
+            new[:len(array)] = array
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def _intern(self, address: str) -> int:
+        sender_id = self._ids.get(address)
+        if sender_id is None:
+            sender_id = len(self.addresses)
+            self._ids[address] = sender_id
+            self.addresses.append(address)
+        return sender_id
+
+    def add(self, columns: TxColumns, indices: Optional[Iterable[int]] = None) -> int:
+        """
+        Добавление строк страницы в агрегаты
+
+        Args:
+            columns: Страница транзакций в колоночном виде
+            indices: Отобранные строки (по умолчанию все)
+
+        Returns:
+            Количество добавленных переводов
+        """
+        rows = np.arange(len(columns)) if indices is None else np.asarray(indices, dtype=np.int64)
+        if not len(rows):
+            return 0
+
+        local_ids, inverse = np.unique(columns.column('from_id')[rows], return_inverse=True)
+        block = columns.column('block')[rows]
+        timestamp = columns.column('timestamp')[rows]
+        amount = columns.column('amount')[rows]
+
+        with self.lock:
+            mapping = np.array([self._intern(columns.addresses[i]) for i in local_ids], dtype=np.int64)
+            sender_ids = mapping[inverse]
+            self._grow(len(self.addresses))
+
+            np.add.at(self._count, sender_ids, 1)
+            np.add.at(self._total, sender_ids, amount)
+            np.minimum.at(self._first_block, sender_ids, block)
+            np.maximum.at(self._last_block, sender_ids, block)
+            np.minimum.at(self._first_ts, sender_ids, timestamp)
+            np.maximum.at(self._last_ts, sender_ids, timestamp)
+            self.transfers += len(rows)
+        return len(rows)
+
+    def _stats(self, sender_id: int) -> SenderStats:
+        return SenderStats(
+            address=self.addresses[sender_id],
+            count=int(self._count[sender_id]),
+            total=float(self._total[sender_id]),
+            first_block=int(self._first_block[sender_id]),
+            last_block=int(self._last_block[sender_id]),
+            first_timestamp=int(self._first_ts[sender_id]),
+            last_timestamp=int(self._last_ts[sender_id])
+        )
+
+    def get(self, address: str) -> Optional[SenderStats]:
+        with self.lock:
+            sender_id = self._ids.get((address or '').lower())
+            return self._stats(sender_id) if sender_id is not None else None
+
+    def top(self, k: Optional[int] = None) -> List[SenderStats]:
+        """
+        K отправителей с наибольшим числом переводов (при равенстве - по сумме)
+
+        Args:
+            k: Количество строк (None - все отправители)
+        """
+        with self.lock:
+            size = len(self.addresses)
+            if k is None or k > size:
+                k = size
+            if k <= 0:
+                return []
+            count = self._count[:size]
+            total = self._total[:size]
+            candidates = np.arange(size)
+            if k < size:
+                # Отбор без полной сортировки; граничное значение захватывается целиком
+                threshold = np.partition(count, size - k)[size - k]
+                candidates = np.flatnonzero(count >= threshold)
+            order = np.lexsort((-total[candidates], -count[candidates]))[:k]
+            return [self._stats(int(i)) for i in candidates[order]]
@@ -0,0 +1,438 @@
+"""
+Замеры времени запуска приложения
+
+Этапы запуска отмечаются через mark(), отсчет идет от set_origin() (начало
+main.py) или от импорта модуля. После первой отрисовки окна report() пишет в
+лог сводку: время до первого окна и длительность каждого этапа.
+
+Профилирование запуска (флаг --profile-startup[=путь] или переменная
+окружения WALLET_SENDER_PROFILE_STARTUP=путь) дополнительно записывает время
+импорта каждого модуля (собственное и суммарное) и время создания синглтонов
+(measure), сохраняет отчет в JSON и сравнивает его с базовым отчетом
+(--profile-baseline=путь / WALLET_SENDER_PROFILE_BASELINE).
+
+Сравнение двух отчетов из командной строки (код выхода 1 при регрессии):
+    python -m wallet_sender.utils.startup_timing report.json baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import threading
+import logging
+import importlib.abc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Только стандартная библиотека: модуль импортируется первым в main.py, и все
+# модули пакета (включая utils.logger) должны попасть в профиль импортов
+logger = logging.getLogger(__name__)
+
+
+_origin = time.perf_counter()
+_marks: List[Tuple[str, float]] = []
+_singletons: Dict[str, float] = {}
+_lock = threading.Lock()
+
+# Этап, по которому считается время до первого окна
+FIRST_WINDOW = 'first_paint'
+
+PROFILE_ENV = 'WALLET_SENDER_PROFILE_STARTUP'
+BASELINE_ENV = 'WALLET_SENDER_PROFILE_BASELINE'
+DEFAULT_REPORT = 'startup_profile.json'
+
+# Порог регрессии: и относительный, и абсолютный (шум на мелких значениях)
+REGRESSION_PCT = 20.0
+REGRESSION_MIN_MS = 25.0
+
+
+class _ProfileSettings:
+    """Настройки профилирования текущего запуска"""
+
+    def __init__(self, output_path: str, baseline_path: Optional[str], exit_after_paint: bool):
+        self.output_path = output_path
+        self.baseline_path = baseline_path
+        self.exit_after_paint = exit_after_paint
+
+
+_profile: Optional[_ProfileSettings] = None
+_import_profiler: Optional['_ImportProfiler'] = None
+
+
+def set_origin(origin: Optional[float] = None):
+    """Установка точки отсчета (perf_counter), по умолчанию - текущий момент"""
+    global _origin
+    with _lock:
+        _origin = time.perf_counter() if origin is None else origin
+        _marks.clear()
+
+
+def mark(stage: str) -> float:
+    """
+    Отметка завершения этапа запуска
+
+    Returns:
+        Время от точки отсчета (мс)
+    """
+    elapsed_ms = (time.perf_counter() - _origin) * 1000
+    with _lock:
+        _marks.append((stage, elapsed_ms))
+    return elapsed_ms
+
+
+def get_marks() -> Dict[str, float]:
+    """Отметки этапов: {этап: мс от точки отсчета}"""
+    with _lock:
+        return {stage: round(ms, 1) for stage, ms in _marks}
+
+
+@contextmanager
+def measure(name: str):
+    """Замер создания синглтона (get_store, get_rpc_pool, ...)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with _lock:
+            _singletons[name] = _singletons.get(name, 0.0) + elapsed_ms
+
+
+def _stages() -> Tuple[List[Dict[str, Any]], Optional[float]]:
+    with _lock:
+        marks = list(_marks)
+
+    stages = []
+    previous = 0.0
+    for stage, at_ms in marks:
+        stages.append({
+            'stage': stage,
+            'at_ms': round(at_ms, 1),
+            'duration_ms': round(at_ms - previous, 1),
+        })
+        previous = at_ms
+
+    first_window = next((at for stage, at in marks if stage == FIRST_WINDOW), None)
+    return stages, first_window
+
+
+def report() -> Dict[str, object]:
+    """
+    Сводка по запуску (дополнительно пишется в лог)
+
+    Returns:
+        {'time_to_first_window_ms': ..., 'stages': [{'stage', 'at_ms', 'duration_ms'}]}
+    """
+    stages, first_window = _stages()
+    summary = {
+        'time_to_first_window_ms': round(first_window, 1) if first_window is not None else None,
+        'stages': stages,
+    }
+
+    details = ', '.join(f"{item['stage']} +{item['duration_ms']:.0f}" for item in stages)
+    if first_window is not None:
+        logger.info(f"[TIME] Время до первого окна: {first_window:.0f} мс ({details})")
+    else:
+        logger.info(f"[TIME] Этапы запуска (мс): {details}")
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Профилирование импортов
+# ---------------------------------------------------------------------------
+
+class _TimedLoader:
+    """Обертка загрузчика, замеряющая выполнение модуля"""
+
+    def __init__(self, loader, fullname: str, profiler: '_ImportProfiler'):
+        self._loader = loader
+        self._fullname = fullname
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Модулю возвращается исходный загрузчик, обертка нужна только на время импорта
+        spec = getattr(module, '__spec__', None)
+        if spec is not None and spec.loader is self:
+            spec.loader = self._loader
+        if getattr(module, '__loader__', None) is self:
+            module.__loader__ = self._loader
+        with self._profiler.timing(self._fullname):
+            self._loader.exec_module(module)
+
+
+class _ImportProfiler(importlib.abc.MetaPathFinder):
+    """Finder, замеряющий время выполнения каждого импортируемого модуля"""
+
+    def __init__(self):
+        self.records: Dict[str, Dict[str, float]] = {}
+        self.preloaded = len(sys.modules)
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, 'finding', False):
+            return None
+        self._local.finding = True
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                if finder is self:
+                    continue
+                find_spec = getattr(finder, 'find_spec', None)
+                if find_spec is None:
+                    continue
+                spec = find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._local.finding = False
+
+        if spec is None or spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        spec.loader = _TimedLoader(spec.loader, fullname, self)
+        return spec
+
+    @contextmanager
+    def timing(self, fullname: str):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        frame = [fullname, 0.0]
+        stack.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            cumulative = (time.perf_counter() - started) * 1000
+            stack.pop()
+            if stack:
+                stack[-1][1] += cumulative
+            self.records[fullname] = {
+                'cumulative_ms': round(cumulative, 2),
+                'self_ms': round(cumulative - frame[1], 2),
+                'depth': len(stack),
+            }
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+# ---------------------------------------------------------------------------
+# Включение профилирования, отчет и сравнение с базовым
+# ---------------------------------------------------------------------------
+
+def enable_profiling(output_path: str = DEFAULT_REPORT, baseline_path: Optional[str] = None,
+                     exit_after_paint: bool = False):
+    """
+    Включение профилирования запуска (вызывать как можно раньше)
+
+    Args:
+        output_path: Файл JSON отчета
+        baseline_path: Базовый отчет для сравнения
+        exit_after_paint: Завершить приложение после первой отрисовки (бенчмарк)
+    """
+    global _profile, _import_profiler
+    _profile = _ProfileSettings(output_path, baseline_path, exit_after_paint)
+    if _import_profiler is None:
+        _import_profiler = _ImportProfiler()
+        _import_profiler.install()
+
+
+def is_profiling() -> bool:
+    """Включено ли профилирование"""
+    return _profile is not None
+
+
+def should_exit_after_paint() -> bool:
+    """Нужно ли завершить приложение после первой отрисовки"""
+    return bool(_profile and _profile.exit_after_paint)
+
+
+def configure_from_argv(argv: List[str]) -> bool:
+    """
+    Включение профилирования по флагам командной строки или окружению
+
+    Флаги (удаляются из argv): --profile-startup[=путь], --profile-baseline=путь,
+    --profile-exit.
+
+    Returns:
+        True, если профилирование включено
+    """
+    output_path = os.environ.get(PROFILE_ENV) or None
+    baseline_path = os.environ.get(BASELINE_ENV) or None
+    exit_after_paint = False
+
+    remaining = []
+    for arg in argv:
+        if arg == '--profile-startup':
+            output_path = output_path or DEFAULT_REPORT
+        elif arg.startswith('--profile-startup='):
+            output_path = arg.split('=', 1)[1] or DEFAULT_REPORT
+        elif arg.startswith('--profile-baseline='):
+            baseline_path = arg.split('=', 1)[1] or None
+        elif arg == '--profile-exit':
+            exit_after_paint = True
+        else:
+            remaining.append(arg)
+    argv[:] = remaining
+
+    if output_path in ('1', 'true', 'yes'):
+        output_path = DEFAULT_REPORT
+    if output_path is None and (baseline_path or exit_after_paint):
+        output_path = DEFAULT_REPORT
+    if output_path is None:
+        return False
+
+    enable_profiling(output_path, baseline_path, exit_after_paint)
+    return True
+
+
+def build_report(top_imports: int = 40) -> Dict[str, Any]:
+    """Машиночитаемый отчет о запуске"""
+    stages, first_window = _stages()
+    with _lock:
+        singletons = {name: round(ms, 1) for name, ms in _singletons.items()}
+
+    imports: Dict[str, Any] = {}
+    if _import_profiler is not None:
+        records = dict(_import_profiler.records)
+        top_level = [r for r in records.values() if r['depth'] == 0]
+        slowest = sorted(records.items(), key=lambda item: item[1]['self_ms'], reverse=True)
+        imports = {
+            'preloaded_modules': _import_profiler.preloaded,
+            'profiled_modules': len(records),
+            'total_ms': round(sum(r['cumulative_ms'] for r in top_level), 1),
+            'top_self': [dict(module=name, **record) for name, record in slowest[:top_imports]],
+            'modules': records,
+        }
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time_to_first_window_ms': round(first_window, 1) if first_window is not None else None,
+        'stages': stages,
+        'singletons_ms': singletons,
+        'imports': imports,
+    }
+
+
+def _metrics(data: Dict[str, Any]) -> Dict[str, float]:
+    """Плоский набор метрик отчета для сравнения"""
+    metrics: Dict[str, float] = {}
+    if data.get('time_to_first_window_ms') is not None:
+        metrics['time_to_first_window_ms'] = data['time_to_first_window_ms']
+    for stage in data.get('stages', []):
+        metrics[f"stage:{stage['stage']}"] = stage['duration_ms']
+    for name, ms in (data.get('singletons_ms') or {}).items():
+        metrics[f'singleton:{name}'] = ms
+    imports = data.get('imports') or {}
+    if 'total_ms' in imports:
+        metrics['imports:total_ms'] = imports['total_ms']
+    for name, record in (imports.get('modules') or {}).items():
+        if name.startswith('wallet_sender') or record.get('depth') == 0:
+            metrics[f'import:{name}'] = record['cumulative_ms']
+    return metrics
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold_pct: float = REGRESSION_PCT,
+                    min_delta_ms: float = REGRESSION_MIN_MS) -> Dict[str, Any]:
+    """
+    Сравнение отчета с базовым
+
+    Регрессия - метрика выросла больше чем на threshold_pct процентов и
+    больше чем на min_delta_ms миллисекунд.
+
+    Returns:
+        {'regressions': [...], 'improvements': [...], 'new': [...], 'missing': [...]}
+    """
+    now, base = _metrics(current), _metrics(baseline)
+    result: Dict[str, Any] = {'regressions': [], 'improvements': [],
+                              'new': sorted(set(now) - set(base)),
+                              'missing': sorted(set(base) - set(now))}
+    for name in sorted(set(now) & set(base)):
+        before, after = base[name], now[name]
+        delta = after - before
+        pct = (delta / before * 100) if before else (100.0 if delta > 0 else 0.0)
+        if abs(delta) < min_delta_ms or abs(pct) < threshold_pct:
+            continue
+        entry = {'metric': name, 'baseline_ms': before, 'current_ms': after,
+                 'delta_ms': round(delta, 1), 'delta_pct': round(pct, 1)}
+        result['regressions' if delta > 0 else 'improvements'].append(entry)
+    result['regressions'].sort(key=lambda e: e['delta_ms'], reverse=True)
+    return result
+
+
+def finish() -> Optional[Dict[str, Any]]:
+    """
+    Завершение замеров (после первой отрисовки и запуска фоновых сервисов)
+
+    При включенном профилировании сохраняет JSON отчет и сравнение с
+    базовым отчетом (сводка в лог пишется отдельно через report()).
+    """
+    if _profile is None:
+        return None
+
+    data = build_report()
+    if _import_profiler is not None:
+        _import_profiler.uninstall()
+
+    if _profile.baseline_path:
+        try:
+            with open(_profile.baseline_path, 'r', encoding='utf-8') as f:
+                comparison = compare_reports(data, json.load(f))
+            data['baseline'] = {'path': _profile.baseline_path, **comparison}
+            for entry in comparison['regressions']:
+                logger.warning(f"[TIME] Регрессия запуска {entry['metric']}: "
+                               f"{entry['baseline_ms']} -> {entry['current_ms']} мс ({entry['delta_pct']:+.0f}%)")
+            if not comparison['regressions']:
+                logger.info("[TIME] Регрессий запуска относительно базового отчета нет")
+        except Exception as e:
+            logger.warning(f"[TIME] Не удалось сравнить с базовым отчетом: {e}")
+
+    try:
+        with open(_profile.output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logger.info(f"[TIME] Профиль запуска сохранен: {_profile.output_path}")
+    except Exception as e:
+        logger.error(f"[TIME] Ошибка сохранения профиля запуска: {e}")
+    return data
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Сравнение отчета с базовым из командной строки"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Сравнение профилей запуска WalletSender")
+    parser.add_argument('report', help="Текущий отчет (JSON)")
+    parser.add_argument('baseline', help="Базовый отчет (JSON)")
+    parser.add_argument('--threshold-pct', type=float, default=REGRESSION_PCT)
+    parser.add_argument('--min-delta-ms', type=float, default=REGRESSION_MIN_MS)
+    args = parser.parse_args(argv)
+
+    with open(args.report, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    comparison = compare_reports(current, baseline, args.threshold_pct, args.min_delta_ms)
+    print(json.dumps(comparison, ensure_ascii=False, indent=2))
+    return 1 if comparison['regressions'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Единый движок хранения SQLite
+
+Store (tx_history, jobs, found_tx, FTS5), модели SQLAlchemy (Database) и
+AnalyticsManager работают с одним файлом wallet_sender_store.db. Все
+соединения открывает движок (open_connection) с одинаковыми PRAGMA (WAL,
+synchronous=NORMAL, busy_timeout) и кешем подготовленных выражений
+(cached_statements). Store и аналитика используют одно соединение на поток;
+сессии SQLAlchemy держат транзакции независимо от них, поэтому берут
+соединения из ограниченного пула QueuePool (orm_pool_size + orm_max_overflow,
+ожидание orm_pool_timeout). get_stats() считает соединения обоих видов.
+Повторяющиеся INSERT/UPDATE горячего пути компилируются один раз на
+соединение, а таблицы разных подсистем можно соединять в одном запросе.
+
+Изменения схемы выполняются через migrate(name, fn): каждая миграция
+применяется один раз и записывается в schema_migrations. Данные прежних
+отдельных файлов (wallet_sender.db, analytics.db) переносятся миграцией
+import_legacy при первом запуске.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'wallet_sender_store.db')
+
+
+class StorageEngine:
+    """Общий SQLite файл с соединением на поток и учетом миграций"""
+
+    def __init__(self, path: Optional[str] = None, busy_timeout_ms: int = 5000,
+                 statement_cache: int = 256, trace_commits: bool = False,
+                 orm_pool_size: int = 8, orm_max_overflow: int = 16, orm_pool_timeout: float = 30.0):
+        """
+        Args:
+            path: Путь к файлу базы
+            busy_timeout_ms: Ожидание блокировки другим писателем
+            statement_cache: Размер кеша подготовленных выражений на соединение
+            trace_commits: Считать COMMIT всех соединений (для бенчмарков)
+            orm_pool_size: Соединения пула SQLAlchemy, остающиеся открытыми
+            orm_max_overflow: Дополнительные соединения пула сверх orm_pool_size
+            orm_pool_timeout: Ожидание свободного соединения пула, с
+        """
+        self.path = os.path.abspath(path or DEFAULT_PATH)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache = statement_cache
+        self.trace_commits = trace_commits
+        self.orm_pool_size = max(1, int(orm_pool_size))
+        self.orm_max_overflow = max(0, int(orm_max_overflow))
+        self.orm_pool_timeout = float(orm_pool_timeout)
+        self._pools: List[Any] = []
+
+        # Статистика
+        self.total_commits = 0
+
+        self._local = threading.local()
+        self._connections: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        self._lock = threading.Lock()
+
+        with self.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    name TEXT PRIMARY KEY,
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+
+    def open_connection(self) -> sqlite3.Connection:
+        """
+        Новое соединение с настройками движка (используется и пулом SQLAlchemy)
+
+        Соединение принадлежит одному потоку; проверка потока sqlite3 отключена,
+        чтобы соединения завершившихся потоков можно было закрыть из другого.
+        """
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0,
+                               check_same_thread=False,
+                               cached_statements=self.statement_cache)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        if self.trace_commits:
+            conn.set_trace_callback(self._trace)
+        return conn
+
+    def _trace(self, statement: str):
+        if statement == 'COMMIT':
+            with self._lock:
+                self.total_commits += 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Соединение текущего потока
+
+        Соединение не закрывается после блока. Незакоммиченные изменения
+        откатываются при выходе из внешнего блока, как при закрытии
+        отдельного соединения раньше.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.open_connection()
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                # Соединения завершившихся потоков закрываются
+                alive = []
+                for thread, other in self._connections:
+                    if thread.is_alive():
+                        alive.append((thread, other))
+                    else:
+                        other.close()
+                alive.append((threading.current_thread(), conn))
+                self._connections = alive
+
+        self._local.depth += 1
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0 and conn.in_transaction:
+                conn.rollback()
+
+    def applied_migrations(self) -> List[str]:
+        with self.connection() as conn:
+            return [row[0] for row in conn.execute('SELECT name FROM schema_migrations ORDER BY applied_at, name')]
+
+    def migrate(self, name: str, migration: Callable[[sqlite3.Connection], None]) -> bool:
+        """
+        Однократное применение миграции в одной транзакции
+
+        Returns:
+            True, если миграция применена сейчас
+        """
+        with self.connection() as conn:
+            if conn.execute('SELECT 1 FROM schema_migrations WHERE name = ?', (name,)).fetchone():
+                return False
+            try:
+                migration(conn)
+                conn.execute('INSERT INTO schema_migrations (name) VALUES (?)', (name,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        logger.info(f"Применена миграция хранилища: {name}")
+        return True
+
+    def import_legacy(self, legacy_path: str, tables: Iterable[str],
+                      renames: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Перенос таблиц из прежнего отдельного файла (однократно)
+
+        Копируются общие колонки и только в пустые таблицы, схема которых уже
+        создана владельцем. Исходный файл не изменяется.
+
+        Args:
+            legacy_path: Путь к старому файлу
+            tables: Имена таблиц в старом файле
+            renames: Новые имена таблиц (старое -> новое)
+        """
+        legacy_path = os.path.abspath(legacy_path)
+        name = f"import_legacy:{os.path.basename(legacy_path)}"
+        if legacy_path == self.path or not os.path.exists(legacy_path):
+            return False
+        renames = renames or {}
+
+        def copy(conn: sqlite3.Connection):
+            conn.commit()
+            conn.execute('ATTACH DATABASE ? AS legacy', (legacy_path,))
+            try:
+                for table in tables:
+                    target = renames.get(table, table)
+                    source_columns = [row[1] for row in conn.execute(f'PRAGMA legacy.table_info("{table}")')]
+                    target_columns = {row[1] for row in conn.execute(f'PRAGMA main.table_info("{target}")')}
+                    columns = [column for column in source_columns if column in target_columns]
+                    if not columns or conn.execute(f'SELECT 1 FROM main."{target}" LIMIT 1').fetchone():
+                        continue
+                    column_list = ', '.join(f'"{column}"' for column in columns)
+                    copied = conn.execute(
+                        f'INSERT INTO main."{target}" ({column_list}) SELECT {column_list} FROM legacy."{table}"'
+                    ).rowcount
+                    logger.info(f"Перенесено {copied} строк {legacy_path}:{table} -> {target}")
+                conn.commit()
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                conn.execute('DETACH DATABASE legacy')
+
+        return self.migrate(name, copy)
+
+    def attach_pool(self, pool):
+        """Учет соединений пула SQLAlchemy в get_stats()"""
+        with self._lock:
+            self._pools.append(pool)
+
+    def detach_pool(self, pool):
+        with self._lock:
+            self._pools = [other for other in self._pools if other is not pool]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pooled = sum(pool.checkedin() + pool.checkedout() for pool in self._pools)
+            return {
+                'path': self.path,
+                'connections': len(self._connections) + pooled,
+                'thread_connections': len(self._connections),
+                'orm_connections': pooled,
+                'total_commits': self.total_commits if self.trace_commits else None,
+            }
+
+    def close(self):
+        """Закрытие соединений всех потоков"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _, conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+
+# Глобальный экземпляр
+_storage: Optional[StorageEngine] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageEngine:
+    """Получение общего движка хранения (путь и параметры из секции storage конфига)"""
+    global _storage
+
+    with _storage_lock:
+        if _storage is None:
+            settings = {}
+            try:
+                from ..config import get_config
+                settings = get_config().get('storage', {}) or {}
+            except Exception:
+                pass
+            _storage = StorageEngine(
+                path=settings.get('path') or None,
+                busy_timeout_ms=settings.get('busy_timeout_ms', 5000),
+                statement_cache=settings.get('statement_cache', 256),
+                trace_commits=settings.get('trace_commits', False),
+                orm_pool_size=settings.get('orm_pool_size', 8),
+                orm_max_overflow=settings.get('orm_max_overflow', 16),
+                orm_pool_timeout=settings.get('orm_pool_timeout', 30)
+            )
+
+    return _storage
+
+
+def close_storage():
+    """Закрытие общего движка хранения"""
+    global _storage
+
+    with _storage_lock:
+        if _storage:
+            _storage.close()
+            _storage = None
@@ -0,0 +1,404 @@
+"""
+Симуляция покупки и продажи токена через eth_call
+
+Проверка "можно ли продать" выполняется без реальной транзакции: в
+eth_call с переопределением состояния (state override) на служебный адрес
+помещается код Multicall3 и баланс BNB, после чего один вызов
+aggregate3Value последовательно выполняет в одном состоянии:
+
+    покупку через роутер PancakeSwap (BNB -> токен), перевод части токенов
+    на другой адрес, approve и продажу части токенов (токен -> WBNB)
+
+и возвращает балансы до и после каждого шага. Из них вычисляются
+фактические комиссии покупки, продажи и перевода. Вызов идет от адреса,
+на котором размещен код (tx.origin == msg.sender), поэтому проверки
+"только EOA" в токенах не искажают результат.
+
+Перед симуляцией одним пакетом запрашиваются котировки getAmountsOut
+(прямая пара с WBNB или маршрут через USDT) - от них зависят суммы
+перевода и продажи. Оба раунда - пакетные JSON-RPC запросы по многим
+токенам, закрепленные на одном блоке; результаты кешируются на окно из
+block_window блоков.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cache_manager import get_cache
+from .logger import get_logger
+from ..constants import CONTRACTS
+
+logger = get_logger(__name__)
+
+
+MULTICALL3 = '0xcA11bde05977b3631167028862bE2a173976CA11'
+
+# Служебные адреса без состояния: исполнитель симуляции и получатель перевода
+SIMULATOR_ADDRESS = '0x' + '51a1' * 10
+PROBE_ADDRESS = '0x' + '9e0b' * 10
+
+SELECTOR_AGGREGATE3_VALUE = '0x174dea71'
+SELECTOR_BUY = '0xb6f9de95'     # swapExactETHForTokensSupportingFeeOnTransferTokens
+SELECTOR_SELL = '0x5c11d795'    # swapExactTokensForTokensSupportingFeeOnTransferTokens
+SELECTOR_AMOUNTS_OUT = '0xd06ca61f'
+SELECTOR_BALANCE_OF = '0x70a08231'
+SELECTOR_TRANSFER = '0xa9059cbb'
+SELECTOR_APPROVE = '0x095ea7b3'
+
+_DEADLINE = 2 ** 255
+_SIMULATOR_BALANCE = 10 ** 30
+
+# Шаги aggregate3Value (индексы результатов)
+(_STEP_TOKEN_BEFORE, _STEP_BUY, _STEP_TOKEN_AFTER, _STEP_TRANSFER, _STEP_PROBE,
+ _STEP_APPROVE, _STEP_WBNB_BEFORE, _STEP_SELL_QUOTE, _STEP_SELL, _STEP_WBNB_AFTER) = range(10)
+
+
+@dataclass
+class SimulationResult:
+    """Результат симуляции покупки и продажи токена"""
+    token: str
+    block: int
+    path: List[str] = field(default_factory=list)
+    can_buy: bool = False
+    can_sell: bool = False
+    can_transfer: bool = False
+    buy_tax: Optional[float] = None
+    sell_tax: Optional[float] = None
+    transfer_tax: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def has_route(self) -> bool:
+        return bool(self.path)
+
+    @property
+    def max_tax(self) -> float:
+        return max(tax for tax in (self.buy_tax, self.sell_tax, 0.0) if tax is not None)
+
+
+def _word(value: int) -> bytes:
+    return int(value).to_bytes(32, 'big')
+
+
+def _address_word(address: str) -> bytes:
+    return bytes(12) + bytes.fromhex(address[2:])
+
+
+def _word_at(data: bytes, position: int) -> int:
+    return int.from_bytes(data[position:position + 32], 'big')
+
+
+def encode_call(selector: str, *args) -> bytes:
+    """ABI вызов: int/bool - слово, str - адрес, list - address[]"""
+    heads, tails = [], b''
+    head_size = 32 * len(args)
+    for arg in args:
+        if isinstance(arg, list):
+            heads.append(_word(head_size + len(tails)))
+            tails += _word(len(arg)) + b''.join(_address_word(address) for address in arg)
+        elif isinstance(arg, str):
+            heads.append(_address_word(arg))
+        else:
+            heads.append(_word(arg))
+    return bytes.fromhex(selector[2:]) + b''.join(heads) + tails
+
+
+def encode_aggregate3_value(calls: List[Tuple[str, int, bytes]]) -> bytes:
+    """aggregate3Value((address,bool,uint256,bytes)[]) с allowFailure = true"""
+    elements = []
+    for target, value, data in calls:
+        padded = data + bytes(-len(data) % 32)
+        elements.append(_address_word(target) + _word(1) + _word(value) + _word(128) +
+                        _word(len(data)) + padded)
+    offsets, position = [], 32 * len(elements)
+    for element in elements:
+        offsets.append(_word(position))
+        position += len(element)
+    return (bytes.fromhex(SELECTOR_AGGREGATE3_VALUE[2:]) + _word(32) + _word(len(elements)) +
+            b''.join(offsets) + b''.join(elements))
+
+
+def decode_aggregate_results(data: bytes) -> List[Tuple[bool, bytes]]:
+    """Результаты aggregate3: (bool success, bytes returnData)[]"""
+    base = _word_at(data, 0)
+    count = _word_at(data, base)
+    head = base + 32
+    results = []
+    for i in range(count):
+        start = head + _word_at(data, head + 32 * i)
+        success = _word_at(data, start) != 0
+        position = start + _word_at(data, start + 32)
+        length = _word_at(data, position)
+        results.append((success, data[position + 32:position + 32 + length]))
+    return results
+
+
+def decode_uint_array(data: bytes) -> List[int]:
+    """uint256[] (ответ getAmountsOut)"""
+    if len(data) < 64:
+        return []
+    base = _word_at(data, 0)
+    count = _word_at(data, base)
+    return [_word_at(data, base + 32 * (i + 1)) for i in range(count)]
+
+
+def _to_bytes(hex_value) -> bytes:
+    if not hex_value or not isinstance(hex_value, str):
+        return b''
+    return bytes.fromhex(hex_value[2:] if hex_value.startswith('0x') else hex_value)
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class SwapSimulator:
+    """Пакетная симуляция покупки и продажи токенов через eth_call"""
+
+    def __init__(self, web3_instance=None, rpc_url: Optional[str] = None,
+                 transport: Optional[Callable[[List[dict]], object]] = None,
+                 amount_bnb: Optional[float] = None, block_window: Optional[int] = None):
+        """
+        Args:
+            web3_instance: Экземпляр Web3 (номер блока через общий кеш)
+            rpc_url: JSON-RPC endpoint (по умолчанию - из конфига)
+            transport: Отправка JSON-RPC запроса (список вызовов -> ответ)
+            amount_bnb: Сумма симулируемой покупки в BNB
+            block_window: Блоков, в течение которых результат не пересчитывается
+        """
+        settings = {}
+        try:
+            from ..config import get_config
+            settings = get_config().get('swap_simulation', {}) or {}
+        except Exception:
+            pass
+
+        self.web3 = web3_instance
+        self.amount_wei = int((amount_bnb or settings.get('amount_bnb', 0.01)) * 10 ** 18)
+        self.block_window = max(1, int(block_window or settings.get('block_window', 20)))
+        self.batch_tokens = max(1, int(settings.get('batch_tokens', 20)))
+        self.workers = max(1, int(settings.get('workers', 4)))
+        self.timeout = settings.get('timeout', 30)
+        self.router = settings.get('router') or CONTRACTS['PANCAKESWAP_ROUTER']
+        self.multicall = settings.get('multicall') or MULTICALL3
+        self.wbnb = CONTRACTS['WBNB'].lower()
+        self.usdt = CONTRACTS['USDT'].lower()
+
+        self.rpc_url = rpc_url or settings.get('rpc_url') or None
+        self._session = None
+        if transport:
+            self.transport = transport
+        else:
+            if not self.rpc_url:
+                from ..config import get_config
+                self.rpc_url = get_config().get_rpc_url()
+            self.transport = self._http_transport
+
+        # Код Multicall3 для переопределения (запрашивается в первом пакете котировок)
+        self._multicall_code: Optional[str] = None
+
+    def _http_transport(self, payload: List[dict]) -> object:
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        response = self._session.post(self.rpc_url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _send(self, payload: List[dict]) -> Dict[int, dict]:
+        response = self.transport(payload)
+        if not isinstance(response, list):
+            response = [response]
+        return {item.get('id'): item for item in response if isinstance(item, dict)}
+
+    def _block_number(self) -> int:
+        if self.web3 is not None:
+            from .balance_reader import get_block_number
+            return int(get_block_number(self.web3))
+        item = self._send([{'jsonrpc': '2.0', 'id': 0, 'method': 'eth_blockNumber', 'params': []}]).get(0)
+        return int(item['result'], 16)
+
+    def _routes(self, token: str) -> List[List[str]]:
+        """Маршруты покупки: прямая пара с WBNB или через USDT"""
+        if token in (self.wbnb, self.usdt):
+            return []
+        return [[self.wbnb, token], [self.wbnb, self.usdt, token]]
+
+    def simulate(self, token: str) -> SimulationResult:
+        return self.simulate_many([token])[token.lower()]
+
+    def simulate_many(self, tokens: Iterable[str]) -> Dict[str, SimulationResult]:
+        """
+        Симуляция списка токенов
+
+        Returns:
+            Словарь адрес в нижнем регистре -> результат
+        """
+        unique = list(dict.fromkeys(token.lower() for token in tokens if token))
+        if not unique:
+            return {}
+        block = self._block_number()
+        window = block // self.block_window
+        cache = get_cache()
+
+        results: Dict[str, SimulationResult] = {}
+        missing = []
+        for token in unique:
+            cached = cache.get('swap_simulation', f'{token}|{window}')
+            if cached is not None:
+                results[token] = cached
+            else:
+                missing.append(token)
+
+        if missing:
+            started = time.time()
+            batches = list(_chunks(missing, self.batch_tokens))
+            if len(batches) == 1:
+                simulated = [self._simulate_batch(batches[0], block)]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(batches)),
+                                        thread_name_prefix="SwapSim") as pool:
+                    simulated = list(pool.map(lambda batch: self._simulate_batch(batch, block), batches))
+            for batch_results in simulated:
+                for token, result in batch_results.items():
+                    if result.error is None:
+                        cache.set('swap_simulation', f'{token}|{window}', result)
+                    results[token] = result
+            logger.info(
+                f"Симуляция свапов: {len(missing)} токенов за {time.time() - started:.2f} с "
+                f"(блок {block}, {len(unique) - len(missing)} из кеша)"
+            )
+        return results
+
+    def _quote_round(self, tokens: List[str], block_tag: str) -> Dict[str, Tuple[List[str], int]]:
+        """Котировки покупки по всем маршрутам: токен -> (лучший маршрут, ожидаемое количество)"""
+        plan: List[Tuple[Optional[str], Optional[List[str]]]] = []
+        payload = []
+        if self._multicall_code is None:
+            plan.append((None, None))
+            payload.append({'jsonrpc': '2.0', 'id': 0, 'method': 'eth_getCode',
+                            'params': [self.multicall, block_tag]})
+        for token in tokens:
+            for path in self._routes(token):
+                data = encode_call(SELECTOR_AMOUNTS_OUT, self.amount_wei, path)
+                plan.append((token, path))
+                payload.append({'jsonrpc': '2.0', 'id': len(payload), 'method': 'eth_call',
+                                'params': [{'to': self.router, 'data': '0x' + data.hex()}, block_tag]})
+
+        responses = self._send(payload)
+        quotes: Dict[str, Tuple[List[str], int]] = {}
+        for call_id, (token, path) in enumerate(plan):
+            item = responses.get(call_id) or {}
+            if token is None:
+                code = item.get('result')
+                if code and code != '0x':
+                    self._multicall_code = code
+                continue
+            amounts = decode_uint_array(_to_bytes(item.get('result')))
+            if amounts and amounts[-1] > quotes.get(token, ([], 0))[1]:
+                quotes[token] = (path, amounts[-1])
+        return quotes
+
+    def _steps(self, token: str, path: List[str], expected: int) -> List[Tuple[str, int, bytes]]:
+        """Шаги покупки, перевода и продажи в одном состоянии"""
+        # Перевод и продажа используют часть ожидаемого количества: суммы
+        # кодируются заранее, а фактически полученное меньше на комиссию покупки
+        transfer_amount = expected // 10
+        sell_amount = expected // 4
+        sell_path = list(reversed(path))
+        sim = SIMULATOR_ADDRESS
+        return [
+            (token, 0, encode_call(SELECTOR_BALANCE_OF, sim)),
+            (self.router, self.amount_wei, encode_call(SELECTOR_BUY, 0, path, sim, _DEADLINE)),
+            (token, 0, encode_call(SELECTOR_BALANCE_OF, sim)),
+            (token, 0, encode_call(SELECTOR_TRANSFER, PROBE_ADDRESS, transfer_amount)),
+            (token, 0, encode_call(SELECTOR_BALANCE_OF, PROBE_ADDRESS)),
+            (token, 0, encode_call(SELECTOR_APPROVE, self.router, sell_amount)),
+            (self.wbnb, 0, encode_call(SELECTOR_BALANCE_OF, sim)),
+            (self.router, 0, encode_call(SELECTOR_AMOUNTS_OUT, sell_amount, sell_path)),
+            (self.router, 0, encode_call(SELECTOR_SELL, sell_amount, 0, sell_path, sim, _DEADLINE)),
+            (self.wbnb, 0, encode_call(SELECTOR_BALANCE_OF, sim)),
+        ]
+
+    def _simulate_batch(self, tokens: List[str], block: int) -> Dict[str, SimulationResult]:
+        block_tag = hex(block)
+        results = {token: SimulationResult(token=token, block=block) for token in tokens}
+        try:
+            quotes = self._quote_round(tokens, block_tag)
+        except Exception as e:
+            logger.warning(f"Ошибка котировок симуляции ({len(tokens)} токенов): {e}")
+            for result in results.values():
+                result.error = str(e)
+            return results
+        if not quotes:
+            return results  # Ни у одного токена нет маршрута покупки
+        if self._multicall_code is None:
+            for token in quotes:
+                results[token].error = "Multicall3 недоступен на endpoint"
+            return results
+
+        plan = []
+        payload = []
+        overrides = {SIMULATOR_ADDRESS: {'balance': hex(_SIMULATOR_BALANCE), 'code': self._multicall_code}}
+        for token, (path, expected) in quotes.items():
+            results[token].path = path
+            data = encode_aggregate3_value(self._steps(token, path, expected))
+            call = {'from': SIMULATOR_ADDRESS, 'to': SIMULATOR_ADDRESS,
+                    'value': hex(self.amount_wei), 'data': '0x' + data.hex()}
+            plan.append((token, expected))
+            payload.append({'jsonrpc': '2.0', 'id': len(payload), 'method': 'eth_call',
+                            'params': [call, block_tag, overrides]})
+
+        try:
+            responses = self._send(payload)
+        except Exception as e:
+            logger.warning(f"Ошибка пакета симуляции ({len(payload)} токенов): {e}")
+            for token, _ in plan:
+                results[token].error = str(e)
+            return results
+
+        for call_id, (token, expected) in enumerate(plan):
+            item = responses.get(call_id) or {}
+            if 'result' not in item:
+                error = item.get('error')
+                results[token].error = (error or {}).get('message', 'нет ответа') if isinstance(error, dict) else str(error)
+                continue
+            try:
+                self._evaluate(results[token], decode_aggregate_results(_to_bytes(item['result'])), expected)
+            except Exception as e:
+                results[token].error = f"Некорректный ответ симуляции: {e}"
+        return results
+
+    @staticmethod
+    def _evaluate(result: SimulationResult, steps: List[Tuple[bool, bytes]], expected: int):
+        """Комиссии по балансам до и после шагов"""
+        def ok(step: int) -> bool:
+            return steps[step][0]
+
+        def uint(step: int) -> int:
+            return _word_at(steps[step][1], 0)
+
+        result.can_buy = ok(_STEP_BUY)
+        if not result.can_buy:
+            return
+        received = uint(_STEP_TOKEN_AFTER) - uint(_STEP_TOKEN_BEFORE)
+        result.buy_tax = max(0.0, 1 - received / expected) if expected else None
+
+        transfer_amount = expected // 10
+        result.can_transfer = ok(_STEP_TRANSFER)
+        if result.can_transfer and transfer_amount:
+            result.transfer_tax = max(0.0, 1 - uint(_STEP_PROBE) / transfer_amount)
+
+        result.can_sell = ok(_STEP_SELL)
+        quote = decode_uint_array(steps[_STEP_SELL_QUOTE][1]) if ok(_STEP_SELL_QUOTE) else []
+        if result.can_sell and quote and quote[-1]:
+            proceeds = uint(_STEP_WBNB_AFTER) - uint(_STEP_WBNB_BEFORE)
+            result.sell_tax = max(0.0, 1 - proceeds / quote[-1])
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
@@ -1,13 +1,113 @@
 """
 Утилиты для проверки безопасности токенов
+
+Все данные о токене собираются одним пакетным JSON-RPC запросом: код
+контракта, name/symbol/decimals/totalSupply/owner и резервы пар PancakeSwap
+(адрес пары вычисляется через CREATE2, без обращения к фабрике). Функции
+контракта определяются по 4-байтным селекторам из таблицы диспетчеризации
+байткода, а не поиском имен в коде. Проверка на honeypot - симуляция
+покупки и продажи через eth_call (см. swap_simulator).
+
+Разбор байткода кешируется по хешу кода (клоны токенов разбираются один
+раз, результат хранится на диске), отчеты - по адресу токена на время TTL
+пространства имен "token_safety". Список токенов проверяется параллельно
+пакетами по batch_tokens токенов.
 """
 
 import time
-from typing import Dict, Any, List, Optional, Tuple
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 from web3 import Web3
 
+from .cache_manager import get_cache
+from .logger import get_logger
+from .swap_simulator import SimulationResult, SwapSimulator
+from ..constants import CONTRACTS
+
+logger = get_logger(__name__)
+
+
+# PancakeSwap V2: фабрика и хеш init-кода пары для CREATE2
+PANCAKE_FACTORY = '0xcA143Ce32Fe78f1f7019d7d551a6402fC5350c73'
+PAIR_INIT_CODE_HASH = '0x00fb7f630766e6a796048ea87d01acd3068e8ff67d078148a3fa3f4a84f69bd5'
+
+# Котируемые токены пар и минимальный резерв (в единицах котируемого токена)
+DEFAULT_MIN_LIQUIDITY = {'WBNB': 1.0, 'USDT': 1000.0}
+
+ZERO_ADDRESS = '0x' + '0' * 40
+
+# Селекторы вызовов, выполняемых при проверке
+SELECTOR_GET_RESERVES = '0x0902f1ac'
+METADATA_SELECTORS = {
+    'name': '0x06fdde03',
+    'symbol': '0x95d89b41',
+    'decimals': '0x313ce567',
+    'total_supply': '0x18160ddd',
+    'owner': '0x8da5cb5b',
+}
+
+# Обязательные функции ERC20 (селектор -> сигнатура)
+ERC20_SELECTORS = {
+    '0x06fdde03': 'name()',
+    '0x95d89b41': 'symbol()',
+    '0x313ce567': 'decimals()',
+    '0x18160ddd': 'totalSupply()',
+    '0x70a08231': 'balanceOf(address)',
+    '0xa9059cbb': 'transfer(address,uint256)',
+    '0x095ea7b3': 'approve(address,uint256)',
+    '0xdd62ed3e': 'allowance(address,address)',
+    '0x23b872dd': 'transferFrom(address,address,uint256)',
+}
+
+# Функции управления, опасные при действующем владельце (селектор -> (сигнатура, категория))
+RISKY_SELECTORS: Dict[str, Tuple[str, str]] = {
+    '0xf9f92be4': ('blacklist(address)', 'blacklist'),
+    '0x44337ea1': ('addToBlacklist(address)', 'blacklist'),
+    '0x153b0d1e': ('setBlacklist(address,bool)', 'blacklist'),
+    '0x455a4396': ('blacklistAddress(address,bool)', 'blacklist'),
+    '0xd34628cc': ('addBots(address[])', 'blacklist'),
+    '0xb515566a': ('setBots(address[])', 'blacklist'),
+    '0xfe575a87': ('isBlacklisted(address)', 'blacklist'),
+    '0x8456cb59': ('pause()', 'pause'),
+    '0x3f4ba83a': ('unpause()', 'pause'),
+    '0xc2e5ec04': ('setTradingEnabled(bool)', 'pause'),
+    '0x8a8c523c': ('enableTrading()', 'pause'),
+    '0xc9567bf9': ('openTrading()', 'pause'),
+    '0x69fe0e2d': ('setFee(uint256)', 'fee'),
+    '0x0b78f9c0': ('setFees(uint256,uint256)', 'fee'),
+    '0x061c82d0': ('setTaxFeePercent(uint256)', 'fee'),
+    '0x0cc835a3': ('setBuyFee(uint256)', 'fee'),
+    '0x8b4cee08': ('setSellFee(uint256)', 'fee'),
+    '0x6db79437': ('updateFees(uint256,uint256)', 'fee'),
+    '0xc647b20e': ('setTaxes(uint256,uint256)', 'fee'),
+    '0xec28438a': ('setMaxTxAmount(uint256)', 'limit'),
+    '0xd543dbeb': ('setMaxTxPercent(uint256)', 'limit'),
+    '0xea1644d5': ('setMaxWalletSize(uint256)', 'limit'),
+    '0x5d0044ca': ('setMaxWallet(uint256)', 'limit'),
+    '0x5932ead1': ('setCooldownEnabled(bool)', 'limit'),
+    '0x40c10f19': ('mint(address,uint256)', 'mint'),
+    '0xa0712d68': ('mint(uint256)', 'mint'),
+    '0x3659cfe6': ('upgradeTo(address)', 'proxy'),
+    '0x4f1ef286': ('upgradeToAndCall(address,bytes)', 'proxy'),
+    '0x5c60da1b': ('implementation()', 'proxy'),
+}
+
+RISK_CATEGORIES = {
+    'blacklist': 'черный список',
+    'pause': 'остановка торговли',
+    'fee': 'изменение комиссий',
+    'limit': 'лимиты транзакций',
+    'mint': 'выпуск токенов',
+    'proxy': 'замена логики',
+}
+
+_OP_PUSH1 = 0x60
+_OP_PUSH32 = 0x7f
+_OP_DELEGATECALL = 0xf4
+
+
 class SafetyLevel(Enum):
     """Уровни безопасности"""
     SAFE = "safe"
@@ -33,371 +133,671 @@ class TokenSafetyReport:
     timestamp: float
     recommendations: List[str]
 
+@dataclass
+class TokenSnapshot:
+    """Данные токена из одного пакетного запроса"""
+    address: str
+    code_hash: Optional[str] = None
+    audit: Optional[Dict[str, Any]] = None
+    name: Optional[str] = None
+    symbol: Optional[str] = None
+    decimals: Optional[int] = None
+    total_supply: Optional[int] = None
+    owner: Optional[str] = None
+    reserves: Dict[str, float] = field(default_factory=dict)
+    errors: int = 0
+
+
+def dispatch_selectors(code: bytes) -> Tuple[Set[str], bool]:
+    """
+    Селекторы из таблицы диспетчеризации байткода
+
+    Компилятор сравнивает селектор вызова с константами PUSH4 (PUSH3, если
+    селектор начинается с нулевого байта). Данные PUSH пропускаются, поэтому
+    байты аргументов не принимаются за инструкции.
+
+    Returns:
+        (селекторы '0x........', есть ли инструкция DELEGATECALL)
+    """
+    selectors: Set[str] = set()
+    delegatecall = False
+    i, size = 0, len(code)
+    while i < size:
+        op = code[i]
+        if _OP_PUSH1 <= op <= _OP_PUSH32:
+            width = op - _OP_PUSH1 + 1
+            if width in (3, 4) and i + width < size:
+                selectors.add('0x' + code[i + 1:i + 1 + width].rjust(4, b'\0').hex())
+            i += width + 1
+            continue
+        if op == _OP_DELEGATECALL:
+            delegatecall = True
+        i += 1
+    return selectors, delegatecall
+
+
+def analyze_code(code: bytes) -> Dict[str, Any]:
+    """Разбор байткода (результат сериализуется в JSON для дискового кеша)"""
+    selectors, delegatecall = dispatch_selectors(code)
+    risky: Dict[str, List[str]] = {}
+    for selector, (signature, category) in RISKY_SELECTORS.items():
+        if selector in selectors:
+            risky.setdefault(category, []).append(signature)
+    return {
+        'size': len(code),
+        'missing_erc20': [sig for sel, sig in ERC20_SELECTORS.items() if sel not in selectors],
+        'risky': risky,
+        'delegatecall': delegatecall,
+    }
+
+
+def _to_bytes(hex_value: Optional[str]) -> bytes:
+    if not hex_value or not isinstance(hex_value, str):
+        return b''
+    return bytes.fromhex(hex_value[2:] if hex_value.startswith('0x') else hex_value)
+
+
+def _decode_uint(data: bytes, word: int = 0) -> Optional[int]:
+    chunk = data[word * 32:(word + 1) * 32]
+    return int.from_bytes(chunk, 'big') if len(chunk) == 32 else None
+
+
+def _decode_string(data: bytes) -> Optional[str]:
+    """ABI string или bytes32 (старые токены)"""
+    if len(data) >= 64 and _decode_uint(data) == 32:
+        length = _decode_uint(data, 1)
+        raw = data[64:64 + length]
+    elif len(data) == 32:
+        raw = data.rstrip(b'\0')
+    else:
+        return None
+    return raw.decode('utf-8', errors='replace')
+
+
+def _decode_address(data: bytes) -> Optional[str]:
+    return '0x' + data[12:32].hex() if len(data) >= 32 else None
+
+
+def pair_address(token: str, quote: str, factory: str = PANCAKE_FACTORY,
+                 init_code_hash: str = PAIR_INIT_CODE_HASH) -> str:
+    """Адрес пары PancakeSwap V2 (CREATE2: токены упорядочены по адресу)"""
+    token0, token1 = sorted((token.lower(), quote.lower()), key=lambda a: int(a, 16))
+    salt = Web3.keccak(_to_bytes(token0) + _to_bytes(token1))
+    digest = Web3.keccak(b'\xff' + _to_bytes(factory) + bytes(salt) + _to_bytes(init_code_hash))
+    return Web3.to_checksum_address('0x' + bytes(digest)[12:].hex())
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
 class TokenSafetyChecker:
     """Проверяет безопасность токенов"""
-    
-    def __init__(self, web3_instance):
+
+    def __init__(self, web3_instance, rpc_url: Optional[str] = None,
+                 transport: Optional[Callable[[List[dict]], object]] = None,
+                 workers: Optional[int] = None, batch_tokens: Optional[int] = None):
+        """
+        Args:
+            web3_instance: Экземпляр Web3 (его HTTP endpoint используется по умолчанию)
+            rpc_url: JSON-RPC endpoint для пакетных запросов
+            transport: Отправка JSON-RPC запроса (список вызовов -> ответ)
+            workers: Параллельных пакетных запросов
+            batch_tokens: Токенов в одном пакетном запросе
+        """
         self.web3 = web3_instance
-        
-        # Стандартный ERC20 ABI для проверок
-        self.erc20_abi = [
-            {"constant": True, "inputs": [], "name": "name", "outputs": [{"name": "", "type": "string"}], "type": "function"},
-            {"constant": True, "inputs": [], "name": "symbol", "outputs": [{"name": "", "type": "string"}], "type": "function"},
-            {"constant": True, "inputs": [], "name": "decimals", "outputs": [{"name": "", "type": "uint8"}], "type": "function"},
-            {"constant": True, "inputs": [], "name": "totalSupply", "outputs": [{"name": "", "type": "uint256"}], "type": "function"},
-            {"constant": True, "inputs": [{"name": "_owner", "type": "address"}], "name": "balanceOf", "outputs": [{"name": "balance", "type": "uint256"}], "type": "function"},
-            {"constant": False, "inputs": [{"name": "_spender", "type": "address"}, {"name": "_value", "type": "uint256"}], "name": "approve", "outputs": [{"name": "", "type": "bool"}], "type": "function"},
-            {"constant": True, "inputs": [{"name": "_owner", "type": "address"}, {"name": "_spender", "type": "address"}], "name": "allowance", "outputs": [{"name": "", "type": "uint256"}], "type": "function"},
-            {"constant": False, "inputs": [{"name": "_to", "type": "address"}, {"name": "_value", "type": "uint256"}], "name": "transfer", "outputs": [{"name": "", "type": "bool"}], "type": "function"}
-        ]
-        
-        # Известные опасные паттерны
-        self.dangerous_functions = [
-            'pause', 'unpause', 'freeze', 'unfreeze', 'blacklist', 'whitelist',
-            'mint', 'burn', 'setTax', 'setFee', 'setOwner', 'transferOwnership'
-        ]
-        
+
+        settings = {}
+        try:
+            from ..config import get_config
+            settings = get_config().get('token_safety', {}) or {}
+        except Exception:
+            pass
+
+        self.workers = max(1, int(workers or settings.get('workers', 4)))
+        self.batch_tokens = max(1, int(batch_tokens or settings.get('batch_tokens', 10)))
+        self.timeout = settings.get('timeout', 30)
+        self.factory = settings.get('factory') or PANCAKE_FACTORY
+        self.init_code_hash = settings.get('init_code_hash') or PAIR_INIT_CODE_HASH
+
+        # Котируемые токены: символ -> (адрес, минимальный резерв)
+        min_liquidity = dict(DEFAULT_MIN_LIQUIDITY)
+        min_liquidity.update(settings.get('min_liquidity') or {})
+        self.quotes = {
+            symbol: (CONTRACTS[symbol], float(minimum))
+            for symbol, minimum in min_liquidity.items() if symbol in CONTRACTS
+        }
+
+        if not rpc_url:
+            rpc_url = settings.get('rpc_url') or None
+        if not rpc_url:
+            endpoint = getattr(getattr(web3_instance, 'provider', None), 'endpoint_uri', None)
+            if endpoint and str(endpoint).startswith('http'):
+                rpc_url = str(endpoint)
+        self.rpc_url = rpc_url
+        self._session = None
+        if transport:
+            self.transport = transport
+        elif self.rpc_url or web3_instance is None:
+            if not self.rpc_url:
+                from ..config import get_config
+                self.rpc_url = get_config().get_rpc_url()
+            self.transport = self._http_transport
+        else:
+            self.transport = self._provider_transport
+
         # Известные безопасные токены
         self.known_safe_tokens = {
             '0x55d398326f99059fF775485246999027B3197955': 'USDT',  # USDT
             '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c': 'WBNB',  # WBNB
             '0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56': 'BUSD',  # BUSD
         }
-    
+        self._known_lower = {addr.lower(): name for addr, name in self.known_safe_tokens.items()}
+
+        # Симуляция покупки и продажи (пороги комиссий - доли от суммы)
+        simulation = {}
+        try:
+            from ..config import get_config
+            simulation = get_config().get('swap_simulation', {}) or {}
+        except Exception:
+            pass
+        self.warn_tax = float(simulation.get('warn_tax', 0.10))
+        self.max_tax = float(simulation.get('max_tax', 0.50))
+        self.simulator: Optional[SwapSimulator] = None
+        if simulation.get('enabled', True):
+            self.simulator = SwapSimulator(web3_instance, rpc_url=self.rpc_url, transport=self.transport)
+
+    def _http_transport(self, payload: List[dict]) -> object:
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        response = self._session.post(self.rpc_url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _provider_transport(self, payload: List[dict]) -> object:
+        """Провайдер без HTTP endpoint (IPC/WebSocket): вызовы по одному"""
+        responses = []
+        for call in payload:
+            response = dict(self.web3.provider.make_request(call['method'], call['params']))
+            response['id'] = call['id']
+            responses.append(response)
+        return responses
+
     def check_token_safety(self, token_address: str) -> TokenSafetyReport:
         """Проверяет безопасность токена"""
-        checks = []
-        
-        try:
-            # Проверяем, что адрес валидный
-            if not self._is_valid_address(token_address):
-                checks.append(SafetyCheck(
-                    name="Валидность адреса",
-                    passed=False,
-                    level=SafetyLevel.DANGEROUS,
-                    message="Неверный адрес токена"
-                ))
-                return TokenSafetyReport(
-                    token_address=token_address,
-                    overall_level=SafetyLevel.DANGEROUS,
-                    checks=checks,
-                    timestamp=time.time(),
-                    recommendations=["Проверьте правильность адреса токена"]
-                )
-            
-            # Проверяем наличие контракта
-            contract_check = self._check_contract_exists(token_address)
-            checks.append(contract_check)
-            
-            if not contract_check.passed:
-                return TokenSafetyReport(
-                    token_address=token_address,
-                    overall_level=SafetyLevel.DANGEROUS,
-                    checks=checks,
-                    timestamp=time.time(),
-                    recommendations=["Контракт не существует или не развернут"]
-                )
-            
-            # Проверяем стандартные функции ERC20
-            checks.append(self._check_erc20_functions(token_address))
-            
-            # Проверяем информацию о токене
-            checks.append(self._check_token_info(token_address))
-            
-            # Проверяем на honeypot
-            checks.append(self._check_honeypot(token_address))
-            
-            # Проверяем ликвидность
-            checks.append(self._check_liquidity(token_address))
-            
-            # Проверяем на подозрительные функции
-            checks.append(self._check_suspicious_functions(token_address))
-            
-            # Проверяем известные токены
-            checks.append(self._check_known_token(token_address))
-            
-            # Определяем общий уровень безопасности
-            overall_level = self._determine_overall_level(checks)
-            
-            # Генерируем рекомендации
-            recommendations = self._generate_recommendations(checks, overall_level)
-            
-            return TokenSafetyReport(
-                token_address=token_address,
-                overall_level=overall_level,
-                checks=checks,
-                timestamp=time.time(),
-                recommendations=recommendations
+        return self.check_tokens([token_address])[token_address]
+
+    def check_tokens(self, token_addresses: Iterable[str]) -> Dict[str, TokenSafetyReport]:
+        """
+        Проверка списка токенов (параллельно, с кешем отчетов)
+
+        Returns:
+            Словарь адрес (как передан) -> отчет
+        """
+        addresses = list(dict.fromkeys(token_addresses))
+        reports: Dict[str, TokenSafetyReport] = {}
+        cache = get_cache()
+
+        pending: Dict[str, List[str]] = {}
+        for address in addresses:
+            if not self._is_valid_address(address):
+                reports[address] = self._invalid_report(address)
+                continue
+            cached = cache.get('token_safety', address.lower())
+            if cached is not None:
+                reports[address] = cached
+            else:
+                pending.setdefault(address.lower(), []).append(address)
+
+        if pending:
+            started = time.time()
+            batches = list(_chunks(list(pending), self.batch_tokens))
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches)),
+                                    thread_name_prefix="TokenSafety") as pool:
+                for batch_reports in pool.map(self._scan_batch, batches):
+                    for token, report in batch_reports.items():
+                        if report.overall_level != SafetyLevel.UNKNOWN:
+                            cache.set('token_safety', token, report)
+                        for address in pending[token]:
+                            reports[address] = report
+            logger.info(
+                f"Проверено токенов: {len(pending)} за {time.time() - started:.2f} с "
+                f"({len(addresses) - len(pending)} из кеша)"
             )
-            
-        except Exception as e:
-            checks.append(SafetyCheck(
-                name="Общая проверка",
+
+        return {address: reports[address] for address in addresses}
+
+    def _invalid_report(self, token_address: str) -> TokenSafetyReport:
+        return TokenSafetyReport(
+            token_address=token_address,
+            overall_level=SafetyLevel.DANGEROUS,
+            checks=[SafetyCheck(
+                name="Валидность адреса",
                 passed=False,
-                level=SafetyLevel.UNKNOWN,
-                message=f"Ошибка при проверке: {str(e)}"
-            ))
-            
-            return TokenSafetyReport(
-                token_address=token_address,
-                overall_level=SafetyLevel.UNKNOWN,
-                checks=checks,
-                timestamp=time.time(),
-                recommendations=["Повторите проверку позже"]
-            )
-    
+                level=SafetyLevel.DANGEROUS,
+                message="Неверный адрес токена"
+            )],
+            timestamp=time.time(),
+            recommendations=["Проверьте правильность адреса токена"]
+        )
+
     def _is_valid_address(self, address: str) -> bool:
         """Проверяет валидность адреса"""
         try:
             return Web3.is_address(address) and address.startswith('0x')
         except:
             return False
-    
-    def _check_contract_exists(self, token_address: str) -> SafetyCheck:
-        """Проверяет существование контракта"""
+
+    def _build_calls(self, token: str) -> List[Tuple[str, str, list]]:
+        """Вызовы одного токена: (поле снимка, метод, параметры)"""
+        calls = []
+        cache = get_cache()
+        code_hash = cache.get('code_audit', f'token:{token}')
+        if code_hash is None or cache.get('code_audit', f'hash:{code_hash}') is None:
+            calls.append(('code', 'eth_getCode', [token, 'latest']))
+        for name, selector in METADATA_SELECTORS.items():
+            calls.append((name, 'eth_call', [{'to': token, 'data': selector}, 'latest']))
+        for symbol, (quote, _) in self.quotes.items():
+            if quote.lower() == token:
+                continue
+            pair = pair_address(token, quote, self.factory, self.init_code_hash)
+            calls.append((f'reserves:{symbol}', 'eth_call',
+                          [{'to': pair, 'data': SELECTOR_GET_RESERVES}, 'latest']))
+        return calls
+
+    def _send(self, payload: List[dict]) -> Dict[int, dict]:
+        """Пакетный запрос; при отказе endpoint от пакетов - по одному вызову"""
+        response = self.transport(payload)
+        if isinstance(response, list):
+            return {item.get('id'): item for item in response if isinstance(item, dict)}
+        results = {}
+        for call in payload:
+            try:
+                item = self.transport(call)
+                if isinstance(item, dict):
+                    results[call['id']] = item
+            except Exception as e:
+                logger.debug(f"{call['method']} {call['params'][0]}: {e}")
+        return results
+
+    def _scan_batch(self, tokens: List[str]) -> Dict[str, TokenSafetyReport]:
+        """Один пакетный запрос на группу токенов"""
+        plan = []
+        payload = []
+        for token in tokens:
+            for field_name, method, params in self._build_calls(token):
+                plan.append((token, field_name))
+                payload.append({'jsonrpc': '2.0', 'id': len(payload), 'method': method, 'params': params})
+
         try:
-            code = self.web3.eth.get_code(token_address)
-            if len(code) <= 2:  # Только 0x
-                return SafetyCheck(
-                    name="Существование контракта",
-                    passed=False,
-                    level=SafetyLevel.DANGEROUS,
-                    message="Контракт не существует"
-                )
-            else:
-                return SafetyCheck(
-                    name="Существование контракта",
-                    passed=True,
-                    level=SafetyLevel.SAFE,
-                    message="Контракт существует",
-                    details={"code_size": len(code)}
-                )
+            results = self._send(payload)
         except Exception as e:
+            logger.warning(f"Ошибка пакетной проверки токенов ({len(tokens)}): {e}")
+            return {token: self._error_report(token, e) for token in tokens}
+
+        snapshots = {token: TokenSnapshot(address=token) for token in tokens}
+        codes: Dict[str, bytes] = {}
+        for call_id, (token, field_name) in enumerate(plan):
+            item = results.get(call_id)
+            snapshot = snapshots[token]
+            if not item or 'result' not in item:
+                snapshot.errors += 1
+                continue
+            data = _to_bytes(item['result'])
+            if field_name == 'code':
+                codes[token] = data
+            elif field_name in ('name', 'symbol'):
+                setattr(snapshot, field_name, _decode_string(data))
+            elif field_name in ('decimals', 'total_supply'):
+                setattr(snapshot, field_name, _decode_uint(data))
+            elif field_name == 'owner':
+                snapshot.owner = _decode_address(data)
+            elif field_name.startswith('reserves:'):
+                self._add_reserves(snapshot, field_name.split(':', 1)[1], data)
+
+        for token, snapshot in snapshots.items():
+            self._attach_audit(snapshot, codes.get(token))
+
+        # Симуляция - один пакет на все контракты группы
+        simulations: Dict[str, SimulationResult] = {}
+        candidates = [token for token, snapshot in snapshots.items()
+                      if (snapshot.audit or {}).get('size') and token not in self._known_lower]
+        if self.simulator and candidates:
+            try:
+                simulations = self.simulator.simulate_many(candidates)
+            except Exception as e:
+                logger.warning(f"Симуляция свапов не выполнена: {e}")
+
+        reports = {}
+        for token, snapshot in snapshots.items():
+            if snapshot.audit is None:
+                # Байткод не получен: без разбора нельзя судить о контракте
+                reports[token] = self._error_report(token, "нет ответа RPC")
+                continue
+            if snapshot.decimals is not None:
+                get_cache().set('token_decimals', token, snapshot.decimals)
+            reports[token] = self._build_report(snapshot, simulations.get(token))
+        return reports
+
+    def _add_reserves(self, snapshot: TokenSnapshot, symbol: str, data: bytes):
+        """Резерв котируемого токена в паре (пустой ответ - пары нет)"""
+        reserve0, reserve1 = _decode_uint(data, 0), _decode_uint(data, 1)
+        if reserve0 is None or reserve1 is None:
+            return
+        quote = self.quotes[symbol][0].lower()
+        quote_is_token0 = int(quote, 16) < int(snapshot.address, 16)
+        reserve = reserve0 if quote_is_token0 else reserve1
+        snapshot.reserves[symbol] = reserve / 10 ** 18  # WBNB и USDT (BSC) - 18 decimals
+
+    def _fetch_code(self, token: str) -> Optional[bytes]:
+        """Отдельный запрос байткода (None - нет ответа)"""
+        try:
+            item = self._send([{'jsonrpc': '2.0', 'id': 0, 'method': 'eth_getCode',
+                                'params': [token, 'latest']}]).get(0)
+        except Exception as e:
+            logger.debug(f"eth_getCode {token}: {e}")
+            return None
+        if not item or 'result' not in item:
+            return None
+        return _to_bytes(item['result'])
+
+    def _attach_audit(self, snapshot: TokenSnapshot, code: Optional[bytes]):
+        """Разбор байткода из кеша по хешу кода или из ответа"""
+        cache = get_cache()
+        token = snapshot.address
+        if code is None:
+            code_hash = cache.get('code_audit', f'token:{token}')
+            audit = cache.get('code_audit', f'hash:{code_hash}') if code_hash is not None else None
+            if audit is not None:
+                snapshot.code_hash = code_hash
+                snapshot.audit = audit
+                return
+            # Разбор вытеснен после планирования вызовов или eth_getCode не ответил
+            code = self._fetch_code(token)
+            if code is None:
+                return
+        if not code:
+            snapshot.audit = {'size': 0}
+            return
+        code_hash = '0x' + bytes(Web3.keccak(code)).hex()
+        snapshot.code_hash = code_hash
+        snapshot.audit = cache.get_or_load('code_audit', f'hash:{code_hash}', lambda: analyze_code(code))
+        cache.set('code_audit', f'token:{token}', code_hash)
+
+    def _error_report(self, token_address: str, error: Any) -> TokenSafetyReport:
+        return TokenSafetyReport(
+            token_address=token_address,
+            overall_level=SafetyLevel.UNKNOWN,
+            checks=[SafetyCheck(
+                name="Общая проверка",
+                passed=False,
+                level=SafetyLevel.UNKNOWN,
+                message=f"Ошибка при проверке: {error}"
+            )],
+            timestamp=time.time(),
+            recommendations=["Повторите проверку позже"]
+        )
+
+    def _build_report(self, snapshot: TokenSnapshot,
+                      simulation: Optional[SimulationResult] = None) -> TokenSafetyReport:
+        """Отчет по снимку токена"""
+        checks = [self._check_contract_exists(snapshot)]
+
+        if not checks[0].passed:
+            return TokenSafetyReport(
+                token_address=snapshot.address,
+                overall_level=SafetyLevel.DANGEROUS,
+                checks=checks,
+                timestamp=time.time(),
+                recommendations=["Контракт не существует или не развернут"]
+            )
+
+        checks.append(self._check_erc20_functions(snapshot))
+        checks.append(self._check_token_info(snapshot))
+        checks.append(self._check_honeypot(snapshot, simulation))
+        checks.append(self._check_liquidity(snapshot))
+        checks.append(self._check_suspicious_functions(snapshot))
+        checks.append(self._check_known_token(snapshot.address))
+
+        overall_level = self._determine_overall_level(checks)
+        return TokenSafetyReport(
+            token_address=snapshot.address,
+            overall_level=overall_level,
+            checks=checks,
+            timestamp=time.time(),
+            recommendations=self._generate_recommendations(checks, overall_level)
+        )
+
+    def _check_contract_exists(self, snapshot: TokenSnapshot) -> SafetyCheck:
+        """Проверяет существование контракта"""
+        size = (snapshot.audit or {}).get('size', 0)
+        if not size:
             return SafetyCheck(
                 name="Существование контракта",
                 passed=False,
-                level=SafetyLevel.UNKNOWN,
-                message=f"Ошибка проверки: {str(e)}"
+                level=SafetyLevel.DANGEROUS,
+                message="Контракт не существует"
             )
-    
-    def _check_erc20_functions(self, token_address: str) -> SafetyCheck:
-        """Проверяет наличие стандартных функций ERC20"""
-        try:
-            contract = self.web3.eth.contract(address=token_address, abi=self.erc20_abi)
-            
-            # Проверяем основные функции
-            required_functions = ['name', 'symbol', 'decimals', 'totalSupply', 'balanceOf', 'transfer', 'approve', 'allowance']
-            missing_functions = []
-            
-            for func_name in required_functions:
-                try:
-                    if func_name == 'name':
-                        contract.functions.name().call()
-                    elif func_name == 'symbol':
-                        contract.functions.symbol().call()
-                    elif func_name == 'decimals':
-                        contract.functions.decimals().call()
-                    elif func_name == 'totalSupply':
-                        contract.functions.totalSupply().call()
-                    # Остальные функции требуют параметры, поэтому просто проверяем их наличие в ABI
-                except Exception:
-                    missing_functions.append(func_name)
-            
-            if missing_functions:
-                return SafetyCheck(
-                    name="Стандартные функции ERC20",
-                    passed=False,
-                    level=SafetyLevel.WARNING,
-                    message=f"Отсутствуют функции: {', '.join(missing_functions)}",
-                    details={"missing_functions": missing_functions}
-                )
-            else:
-                return SafetyCheck(
-                    name="Стандартные функции ERC20",
-                    passed=True,
-                    level=SafetyLevel.SAFE,
-                    message="Все стандартные функции присутствуют"
-                )
-                
-        except Exception as e:
+        return SafetyCheck(
+            name="Существование контракта",
+            passed=True,
+            level=SafetyLevel.SAFE,
+            message="Контракт существует",
+            details={"code_size": size, "code_hash": snapshot.code_hash}
+        )
+
+    def _is_proxy(self, snapshot: TokenSnapshot) -> bool:
+        audit = snapshot.audit or {}
+        return bool(audit.get('delegatecall')) or 'proxy' in audit.get('risky', {})
+
+    def _check_erc20_functions(self, snapshot: TokenSnapshot) -> SafetyCheck:
+        """Проверяет наличие стандартных функций ERC20 в таблице селекторов"""
+        missing_functions = snapshot.audit.get('missing_erc20', [])
+
+        if missing_functions and self._is_proxy(snapshot) and snapshot.symbol is not None:
+            # Селекторы находятся в коде реализации, а не прокси
             return SafetyCheck(
                 name="Стандартные функции ERC20",
                 passed=False,
-                level=SafetyLevel.UNKNOWN,
-                message=f"Ошибка проверки: {str(e)}"
+                level=SafetyLevel.WARNING,
+                message="Прокси-контракт: функции ERC20 находятся в заменяемой реализации",
+                details={"proxy": True}
+            )
+        if missing_functions:
+            return SafetyCheck(
+                name="Стандартные функции ERC20",
+                passed=False,
+                level=SafetyLevel.WARNING,
+                message=f"Отсутствуют функции: {', '.join(missing_functions)}",
+                details={"missing_functions": missing_functions}
             )
-    
-    def _check_token_info(self, token_address: str) -> SafetyCheck:
+        return SafetyCheck(
+            name="Стандартные функции ERC20",
+            passed=True,
+            level=SafetyLevel.SAFE,
+            message="Все стандартные функции присутствуют"
+        )
+
+    def _check_token_info(self, snapshot: TokenSnapshot) -> SafetyCheck:
         """Проверяет информацию о токене"""
-        try:
-            contract = self.web3.eth.contract(address=token_address, abi=self.erc20_abi)
-            
-            # Получаем информацию о токене
-            name = contract.functions.name().call()
-            symbol = contract.functions.symbol().call()
-            decimals = contract.functions.decimals().call()
-            total_supply = contract.functions.totalSupply().call()
-            
-            issues = []
-            
-            # Проверяем name
-            if not name or name == "Unknown" or len(name) < 2:
-                issues.append("Подозрительное имя токена")
-            
-            # Проверяем symbol
-            if not symbol or symbol == "???" or len(symbol) < 2:
-                issues.append("Подозрительный символ токена")
-            
-            # Проверяем decimals
-            if decimals < 0 or decimals > 36:
-                issues.append("Некорректное количество decimals")
-            
-            # Проверяем total supply
-            if total_supply == 0:
-                issues.append("Общее количество токенов равно 0")
-            
-            if issues:
-                return SafetyCheck(
-                    name="Информация о токене",
-                    passed=False,
-                    level=SafetyLevel.WARNING,
-                    message=f"Проблемы: {', '.join(issues)}",
-                    details={
-                        "name": name,
-                        "symbol": symbol,
-                        "decimals": decimals,
-                        "total_supply": total_supply,
-                        "issues": issues
-                    }
-                )
-            else:
-                return SafetyCheck(
-                    name="Информация о токене",
-                    passed=True,
-                    level=SafetyLevel.SAFE,
-                    message="Информация о токене корректна",
-                    details={
-                        "name": name,
-                        "symbol": symbol,
-                        "decimals": decimals,
-                        "total_supply": total_supply
-                    }
-                )
-                
-        except Exception as e:
+        name, symbol = snapshot.name, snapshot.symbol
+        decimals, total_supply = snapshot.decimals, snapshot.total_supply
+        details = {
+            "name": name,
+            "symbol": symbol,
+            "decimals": decimals,
+            "total_supply": total_supply
+        }
+
+        if name is None and symbol is None and decimals is None:
             return SafetyCheck(
                 name="Информация о токене",
                 passed=False,
                 level=SafetyLevel.UNKNOWN,
-                message=f"Ошибка получения информации: {str(e)}"
+                message="Не удалось получить информацию о токене",
+                details=details
             )
-    
-    def _check_honeypot(self, token_address: str) -> SafetyCheck:
-        """Проверяет на honeypot (упрощенная проверка)"""
-        try:
-            # Это упрощенная проверка. В реальности нужен более сложный анализ
-            contract = self.web3.eth.contract(address=token_address, abi=self.erc20_abi)
-            
-            # Проверяем, можем ли мы получить информацию о токене
-            try:
-                name = contract.functions.name().call()
-                symbol = contract.functions.symbol().call()
-                
-                # Если можем получить базовую информацию, то не honeypot
-                return SafetyCheck(
-                    name="Проверка на honeypot",
-                    passed=True,
-                    level=SafetyLevel.SAFE,
-                    message="Базовая проверка пройдена"
-                )
-            except Exception:
-                return SafetyCheck(
-                    name="Проверка на honeypot",
-                    passed=False,
-                    level=SafetyLevel.DANGEROUS,
-                    message="Возможный honeypot - не удается получить информацию"
-                )
-                
-        except Exception as e:
+
+        issues = []
+
+        # Проверяем name
+        if not name or name == "Unknown" or len(name) < 2:
+            issues.append("Подозрительное имя токена")
+
+        # Проверяем symbol
+        if not symbol or symbol == "???" or len(symbol) < 2:
+            issues.append("Подозрительный символ токена")
+
+        # Проверяем decimals
+        if decimals is None or decimals > 36:
+            issues.append("Некорректное количество decimals")
+
+        # Проверяем total supply
+        if not total_supply:
+            issues.append("Общее количество токенов равно 0")
+
+        if issues:
+            details["issues"] = issues
             return SafetyCheck(
-                name="Проверка на honeypot",
+                name="Информация о токене",
                 passed=False,
-                level=SafetyLevel.UNKNOWN,
-                message=f"Ошибка проверки: {str(e)}"
+                level=SafetyLevel.WARNING,
+                message=f"Проблемы: {', '.join(issues)}",
+                details=details
             )
-    
-    def _check_liquidity(self, token_address: str) -> SafetyCheck:
-        """Проверяет ликвидность токена"""
-        try:
-            # Упрощенная проверка ликвидности
-            # В реальности нужно проверять пулы на DEX
-            
-            # Проверяем, есть ли токен в списке известных
-            if token_address.lower() in [addr.lower() for addr in self.known_safe_tokens.keys()]:
-                return SafetyCheck(
-                    name="Проверка ликвидности",
-                    passed=True,
-                    level=SafetyLevel.SAFE,
-                    message="Известный токен с ликвидностью"
-                )
-            else:
-                return SafetyCheck(
-                    name="Проверка ликвидности",
-                    passed=False,
-                    level=SafetyLevel.WARNING,
-                    message="Неизвестный токен - проверьте ликвидность вручную"
-                )
-                
-        except Exception as e:
+        return SafetyCheck(
+            name="Информация о токене",
+            passed=True,
+            level=SafetyLevel.SAFE,
+            message="Информация о токене корректна",
+            details=details
+        )
+
+    def _check_honeypot(self, snapshot: TokenSnapshot,
+                        simulation: Optional[SimulationResult]) -> SafetyCheck:
+        """Проверяет на honeypot по симуляции покупки и продажи"""
+        details = None
+
+        def verdict(level: SafetyLevel, message: str) -> SafetyCheck:
+            return SafetyCheck(
+                name="Проверка на honeypot",
+                passed=level == SafetyLevel.SAFE,
+                level=level,
+                message=message,
+                details=details
+            )
+
+        if snapshot.address.lower() in self._known_lower:
+            return verdict(SafetyLevel.SAFE, "Известный токен")
+        if simulation is None:
+            return verdict(SafetyLevel.UNKNOWN, "Симуляция покупки и продажи не выполнялась")
+        if simulation.error:
+            return verdict(SafetyLevel.UNKNOWN, f"Ошибка симуляции: {simulation.error}")
+        if not simulation.has_route:
+            return verdict(SafetyLevel.WARNING, "Нет маршрута покупки через PancakeSwap - продажа не проверена")
+
+        details = {
+            "block": simulation.block,
+            "path": simulation.path,
+            "buy_tax": simulation.buy_tax,
+            "sell_tax": simulation.sell_tax,
+            "transfer_tax": simulation.transfer_tax,
+            "can_transfer": simulation.can_transfer
+        }
+        taxes = (f"покупка {(simulation.buy_tax or 0) * 100:.1f}%, "
+                 f"продажа {(simulation.sell_tax or 0) * 100:.1f}%")
+
+        if not simulation.can_buy:
+            return verdict(SafetyLevel.WARNING, "Покупка не проходит (торговля закрыта или ограничена)")
+        # При такой комиссии покупки результат продажи уже не показателен
+        if (simulation.buy_tax or 0) >= self.max_tax:
+            return verdict(SafetyLevel.DANGEROUS, f"Возможный honeypot - комиссия покупки {simulation.buy_tax * 100:.1f}%")
+        if not simulation.can_sell:
+            return verdict(SafetyLevel.DANGEROUS, "Возможный honeypot - продажа не проходит")
+        if simulation.max_tax >= self.max_tax:
+            return verdict(SafetyLevel.DANGEROUS, f"Возможный honeypot - комиссии: {taxes}")
+        if simulation.max_tax >= self.warn_tax:
+            return verdict(SafetyLevel.WARNING, f"Высокие комиссии: {taxes}")
+        if not simulation.can_transfer:
+            return verdict(SafetyLevel.WARNING, f"Переводы между кошельками ограничены ({taxes})")
+        return verdict(SafetyLevel.SAFE, f"Покупка и продажа проходят, комиссии: {taxes}")
+
+    def _check_liquidity(self, snapshot: TokenSnapshot) -> SafetyCheck:
+        """Проверяет ликвидность токена по резервам пар PancakeSwap"""
+        if snapshot.address.lower() in self._known_lower:
+            return SafetyCheck(
+                name="Проверка ликвидности",
+                passed=True,
+                level=SafetyLevel.SAFE,
+                message="Известный токен с ликвидностью"
+            )
+
+        reserves = snapshot.reserves
+        details = {"reserves": dict(reserves)}
+        if not reserves:
             return SafetyCheck(
                 name="Проверка ликвидности",
                 passed=False,
-                level=SafetyLevel.UNKNOWN,
-                message=f"Ошибка проверки: {str(e)}"
+                level=SafetyLevel.WARNING,
+                message="Пары на PancakeSwap не найдены",
+                details=details
             )
-    
-    def _check_suspicious_functions(self, token_address: str) -> SafetyCheck:
-        """Проверяет на подозрительные функции"""
-        try:
-            # Получаем код контракта
-            code = self.web3.eth.get_code(token_address)
-            code_hex = code.hex().lower()
-            
-            suspicious_found = []
-            
-            # Проверяем наличие подозрительных функций в коде
-            for func in self.dangerous_functions:
-                if func.lower() in code_hex:
-                    suspicious_found.append(func)
-            
-            if suspicious_found:
-                return SafetyCheck(
-                    name="Подозрительные функции",
-                    passed=False,
-                    level=SafetyLevel.WARNING,
-                    message=f"Найдены подозрительные функции: {', '.join(suspicious_found)}",
-                    details={"suspicious_functions": suspicious_found}
-                )
-            else:
-                return SafetyCheck(
-                    name="Подозрительные функции",
-                    passed=True,
-                    level=SafetyLevel.SAFE,
-                    message="Подозрительные функции не найдены"
-                )
-                
-        except Exception as e:
+
+        sufficient = [symbol for symbol, reserve in reserves.items() if reserve >= self.quotes[symbol][1]]
+        summary = ', '.join(f"{reserve:,.2f} {symbol}" for symbol, reserve in reserves.items())
+        if sufficient:
+            return SafetyCheck(
+                name="Проверка ликвидности",
+                passed=True,
+                level=SafetyLevel.SAFE,
+                message=f"Ликвидность: {summary}",
+                details=details
+            )
+        return SafetyCheck(
+            name="Проверка ликвидности",
+            passed=False,
+            level=SafetyLevel.WARNING,
+            message=f"Низкая ликвидность: {summary}",
+            details=details
+        )
+
+    def _check_suspicious_functions(self, snapshot: TokenSnapshot) -> SafetyCheck:
+        """Проверяет на подозрительные функции управления по селекторам"""
+        risky = snapshot.audit.get('risky', {})
+        if not risky:
             return SafetyCheck(
                 name="Подозрительные функции",
-                passed=False,
-                level=SafetyLevel.UNKNOWN,
-                message=f"Ошибка проверки: {str(e)}"
+                passed=True,
+                level=SafetyLevel.SAFE,
+                message="Подозрительные функции не найдены"
+            )
+
+        categories = ', '.join(RISK_CATEGORIES.get(category, category) for category in risky)
+        details = {"suspicious_functions": risky, "owner": snapshot.owner}
+
+        # Функции владельца недоступны после отказа от прав (замена логики прокси - нет)
+        if snapshot.owner == ZERO_ADDRESS and 'proxy' not in risky:
+            return SafetyCheck(
+                name="Подозрительные функции",
+                passed=True,
+                level=SafetyLevel.SAFE,
+                message=f"Функции управления ({categories}) отключены: владелец отказался от прав",
+                details=details
             )
-    
+        return SafetyCheck(
+            name="Подозрительные функции",
+            passed=False,
+            level=SafetyLevel.WARNING,
+            message=f"Найдены функции управления: {categories}",
+            details=details
+        )
+
     def _check_known_token(self, token_address: str) -> SafetyCheck:
         """Проверяет, является ли токен известным"""
-        if token_address.lower() in [addr.lower() for addr in self.known_safe_tokens.keys()]:
-            token_name = self.known_safe_tokens[token_address]
+        token_name = self._known_lower.get(token_address.lower())
+        if token_name:
             return SafetyCheck(
                 name="Известный токен",
                 passed=True,
@@ -411,37 +811,37 @@ class TokenSafetyChecker:
                 level=SafetyLevel.WARNING,
                 message="Неизвестный токен - будьте осторожны"
             )
-    
+
     def _determine_overall_level(self, checks: List[SafetyCheck]) -> SafetyLevel:
         """Определяет общий уровень безопасности"""
         if not checks:
             return SafetyLevel.UNKNOWN
-        
+
         # Подсчитываем уровни
         levels = [check.level for check in checks]
-        
+
         # Если есть опасные проверки
         if SafetyLevel.DANGEROUS in levels:
             return SafetyLevel.DANGEROUS
-        
+
         # Если есть предупреждения
         if SafetyLevel.WARNING in levels:
             return SafetyLevel.WARNING
-        
+
         # Если все проверки прошли
         if all(check.passed for check in checks):
             return SafetyLevel.SAFE
-        
+
         # Если есть неизвестные проверки
         if SafetyLevel.UNKNOWN in levels:
             return SafetyLevel.UNKNOWN
-        
+
         return SafetyLevel.WARNING
-    
+
     def _generate_recommendations(self, checks: List[SafetyCheck], overall_level: SafetyLevel) -> List[str]:
         """Генерирует рекомендации на основе проверок"""
         recommendations = []
-        
+
         if overall_level == SafetyLevel.DANGEROUS:
             recommendations.append("🚨 НЕ РЕКОМЕНДУЕТСЯ использовать этот токен")
             recommendations.append("Проверьте адрес токена и убедитесь в его подлинности")
@@ -453,7 +853,7 @@ class TokenSafetyChecker:
         else:
             recommendations.append("❓ Не удалось полностью проверить токен")
             recommendations.append("Повторите проверку позже")
-        
+
         # Добавляем специфичные рекомендации
         for check in checks:
             if not check.passed and check.level == SafetyLevel.DANGEROUS:
@@ -461,5 +861,12 @@ class TokenSafetyChecker:
                     recommendations.append("Проверьте правильность адреса токена")
                 elif "honeypot" in check.message.lower():
                     recommendations.append("Возможный honeypot - избегайте этого токена")
-        
+
         return recommendations
+
+    def close(self):
+        if self.simulator:
+            self.simulator.close()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
@@ -0,0 +1,205 @@
+"""
+Колоночное хранилище транзакций explorer API для быстрой фильтрации
+
+Страницы ответа BscScan/Etherscan (списки словарей) разбираются один раз в
+типизированные массивы numpy: блок, время, отправитель/получатель в виде
+интернированных id, сумма в wei (исходное целое) и decimals, признак
+ошибки. Фильтры по направлению, сумме, дате, уникальным отправителям и
+минимуму транзакций на отправителя выполняются векторными масками и
+группировками (bincount), поэтому повторная фильтрация сотен тысяч
+переводов не требует повторного запроса к API и повторного разбора строк.
+
+Сумма в единицах токена (amount) хранится как float64 и вычисляется из
+целого wei один раз; точное значение в wei доступно через value_wei().
+"""
+
+from datetime import date, datetime, time as dt_time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+INCOMING = 'in'
+OUTGOING = 'out'
+
+_COLUMNS = ('block', 'timestamp', 'from_id', 'to_id', 'decimals', 'amount', 'ok')
+
+
+def _int(value: Any, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def day_bounds(date_from: Optional[date], date_to: Optional[date]):
+    """Границы дат (локальное время, включительно) в unix timestamp"""
+    ts_from = datetime.combine(date_from, dt_time.min).timestamp() if date_from else None
+    ts_to = datetime.combine(date_to, dt_time.max).timestamp() if date_to else None
+    return ts_from, ts_to
+
+
+class TxColumns:
+    """Транзакции в колоночном виде с векторными фильтрами"""
+
+    def __init__(self, transactions: Optional[Iterable[Dict[str, Any]]] = None):
+        self.transactions: List[Dict[str, Any]] = []
+        self.addresses: List[str] = []
+        self._address_ids: Dict[str, int] = {}
+        self._chunks: Dict[str, List[np.ndarray]] = {name: [] for name in _COLUMNS}
+        self._wei: List[int] = []
+        self._cache: Dict[str, np.ndarray] = {}
+        if transactions:
+            self.extend(transactions)
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def _intern(self, address: Optional[str]) -> int:
+        address = (address or '').lower()
+        address_id = self._address_ids.get(address)
+        if address_id is None:
+            address_id = len(self.addresses)
+            self._address_ids[address] = address_id
+            self.addresses.append(address)
+        return address_id
+
+    def address_id(self, address: str) -> int:
+        """Id адреса или -1, если адрес не встречался"""
+        return self._address_ids.get((address or '').lower(), -1)
+
+    def extend(self, transactions: Iterable[Dict[str, Any]]) -> int:
+        """
+        Добавление страницы транзакций (строки разбираются один раз)
+
+        Returns:
+            Индекс первой добавленной строки
+        """
+        start = len(self.transactions)
+        page = list(transactions)
+        if not page:
+            return start
+
+        size = len(page)
+        block = np.empty(size, dtype=np.int64)
+        timestamp = np.empty(size, dtype=np.int64)
+        from_id = np.empty(size, dtype=np.int32)
+        to_id = np.empty(size, dtype=np.int32)
+        decimals = np.empty(size, dtype=np.int16)
+        amount = np.empty(size, dtype=np.float64)
+        ok = np.empty(size, dtype=np.bool_)
+
+        for i, tx in enumerate(page):
+            wei = _int(tx.get('value'))
+            dec = _int(tx.get('tokenDecimal', 18) or 18, 18)
+            block[i] = _int(tx.get('blockNumber'))
+            timestamp[i] = _int(tx.get('timeStamp'))
+            from_id[i] = self._intern(tx.get('from'))
+            to_id[i] = self._intern(tx.get('to'))
+            decimals[i] = dec
+            amount[i] = wei / (10 ** dec)
+            ok[i] = tx.get('isError', '0') == '0' and tx.get('txreceipt_status', '1') == '1'
+            self._wei.append(wei)
+
+        for name, array in zip(_COLUMNS, (block, timestamp, from_id, to_id, decimals, amount, ok)):
+            self._chunks[name].append(array)
+        self.transactions.extend(page)
+        self._cache.clear()
+        return start
+
+    def column(self, name: str) -> np.ndarray:
+        """Колонка целиком (страницы склеиваются при первом обращении)"""
+        array = self._cache.get(name)
+        if array is None:
+            chunks = self._chunks[name]
+            if len(chunks) > 1:
+                # Склеенный массив заменяет страницы, чтобы не хранить данные дважды
+                chunks[:] = [np.concatenate(chunks)]
+            array = chunks[0] if chunks else np.empty(0, dtype=np.int64)
+            self._cache[name] = array
+        return array
+
+    def value_wei(self, index: int) -> int:
+        return self._wei[index]
+
+    def mask(self, direction: Optional[str] = None, address: Optional[str] = None,
+             only_success: bool = False, amount_min: Optional[float] = None,
+             amount_max: Optional[float] = None, amount_exact: Optional[float] = None,
+             tolerance: float = 1e-7, ts_from: Optional[float] = None,
+             ts_to: Optional[float] = None, start: int = 0) -> np.ndarray:
+        """
+        Векторная маска строк по построчным предикатам
+
+        Args:
+            direction: INCOMING/OUTGOING относительно address или None
+            address: Анализируемый адрес
+            only_success: Исключить транзакции с ошибкой
+            amount_min, amount_max: Диапазон суммы в единицах токена
+            amount_exact: Точная сумма (с допуском tolerance)
+            ts_from, ts_to: Диапазон времени (unix timestamp, включительно)
+            start: Учитывать только строки с индексом >= start
+        """
+        result = np.ones(len(self), dtype=np.bool_)
+        if start:
+            result[:start] = False
+
+        if direction in (INCOMING, OUTGOING):
+            address_id = self.address_id(address)
+            column = self.column('to_id' if direction == INCOMING else 'from_id')
+            result &= column == address_id
+        if only_success:
+            result &= self.column('ok')
+
+        amount = self.column('amount')
+        if amount_exact is not None:
+            result &= np.abs(amount - amount_exact) < tolerance
+        if amount_min is not None:
+            result &= amount >= amount_min
+        if amount_max is not None:
+            result &= amount <= amount_max
+
+        timestamp = self.column('timestamp')
+        if ts_from is not None:
+            result &= timestamp >= ts_from
+        if ts_to is not None:
+            result &= timestamp <= ts_to
+        return result
+
+    def min_tx_per_sender(self, mask: np.ndarray, min_count: int) -> np.ndarray:
+        """Строки отправителей, у которых в маске не меньше min_count транзакций"""
+        from_id = self.column('from_id')
+        counts = np.bincount(from_id[mask], minlength=len(self.addresses))
+        return mask & (counts[from_id] >= min_count)
+
+    def unique_senders(self, mask: np.ndarray) -> np.ndarray:
+        """Первая (в порядке строк) транзакция каждого отправителя из маски"""
+        rows = np.flatnonzero(mask)
+        _, first = np.unique(self.column('from_id')[rows], return_index=True)
+        result = np.zeros(len(self), dtype=np.bool_)
+        result[rows[first]] = True
+        return result
+
+    def filter_indices(self, unique_senders: bool = False, min_tx_per_sender: int = 0,
+                       **predicates) -> np.ndarray:
+        """
+        Индексы строк, прошедших все фильтры
+
+        Args:
+            unique_senders: Оставить по одной транзакции на отправителя
+            min_tx_per_sender: Минимум транзакций отправителя (до выбора уникальных)
+            **predicates: Аргументы mask()
+        """
+        mask = self.mask(**predicates)
+        if min_tx_per_sender > 1:
+            mask = self.min_tx_per_sender(mask, min_tx_per_sender)
+        if unique_senders:
+            mask = self.unique_senders(mask)
+        return np.flatnonzero(mask)
+
+    def rows(self, indices: Iterable[int]) -> List[Dict[str, Any]]:
+        """Исходные словари транзакций по индексам"""
+        return [self.transactions[i] for i in indices]
@@ -3,11 +3,23 @@
 """
 Единый менеджер логирования для WalletSender
 Обеспечивает синхронизацию логов между всеми окнами
+
+add_log можно вызывать из любого потока: сообщение кладется в кольцевой
+буфер, а подписчики получают накопленные сообщения пачкой по таймеру
+GUI-потока с частотой ui_fps. Каждое сообщение также уходит в логгер
+wallet_sender.ui, то есть в файл и JSON журнал.
 """
 
+import logging
+import threading
+from collections import deque
 from typing import List, Callable, Optional
 from datetime import datetime
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# UI уровни, которых нет в logging
+_UI_LEVELS = {"SUCCESS": logging.INFO, "SALE": logging.INFO, "PROFIT": logging.INFO}
+_ui_logger = logging.getLogger("wallet_sender.ui")
 
 class UnifiedLogManager(QObject):
     """Единый менеджер логирования"""
@@ -29,46 +41,101 @@ class UnifiedLogManager(QObject):
             # Инициализируем родительский класс
             super(UnifiedLogManager, self).__init__()
             UnifiedLogManager._initialized = True
+            settings = self._load_settings()
             self.subscribers: List[Callable] = []
-            self.log_history: List[tuple] = []  # (timestamp, message, level)
-            self.max_history = 1000
+            self.batch_subscribers: List[Callable] = []
+            self.max_history = int(settings.get('ui_history', 1000))
+            self.max_pending = int(settings.get('ui_max_lines', 5000))
+            self.ui_fps = max(1, int(settings.get('ui_fps', 10)))
+            self.log_history = deque(maxlen=self.max_history)  # (timestamp, message, level)
+            self._pending = deque(maxlen=self.max_pending)
+            self._lock = threading.Lock()
+            self.dropped = 0
+            self._timer: Optional[QTimer] = None
+    
+    @staticmethod
+    def _load_settings() -> dict:
+        try:
+            from ..config import get_config
+            return get_config().get('logging', {}) or {}
+        except Exception:
+            return {}
     
     def add_log(self, message: str, level: str = "INFO"):
-        """Добавляет лог и уведомляет всех подписчиков"""
+        """Добавляет лог в буфер; подписчики получат его при ближайшем сбросе"""
         timestamp = datetime.now().strftime("%H:%M:%S")
+        entry = (timestamp, message, level)
+        
+        with self._lock:
+            self.log_history.append(entry)
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(entry)
         
-        # Сохраняем в историю
-        self.log_history.append((timestamp, message, level))
-        if len(self.log_history) > self.max_history:
-            self.log_history.pop(0)
+        _ui_logger.log(_UI_LEVELS.get(level, getattr(logging, level, logging.INFO)),
+                       message, extra={'ui_level': level})
+    
+    def flush(self):
+        """Раздать накопленные сообщения подписчикам (вызывается в GUI-потоке)"""
+        with self._lock:
+            if not self._pending:
+                return
+            batch = list(self._pending)
+            self._pending.clear()
+            dropped, self.dropped = self.dropped, 0
         
-        # Отправляем сигнал всем подписчикам
-        self.log_added.emit(message, level)
+        if dropped:
+            batch.insert(0, (batch[0][0], f"... пропущено {dropped} сообщений лога", "WARNING"))
         
-        # Вызываем callback'и подписчиков
-        for subscriber in self.subscribers:
+        for subscriber in self.batch_subscribers:
             try:
-                subscriber(message, level)
+                subscriber(batch)
             except Exception as e:
                 print(f"Ошибка вызова подписчика: {e}")
+        
+        for _, message, level in batch:
+            self.log_added.emit(message, level)
+            for subscriber in self.subscribers:
+                try:
+                    subscriber(message, level)
+                except Exception as e:
+                    print(f"Ошибка вызова подписчика: {e}")
+    
+    def _ensure_timer(self):
+        """Таймер сброса создается в потоке первого подписчика (GUI)"""
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.timeout.connect(self.flush)
+            self._timer.start(int(1000 / self.ui_fps))
     
     def subscribe(self, callback: Callable):
-        """Подписаться на получение логов"""
+        """Подписаться на получение логов по одному сообщению"""
         if callback not in self.subscribers:
             self.subscribers.append(callback)
+        self._ensure_timer()
+    
+    def subscribe_batch(self, callback: Callable):
+        """Подписаться на получение логов пачками: callback([(timestamp, message, level), ...])"""
+        if callback not in self.batch_subscribers:
+            self.batch_subscribers.append(callback)
+        self._ensure_timer()
     
     def unsubscribe(self, callback: Callable):
         """Отписаться от получения логов"""
         if callback in self.subscribers:
             self.subscribers.remove(callback)
+        if callback in self.batch_subscribers:
+            self.batch_subscribers.remove(callback)
     
     def get_history(self) -> List[tuple]:
         """Получить историю логов"""
-        return self.log_history.copy()
+        with self._lock:
+            return list(self.log_history)
     
     def clear_history(self):
         """Очистить историю логов"""
-        self.log_history.clear()
+        with self._lock:
+            self.log_history.clear()
 
 # Глобальный экземпляр менеджера
 _log_manager = None
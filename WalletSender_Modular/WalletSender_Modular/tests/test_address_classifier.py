@@ -0,0 +1,89 @@
+"""Тесты пакетной классификации адресов EOA/контракт."""
+
+import threading
+
+import pytest
+
+from wallet_sender.utils.address_classifier import (
+    CONTRACT, EOA, MODE_DROP, MODE_FLAG, UNKNOWN, AddressClassifier
+)
+
+ADDRESSES = [f"0x{i:040x}" for i in range(1, 8)]
+
+
+class _Transport:
+    """JSON-RPC endpoint: код есть у адресов с четным номером, адрес 7 отвечает ошибкой"""
+
+    def __init__(self, batch=True):
+        self.batch = batch
+        self.requests = []
+
+    def _answer(self, call):
+        address = call['params'][0]
+        if int(address, 16) == 7:
+            return {'jsonrpc': '2.0', 'id': call['id'], 'error': {'code': -32000, 'message': 'busy'}}
+        code = '0x6080' if int(address, 16) % 2 == 0 else '0x'
+        return {'jsonrpc': '2.0', 'id': call['id'], 'result': code}
+
+    def __call__(self, payload):
+        self.requests.append(payload)
+        if isinstance(payload, dict):
+            return self._answer(payload)
+        if not self.batch:
+            return {'jsonrpc': '2.0', 'error': {'code': -32600, 'message': 'batch not supported'}}
+        return [self._answer(call) for call in reversed(payload)]
+
+
+def test_batched_classification_is_cached(tmp_path):
+    transport = _Transport()
+    classifier = AddressClassifier(rpc_url='http://rpc', db_path=str(tmp_path / 'kinds.db'),
+                                   batch_size=3, workers=2, transport=transport)
+    kinds = classifier.classify([a.upper().replace('0X', '0x') for a in ADDRESSES])
+
+    assert [kinds[a] for a in ADDRESSES] == [EOA, CONTRACT, EOA, CONTRACT, EOA, CONTRACT, UNKNOWN]
+    assert len(transport.requests) == 3
+    classifier.close()
+
+    # Новый экземпляр читает вердикты с диска, RPC нужен только для адреса с ошибкой
+    transport = _Transport()
+    classifier = AddressClassifier(rpc_url='http://rpc', db_path=str(tmp_path / 'kinds.db'),
+                                   transport=transport)
+    recipients, contracts = classifier.filter_recipients(ADDRESSES, MODE_DROP)
+    assert [len(batch) for batch in transport.requests] == [1]
+    assert contracts == ADDRESSES[1:6:2]
+    assert recipients == [ADDRESSES[0], ADDRESSES[2], ADDRESSES[4], ADDRESSES[6]]
+    assert classifier.filter_recipients(ADDRESSES, MODE_FLAG)[0] == ADDRESSES
+    classifier.close()
+
+
+def test_falls_back_to_single_calls(tmp_path):
+    transport = _Transport(batch=False)
+    classifier = AddressClassifier(rpc_url='http://rpc', db_path=str(tmp_path / 'kinds.db'),
+                                   transport=transport)
+    kinds = classifier.classify(ADDRESSES[:2])
+    assert kinds == {ADDRESSES[0]: EOA, ADDRESSES[1]: CONTRACT}
+    classifier.close()
+
+
+def test_router_screening_defers_flag_and_tolerates_classifier_errors(monkeypatch):
+    job_router = pytest.importorskip("wallet_sender.services.job_router")
+    router = job_router.JobRouter.__new__(job_router.JobRouter)
+    checked = threading.Event()
+
+    class _Classifier:
+        def filter_recipients(self, addresses, mode):
+            assert threading.current_thread().name == "FlagContracts"
+            checked.set()
+            return addresses, addresses[1:2]
+
+    # flag: список возвращается сразу, проверка идет в фоне
+    monkeypatch.setattr(job_router, 'get_address_classifier', _Classifier)
+    assert router._screen_recipients(ADDRESSES, MODE_FLAG) == ADDRESSES
+    assert checked.wait(2)
+
+    # drop: ошибка создания классификатора не срывает постановку задачи
+    def broken():
+        raise OSError("disk full")
+
+    monkeypatch.setattr(job_router, 'get_address_classifier', broken)
+    assert router._screen_recipients(ADDRESSES, MODE_DROP) == ADDRESSES
@@ -0,0 +1,76 @@
+"""Тесты объединения чтений балансов в пределах блока."""
+
+import threading
+import time
+
+import pytest
+
+from wallet_sender.utils import balance_reader, cache_manager
+from wallet_sender.utils.cache_manager import DEFAULT_NAMESPACES, TieredCache
+
+OWNER = "0x" + "ab" * 20
+
+
+class _Eth:
+    def __init__(self):
+        self.block_number_value = 100
+        self.balance_calls = 0
+        self.block_calls = 0
+
+    @property
+    def block_number(self):
+        self.block_calls += 1
+        return self.block_number_value
+
+    def get_balance(self, address):
+        self.balance_calls += 1
+        time.sleep(0.05)
+        return 10 ** 18 + self.block_number_value
+
+
+class _Web3:
+    def __init__(self):
+        self.eth = _Eth()
+
+    @staticmethod
+    def to_checksum_address(address):
+        return address
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch):
+    cache = TieredCache(dict(DEFAULT_NAMESPACES))
+    monkeypatch.setattr(cache_manager, '_global_cache', cache)
+    yield cache
+    cache.close()
+
+
+def test_concurrent_reads_share_one_call():
+    web3 = _Web3()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(balance_reader.get_native_balance(web3, OWNER)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [10 ** 18 + 100] * 8
+    assert web3.eth.balance_calls == 1
+    assert web3.eth.block_calls == 1
+
+
+def test_new_block_and_invalidation_reload(isolated_cache):
+    web3 = _Web3()
+    balance_reader.get_native_balance(web3, OWNER)
+
+    web3.eth.block_number_value = 101
+    isolated_cache.clear('block_number')
+    assert balance_reader.get_native_balance(web3, OWNER) == 10 ** 18 + 101
+    assert web3.eth.balance_calls == 2
+
+    assert balance_reader.invalidate_balances(OWNER.upper()) == 2
+    balance_reader.get_native_balance(web3, OWNER)
+    assert web3.eth.balance_calls == 3
@@ -0,0 +1,86 @@
+"""Тесты считающего RPC прокси и метрик бенчмарка."""
+
+import json
+import urllib.request
+from dataclasses import replace
+
+import pytest
+
+from benchmarks.results import ResultHistory, ScenarioResult, percentile, regressions
+from benchmarks.rpc_proxy import CountingRpcProxy
+
+
+class _EchoBackend:
+    def forward(self, body):
+        payload = json.loads(body)
+        calls = payload if isinstance(payload, list) else [payload]
+        results = [{'jsonrpc': '2.0', 'id': call['id'], 'result': '0x%02x' % call['id']} for call in calls]
+        return json.dumps(results if isinstance(payload, list) else results[0]).encode()
+
+
+def _post(url, payload):
+    request = urllib.request.Request(url, json.dumps(payload).encode(), {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def _call(call_id, method, *params):
+    return {'jsonrpc': '2.0', 'id': call_id, 'method': method, 'params': list(params)}
+
+
+def test_proxy_counts_batch_items_and_skips_harness():
+    proxy = CountingRpcProxy(_EchoBackend()).start()
+    try:
+        assert _post(proxy.url, _call(1, 'eth_chainId'))['result'] == '0x01'
+        batch = _post(proxy.url, [_call(2, 'eth_getBalance', '0xA'), _call(3, 'eth_sendRawTransaction', '0xf8')])
+        assert [item['id'] for item in batch] == [2, 3]
+        _post(proxy.harness_url, _call(4, 'eth_sendRawTransaction', '0xf9'))
+
+        assert proxy.submitted() == ['0x03']
+        stats = proxy.reset()
+    finally:
+        proxy.close()
+
+    assert stats.http_requests == 2 and stats.total_calls == 3
+    assert stats.calls['eth_sendRawTransaction'] == 1
+    assert stats.submissions[0].raw == '0xf8'
+    assert proxy.reset().total_calls == 0
+
+
+def test_percentile_and_regressions():
+    assert percentile([], 50) is None
+    assert percentile([5, 1, 4, 2, 3], 50) == 3
+    assert percentile(list(range(1, 101)), 99) == 99
+
+    result = ScenarioResult(scenario='distribution', n=10, node='eth-tester', params={}, submitted=10, failed=0,
+                            mined=10, duration_s=1.0, confirm_s=1.2, tx_per_s=8.0, p50_ms=100.0, p99_ms=150.0,
+                            rpc_calls=41, rpc_per_tx=4.1, http_requests=41, db_commits=None,
+                            db_commits_per_tx=None, journal_commits=20, journal_commits_per_tx=2.0)
+    previous = {'tx_per_s': 10.0, 'p50_ms': 100.0, 'p99_ms': 140.0, 'rpc_per_tx': 4.07,
+                'db_commits_per_tx': 1.0, 'journal_commits_per_tx': 1.0}
+
+    # tx/s -20%, журнал +1/tx; p99 и RPC/tx в пределах допуска, COMMIT не учитывался
+    assert regressions(result, previous) == ['distribution: tx_per_s 10.0 -> 8.0',
+                                             'distribution: journal_commits_per_tx 1.0 -> 2.0']
+    assert regressions(result, None) == []
+
+
+def test_failed_scenario_excluded_from_history(tmp_path):
+    result = ScenarioResult(scenario='queue', n=10, node='eth-tester', params={}, submitted=10, failed=0,
+                            mined=10, duration_s=1.0, confirm_s=1.2, tx_per_s=10.0, p50_ms=100.0, p99_ms=150.0,
+                            rpc_calls=40, rpc_per_tx=4.0, http_requests=40, db_commits=None,
+                            db_commits_per_tx=None, journal_commits=10, journal_commits_per_tx=1.0)
+    history = ResultHistory(str(tmp_path / 'history.jsonl'))
+    history.append(result)
+    partial = replace(result, submitted=3, tx_per_s=1.0, error='RuntimeError: boom')
+
+    # Частичный результат не сравнивается и не сохраняется
+    assert regressions(partial, history.previous(partial)) == []
+    with pytest.raises(ValueError):
+        history.append(partial)
+    assert len(history.load()) == 1
+
+    # Старые записи с ошибкой не становятся базой сравнения
+    with open(history.path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(dict(history.load()[0], tx_per_s=1.0, error='boom')) + '\n')
+    assert history.previous(result)['tx_per_s'] == 10.0
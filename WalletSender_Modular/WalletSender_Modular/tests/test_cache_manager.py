@@ -0,0 +1,97 @@
+"""Тесты единого многоуровневого кеша."""
+
+import threading
+import time
+
+from wallet_sender.utils import cache_manager
+from wallet_sender.utils.cache_manager import CacheManager, NamespaceConfig, TieredCache
+
+
+def test_lru_bound_and_ttl():
+    cache = TieredCache({'ns': NamespaceConfig(ttl=60, max_size=2)})
+    cache.set('ns', 'a', 1)
+    cache.set('ns', 'b', 2)
+    cache.get('ns', 'a')
+    cache.set('ns', 'c', 3)
+
+    assert cache.get('ns', 'b') is None
+    assert cache.get('ns', 'a') == 1
+    cache.set('ns', 'short', 'x', ttl=0)
+    assert cache.get('ns', 'short') is None
+
+    stats = cache.get_stats('ns')['ns']
+    assert stats['evictions'] == 2 and stats['expirations'] == 1 and stats['size'] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = TieredCache({'info': NamespaceConfig(ttl=60, disk=True)}, disk_path=path)
+    first.set('info', '0xabc', {'symbol': 'PLEX', 'decimals': 9})
+    first.close()
+
+    second = TieredCache({'info': NamespaceConfig(ttl=60, disk=True)}, disk_path=path)
+    assert second.get('info', '0xabc') == {'symbol': 'PLEX', 'decimals': 9}
+    assert second.get_stats('info')['info']['disk_hits'] == 1
+    second.close()
+
+
+def test_disk_writes_are_batched(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = TieredCache({'info': NamespaceConfig(ttl=60, disk=True)}, disk_path=path,
+                        disk_flush_interval=60)
+    for i in range(100):
+        cache.set('info', f'0x{i}', i)
+    cache.invalidate('info', '0x5')
+
+    disk = cache._disk
+    assert disk.total_commits == 0
+    assert disk.get('info', '0x7', time.time())[0] == 7
+    disk.flush()
+    assert disk.total_commits == 1
+    cache.close()
+
+    reopened = TieredCache({'info': NamespaceConfig(ttl=60, disk=True)}, disk_path=path)
+    assert reopened.get('info', '0x99') == 99
+    assert reopened.get('info', '0x5') is None
+    reopened.close()
+
+
+def test_concurrent_misses_are_coalesced():
+    cache = TieredCache({'balance': NamespaceConfig(ttl=60)})
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('balance', 'k', loader)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42] * 8
+    assert len(calls) == 1
+    assert cache.get_stats('balance')['balance']['coalesced'] == 7
+
+
+def test_cache_manager_drops_own_namespace_on_close(monkeypatch):
+    cache = TieredCache()
+    monkeypatch.setattr(cache_manager, '_global_cache', cache)
+    first, second = CacheManager(default_ttl=60), CacheManager(default_ttl=60)
+    assert first._namespace != second._namespace
+
+    first.set('k', 1)
+    first.close()
+    assert first._namespace not in cache.get_stats()
+    assert second._namespace in cache.get_stats()
+
+    shared = CacheManager(namespace='balance')
+    shared.close()
+    assert 'balance' in cache.get_stats()
@@ -0,0 +1,156 @@
+"""Тесты подтверждения транзакций по новым блокам."""
+
+import pytest
+
+pytest.importorskip("web3")
+
+from wallet_sender.core.confirmation_service import (  # noqa: E402
+    DROPPED, FAILED, ConfirmationService
+)
+
+
+def _hash(i):
+    return "0x" + f"{i:064x}"
+
+
+class _Provider:
+    def __init__(self, chain):
+        self.chain = chain
+
+    def make_request(self, method, params):
+        self.chain.calls.append(method)
+        number = int(params[0], 16)
+        return {'result': [
+            {'transactionHash': h, 'status': hex(self.chain.status.get(h, 1)),
+             'gasUsed': '0x5208', 'blockNumber': hex(number), 'effectiveGasPrice': '0x3b9aca00',
+             'from': '0x' + '11' * 20, 'logs': [{'logIndex': '0x0', 'data': '0x'}]}
+            for h in self.chain.blocks[number]
+        ]}
+
+
+class _Eth:
+    def __init__(self, chain):
+        self.chain = chain
+
+    @property
+    def block_number(self):
+        self.chain.calls.append('eth_blockNumber')
+        return max(self.chain.blocks)
+
+    def get_block(self, number):
+        self.chain.calls.append('eth_getBlockByNumber')
+        return {'number': number, 'timestamp': 1_700_000_000 + number, 'transactions': self.chain.blocks[number]}
+
+    def get_transaction_receipt(self, tx_hash):
+        self.chain.calls.append('eth_getTransactionReceipt')
+        for number, hashes in self.chain.blocks.items():
+            if tx_hash in hashes:
+                return {'status': self.chain.status.get(tx_hash, 1), 'gasUsed': 21000, 'blockNumber': number}
+        raise ValueError("not found")
+
+    def get_transaction(self, tx_hash):
+        self.chain.calls.append('eth_getTransactionByHash')
+        return None
+
+
+class _Chain:
+    def __init__(self):
+        self.blocks = {10: [_hash(99999)]}
+        self.status = {}
+        self.calls = []
+        self.eth = _Eth(self)
+        self.provider = _Provider(self)
+
+    def mine(self, *hashes):
+        self.blocks[max(self.blocks) + 1] = list(hashes)
+
+
+class _Nonces:
+    def __init__(self):
+        self.events = []
+
+    def confirm(self, ticket):
+        self.events.append(('confirm', ticket))
+
+    def fail(self, ticket, reason):
+        self.events.append(('fail', ticket, reason))
+
+
+@pytest.fixture
+def service():
+    chain = _Chain()
+    service = ConfirmationService(chain, nonce_manager=_Nonces(), persist=False, reload_interval=0,
+                                  block_receipts_threshold=4)
+    service.check_once()
+    return service
+
+
+def test_new_blocks_resolve_watched_set_with_few_calls(service):
+    chain = service.web3
+    results = []
+    service.subscribe(lambda tx_hash, status, receipt: results.append((tx_hash, status)))
+    futures = {i: service.watch(_hash(i), ticket=f"t{i}", since_block=10) for i in range(1000)}
+
+    chain.calls.clear()
+    chain.mine(_hash(5000))
+    service.check_once()
+    # Ни одной нашей транзакции в блоке: номер блока и список хешей
+    assert chain.calls == ['eth_blockNumber', 'eth_getBlockByNumber']
+
+    chain.status[_hash(1)] = 0
+    chain.mine(_hash(0), _hash(1))
+    chain.mine(*[_hash(i) for i in range(2, 12)])
+    chain.calls.clear()
+    service.check_once()
+    assert chain.calls.count('eth_getTransactionReceipt') == 2
+    assert chain.calls.count('eth_getBlockReceipts') == 1
+
+    assert futures[0].result(0)['status'] == 1
+    # Квитанции eth_getBlockReceipts полные, с числами вместо hex
+    receipt = futures[5].result(0)
+    assert receipt['effectiveGasPrice'] == 10 ** 9 and receipt['logs'] == [{'logIndex': 0, 'data': '0x'}]
+    assert (_hash(1), FAILED) in results and len(results) == 12
+    assert ('fail', 't1', 'reverted') in service.nonce_manager.events
+    assert len(service.watched) == 988
+
+
+def test_late_watch_sweep_and_drop(service):
+    chain = service.web3
+    service.drop_after_blocks = 3
+    chain.mine(_hash(1))
+    service.check_once()
+
+    # Поставлена на отслеживание после просмотра блока: найдена в памяти последних блоков
+    late = service.watch(_hash(1))
+    # Отправлена до начала наблюдения: точечная проверка
+    old = service.watch(_hash(99999))
+    lost = service.watch(_hash(2), ticket='t2')
+    service.check_once()
+    assert late.result(0)['blockNumber'] == 11
+    assert old.result(0)['blockNumber'] == 10
+    assert not lost.done()
+
+    for _ in range(4):
+        chain.mine()
+        service.check_once()
+    assert lost.result(0) is None
+    assert service.nonce_manager.events == [('fail', 't2', DROPPED)]
+    assert service.get_stats()['total_dropped'] == 1
+
+
+def test_replacement_moves_watch_and_owner_settles(service):
+    chain = service.web3
+    original = service.watch(_hash(1), ticket='t1', since_block=10)
+    service.replace(_hash(1), _hash(2))
+    assert _hash(1) not in service.watched and service.watched[_hash(2)].ticket == 't1'
+
+    chain.mine(_hash(2))
+    service.check_once()
+    assert original.result(0)['blockNumber'] == 11
+    assert service.nonce_manager.events == [('confirm', 't1')]
+
+    # Владелец (TxTracker) разобрал nonce: наблюдение снимается без финализации тикета
+    other = service.watch(_hash(3), ticket='t3', since_block=11)
+    service.settle([_hash(3)], {'status': 1})
+    assert other.result(0) == {'status': 1} and not service.watched
+    assert service.nonce_manager.events == [('confirm', 't1')]
@@ -0,0 +1,103 @@
+"""Тесты шардирования рассылки по отправителям."""
+
+import queue
+import threading
+
+import pytest
+
+pytest.importorskip("web3")
+
+from wallet_sender.core import distribution_shards
+from wallet_sender.core.distribution_shards import FAILED, SENT, SHARD_DONE, run_shard, shard_addresses
+
+SENDER = "0x" + "11" * 20
+
+
+class _Eth:
+    chain_id = 56
+
+    def __init__(self, fail_on=()):
+        self.sent = []
+        self.fail_on = set(fail_on)
+
+    def get_transaction_count(self, address, block_identifier='pending'):
+        return 7
+
+    def fee_history(self, block_count, newest, percentiles):
+        return {'oldestBlock': 1, 'baseFeePerGas': [0], 'reward': [[1, 3, 4, 5]]}
+
+    def send_raw_transaction(self, raw):
+        if len(self.sent) in self.fail_on:
+            self.fail_on.discard(len(self.sent))
+            raise ValueError("rejected")
+        self.sent.append(raw)
+        return bytes([len(self.sent)])
+
+
+class _Web3:
+    def __init__(self, fail_on=()):
+        self.eth = _Eth(fail_on)
+
+    @staticmethod
+    def to_wei(value, unit):
+        return int(value * 10 ** 18)
+
+
+class _Account:
+    address = SENDER
+
+    @classmethod
+    def from_key(cls, key):
+        return cls()
+
+    @staticmethod
+    def sign_transaction(tx):
+        return type('Signed', (), {'rawTransaction': bytes([tx['nonce']]), 'gas_price': tx['gasPrice']})()
+
+
+def test_shard_addresses_round_robin():
+    shards = shard_addresses(['a', 'b', 'c', 'd', 'e'], 2)
+    assert shards == [[(0, 'a'), (2, 'c'), (4, 'e')], [(1, 'b'), (3, 'd')]]
+    assert len(shard_addresses(['a'], 4)) == 1
+
+
+def test_run_shard_uses_contiguous_nonce_lane(monkeypatch):
+    monkeypatch.setattr(distribution_shards, 'Account', _Account)
+    monkeypatch.setattr(distribution_shards.Web3, 'to_checksum_address', staticmethod(lambda a: a))
+    w3 = _Web3(fail_on={1})
+    events = queue.Queue()
+    run_event = threading.Event()
+    run_event.set()
+    items = [(i, f"0x{i:040x}") for i in range(4)]
+    params = {'amount_per_address': 0.1, 'gas_price_wei': 1, 'delay_between_tx': 0}
+
+    run_shard(0, 'key', items, params, events, run_event, threading.Event(), client=w3)
+
+    received = [events.get_nowait() for _ in range(events.qsize())]
+    assert [event[0] for event in received] == [SENT, FAILED, SENT, SENT, SHARD_DONE]
+    # Неотправленный nonce 8 переиспользуется следующей транзакцией
+    assert w3.eth.sent == [b"\x07", b"\x08", b"\x09"]
+    assert received[-1] == (SHARD_DONE, 0, None)
+
+
+def test_run_shard_journals_nonces_and_prices_gas_by_oracle(monkeypatch, tmp_path):
+    monkeypatch.setattr(distribution_shards, 'Account', _Account)
+    monkeypatch.setattr(distribution_shards.Web3, 'to_checksum_address', staticmethod(lambda a: a))
+    run_event = threading.Event()
+    run_event.set()
+    items = [(i, f"0x{i:040x}") for i in range(2)]
+    params = {'amount_per_address': 0.1, 'gas_price_wei': None, 'gas_priority': 'fast',
+              'fallback_gas_price_wei': 1, 'delay_between_tx': 0,
+              'nonce_journal_path': distribution_shards.journal_path(str(tmp_path / 'nonce.db'), SENDER)}
+
+    events = queue.Queue()
+    run_shard(0, 'key', items, params, events, run_event, threading.Event(), client=_Web3())
+    sent = [event for event in (events.get_nowait() for _ in range(events.qsize())) if event[0] == SENT]
+    assert [event[5]['gasPrice'] for event in sent] == [4, 4]
+    assert (tmp_path / f"nonce_{SENDER.lower()}.db").exists()
+
+    # Процесс упал до того, как узел принял транзакции: новый запуск шарда
+    # отправляет их из журнала и продолжает после них
+    w3 = _Web3()
+    run_shard(0, 'key', items[:1], params, queue.Queue(), run_event, threading.Event(), client=w3)
+    assert w3.eth.sent == ["0x07", "0x08", b"\x09"]
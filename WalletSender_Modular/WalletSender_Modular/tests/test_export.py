@@ -0,0 +1,74 @@
+"""Тесты потокового экспорта и агрегации по файлам экспорта."""
+
+import csv
+import gzip
+import sqlite3
+
+import pytest
+
+from wallet_sender.utils.export import aggregate_export, export_table
+
+
+@pytest.fixture
+def history_db(tmp_path):
+    db_path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE tx_history (id INTEGER PRIMARY KEY, token_symbol TEXT, status TEXT, amount REAL)")
+    conn.executemany(
+        "INSERT INTO tx_history (token_symbol, status, amount) VALUES (?, ?, ?)",
+        [("PLEX" if i % 3 else "USDT", "success" if i % 2 else "failed", float(i)) for i in range(1, 101)]
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_csv_export_streams_all_rows_in_chunks(history_db, tmp_path):
+    output = str(tmp_path / "history.csv.gz")
+
+    total = export_table(history_db, "tx_history", output, where="amount > ?", params=(10,), chunk_size=7)
+
+    with gzip.open(output, "rt", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert total == 90
+    assert rows[0] == ["id", "token_symbol", "status", "amount"]
+    assert [int(r[0]) for r in rows[1:]] == list(range(11, 101))
+
+
+def test_without_rowid_table_pages_by_primary_key(tmp_path):
+    db_path = str(tmp_path / "kinds.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE kinds (chain INTEGER, address TEXT, kind TEXT, "
+                 "PRIMARY KEY (chain, address)) WITHOUT ROWID")
+    rows = [(chain, f"0x{i:040x}", "eoa") for chain in (56, 1) for i in range(10)]
+    conn.executemany("INSERT INTO kinds VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    output = str(tmp_path / "kinds.csv")
+
+    assert export_table(db_path, "kinds", output, where="kind = ?", params=("eoa",), chunk_size=3) == 20
+
+    with open(output, newline="", encoding="utf-8") as f:
+        exported = [(int(r[0]), r[1], r[2]) for r in list(csv.reader(f))[1:]]
+    assert exported == sorted(rows)
+
+
+def test_unknown_table_is_rejected(history_db, tmp_path):
+    with pytest.raises(ValueError):
+        export_table(history_db, "missing", str(tmp_path / "x.csv"))
+
+
+def test_aggregate_export_merges_chunk_partials(history_db, tmp_path):
+    pytest.importorskip("pandas")
+    output = str(tmp_path / "history.csv")
+    export_table(history_db, "tx_history", output)
+
+    result = aggregate_export(output, ["token_symbol"], {"amount": ["sum", "mean", "max"], "id": ["count"]},
+                              chunk_size=9)
+
+    by_token = {row["token_symbol"]: row for row in result}
+    usdt = [float(i) for i in range(1, 101) if i % 3 == 0]
+    assert by_token["USDT"]["id_count"] == len(usdt)
+    assert by_token["USDT"]["amount_sum"] == sum(usdt)
+    assert by_token["USDT"]["amount_mean"] == pytest.approx(sum(usdt) / len(usdt))
+    assert by_token["PLEX"]["amount_max"] == 100.0
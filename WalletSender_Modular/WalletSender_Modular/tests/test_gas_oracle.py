@@ -0,0 +1,80 @@
+"""Тесты перцентильного оракула газа."""
+
+import pytest
+
+pytest.importorskip("requests")
+
+from wallet_sender.utils.gas_manager import GasOracle, GasPriority  # noqa: E402
+
+GWEI = 10**9
+
+
+class _FeeHistoryEth:
+    block_number = 100
+
+    def fee_history(self, block_count, newest, percentiles):
+        return {
+            'oldestBlock': 91,
+            'baseFeePerGas': [0] * (block_count + 1),
+            'reward': [[1 * GWEI, 3 * GWEI, 5 * GWEI, 9 * GWEI] for _ in range(block_count)],
+        }
+
+
+class _BlocksEth:
+    block_number = 10
+
+    def fee_history(self, *args):
+        raise ValueError("the method eth_feeHistory does not exist")
+
+    def get_block(self, number, full_transactions=False):
+        return {'transactions': [{'gasPrice': price * GWEI} for price in range(1, 11)]}
+
+
+class _FakeWeb3:
+    def __init__(self, eth):
+        self.eth = eth
+
+
+def test_fee_history_tiers():
+    oracle = GasOracle(_FakeWeb3(_FeeHistoryEth()), block_count=10)
+    tiers = oracle.refresh()
+
+    assert (tiers.slow, tiers.standard, tiers.fast, tiers.instant) == (
+        1 * GWEI, 3 * GWEI, 5 * GWEI, 9 * GWEI)
+    assert tiers.block_number == 100
+    assert oracle.get_tiers().get(GasPriority.FAST) == 5 * GWEI
+
+
+def test_falls_back_to_block_sampling():
+    oracle = GasOracle(_FakeWeb3(_BlocksEth()), block_count=3)
+    tiers = oracle.refresh()
+
+    assert tiers.sample_size == 30
+    assert tiers.slow <= tiers.standard <= tiers.fast <= tiers.instant
+    assert tiers.standard == 5 * GWEI
+
+
+class _FlakyFeeHistoryEth(_BlocksEth):
+    def __init__(self):
+        self.calls = 0
+
+    def fee_history(self, block_count, newest, percentiles):
+        self.calls += 1
+        if self.calls == 1:
+            raise TimeoutError("read timed out")
+        return _FeeHistoryEth().fee_history(block_count, newest, percentiles)
+
+
+def test_fee_history_retried_after_transient_error():
+    eth = _FlakyFeeHistoryEth()
+    oracle = GasOracle(_FakeWeb3(eth), block_count=3, interval=2.0)
+
+    # Ошибка: снимок по блокам, повтор eth_feeHistory только после паузы
+    assert oracle.refresh().sample_size == 30
+    oracle.refresh()
+    assert eth.calls == 1 and oracle._fee_history_backoff == 2.0
+
+    oracle._fee_history_retry_at = 0.0
+    tiers = oracle.refresh()
+    assert eth.calls == 2 and tiers.standard == 3 * GWEI
+    assert oracle._fee_history_backoff == 0.0
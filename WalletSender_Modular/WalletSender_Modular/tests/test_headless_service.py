@@ -0,0 +1,105 @@
+"""Тесты headless API поверх JobRouter."""
+
+import threading
+
+import pytest
+
+pytest.importorskip("web3")
+
+from wallet_sender.cli import HeadlessClient, build_submission
+from wallet_sender.services.headless_service import HeadlessServer, HeadlessService
+
+
+class _Store:
+    def __init__(self):
+        self.jobs = {}
+
+    def get_job(self, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    def get_jobs(self, state=None, mode=None, limit=100):
+        return [dict(job) for job in self.jobs.values()][:limit]
+
+
+class _Router:
+    def __init__(self):
+        self.engine = type('Engine', (), {'store': _Store(), 'active_jobs': {}})()
+        self.callbacks = {}
+
+    def register_callback(self, event, callback):
+        self.callbacks.setdefault(event, []).append(callback)
+
+    def submit_distribution(self, addresses, token_address, amount_per_address, sender_key,
+                            tag=None, priority=5):
+        job_id = len(self.engine.store.jobs) + 1
+        self.engine.store.jobs[job_id] = {
+            'job_id': job_id, 'mode': 'distribution', 'state': 'pending',
+            'total': len(addresses), 'done': 0, 'failed': 0,
+            'config': {'addresses': addresses, 'sender_key': sender_key},
+        }
+        return job_id
+
+    def get_progress(self, job_id):
+        job = self.engine.store.jobs[job_id]
+        return {'total': job['total'], 'done': job['done'], 'failed': 0}
+
+    def advance(self, job_id, done, state):
+        self.engine.store.jobs[job_id].update(done=done, state=state)
+        for callback in self.callbacks.get('job_progress', []):
+            callback(job_id, {})
+
+
+@pytest.fixture
+def api():
+    router = _Router()
+    server = HeadlessServer(HeadlessService(router, poll_interval=0.05), port=0, token='secret')
+    server.start()
+    yield router, HeadlessClient(url=server.address, token='secret')
+    server.stop()
+
+
+def test_submit_redacts_keys_and_streams_progress(api):
+    router, client = api
+    params = build_submission('distribution', {
+        'addresses': ['0x1', '0x2'], 'token_address': 'BNB', 'amount_per_address': 0.1,
+    }, ['0xprivate'])
+
+    job_id = client.request('POST', '/jobs', {'mode': 'distribution', 'params': params})['job_id']
+    job = client.request('GET', f'/jobs/{job_id}')
+    assert job['config'] == {'addresses': ['0x1', '0x2'], 'sender_key': '***'}
+
+    def run():
+        router.advance(job_id, 1, 'running')
+        router.advance(job_id, 2, 'completed')
+
+    events = client.events(job_id)
+    assert next(events)['state'] == 'pending'
+    threading.Timer(0.1, run).start()
+    states = [event['state'] for event in events]
+    assert states[-1] == 'completed'
+
+
+def test_errors_and_auth(api):
+    router, client = api
+    with pytest.raises(RuntimeError, match='404'):
+        client.request('GET', '/jobs/42')
+    with pytest.raises(RuntimeError, match='400'):
+        client.request('POST', '/jobs', {'mode': 'unknown', 'params': {}})
+    with pytest.raises(RuntimeError, match='401'):
+        HeadlessClient(url=client.url.geturl()).request('GET', '/health')
+
+
+def test_browser_origin_rejected_without_token():
+    import http.client
+
+    server = HeadlessServer(HeadlessService(_Router(), poll_interval=0.05), port=0)
+    server.start()
+    try:
+        host, port = server.httpd.server_address[:2]
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        conn.request('POST', '/jobs/1/cancel', headers={'Origin': 'https://evil.example'})
+        assert conn.getresponse().status == 403
+        assert HeadlessClient(url=server.address).request('GET', '/health')
+    finally:
+        server.stop()
@@ -0,0 +1,54 @@
+"""Тесты асинхронного конвейера логирования."""
+
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler
+
+from wallet_sender.utils.logger import BatchingFileHandler, BufferedQueueListener, JsonLinesHandler
+
+
+def _record(message, level=logging.INFO, **extra):
+    record = logging.LogRecord("wallet_sender.test", level, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_batching_file_handler_writes_in_batches(tmp_path):
+    path = tmp_path / "app.log"
+    handler = BatchingFileHandler(path, batch_size=3, flush_interval=60)
+    handler.handle(_record("one"))
+    handler.handle(_record("two"))
+    assert path.read_text(encoding="utf-8") == ""
+
+    handler.handle(_record("three"))
+    assert path.read_text(encoding="utf-8").splitlines() == ["one", "two", "three"]
+
+    # Ошибки пишутся сразу, не дожидаясь пакета
+    handler.handle(_record("boom", logging.ERROR))
+    assert path.read_text(encoding="utf-8").splitlines()[-1] == "boom"
+    handler.close()
+
+
+def test_listener_feeds_json_lines_with_extra_fields(tmp_path):
+    path = tmp_path / "app.jsonl"
+    sink = JsonLinesHandler(path, batch_size=1000, flush_interval=0.05)
+    log_queue = queue.Queue()
+    listener = BufferedQueueListener(log_queue, sink, flush_interval=0.05)
+    logger = logging.getLogger("wallet_sender.test.pipeline")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(QueueHandler(log_queue))
+    listener.start()
+    try:
+        logger.info("Отправлено %s", "0xabc", extra={"tx_hash": "0xabc", "amount": 1.5})
+        logger.debug("ниже уровня логгера")
+        logger.warning("повтор")
+    finally:
+        listener.stop()
+        sink.close()
+
+    entries = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [entry["message"] for entry in entries] == ["Отправлено 0xabc", "повтор"]
+    assert entries[0]["tx_hash"] == "0xabc" and entries[0]["amount"] == 1.5
+    assert entries[1]["level"] == "WARNING"
@@ -0,0 +1,80 @@
+"""Тесты восстановления NonceManager из журнала."""
+
+import pytest
+
+pytest.importorskip("web3")
+
+from wallet_sender.core.nonce_journal import NonceJournal  # noqa: E402
+from wallet_sender.core.nonce_manager import NonceManager  # noqa: E402
+
+ADDRESS = "0x" + "11" * 20
+
+
+class _Eth:
+    def __init__(self, pending, latest):
+        self.counts = {'pending': pending, 'latest': latest}
+        self.rebroadcast = []
+
+    def get_transaction_count(self, address, block_identifier='latest'):
+        return self.counts[block_identifier]
+
+    def send_raw_transaction(self, raw_tx):
+        self.rebroadcast.append(raw_tx)
+        return raw_tx
+
+
+class _Web3:
+    def __init__(self, pending, latest):
+        self.eth = _Eth(pending, latest)
+
+
+def _crash_with_lost_broadcasts(db_path, raw_tx):
+    manager = NonceManager(_Web3(pending=5, latest=5), journal=NonceJournal(db_path))
+    tickets = [manager.reserve(ADDRESS) for _ in range(4)]
+    manager.complete(tickets[0], "0xaa", b"\x05" if raw_tx else None)
+    manager.complete(tickets[1], "0xbb", b"\x06" if raw_tx else None)
+    manager.complete(tickets[2], "0xcc", b"\x07" if raw_tx else None)
+    manager.confirm(tickets[0])
+    # tickets[3] зарезервирован, но не отправлен - "сбой"
+    manager.shutdown()
+
+
+def test_replay_rebroadcasts_transactions_unknown_to_network(tmp_path):
+    db_path = str(tmp_path / "journal.db")
+    _crash_with_lost_broadcasts(db_path, raw_tx=True)
+
+    # Сеть видит только смайненный nonce 5, nonce 6 и 7 потеряны из mempool
+    web3 = _Web3(pending=6, latest=6)
+    restarted = NonceManager(web3, journal=NonceJournal(db_path))
+    # Потерянные транзакции отправлены заново, неотправленный nonce 8 переиспользуется
+    assert restarted.reserve(ADDRESS).nonce == 8
+    assert web3.eth.rebroadcast == ["0x06", "0x07"]
+    assert restarted.get_pending_nonces(ADDRESS) == {6, 7, 8}
+    restarted.shutdown()
+
+
+def test_replay_resumes_from_first_nonce_network_does_not_know(tmp_path):
+    db_path = str(tmp_path / "journal.db")
+    _crash_with_lost_broadcasts(db_path, raw_tx=False)
+
+    # Без подписанных транзакций повторить отправку нельзя: дыры не остается
+    restarted = NonceManager(_Web3(pending=6, latest=6), journal=NonceJournal(db_path))
+    assert restarted.reserve(ADDRESS).nonce == 6
+    assert restarted.get_pending_nonces(ADDRESS) == {6}
+    restarted.shutdown()
+
+    # Потерянные nonce отмечены в журнале и при следующем старте не всплывают
+    journal = NonceJournal(db_path)
+    state = journal.load(ADDRESS)
+    assert state.inflight == {} and state.reserved == {6}
+    journal.close()
+
+
+def test_reset_address_forgets_journal(tmp_path):
+    db_path = str(tmp_path / "journal.db")
+
+    manager = NonceManager(_Web3(pending=0, latest=0), journal=NonceJournal(db_path))
+    manager.complete(manager.reserve(ADDRESS), "0xaa")
+    manager.reset_address(ADDRESS)
+    assert manager.reserve(ADDRESS).nonce == 0
+    manager.shutdown()
@@ -0,0 +1,55 @@
+"""Тесты аренды диапазонов nonce."""
+
+import pytest
+
+pytest.importorskip("web3")
+
+from wallet_sender.core.nonce_manager import NonceManager  # noqa: E402
+
+ADDRESS = "0x" + "22" * 20
+
+
+class _Eth:
+    def __init__(self, nonce):
+        self.nonce = nonce
+
+    def get_transaction_count(self, address, block_identifier='latest'):
+        return self.nonce
+
+
+class _Web3:
+    def __init__(self, nonce):
+        self.eth = _Eth(nonce)
+
+
+def test_lease_hands_out_contiguous_range_and_returns_tail():
+    manager = NonceManager(_Web3(10))
+
+    lease = manager.lease(ADDRESS, 100)
+    assert [lease.next() for _ in range(3)] == [10, 11, 12]
+    assert manager.reserve(ADDRESS).nonce == 110
+
+    # После аренды уже выдан nonce: хвост 13..109 уходит в список свободных
+    manager.release_lease(lease)
+    second = manager.lease(ADDRESS, 5)
+    assert (second.start, second.end) == (13, 18)
+    assert second.next() == 13
+    second.release()
+    assert manager.reserve(ADDRESS).nonce == 14
+    # Свободный диапазон короче запрошенного: аренда до его конца
+    third = manager.lease(ADDRESS, 500)
+    assert (third.start, third.end) == (15, 110)
+    assert manager.lease(ADDRESS, 1).next() == 111
+    assert manager._creation_locks == {}
+    manager.shutdown()
+
+
+def test_failed_lease_rolls_back_to_failed_nonce():
+    manager = NonceManager(_Web3(0))
+
+    lease = manager.lease(ADDRESS, 10)
+    lease.complete(lease.next(), "0xaa")
+    lease.fail(lease.next(), "insufficient funds")
+    assert lease.exhausted
+    assert manager.reserve(ADDRESS).nonce == 1
+    manager.shutdown()
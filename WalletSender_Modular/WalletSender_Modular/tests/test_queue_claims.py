@@ -0,0 +1,187 @@
+"""Тесты атомарной аренды адресов воркерами QueueExecutor."""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("web3")
+
+from wallet_sender.database.database import Database
+from wallet_sender.database.models import DistributionAddress, DistributionTask, Transaction
+from wallet_sender.services.queue_executor import ClaimedAddress, QueueExecutor
+from wallet_sender.services.queue_writeback import StatusWriteBuffer
+
+
+@pytest.fixture
+def executor(tmp_path):
+    executor = QueueExecutor.__new__(QueueExecutor)
+    executor.db = Database(f"sqlite:///{tmp_path / 'queue.db'}")
+    executor.claim_batch_size = 5
+    executor.lease_seconds = 300
+    executor.write_buffer = StatusWriteBuffer(executor.db, journal_path=str(tmp_path / 'wb.jsonl'))
+    with executor._session_scope() as session:
+        session.add(DistributionTask(id=1, status='running', total_addresses=40))
+        session.add_all(
+            DistributionAddress(task_id=1, address=f"0x{i:040x}", status='pending')
+            for i in range(40)
+        )
+    yield executor
+    executor.write_buffer.close()
+    executor.db.close()
+
+
+def test_concurrent_claims_are_disjoint(executor):
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(n):
+        while True:
+            batch = executor.claim_addresses(1, f"worker-{n}-{len(claimed)}-{threading.get_ident()}")
+            if not batch:
+                return
+            with lock:
+                claimed.extend(item.id for item in batch)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == list(range(1, 41))
+
+
+def test_expired_lease_is_reclaimed_and_task_completes_last(executor):
+    first = executor.claim_addresses(1, 'a', batch_size=40)
+    assert len(first) == 40
+    assert executor.claim_addresses(1, 'b') == []
+
+    with executor._session_scope() as session:
+        session.query(DistributionAddress).filter_by(id=1).update(
+            {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)})
+    assert [item.id for item in executor.claim_addresses(1, 'b')] == [1]
+
+    executor._release_claim('a')
+    executor._mark_task_completed(1)
+    with executor._session_scope() as session:
+        assert session.get(DistributionTask, 1).status == 'running'
+        session.query(DistributionAddress).update({'status': 'sent'})
+    executor._mark_task_completed(1)
+    with executor._session_scope() as session:
+        assert session.get(DistributionTask, 1).status == 'completed'
+
+
+def test_write_buffer_batches_and_recovers_after_crash(executor, tmp_path):
+    journal = str(tmp_path / 'crash.jsonl')
+    batch = executor.claim_addresses(1, 'a', batch_size=3)
+    crashed = StatusWriteBuffer(executor.db, journal_path=journal, flush_rows=100)
+    for item in batch:
+        crashed.add(1, item.id, 'sent', f"0x{item.id:064x}",
+                    transaction={'tx_hash': f"0x{item.id:064x}", 'to_address': item.address})
+    crashed.add(1, 4, 'failed', error='rejected')
+
+    # Процесс упал до сброса: в БД адреса еще арендованы
+    with executor._session_scope() as session:
+        assert session.query(DistributionAddress).filter_by(status='processing').count() == 3
+
+    # Повторное применение (падение после коммита, до очистки журнала) идемпотентно
+    content = open(journal, encoding='utf-8').read()
+    for _ in range(2):
+        with open(journal, 'w', encoding='utf-8') as f:
+            f.write(content)
+        assert StatusWriteBuffer(executor.db, journal_path=journal).recover() == 4
+
+    with executor._session_scope() as session:
+        task = session.get(DistributionTask, 1)
+        assert (task.processed_addresses, task.successful_sends, task.failed_sends) == (4, 3, 1)
+        assert session.query(DistributionAddress).filter_by(status='processing').count() == 0
+        assert session.query(Transaction).count() == 3
+
+
+def test_unflushed_results_are_not_released_or_reclaimed(executor, monkeypatch):
+    batch = executor.claim_addresses(1, 'a', batch_size=3)
+
+    def broken(entries):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(executor.write_buffer, '_write', broken)
+    for item in batch[:2]:
+        executor.write_buffer.add(1, item.id, 'sent', f"0x{item.id:064x}")
+
+    # Сброс не удался: в очередь возвращается только неотправленный адрес
+    executor._release_claim('a')
+    with executor._session_scope() as session:
+        statuses = {row.id: row.status for row in session.query(DistributionAddress).filter(
+            DistributionAddress.id.in_([item.id for item in batch]))}
+        assert statuses == {1: 'processing', 2: 'processing', 3: 'pending'}
+        session.query(DistributionAddress).update(
+            {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)})
+
+    # И после истечения аренды отправленные адреса не арендуются повторно
+    assert not {1, 2} & {item.id for item in executor.claim_addresses(1, 'b', batch_size=40)}
+
+    monkeypatch.undo()
+    assert executor.write_buffer.flush() == 2
+    with executor._session_scope() as session:
+        assert session.get(DistributionAddress, 1).status == 'sent'
+
+
+def test_concurrent_sends_reserve_distinct_nonces(monkeypatch):
+    from wallet_sender.core.nonce_manager import NonceManager, NonceStatus
+    from wallet_sender.services import queue_executor
+
+    class _Eth:
+        def get_transaction_count(self, address, block_identifier='latest'):
+            return 7
+
+    class _Confirmations:
+        def __init__(self):
+            self.watched = []
+
+        def watch(self, tx_hash, ticket=None, sent_at=None):
+            self.watched.append((tx_hash, ticket))
+
+    class _TokenService:
+        def __init__(self):
+            self.nonces = []
+            self.lock = threading.Lock()
+
+        def transfer(self, nonce=None, to_address=None, **kwargs):
+            with self.lock:
+                self.nonces.append(nonce)
+            if to_address.endswith('ff'):
+                return {'success': False, 'error': 'insufficient funds'}
+            return {'success': True, 'tx_hash': f"0x{nonce:064x}"}
+
+    manager = NonceManager(type('Web3', (), {'eth': _Eth()})())
+    confirmations = _Confirmations()
+    monkeypatch.setattr(queue_executor, 'get_nonce_manager', lambda: manager)
+    monkeypatch.setattr(queue_executor, 'get_confirmation_service', lambda web3=None: confirmations)
+
+    executor = QueueExecutor.__new__(QueueExecutor)
+    executor.config = type('Config', (), {'get': lambda self, key, default=None: default})()
+    executor.web3_provider = type('Provider', (), {'web3': manager.web3})()
+    executor.token_service = _TokenService()
+    key = "0x" + "11" * 32
+
+    threads = [threading.Thread(target=executor._send_tokens,
+                                args=(ClaimedAddress(i, f"0x{i:040x}"), "0xT", "PLEX", 1.0, key))
+               for i in range(1, 7)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Каждый воркер получил свой nonce, тикеты отправленных переданы на подтверждение
+    assert sorted(executor.token_service.nonces) == list(range(7, 13))
+    assert len(confirmations.watched) == 6
+    assert all(ticket.status == NonceStatus.PENDING for _, ticket in confirmations.watched)
+
+    # Неудачная отправка закрывает ticket ошибкой и не передается на подтверждение
+    executor._send_tokens(ClaimedAddress(99, "0x" + "f" * 40), "0xT", "PLEX", 1.0, key)
+    assert executor.token_service.nonces[-1] == 13
+    assert manager.total_failed == 1 and len(confirmations.watched) == 6
+    assert 13 not in manager.get_pending_nonces(confirmations.watched[0][1].address)
+    manager.shutdown()
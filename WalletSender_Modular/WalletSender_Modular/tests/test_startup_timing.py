@@ -0,0 +1,70 @@
+"""Тесты отчета о времени запуска."""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from wallet_sender.utils import startup_timing
+
+
+def test_report_stages_and_first_window():
+    startup_timing.set_origin(time.perf_counter() - 0.1)
+    startup_timing.mark('imports')
+    startup_timing.mark(startup_timing.FIRST_WINDOW)
+
+    summary = startup_timing.report()
+
+    stages = summary['stages']
+    assert [item['stage'] for item in stages] == ['imports', 'first_paint']
+    assert stages[0]['at_ms'] >= 100
+    assert summary['time_to_first_window_ms'] == stages[1]['at_ms']
+    assert sum(item['duration_ms'] for item in stages) == pytest.approx(stages[1]['at_ms'], abs=0.5)
+
+
+
+def test_import_has_no_package_side_effects():
+    # Профилировщик ставится до импорта остальных модулей пакета (main.py)
+    code = ("import sys; import wallet_sender.utils.startup_timing; "
+            "print(sorted(m for m in sys.modules if m.startswith('wallet_sender') or m == 'asyncio'))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONPATH=startup_timing.__file__.rsplit("wallet_sender", 1)[0]))
+    assert result.stdout.strip() == "['wallet_sender', 'wallet_sender.utils', 'wallet_sender.utils.startup_timing']"
+
+
+def test_profile_records_imports_and_singletons(tmp_path, monkeypatch):
+    (tmp_path / "slow_child.py").write_text("import time\ntime.sleep(0.03)\n")
+    (tmp_path / "slow_parent.py").write_text("import slow_child\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(startup_timing, '_import_profiler', None)
+
+    argv = ['main.py', f'--profile-startup={tmp_path / "profile.json"}', '--profile-exit']
+    assert startup_timing.configure_from_argv(argv)
+    assert argv == ['main.py'] and startup_timing.should_exit_after_paint()
+    try:
+        import slow_parent  # noqa: F401
+        with startup_timing.measure('get_store'):
+            pass
+        data = startup_timing.finish()
+    finally:
+        startup_timing._import_profiler.uninstall()
+        monkeypatch.setattr(startup_timing, '_profile', None)
+
+    modules = data['imports']['modules']
+    assert modules['slow_child']['self_ms'] >= 25
+    assert modules['slow_parent']['cumulative_ms'] >= modules['slow_child']['cumulative_ms']
+    assert modules['slow_parent']['self_ms'] < 25
+    assert 'get_store' in data['singletons_ms']
+    assert (tmp_path / "profile.json").exists()
+
+
+def test_compare_reports_flags_regressions():
+    baseline = {'time_to_first_window_ms': 1000.0, 'stages': [], 'singletons_ms': {'get_store': 10.0}}
+    current = {'time_to_first_window_ms': 1500.0, 'stages': [], 'singletons_ms': {'get_store': 20.0}}
+
+    comparison = startup_timing.compare_reports(current, baseline)
+
+    assert [e['metric'] for e in comparison['regressions']] == ['time_to_first_window_ms']
+    assert comparison['regressions'][0]['delta_pct'] == 50.0
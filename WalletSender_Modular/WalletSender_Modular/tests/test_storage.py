@@ -0,0 +1,107 @@
+"""Тесты общего движка хранения SQLite."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from wallet_sender.utils.storage import StorageEngine
+
+
+def test_connection_per_thread_and_rollback(tmp_path):
+    storage = StorageEngine(str(tmp_path / "store.db"), trace_commits=True)
+    with storage.connection() as conn:
+        conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+        conn.commit()
+        # Вложенный вход использует то же соединение потока
+        with storage.connection() as inner:
+            assert inner is conn
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(storage.connection().__enter__()))
+    thread.start()
+    thread.join()
+    with storage.connection() as conn:
+        assert other[0] is not conn
+
+    # Незакоммиченная запись откатывается на выходе
+    with storage.connection() as conn:
+        conn.execute("INSERT INTO items (name) VALUES ('lost')")
+    with storage.connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+        conn.execute("INSERT INTO items (name) VALUES ('kept')")
+        conn.commit()
+    assert storage.get_stats()['total_commits'] == 1
+    storage.close()
+
+
+def test_migration_applied_once_and_legacy_import(tmp_path):
+    legacy = tmp_path / "legacy.db"
+    with sqlite3.connect(legacy) as conn:
+        conn.execute('CREATE TABLE settings (key TEXT, value TEXT, obsolete TEXT)')
+        conn.execute("INSERT INTO settings VALUES ('theme', 'dark', 'x')")
+
+    storage = StorageEngine(str(tmp_path / "store.db"))
+    calls = []
+
+    def create(conn):
+        calls.append(1)
+        conn.execute('CREATE TABLE app_settings (key TEXT, value TEXT)')
+
+    assert storage.migrate('001_app_settings', create)
+    assert not storage.migrate('001_app_settings', create)
+    assert calls == [1]
+
+    renames = {'settings': 'app_settings'}
+    assert storage.import_legacy(str(legacy), ['settings'], renames=renames)
+    assert not storage.import_legacy(str(legacy), ['settings'], renames=renames)
+    with storage.connection() as conn:
+        assert [tuple(row) for row in conn.execute('SELECT * FROM app_settings')] == [('theme', 'dark')]
+    assert storage.applied_migrations() == ['001_app_settings', 'import_legacy:legacy.db']
+    storage.close()
+
+
+def test_orm_sessions_in_many_threads(tmp_path, monkeypatch):
+    pytest.importorskip("sqlalchemy")
+    from wallet_sender.database import database
+    from wallet_sender.database.models import DistributionTask
+
+    storage = StorageEngine(str(tmp_path / "store.db"), orm_pool_size=4, orm_max_overflow=8)
+    monkeypatch.setattr(database, 'get_storage', lambda: storage)
+    db = database.Database()
+
+    threads_count = 12
+    barrier = threading.Barrier(threads_count)
+    errors = []
+
+    def worker(n):
+        session = db.get_session()
+        try:
+            session.query(DistributionTask).count()
+            # Все потоки держат соединения одновременно
+            barrier.wait(timeout=10)
+            session.add(DistributionTask(name=f"task-{n}", status='pending'))
+            session.commit()
+            assert session.query(DistributionTask).filter_by(name=f"task-{n}").count() == 1
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with storage.connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM distribution_tasks').fetchone()[0] == threads_count
+    # Пул ограничен и учитывается в статистике движка
+    stats = storage.get_stats()
+    assert 0 < stats['orm_connections'] <= 4 + 8
+    assert stats['connections'] == stats['thread_connections'] + stats['orm_connections']
+    db.close()
+    assert storage.get_stats()['orm_connections'] == 0
+    storage.close()
@@ -0,0 +1,56 @@
+"""Тесты агрегатов tx_history в Store."""
+
+import pytest
+
+pytest.importorskip("web3")
+
+from wallet_sender.core.store import Store  # noqa: E402
+
+
+def _rollups(store):
+    return store.get_rollups('day', group_by=('token', 'type', 'status', 'sender'))
+
+
+def test_rollups_follow_inserts_and_status_updates(tmp_path):
+    store = Store(str(tmp_path / "store.db"))
+    for i in range(4):
+        store.add_transaction(tx_hash=f"0x{i}", from_address="0xA", to_address=f"0xR{i % 2}",
+                              amount=2.0, gas_price=5 * 10**9, status='pending',
+                              type='distribution', token_symbol='PLEX')
+    store.update_transaction("0x0", status='success', gas_used=21000)
+    store.update_transaction("0x1", status='failed', note='reverted')
+
+    stats = store.get_statistics()
+    assert stats['total_transactions'] == 4
+    assert stats['transactions_by_status'] == {'pending': 2, 'success': 1, 'failed': 1}
+    assert store.get_transaction_volume()[0]['volume'] == 8.0
+    assert store.count_unique_receivers() == 2
+    assert sum(store.get_latency_histogram().values()) == 2
+    assert store.get_gas_price_histogram() == {5.0: 4}
+
+    incremental = _rollups(store)
+    store.rebuild_rollups()
+    assert _rollups(store) == incremental
+
+
+def test_rollup_min_max_follow_amount_and_status_changes(tmp_path):
+    store = Store(str(tmp_path / "store.db"))
+    for i, amount in enumerate((1.0, 5.0, 9.0)):
+        store.add_transaction(tx_hash=f"0x{i}", from_address="0xA", to_address="0xR",
+                              amount=amount, status='pending', type='distribution', token_symbol='PLEX')
+    store.update_transaction("0x2", status='success')
+    store.update_transaction("0x0", amount=3.0)
+
+    by_status = {row['status']: row for row in _rollups(store)}
+    assert (by_status['pending']['amount_min'], by_status['pending']['amount_max']) == (3.0, 5.0)
+    assert (by_status['success']['amount_min'], by_status['success']['amount_max']) == (9.0, 9.0)
+
+    incremental = _rollups(store)
+    store.rebuild_rollups()
+    assert _rollups(store) == incremental
+
+    with store.get_connection() as conn:
+        conn.execute("DELETE FROM tx_history WHERE tx_hash = '0x1'")
+        conn.commit()
+    pending = [row for row in _rollups(store) if row['status'] == 'pending'][0]
+    assert (pending['amount_min'], pending['amount_max']) == (3.0, 3.0)
@@ -0,0 +1,163 @@
+"""Тесты симуляции покупки и продажи через eth_call."""
+
+import pytest
+
+from wallet_sender.utils import cache_manager
+from wallet_sender.utils.cache_manager import DEFAULT_NAMESPACES, TieredCache
+from wallet_sender.utils.swap_simulator import (
+    SELECTOR_AMOUNTS_OUT, SELECTOR_BALANCE_OF, SELECTOR_BUY, SELECTOR_SELL, SELECTOR_TRANSFER,
+    SIMULATOR_ADDRESS, SwapSimulator
+)
+
+CLEAN = "0x" + "c1" * 20
+HONEYPOT = "0x" + "de" * 20
+TAXED = "0x" + "7a" * 20
+NO_PAIR = "0x" + "00" * 19 + "01"
+
+# Токен -> (комиссия покупки, комиссия продажи, продажа проходит)
+TOKENS = {CLEAN: (0.0, 0.0, True), HONEYPOT: (0.0, 0.0, False), TAXED: (0.05, 0.2, True)}
+PRICE = 1000  # токенов за 1 wei BNB
+
+
+def _word(value):
+    return int(value).to_bytes(32, "big")
+
+
+def _at(data, position):
+    return int.from_bytes(data[position:position + 32], "big")
+
+
+def _decode_calls(data):
+    """Разбор aggregate3Value((address,bool,uint256,bytes)[]) по спецификации ABI"""
+    assert data[:4].hex() == "174dea71"
+    body = data[4:]
+    array = _at(body, 0)
+    count = _at(body, array)
+    calls = []
+    for i in range(count):
+        start = array + 32 + _at(body, array + 32 + 32 * i)
+        target = "0x" + body[start + 12:start + 32].hex()
+        assert _at(body, start + 32) == 1  # allowFailure
+        value = _at(body, start + 64)
+        position = start + _at(body, start + 96)
+        calls.append((target, value, body[position + 32:position + 32 + _at(body, position)]))
+    return calls
+
+
+def _encode_results(results):
+    elements = [_word(ok) + _word(64) + _word(len(data)) + data + bytes(-len(data) % 32)
+                for ok, data in results]
+    offsets, position = b"", 32 * len(elements)
+    for element in elements:
+        offsets += _word(position)
+        position += len(element)
+    return "0x" + (_word(32) + _word(len(elements)) + offsets + b"".join(elements)).hex()
+
+
+def _amounts(*values):
+    return _word(32) + _word(len(values)) + b"".join(_word(v) for v in values)
+
+
+class _Node:
+    def __init__(self):
+        self.block = 1000
+        self.requests = []
+        self.simulated = []
+
+    def __call__(self, payload):
+        self.requests.append(payload)
+        return [dict(self._answer(call), id=call["id"], jsonrpc="2.0") for call in payload]
+
+    def _answer(self, call):
+        if call["method"] == "eth_blockNumber":
+            return {"result": hex(self.block)}
+        if call["method"] == "eth_getCode":
+            return {"result": "0x6080"}
+        tx, block_tag = call["params"][0], call["params"][1]
+        assert block_tag == hex(self.block)
+        data = bytes.fromhex(tx["data"][2:])
+        if tx["to"] == SIMULATOR_ADDRESS:
+            assert call["params"][2][SIMULATOR_ADDRESS]["code"] == "0x6080"
+            return {"result": _encode_results(self._simulate(_decode_calls(data), int(tx["value"], 16)))}
+        # Котировка покупки: пара есть только у известных токенов и только напрямую с WBNB
+        path_length = _at(data[4:], 64)
+        token = "0x" + data[4 + 96 + 32 * (path_length - 1) + 12:4 + 96 + 32 * path_length].hex()
+        if token not in TOKENS or path_length != 2:
+            return {"error": {"code": 3, "message": "execution reverted"}}
+        return {"result": "0x" + _amounts(_at(data[4:], 0), _at(data[4:], 0) * PRICE).hex()}
+
+    def _simulate(self, calls, value):
+        token = calls[0][0]
+        self.simulated.append(token)
+        buy_tax, sell_tax, sellable = TOKENS[token]
+        held, probe, wbnb = 0, 0, 7
+        results = []
+        for target, call_value, data in calls:
+            selector, args = "0x" + data[:4].hex(), data[4:]
+            if selector == SELECTOR_BALANCE_OF:
+                owner = "0x" + args[12:32].hex()
+                amount = (held if owner == SIMULATOR_ADDRESS else probe) if target == token else wbnb
+                results.append((True, _word(amount)))
+            elif selector == SELECTOR_BUY:
+                assert call_value == value
+                held += int(value * PRICE * (1 - buy_tax))
+                results.append((True, b""))
+            elif selector == SELECTOR_TRANSFER:
+                amount = _at(args, 32)
+                held -= amount
+                probe += amount
+                results.append((True, _word(1)))
+            elif selector == SELECTOR_AMOUNTS_OUT:
+                amount = _at(args, 0)
+                results.append((True, _amounts(amount, amount // PRICE)))
+            elif selector == SELECTOR_SELL:
+                amount = _at(args, 0)
+                if not sellable or amount > held:
+                    results.append((False, b""))
+                    continue
+                held -= amount
+                wbnb += int(amount // PRICE * (1 - sell_tax))
+                results.append((True, b""))
+            else:
+                results.append((True, _word(1)))
+        return results
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch):
+    cache = TieredCache(dict(DEFAULT_NAMESPACES))
+    monkeypatch.setattr(cache_manager, "_global_cache", cache)
+    yield cache
+    cache.close()
+
+
+def test_round_trip_batched_and_cached_per_block_window():
+    node = _Node()
+    simulator = SwapSimulator(transport=node, amount_bnb=0.01, block_window=20)
+    results = simulator.simulate_many([CLEAN, HONEYPOT, TAXED, NO_PAIR])
+
+    # Номер блока, пакет котировок, пакет симуляций
+    assert len(node.requests) == 3
+    assert sorted(node.simulated) == sorted(TOKENS)
+
+    clean = results[CLEAN]
+    assert clean.can_buy and clean.can_sell and clean.can_transfer
+    assert clean.buy_tax == 0.0 and clean.sell_tax == 0.0 and clean.transfer_tax == 0.0
+
+    assert results[HONEYPOT].can_buy and not results[HONEYPOT].can_sell
+
+    taxed = results[TAXED]
+    assert taxed.buy_tax == pytest.approx(0.05)
+    assert taxed.sell_tax == pytest.approx(0.2, abs=1e-6)
+
+    assert not results[NO_PAIR].has_route and results[NO_PAIR].error is None
+
+    # В пределах окна блоков - только запрос номера блока
+    node.block += 5
+    assert simulator.simulate(TAXED) is taxed
+    assert len(node.requests) == 4
+
+    node.block += 20
+    node.simulated.clear()
+    simulator.simulate(TAXED)
+    assert node.simulated == [TAXED]
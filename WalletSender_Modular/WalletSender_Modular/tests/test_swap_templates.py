@@ -0,0 +1,112 @@
+"""Тесты сборки calldata из шаблонов swap транзакций."""
+
+import pytest
+
+pytest.importorskip("web3")
+eth_abi = pytest.importorskip("eth_abi")
+
+from web3 import Web3  # noqa: E402
+
+from wallet_sender.services.swap_templates import SwapTemplateCache  # noqa: E402
+from wallet_sender.utils import cache_manager  # noqa: E402
+from wallet_sender.utils.cache_manager import DEFAULT_NAMESPACES, TieredCache  # noqa: E402
+
+ROUTER = "0x10ED43C718714eb63d5aA57B78B54704E256024E"
+SENDER = "0x000000000000000000000000000000000000dEaD"
+PATH = [
+    "0x55d398326f99059fF775485246999027B3197955",
+    "0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c",
+]
+
+
+class _FakeEth:
+    chain_id = 56
+
+
+class _FakeWeb3:
+    eth = _FakeEth()
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch):
+    cache = TieredCache(dict(DEFAULT_NAMESPACES))
+    monkeypatch.setattr(cache_manager, "_global_cache", cache)
+    yield cache
+    cache.close()
+
+
+def _reference(signature: str, types, args) -> str:
+    selector = Web3.keccak(text=signature)[:4]
+    return "0x" + (selector + eth_abi.encode(types, args)).hex()
+
+
+def test_tokens_in_calldata_matches_abi_encoding():
+    cache = SwapTemplateCache(_FakeWeb3(), ROUTER, SENDER)
+    template = cache.get("swapExactTokensForTokens", PATH)
+    tx = template.build_transaction(10**18, 5, nonce=7, gas_price=10**9, deadline=1700000000)
+
+    expected = _reference(
+        "swapExactTokensForTokens(uint256,uint256,address[],address,uint256)",
+        ["uint256", "uint256", "address[]", "address", "uint256"],
+        [10**18, 5, PATH, SENDER, 1700000000],
+    )
+    assert tx["data"] == expected
+    assert tx["value"] == 0
+    assert tx["nonce"] == 7
+    assert tx["chainId"] == 56
+
+
+def test_eth_in_calldata_and_cache_hit():
+    cache = SwapTemplateCache(_FakeWeb3(), ROUTER, SENDER)
+    template = cache.get("swapExactETHForTokens", PATH[::-1])
+    assert cache.get("swapExactETHForTokens", PATH[::-1]) is template
+    assert cache.get_stats()["hits"] == 1
+
+    tx = template.build_transaction(3, 1, nonce=0, gas_price=1, deadline=42)
+    expected = _reference(
+        "swapExactETHForTokens(uint256,address[],address,uint256)",
+        ["uint256", "address[]", "address", "uint256"],
+        [1, PATH[::-1], SENDER, 42],
+    )
+    assert tx["data"] == expected
+    assert tx["value"] == 3
+
+
+def test_gas_limit_per_build_and_estimate():
+    class _EstimatingEth(_FakeEth):
+        def estimate_gas(self, tx):
+            assert "gas" not in tx and "nonce" not in tx
+            return 100_000
+
+    web3 = _FakeWeb3()
+    web3.eth = _EstimatingEth()
+    cache = SwapTemplateCache(web3, ROUTER, SENDER)
+    template = cache.get("swapExactTokensForTokens", PATH)
+
+    assert template.build_transaction(1, 0, nonce=0, gas_price=1, gas_limit=450_000)["gas"] == 450_000
+    assert cache.estimate_gas(template, 10**18) == 120_000
+    assert template.gas_estimated and template.uses == 1
+    # Лимит вызывающего не влияет на следующие транзакции по шаблону
+    assert cache.get("swapExactTokensForTokens", PATH).build_transaction(1, 0, nonce=1, gas_price=1)["gas"] == 120_000
+
+
+def test_route_gas_cache_feeds_new_templates():
+    estimates = iter([100_000, 90_000])
+
+    class _EstimatingEth(_FakeEth):
+        def estimate_gas(self, tx):
+            return next(estimates)
+
+    web3 = _FakeWeb3()
+    web3.eth = _EstimatingEth()
+    cache = SwapTemplateCache(web3, ROUTER, SENDER)
+    template = cache.get("swapExactTokensForTokens", PATH)
+    cache.estimate_gas(template, 10**18)
+    # Лимит - максимум последних оценок маршрута, а не последняя оценка
+    assert cache.estimate_gas(template, 10**18) == 120_000
+
+    # Новый кэш шаблонов берет лимит маршрута без eth_estimateGas
+    fresh = SwapTemplateCache(_FakeWeb3(), ROUTER, SENDER)
+    warmed = fresh.get("swapExactTokensForTokens", PATH)
+    assert warmed.gas_estimated and warmed.gas_limit == 120_000
+    assert fresh.get("swapExactETHForTokens", PATH[::-1]).gas_limit == fresh.default_gas_limit
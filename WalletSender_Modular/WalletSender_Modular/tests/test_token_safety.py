@@ -0,0 +1,170 @@
+"""Тесты пакетной проверки безопасности токенов."""
+
+import pytest
+
+pytest.importorskip("web3")
+
+from wallet_sender.constants import CONTRACTS
+from wallet_sender.utils import cache_manager
+from wallet_sender.utils.cache_manager import DEFAULT_NAMESPACES, TieredCache
+from wallet_sender.utils.swap_simulator import SimulationResult
+from wallet_sender.utils.token_safety import (
+    ERC20_SELECTORS, SafetyLevel, TokenSafetyChecker, dispatch_selectors, pair_address
+)
+
+TOKEN = "0x" + "7e" * 20
+OWNER = "0x" + "0a" * 20
+BLACKLIST = "f9f92be4"
+SET_FEE = "69fe0e2d"
+
+
+def _bytecode(*selectors):
+    code = b"".join(b"\x63" + bytes.fromhex(sel[2:] if sel.startswith("0x") else sel) for sel in selectors)
+    # Селектор внутри данных PUSH32 не является частью таблицы диспетчеризации
+    code += b"\x7f" + b"\x63" + bytes.fromhex(SET_FEE) + b"\x00" * 27
+    return code + b"\x00"
+
+
+def _word(value):
+    return value.to_bytes(32, "big").hex()
+
+
+def _string(text):
+    raw = text.encode()
+    return "0x" + _word(32) + _word(len(raw)) + raw.ljust(32, b"\0").hex()
+
+
+class _Chain:
+    def __init__(self):
+        self.requests = []
+        self.calls = []
+        wbnb = CONTRACTS["WBNB"].lower()
+        pair = pair_address(TOKEN, wbnb).lower()
+        quote_first = int(wbnb, 16) < int(TOKEN, 16)
+        reserves = (5 * 10 ** 18, 10 ** 24) if quote_first else (10 ** 24, 5 * 10 ** 18)
+        self.results = {
+            ("eth_getCode", TOKEN): "0x" + _bytecode(*ERC20_SELECTORS, BLACKLIST).hex(),
+            ("0x06fdde03", TOKEN): _string("Test Token"),
+            ("0x95d89b41", TOKEN): _string("TST"),
+            ("0x313ce567", TOKEN): "0x" + _word(18),
+            ("0x18160ddd", TOKEN): "0x" + _word(10 ** 27),
+            ("0x8da5cb5b", TOKEN): "0x" + _word(int(OWNER, 16)),
+            ("0x0902f1ac", pair): "0x" + _word(reserves[0]) + _word(reserves[1]) + _word(0),
+        }
+
+    def __call__(self, payload):
+        self.requests.append(payload)
+        response = []
+        for call in payload:
+            self.calls.append(call["method"])
+            if call["method"] == "eth_getCode":
+                key = ("eth_getCode", call["params"][0].lower())
+            else:
+                key = (call["params"][0]["data"], call["params"][0]["to"].lower())
+            response.append({"jsonrpc": "2.0", "id": call["id"], "result": self.results.get(key, "0x")})
+        return response
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch):
+    cache = TieredCache(dict(DEFAULT_NAMESPACES))
+    monkeypatch.setattr(cache_manager, "_global_cache", cache)
+    yield cache
+    cache.close()
+
+
+def test_dispatch_selectors_skip_push_data():
+    # PUSH3: селектор с ведущим нулевым байтом
+    selectors, delegatecall = dispatch_selectors(_bytecode(BLACKLIST) + b"\x62\xaa\xbb\xcc")
+    assert {"0x" + BLACKLIST, "0x00aabbcc"} <= selectors
+    assert "0x" + SET_FEE not in selectors
+    assert not delegatecall
+
+
+def test_one_batch_per_token_and_cached_repeat(isolated_cache):
+    chain = _Chain()
+    checker = TokenSafetyChecker(None, transport=chain)
+    checker.simulator = None
+    report = checker.check_token_safety(TOKEN)
+
+    assert len(chain.requests) == 1
+    checks = {check.name: check for check in report.checks}
+    assert checks["Стандартные функции ERC20"].passed
+    assert checks["Информация о токене"].details["symbol"] == "TST"
+    assert checks["Проверка ликвидности"].passed
+    assert checks["Проверка ликвидности"].details["reserves"]["WBNB"] == 5.0
+    assert "USDT" not in checks["Проверка ликвидности"].details["reserves"]
+    suspicious = checks["Подозрительные функции"]
+    assert suspicious.details["suspicious_functions"] == {"blacklist": ["blacklist(address)"]}
+    assert report.overall_level == SafetyLevel.WARNING
+
+    # Повтор - из кеша отчетов, без запросов
+    assert checker.check_tokens([TOKEN, "not-an-address"])[TOKEN] is report
+    assert len(chain.requests) == 1
+
+    # После истечения отчета код не скачивается повторно: разбор берется по хешу кода
+    isolated_cache.clear("token_safety")
+    chain.calls.clear()
+    checker.check_token_safety(TOKEN)
+    assert "eth_getCode" not in chain.calls
+    assert len(chain.requests) == 2
+
+
+def test_audit_evicted_after_planning_is_refetched(isolated_cache):
+    chain = _Chain()
+    checker = TokenSafetyChecker(None, transport=chain)
+    checker.simulator = None
+    checker.check_token_safety(TOKEN)
+    isolated_cache.clear("token_safety")
+
+    # Разбор по хешу вытесняется между планированием пакета и разбором ответа
+    build_calls = checker._build_calls
+
+    def build_then_evict(token):
+        calls = build_calls(token)
+        isolated_cache.clear("code_audit")
+        return calls
+
+    checker._build_calls = build_then_evict
+    chain.calls.clear()
+    report = checker.check_token_safety(TOKEN)
+    assert chain.calls.count("eth_getCode") == 1
+    assert report.overall_level == SafetyLevel.WARNING
+
+    # Без ответа на повторный запрос кода - UNKNOWN, а не "контракт не существует"
+    isolated_cache.clear("token_safety")
+    checker._fetch_code = lambda token: None
+    assert checker.check_token_safety(TOKEN).overall_level == SafetyLevel.UNKNOWN
+
+
+def test_renounced_owner_disables_owner_functions():
+    chain = _Chain()
+    chain.results[("0x8da5cb5b", TOKEN)] = "0x" + _word(0)
+    checker = TokenSafetyChecker(None, transport=chain)
+    checker.simulator = None
+    report = checker.check_token_safety(TOKEN)
+    suspicious = {check.name: check for check in report.checks}["Подозрительные функции"]
+    assert suspicious.passed and suspicious.level == SafetyLevel.SAFE
+
+
+class _Simulator:
+    def __init__(self, **outcome):
+        self.outcome = outcome
+        self.calls = []
+
+    def simulate_many(self, tokens):
+        self.calls.append(list(tokens))
+        return {token: SimulationResult(token=token, block=1, path=["wbnb", token], **self.outcome)
+                for token in tokens}
+
+
+def test_failed_sell_simulation_is_dangerous():
+    checker = TokenSafetyChecker(None, transport=_Chain())
+    checker.simulator = _Simulator(can_buy=True, can_transfer=True, buy_tax=0.01)
+    report = checker.check_token_safety(TOKEN)
+
+    assert checker.simulator.calls == [[TOKEN]]
+    honeypot = {check.name: check for check in report.checks}["Проверка на honeypot"]
+    assert honeypot.level == SafetyLevel.DANGEROUS
+    assert report.overall_level == SafetyLevel.DANGEROUS
+    assert "Возможный honeypot - избегайте этого токена" in report.recommendations
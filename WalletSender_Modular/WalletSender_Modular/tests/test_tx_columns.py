@@ -0,0 +1,77 @@
+"""Тесты колоночной фильтрации транзакций explorer API."""
+
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from wallet_sender.utils.tx_columns import INCOMING, OUTGOING, TxColumns, day_bounds
+
+WALLET = "0x" + "aa" * 20
+ALICE = "0x" + "01" * 20
+BOB = "0x" + "02" * 20
+
+
+def _tx(sender, recipient, amount, day, error='0'):
+    return {
+        'from': sender,
+        'to': recipient,
+        'value': str(int(amount * 10 ** 9)),
+        'tokenDecimal': '9',
+        'timeStamp': str(int(datetime(2024, 1, day, 12).timestamp())),
+        'blockNumber': str(day),
+        'isError': error,
+    }
+
+
+@pytest.fixture
+def columns():
+    columns = TxColumns([
+        _tx(ALICE, WALLET, 1.5, 1),
+        _tx(BOB, "0x" + "AA" * 20, 30, 2),
+    ])
+    # Вторая страница добавляется отдельно
+    columns.extend([
+        _tx(ALICE, WALLET, 2, 3),
+        _tx(WALLET, BOB, 7, 4),
+        _tx(ALICE, WALLET, 3, 5, error='1'),
+    ])
+    return columns
+
+
+def test_row_predicates(columns):
+    assert list(columns.filter_indices(direction=INCOMING, address=WALLET)) == [0, 1, 2, 4]
+    assert list(columns.filter_indices(direction=OUTGOING, address=WALLET)) == [3]
+    assert list(columns.filter_indices(direction=INCOMING, address="0x" + "ff" * 20)) == []
+    assert list(columns.filter_indices(only_success=True, amount_min=2, amount_max=10)) == [2, 3]
+    assert list(columns.filter_indices(amount_exact=1.5)) == [0]
+    ts_from, ts_to = day_bounds(date(2024, 1, 2), date(2024, 1, 3))
+    assert list(columns.filter_indices(ts_from=ts_from, ts_to=ts_to)) == [1, 2]
+    assert list(columns.filter_indices(start=3)) == [3, 4]
+    assert columns.value_wei(1) == 30 * 10 ** 9
+
+
+def test_sender_group_predicates(columns):
+    incoming = {'direction': INCOMING, 'address': WALLET}
+    assert list(columns.filter_indices(unique_senders=True, **incoming)) == [0, 1]
+    assert list(columns.filter_indices(min_tx_per_sender=3, **incoming)) == [0, 2, 4]
+    assert list(columns.filter_indices(min_tx_per_sender=3, unique_senders=True, **incoming)) == [0]
+    assert columns.rows([1]) == [columns.transactions[1]]
+
+
+def test_sender_index_incremental_top_k(columns):
+    from wallet_sender.utils.sender_index import SenderIndex
+
+    index = SenderIndex(capacity=1)
+    index.add(columns, columns.filter_indices(direction=INCOMING, address=WALLET))
+    # Следующая страница с новым отправителем (расширение массивов)
+    carol = "0x" + "03" * 20
+    index.add(TxColumns([_tx(carol, WALLET, 5, 6), _tx(BOB, WALLET, 1, 7)]))
+
+    assert (len(index), index.transfers) == (3, 6)
+    top = index.top(2)
+    assert [(s.address, s.count) for s in top] == [(ALICE, 3), (BOB, 2)]
+    assert (top[0].total, top[0].first_block, top[0].last_block) == (6.5, 1, 5)
+    assert [s.address for s in index.top()] == [ALICE, BOB, carol]
+    assert index.get(BOB).total == 31
@@ -0,0 +1,156 @@
+"""Тесты журнала событий транзакций и его проекций."""
+
+import json
+
+import pytest
+
+pytest.importorskip("web3")
+
+from wallet_sender.core.store import Store  # noqa: E402
+from wallet_sender.core.tx_journal import (  # noqa: E402
+    BROADCAST, FAILED, MINED, REPLACED, RESERVED, StoreProjection, TxJournal
+)
+
+
+def _rows(store):
+    with store.get_connection() as conn:
+        return {row['tx_hash']: dict(row) for row in conn.execute('SELECT * FROM tx_history')}
+
+
+def _send(journal, tx_hash, **fields):
+    fields = dict(dict(from_address="0xA", to_address="0xB", amount=1.0, gas_price=5 * 10**9,
+                       type='distribution'), **fields)
+    journal.append(BROADCAST, tx_hash, **fields)
+
+
+class _CountingProjection:
+    name = 'counting'
+
+    def __init__(self):
+        self.batches = []
+
+    def apply(self, events):
+        self.batches.append([event['seq'] for event in events])
+
+
+def test_events_group_committed_and_projected(tmp_path):
+    store = Store(str(tmp_path / "store.db"))
+    # Писатель просыпается только по flush: все события попадают в одну пачку
+    journal = TxJournal(str(tmp_path / "tx.jsonl"), flush_interval=5)
+    counting = _CountingProjection()
+    journal.add_projection(StoreProjection(store))
+    journal.add_projection(counting)
+
+    journal.append(RESERVED, from_address="0xA", nonce=7)
+    for i in range(3):
+        _send(journal, f"0x{i}", nonce=7 + i)
+    journal.append(MINED, "0x0", status='success', gas_used=21000, block_number=100)
+    journal.append(REPLACED, "0x1", replaced_by="0x9")
+    _send(journal, "0x9", type='replacement')
+    journal.append(FAILED, "0x2", status='failed', note='dropped')
+    journal.flush()
+
+    rows = _rows(store)
+    assert rows["0x0"]["status"] == 'success' and rows["0x0"]["block_number"] == 100
+    assert rows["0x1"]["status"] == 'replaced' and rows["0x1"]["note"] == 'replaced by 0x9'
+    assert rows["0x2"]["status"] == 'failed' and rows["0x2"]["note"] == 'dropped'
+    assert rows["0x9"]["status"] == 'pending' and rows["0x9"]["type"] == 'replacement'
+
+    # Одна пачка - один коммит файла и одно применение проекции
+    assert journal.total_commits == 1 and counting.batches == [list(range(1, 9))]
+    journal.close()
+
+    lines = (tmp_path / "tx.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["event"] for line in lines][:2] == [RESERVED, BROADCAST]
+
+
+def test_original_mined_after_replacement_keeps_success(tmp_path):
+    store = Store(str(tmp_path / "store.db"))
+    journal = TxJournal(str(tmp_path / "tx.jsonl"), flush_interval=5)
+    journal.add_projection(StoreProjection(store))
+
+    # Порядок TxTracker: замена, затем добыт исходный хеш и замена помечена замененной
+    _send(journal, "0xold", nonce=7)
+    journal.append(REPLACED, "0xold", replaced_by="0xnew", nonce=7)
+    _send(journal, "0xnew", nonce=7, type='replacement')
+    journal.append(MINED, "0xold", status='success', gas_used=21000, block_number=100, nonce=7)
+    journal.append(REPLACED, "0xnew", replaced_by="0xold", nonce=7)
+    journal.flush()
+
+    rows = _rows(store)
+    assert (rows["0xold"]["status"], rows["0xold"]["block_number"], rows["0xold"]["note"]) == ('success', 100, None)
+    assert rows["0xnew"]["status"] == 'replaced' and rows["0xnew"]["note"] == 'replaced by 0xold'
+
+    # Замена уже добытой транзакции ее не перезаписывает
+    journal.append(REPLACED, "0xold", replaced_by="0xlate", nonce=7)
+    journal.flush()
+    assert _rows(store)["0xold"]["status"] == 'success'
+    journal.close()
+
+
+def test_projection_rebuilt_from_journal_after_restart(tmp_path):
+    journal = TxJournal(str(tmp_path / "tx.jsonl"))
+    _send(journal, "0xaa")
+    journal.append(MINED, "0xaa", status='success', block_number=5)
+    journal.close()
+
+    # Оборванная строка при падении во время записи
+    with open(tmp_path / "tx.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"seq": 3, "ev')
+
+    store = Store(str(tmp_path / "store.db"))
+    journal = TxJournal(str(tmp_path / "tx.jsonl"))
+    journal.add_projection(StoreProjection(store))
+    assert _rows(store)["0xaa"]["status"] == 'success'
+
+    _send(journal, "0xbb")
+    journal.flush()
+    assert journal.get_stats()['projections'] == {'store': 3}
+    assert set(_rows(store)) == {"0xaa", "0xbb"}
+    journal.close()
+
+
+class _PoisonProjection(_CountingProjection):
+    name = 'poison'
+
+    def __init__(self):
+        super().__init__()
+        self.poisoned = True
+
+    def apply(self, events):
+        if self.poisoned:
+            raise ValueError("poison")
+        super().apply(events)
+
+
+def test_failing_projection_parked_and_journal_compacted(tmp_path):
+    path = tmp_path / "tx.jsonl"
+    journal = TxJournal(str(path), segment_bytes=1, max_projection_failures=2)
+    counting, poison = _CountingProjection(), _PoisonProjection()
+    journal.add_projection(counting)
+    journal.add_projection(poison)
+
+    for i in range(3):
+        _send(journal, f"0x{i}")
+        journal.flush()
+    # Две ошибки подряд: проекция припаркована, файл не усекается, пока она отстает
+    assert journal.get_stats()['parked'] == ['poison']
+    assert journal.total_compactions == 0 and path.stat().st_size > 0
+
+    # Отставшая проекция дочитывает файл со своего смещения и разрешает усечение
+    poison.poisoned = False
+    journal.resume_projection('poison')
+    assert poison.batches == [[1, 2, 3]]
+    _send(journal, "0x3")
+    journal.flush()
+    assert journal.total_compactions == 1 and path.stat().st_size == 0
+    assert journal.get_stats()['checkpoint'] == 4
+    journal.close()
+
+    # После перезапуска seq продолжается с checkpoint, проекции получают только новое
+    journal = TxJournal(str(path), segment_bytes=0)
+    journal.add_projection(counting)
+    _send(journal, "0x4")
+    assert journal.append(MINED, "0x4", sync=True) == 6
+    assert counting.batches[-1][-1] == 6 and sum(counting.batches, [])[-2:] == [5, 6]
+    journal.close()
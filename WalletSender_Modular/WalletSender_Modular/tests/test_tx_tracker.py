@@ -0,0 +1,159 @@
+"""Тесты трекера транзакций: замена зависших и разбор смайненного nonce."""
+
+import pytest
+
+pytest.importorskip("web3")
+
+from web3.exceptions import TransactionNotFound  # noqa: E402
+
+if not isinstance(TransactionNotFound, type) or not issubclass(TransactionNotFound, Exception):
+    pytest.skip("web3 без исключений", allow_module_level=True)
+
+from wallet_sender.core import tx_tracker  # noqa: E402
+from wallet_sender.core.tx_journal import BROADCAST, FAILED, MINED, REPLACED  # noqa: E402
+from wallet_sender.core.tx_tracker import TxTracker  # noqa: E402
+
+SENDER = "0x" + "11" * 20
+RECIPIENT = "0x" + "22" * 20
+
+
+class _Eth:
+    chain_id = 56
+    gas_price = 1
+
+    def __init__(self):
+        self.block_number = 100
+        self.mined_nonce = 5
+        self.receipts = {}
+        self.sent = []
+        self.calls = 0
+
+    def get_transaction_count(self, address, block_identifier):
+        self.calls += 1
+        return self.mined_nonce
+
+    def get_transaction_receipt(self, tx_hash):
+        if tx_hash not in self.receipts:
+            raise TransactionNotFound(tx_hash)
+        return self.receipts[tx_hash]
+
+    def send_raw_transaction(self, raw):
+        self.sent.append(raw)
+        return _Hash("0x%064x" % len(self.sent))
+
+
+class _Hash(str):
+    def hex(self):
+        return str(self)
+
+
+class _Web3:
+    def __init__(self):
+        self.eth = _Eth()
+
+
+class _NonceManager:
+    def __init__(self):
+        self.calls = []
+
+    def confirm(self, ticket):
+        self.calls.append(('confirm', ticket))
+
+    def fail(self, ticket, reason):
+        self.calls.append(('fail', ticket, reason))
+
+    def replace(self, ticket, tx_hash, raw_tx=None):
+        self.calls.append(('replace', ticket, tx_hash))
+
+
+class _Journal:
+    def __init__(self):
+        self.events = []
+
+    def append(self, kind, tx_hash=None, **fields):
+        self.events.append((kind, tx_hash, fields))
+
+
+def _sign(tx):
+    return type('Signed', (), {'rawTransaction': tx})()
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    journal = _Journal()
+    monkeypatch.setattr(tx_tracker, 'get_tx_journal', lambda: journal)
+    tracker = TxTracker(_Web3(), nonce_manager=_NonceManager(), stuck_blocks=10, max_bumps=1)
+    tracker.journal = journal
+    tx = {'to': RECIPIENT, 'value': 1, 'gas': 21000, 'gasPrice': 100, 'nonce': 5, 'chainId': 56}
+    tracker.track(tx, '0xorig', SENDER, _sign, ticket='ticket')
+    return tracker
+
+
+def test_track_makes_no_rpc_and_uses_first_check_block(tracker):
+    eth = tracker.web3.eth
+    assert eth.calls == 0
+    tracker.check_once()
+    assert tracker.get_inflight()[0].sent_block == 100 and eth.sent == []
+
+
+def test_stuck_tx_is_bumped_then_cancelled(tracker):
+    eth = tracker.web3.eth
+    tracker.check_once()
+
+    eth.block_number = 110
+    tracker.check_once()
+    bumped = eth.sent[-1]
+    assert bumped['gasPrice'] == 113 and bumped['to'] == RECIPIENT and bumped['nonce'] == 5
+    assert tracker.nonce_manager.calls == [('replace', 'ticket', "0x%064x" % 1)]
+
+    # max_bumps исчерпан: замена 0-value переводом самому себе
+    eth.block_number = 120
+    tracker.check_once()
+    cancel = eth.sent[-1]
+    assert cancel['to'] == SENDER and cancel['value'] == 0 and cancel['gasPrice'] == 128
+    assert tracker.get_inflight()[0].cancelled
+    kinds = [event[0] for event in tracker.journal.events]
+    assert kinds == [REPLACED, BROADCAST, REPLACED, BROADCAST]
+
+
+def test_mined_original_confirms_ticket(tracker):
+    eth = tracker.web3.eth
+    eth.mined_nonce = 6
+    eth.receipts['0xorig'] = {'status': 1, 'gasUsed': 21000, 'blockNumber': 101}
+    tracker.check_once()
+
+    assert tracker.nonce_manager.calls == [('confirm', 'ticket')]
+    assert tracker.journal.events[0][:2] == (MINED, '0xorig')
+    assert tracker.journal.events[0][2]['status'] == 'success'
+    assert tracker.get_inflight() == []
+
+
+def test_mined_replacement_marks_original_replaced(tracker):
+    eth = tracker.web3.eth
+    tracker.check_once()
+    eth.block_number = 110
+    tracker.check_once()
+    replacement = tracker.get_inflight()[0].current_hash
+
+    eth.mined_nonce = 6
+    eth.receipts[replacement] = {'status': 1, 'gasUsed': 21000, 'blockNumber': 111}
+    tracker.journal.events.clear()
+    tracker.check_once()
+
+    assert tracker.journal.events == [
+        (MINED, replacement, {'status': 'success', 'gas_used': 21000, 'block_number': 111, 'nonce': 5}),
+        (REPLACED, '0xorig', {'replaced_by': replacement, 'nonce': 5}),
+    ]
+    assert tracker.nonce_manager.calls[-1] == ('confirm', 'ticket')
+
+
+def test_nonce_consumed_externally_fails_ticket(tracker):
+    dropped = []
+    tracker.register_callback('dropped', dropped.append)
+    tracker.web3.eth.mined_nonce = 6
+    tracker.check_once()
+
+    assert tracker.journal.events == [(FAILED, '0xorig', {'status': 'failed',
+                                                          'note': 'nonce consumed externally', 'nonce': 5})]
+    assert tracker.nonce_manager.calls == [('fail', 'ticket', 'nonce consumed externally')]
+    assert len(dropped) == 1 and tracker.get_inflight() == []